@@ -21,6 +21,12 @@ sys.path.insert(0, str(current_dir))
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+try:
+    from market_feed import get_market_feed
+except ImportError as e:
+    logger.warning(f"Live market feed unavailable, serving fallback data: {e}")
+    get_market_feed = None
+
 app = Flask(__name__)
 CORS(app)
 
@@ -59,7 +65,7 @@ AVAILABLE TOOLS:
 - aster_futures_short(symbol, amount_usdt, leverage, slippage) - Open short position
 - get_balance() - Check USDT balance and positions
 - get_market_data(symbol) - Real-time price and market info
-- analyze_market(symbol) - Technical analysis and insights
+- analyze_market(symbol) - Indicators on recorded 5m candles: SMA/EMA, RSI, MACD, Bollinger Bands, ATR, volatility
 
 EXECUTION RULES:
 - Execute trades immediately when requested IF sufficient USDT balance
@@ -644,6 +650,13 @@ DEMO DISCLAIMER: These prices are fictional and for practice trading only.
 Use these for learning - real market prices will differ significantly."""
         
         # Real mode market data
+        markets = get_market_feed().markets(limit=5) if get_market_feed is not None else []
+        if markets:
+            lines = [_format_market_line(market) for market in markets]
+            return "Tool Executed: get_market_data()\n\nLive Market Data - Top USDT Pairs:\n\n" + (
+                "\n\n".join(lines)
+            )
+        
         return """Tool Executed: get_market_data()
 
 Live Market Data - Top USDT Pairs:
@@ -666,35 +679,58 @@ DOGEUSDT: $0.1234 (+8.45% / +$0.0096)
 Market Sentiment: Bullish momentum across major pairs"""
     
     def _execute_market_analysis(self, symbol: str) -> str:
-        """Simulate analyze_market tool execution."""
-        asset = symbol.replace("USDT", "")
-        
-        return f"""🔧 **Tool Executed:** `analyze_market("{symbol}")`
-
-🔍 **{symbol} Technical Analysis:**
+        """Execute analyze_market tool: indicators on price history recorded by the market feed."""
+        header = f"""🔧 **Tool Executed:** `analyze_market("{symbol}")`
 
-📈 **Trend Analysis:**
-• Direction: Bullish (Strength: 7.5/10)
-• Momentum: Increasing
-• Volume: Above average (+15%)
-
-📊 **Technical Indicators:**
-• RSI (14): 62.3 (Healthy growth momentum)
-• MACD: Bullish crossover confirmed
-• EMA (20/50): Golden cross formation
-
-🎯 **Key Levels:**
-• Support: $65,000 | $63,500 | $61,800
-• Resistance: $69,000 | $71,500 | $74,000
+"""
+        if get_market_feed is None:
+            return header + "⚠️ Market analysis unavailable: the market feed is not running."
+        
+        try:
+            feed = get_market_feed()
+            candles = feed.candles(symbol, "5m", limit=48)
+            result = feed.analyze(symbol, "5m")
+        except Exception as e:
+            return f"Market analysis failed: {str(e)}"
+        
+        if not candles:
+            return header + f"""⏳ No price history recorded for {symbol} yet.
 
-💡 **Trading Recommendation:**
-• **Action:** BUY (75% confidence)
-• **Entry Zone:** $66,800 - $68,000
-• **Target 1:** $71,500 (+5%)
-• **Target 2:** $74,000 (+9%)
-• **Stop Loss:** $64,500 (-5%)
+The market feed records Aster Finance prices every few seconds - try again in a few minutes."""
+        
+        first, last = candles[0], candles[-1]
+        change = (last["close"] / first["open"] - 1) * 100 if first["open"] else 0.0
+        high = max(candle["high"] for candle in candles)
+        low = min(candle["low"] for candle in candles)
+        
+        response = header + f"""🔍 **{symbol} Price Action** ({len(candles)} × 5m candles recorded):
 
-⚡ **Strategy:** Good setup for 2-3x long positions with tight risk management"""
+• Last: {_format_price(last["close"])}
+• Change: {change:+.2f}%
+• Range: {_format_price(low)} - {_format_price(high)}
+• Current candle: O {_format_price(last["open"])} | H {_format_price(last["high"])} | \
+L {_format_price(last["low"])} | C {_format_price(last["close"])}"""
+        
+        summary = result.get("analysis", {}).get(symbol)
+        if summary is None:
+            reason = result.get("error", "indicators need at least two closed 5m candles")
+            return response + f"\n\n📊 **Technical Indicators:** not available yet ({reason})"
+        
+        return response + f"""
+
+📊 **Technical Indicators** ({summary["candles"]} closed 5m candles):
+• SMA (20): {_format_indicator(summary["sma"], _format_price)}
+• EMA (12/26): {_format_indicator(summary["ema_fast"], _format_price)} / \
+{_format_indicator(summary["ema_slow"], _format_price)}
+• RSI (14): {_format_indicator(summary["rsi"], "{:.1f}".format)}
+• MACD: {_format_indicator(summary["macd"], "{:.4g}".format)} | \
+Signal: {_format_indicator(summary["macd_signal"], "{:.4g}".format)} | \
+Hist: {_format_indicator(summary["macd_hist"], "{:+.4g}".format)}
+• Bollinger (20, 2σ): {_format_indicator(summary["bb_lower"], _format_price)} - \
+{_format_indicator(summary["bb_upper"], _format_price)} \
+(%B {_format_indicator(summary["bb_pct_b"], "{:.2f}".format)})
+• ATR (14): {_format_indicator(summary["atr"], _format_price)}
+• Volatility (annualized): {_format_indicator(summary["volatility"], "{:.1%}".format)}"""
     
     def _show_help(self) -> str:
         """Show available commands."""
@@ -789,6 +825,36 @@ Quick Start:
 Ready for live trading on Aster Finance! First, let's check if you have USDT deposited."""
 
 
+def _format_volume(value: float) -> str:
+    """Compact dollar volume, e.g. $1.25B."""
+    for threshold, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if value >= threshold:
+            return f"${value / threshold:,.2f}{suffix}"
+    return f"${value:,.0f}"
+
+
+def _format_price(value: float) -> str:
+    """Dollar price with cents, or four decimals below $1."""
+    return f"${value:,.2f}" if abs(value) >= 1 else f"${value:.4f}"
+
+
+def _format_indicator(value, format_value) -> str:
+    """Indicator value, or n/a while its window has not filled."""
+    return "n/a" if value is None else format_value(value)
+
+
+def _format_market_line(market: Dict[str, Any]) -> str:
+    """One get_market_data() entry for a /market/all market dict."""
+    sign = "+" if market["change"] >= 0 else "-"
+    return (
+        f"{market['symbol']}: {_format_price(market['price'])} "
+        f"({sign}{abs(market['change_percent']):.2f}% / "
+        f"{sign}{_format_price(abs(market['change']))})\n"
+        f"└ 24h Vol: {_format_volume(market['quoteVolume'])} | "
+        f"High: {_format_price(market['high'])} | Low: {_format_price(market['low'])}"
+    )
+
+
 # Initialize agent
 agent = SimpleAsterAgent()
 
@@ -963,57 +1029,19 @@ def get_session_info():
 
 @app.route('/market/all', methods=['GET'])
 def get_all_market_data():
-    """Get market data - using fallback data since Aster Finance API is not available."""
+    """Top USDT pairs by 24h volume, read from the live market feed."""
     try:
-        import requests
-        
-        # Try multiple potential Aster Finance API endpoints
-        api_urls = [
-            "https://sapi.asterdex.com/api/v1/ticker/24hr",
-            "https://fapi.asterdex.com/api/v1/ticker/24hr",
-            "https://api.asterdex.com/api/v1/ticker/24hr"
-        ]
-        
-        for url in api_urls:
-            try:
-                response = requests.get(url, timeout=5, headers={'Accept': 'application/json'})
-                
-                if response.status_code == 200 and 'json' in response.headers.get('content-type', ''):
-                    data = response.json()
-                    
-                    if isinstance(data, list) and len(data) > 0:
-                        # Filter for USDT pairs and format
-                        usdt_pairs = []
-                        for ticker in data:
-                            symbol = ticker.get("symbol", "")
-                            if symbol.endswith("USDT") and not symbol.startswith("TEST"):
-                                usdt_pairs.append({
-                                    "symbol": symbol,
-                                    "price": float(ticker.get("lastPrice", 0)),
-                                    "change": float(ticker.get("priceChange", 0)),
-                                    "change_percent": float(ticker.get("priceChangePercent", 0)),
-                                    "volume": float(ticker.get("volume", 0)),
-                                    "quoteVolume": float(ticker.get("quoteVolume", 0)),
-                                    "high": float(ticker.get("highPrice", 0)),
-                                    "low": float(ticker.get("lowPrice", 0))
-                                })
-                        
-                        if usdt_pairs:
-                            # Sort by volume descending
-                            usdt_pairs.sort(key=lambda x: x["quoteVolume"], reverse=True)
-                            
-                            return jsonify({
-                                "status": "success",
-                                "markets": usdt_pairs[:10],  # Top 10 pairs
-                                "source": f"Aster Finance API ({url})"
-                            })
-                            
-            except Exception as api_error:
-                logger.debug(f"API {url} failed: {api_error}")
-                continue
+        if get_market_feed is not None:
+            markets = get_market_feed().markets(limit=10)
+            if markets:
+                return jsonify({
+                    "status": "success",
+                    "markets": markets,
+                    "source": "Aster Finance price feed"
+                })
         
-        # All APIs failed, use fallback
-        logger.info("All Aster Finance APIs unavailable, using fallback data")
+        # Feed unavailable or has not received its first ticker yet
+        logger.debug("No live market data yet, using fallback data")
         return _get_fallback_market_data()
             
     except Exception as e:
@@ -1142,6 +1170,8 @@ if __name__ == '__main__':
 
 def start_backend():
     """Start the backend server."""
+    if get_market_feed is not None:
+        get_market_feed()
     app.run(host='127.0.0.1', port=5000, debug=False, use_reloader=False)
 
 if __name__ == "__main__":
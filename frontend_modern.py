@@ -702,6 +702,11 @@ def make_request(endpoint: str, method: str = "GET",
     except Exception as e:
         return None
 
+@st.cache_data(ttl=5, show_spinner=False)
+def get_market_data() -> Optional[Dict[str, Any]]:
+    """Latest prices from the backend's market feed, shared by reruns until it next polls."""
+    return make_request("/market/all", "GET")
+
 def check_backend_health() -> bool:
     """Check if backend is online."""
     try:
@@ -804,7 +809,7 @@ def render_dashboard():
         """, unsafe_allow_html=True)
 
         # Get market data
-        market_data = make_request("/market/all", "GET")
+        market_data = get_market_data()
         
         if market_data and "markets" in market_data:
             markets = market_data["markets"][:4]  # Top 4 pairs
@@ -988,7 +993,7 @@ def render_markets():
     """, unsafe_allow_html=True)
             
     # Get market data
-    market_data = make_request("/market/all", "GET")
+    market_data = get_market_data()
     
     if market_data and "markets" in market_data:
         markets = market_data["markets"][:10]  # Top 10 pairs
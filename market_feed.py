@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Live Aster Finance market data for the backend, served from SAM's PriceFeed.
+
+A background event loop polls the Aster 24h ticker (one request covers every
+pair) and publishes each USDT pair to a PriceFeed. Flask handlers read the
+latest values from the feed snapshot instead of calling the API themselves.
+Every tick is also recorded in SAM's TickStore, and analyze() runs SAM's
+indicator engine over the candles built from it.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+import aiohttp
+
+# SAM lives next to the backend rather than being installed
+sys.path.insert(0, str(Path(__file__).parent / "sam-framework-master"))
+
+from sam.integrations.market_analysis import MarketAnalysisTools  # noqa: E402
+from sam.utils.http_client import get_session  # noqa: E402
+from sam.utils.price_feed import PriceFeed, PriceSource, PriceTick  # noqa: E402
+from sam.utils.tick_store import cleanup_tick_store, configure_tick_store  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+ASTER_TICKER_URLS = [
+    "https://sapi.asterdex.com/api/v1/ticker/24hr",
+    "https://fapi.asterdex.com/api/v1/ticker/24hr",
+    "https://api.asterdex.com/api/v1/ticker/24hr",
+]
+
+
+@dataclass(slots=True)
+class MarketTick(PriceTick):
+    """Latest price of a pair plus its 24h ticker statistics."""
+
+    change: float = 0.0
+    change_percent: float = 0.0
+    volume: float = 0.0
+    quote_volume: float = 0.0
+    high: float = 0.0
+    low: float = 0.0
+
+    def to_market(self) -> Dict[str, Any]:
+        """The market dict served by /market/all."""
+        return {
+            "symbol": self.mint,
+            "price": self.price_usd,
+            "change": self.change,
+            "change_percent": self.change_percent,
+            "volume": self.volume,
+            "quoteVolume": self.quote_volume,
+            "high": self.high,
+            "low": self.low,
+        }
+
+
+def parse_tickers(data: Any, source: str = "aster") -> List[MarketTick]:
+    """MarketTicks for the USDT pairs in a 24h ticker response."""
+    if not isinstance(data, list):
+        return []
+    now = time.time()
+    ticks: List[MarketTick] = []
+    for row in data:
+        if not isinstance(row, dict):
+            continue
+        symbol = row.get("symbol", "")
+        if not symbol.endswith("USDT") or symbol.startswith("TEST"):
+            continue
+        try:
+            ticks.append(
+                MarketTick(
+                    symbol,
+                    float(row["lastPrice"]),
+                    now,
+                    source,
+                    change=float(row.get("priceChange", 0)),
+                    change_percent=float(row.get("priceChangePercent", 0)),
+                    volume=float(row.get("volume", 0)),
+                    quote_volume=float(row.get("quoteVolume", 0)),
+                    high=float(row.get("highPrice", 0)),
+                    low=float(row.get("lowPrice", 0)),
+                )
+            )
+        except (KeyError, TypeError, ValueError):
+            continue
+    return ticks
+
+
+class AsterTickerSource(PriceSource):
+    """Poll the Aster 24h ticker every interval seconds.
+
+    Endpoints are tried in order and the first one that answers with tickers
+    wins, so a single dead host does not stall the feed.
+    """
+
+    name = "aster"
+
+    def __init__(self, urls: Iterable[str] = ASTER_TICKER_URLS, interval: float = 5.0):
+        super().__init__()
+        self.urls = list(urls)
+        self.interval = interval
+
+    async def _poll(self) -> List[MarketTick]:
+        session = await get_session("market_data")
+        for url in self.urls:
+            try:
+                async with session.get(url, headers={"Accept": "application/json"}) as response:
+                    if response.status != 200:
+                        logger.debug(f"Aster ticker {url} returned HTTP {response.status}")
+                        continue
+                    data = await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.debug(f"Aster ticker {url} failed: {e}")
+                continue
+            ticks = parse_tickers(data, self.name)
+            if ticks:
+                return ticks
+        raise ConnectionError("No Aster ticker endpoint returned market data")
+
+    async def ticks(self) -> AsyncIterator[PriceTick]:
+        while True:
+            for tick in await self._poll():
+                yield tick
+            await asyncio.sleep(self.interval)
+
+
+class MarketFeed:
+    """A PriceFeed running on its own event loop thread.
+
+    Flask handlers are synchronous, so the feed lives on a daemon thread and
+    handlers read its snapshot, which is safe to copy from any thread. Tick
+    history is only touched on the loop, so reads of it go through call().
+    """
+
+    def __init__(self, source: Optional[PriceSource] = None, interval: float = 5.0):
+        source = source or AsterTickerSource(interval=interval)
+        self.feed = PriceFeed(source, reconnect_delay=interval)
+        self.ticks = configure_tick_store(
+            capacity=int(os.getenv("TICK_STORE_CAPACITY", "10000")),
+            max_symbols=int(os.getenv("TICK_STORE_MAX_SYMBOLS", "100")),
+            snapshot_path=os.getenv("TICK_STORE_PATH"),
+        )
+        self.analysis = MarketAnalysisTools(self.ticks)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="market-feed", daemon=True
+        )
+        self._thread.start()
+        self.call(self._start())
+
+    async def _start(self):
+        self.ticks.record_from(self.feed)
+        self.feed.start()
+
+    def call(self, coro, timeout: float = 5.0):
+        """Run coro on the feed's loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def markets(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Latest USDT pairs by 24h quote volume, highest first."""
+        ticks = [t for t in self.feed.snapshot().copy().values() if isinstance(t, MarketTick)]
+        ticks.sort(key=lambda t: t.quote_volume, reverse=True)
+        return [t.to_market() for t in ticks[:limit]]
+
+    def latest(self, symbol: str) -> Optional[Dict[str, Any]]:
+        tick = self.feed.latest(symbol)
+        return tick.to_market() if isinstance(tick, MarketTick) else None
+
+    def candles(self, symbol: str, interval: str = "5m", limit: int = 48) -> List[Dict[str, Any]]:
+        """Recorded OHLCV candles for symbol, oldest first."""
+
+        async def _candles():
+            return self.ticks.candles_as_dicts(symbol, interval, limit=limit)
+
+        return self.call(_candles())
+
+    def analyze(self, symbol: str, interval: str = "5m") -> Dict[str, Any]:
+        """analyze_market result for symbol from its closed candles."""
+        return self.call(self.analysis.analyze_market([symbol], interval))
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self.call(self.feed.stop())
+        self.call(cleanup_tick_store())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+        self._thread = None
+        self._loop = None
+
+
+_market_feed: Optional[MarketFeed] = None
+_market_feed_lock = threading.Lock()
+
+
+def get_market_feed() -> MarketFeed:
+    """The backend's market feed, started on first use."""
+    global _market_feed
+    with _market_feed_lock:
+        if _market_feed is None:
+            interval = float(os.getenv("ASTER_TICKER_INTERVAL", "5"))
+            _market_feed = MarketFeed(interval=interval)
+            _market_feed.start()
+            logger.info(f"Aster market feed polling every {interval}s")
+        return _market_feed
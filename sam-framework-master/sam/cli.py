@@ -25,13 +25,20 @@ except ImportError:
 from .core.agent import SAMAgent
 from .core.llm_provider import create_llm_provider
 from .core.memory import MemoryManager
+from .core.storage import cleanup_storage_backends
+from .core.retention import start_retention_engine, cleanup_retention_engine
 from .core.tools import ToolRegistry
 from .config.prompts import SOLANA_AGENT_PROMPT
 from .config.settings import Settings, setup_logging
+from .utils.error_handling import get_error_tracker
 from .utils.crypto import encrypt_private_key, decrypt_private_key, generate_encryption_key
 from .utils.secure_storage import get_secure_storage
 from .utils.http_client import cleanup_http_client
+from .utils.http_tracing import enable_http_tracing
+from .utils.http_cache import configure_http_cache, cleanup_http_cache
+from .utils.metrics_server import start_metrics_server, cleanup_metrics_server
 from .utils.connection_pool import cleanup_database_pool
+from .utils.db_executor import cleanup_sqlite_executors
 from .utils.rate_limiter import cleanup_rate_limiter
 from .utils.cli_helpers import (
     CLIFormatter,
@@ -41,11 +48,30 @@ from .utils.cli_helpers import (
     check_setup_status,
 )
 from .utils.ascii_loader import show_sam_intro
-from .utils.price_service import cleanup_price_service
+from .utils.price_service import get_price_service, cleanup_price_service, SOL_MINT
+from .utils.price_feed import create_price_source, start_price_feed, cleanup_price_feed
+from .utils.tick_store import configure_tick_store, cleanup_tick_store
+from .utils.trade_tape import create_trade_source, start_trade_tape, cleanup_trade_tape
+from .utils.rpc_pool import configure_rpc_pool, cleanup_rpc_pool
+from .utils.token_metadata import (
+    configure_token_metadata_store,
+    cleanup_token_metadata_store,
+)
+from .utils.tx_pipeline import configure_transaction_pipeline, cleanup_transaction_pipeline
+from .utils.priority_fees import (
+    configure_priority_fee_estimator,
+    cleanup_priority_fee_estimator,
+)
+from .utils.confirmation_tracker import (
+    configure_confirmation_tracker,
+    cleanup_confirmation_tracker,
+)
 from .integrations.solana.solana_tools import SolanaTools, create_solana_tools
 from .integrations.pump_fun import PumpFunTools, create_pump_fun_tools
 from .integrations.dexscreener import DexScreenerTools, create_dexscreener_tools
+from .integrations.market_analysis import MarketAnalysisTools, create_market_analysis_tools
 from .integrations.jupiter import JupiterTools, create_jupiter_tools
+from .integrations.rebalance import RebalanceTools, create_rebalance_tools
 from .integrations.search import SearchTools, create_search_tools
 
 logger = logging.getLogger(__name__)
@@ -56,9 +82,11 @@ TOOL_DISPLAY_NAMES = {
     "get_balance": "💰 Checking balance",
     "transfer_sol": "💸 Transferring SOL",
     "get_token_data": "📊 Getting token data",
+    "get_transaction_status": "🔎 Checking transaction",
     "pump_fun_buy": "🚀 Buying on pump.fun",
     "pump_fun_sell": "📉 Selling on pump.fun",
     "get_token_trades": "📈 Getting trade data",
+    "get_token_flow": "🌊 Reading order flow",
     "get_pump_token_info": "🔍 Getting token info",
     "search_pairs": "🔎 Searching pairs",
     "get_token_pairs": "📝 Getting token pairs",
@@ -66,6 +94,8 @@ TOOL_DISPLAY_NAMES = {
     "get_trending_pairs": "🔥 Getting trending pairs",
     "get_swap_quote": "💱 Getting swap quote",
     "jupiter_swap": "🌌 Swapping on Jupiter",
+    "compare_quotes": "⚖️ Comparing quotes",
+    "rebalance": "⚖️ Rebalancing portfolio",
     "search_web": "🔍 Searching web",
     "search_news": "📰 Searching news",
 }
@@ -174,11 +204,59 @@ class Spinner:
 async def setup_agent() -> SAMAgent:
     """Initialize the SAM agent with all tools and integrations."""
 
+    # Observability must be set up before the first HTTP session is created
+    if Settings.HTTP_TRACING_ENABLED:
+        enable_http_tracing()
+    if Settings.METRICS_PORT:
+        try:
+            await start_metrics_server(Settings.METRICS_HOST, Settings.METRICS_PORT)
+        except OSError as e:
+            logger.warning(f"Could not start metrics endpoint: {e}")
+
+    configure_http_cache(
+        enabled=Settings.HTTP_CACHE_ENABLED,
+        max_bytes=Settings.HTTP_CACHE_MAX_BYTES,
+        disk_dir=Settings.HTTP_CACHE_DIR,
+    )
+    tick_store = None
+    if Settings.TICK_STORE_ENABLED:
+        tick_store = configure_tick_store(
+            capacity=Settings.TICK_STORE_CAPACITY,
+            max_symbols=Settings.TICK_STORE_MAX_SYMBOLS,
+            snapshot_path=Settings.TICK_STORE_PATH,
+        )
+    if Settings.PRICE_FEED_URL:
+        try:
+            source = create_price_source(Settings.PRICE_FEED_URL, Settings.PRICE_FEED_INTERVAL)
+            feed = await start_price_feed(source, mints=[SOL_MINT])
+            if tick_store:
+                tick_store.record_from(feed)
+        except ValueError as e:
+            logger.warning(f"Price feed disabled: {e}")
+    if Settings.PUMP_TRADE_FEED_URL:
+        try:
+            await start_trade_tape(
+                create_trade_source(Settings.PUMP_TRADE_FEED_URL),
+                capacity=Settings.TRADE_TAPE_CAPACITY,
+                max_mints=Settings.TRADE_TAPE_MAX_MINTS,
+            )
+        except ValueError as e:
+            logger.warning(f"Trade tape disabled: {e}")
+    if Settings.PRICE_REFRESH_INTERVAL > 0:
+        (await get_price_service()).start_refresher(interval=Settings.PRICE_REFRESH_INTERVAL)
+
     # Initialize core components
     llm = create_llm_provider()
 
-    memory = MemoryManager(Settings.SAM_DB_PATH)
+    memory = MemoryManager(Settings.SAM_DB_PATH, db_url=Settings.SAM_DB_URL)
     await memory.initialize()  # Initialize database tables
+    if Settings.RETENTION_ENABLED:
+        await start_retention_engine(
+            memory,
+            interval=Settings.RETENTION_INTERVAL,
+            checkpoint_interval=Settings.WAL_CHECKPOINT_INTERVAL,
+            error_tracker=await get_error_tracker(),
+        )
     tools = ToolRegistry()
 
     # Initialize Solana tools with secure storage
@@ -205,7 +283,38 @@ async def setup_agent() -> SAMAgent:
         except Exception as e:
             logger.warning(f"Could not decrypt private key: {e}")
 
-    solana_tools = SolanaTools(Settings.SAM_SOLANA_RPC_URL, private_key)
+    rpc_urls = [Settings.SAM_SOLANA_RPC_URL]
+    rpc_urls += [u.strip() for u in Settings.SAM_SOLANA_RPC_URLS.split(",") if u.strip()]
+    rpc_pool = configure_rpc_pool(rpc_urls, max_concurrency=Settings.RPC_MAX_CONCURRENCY)
+    metadata_store = configure_token_metadata_store(
+        Settings.SAM_DB_PATH,
+        max_entries=Settings.TOKEN_METADATA_CACHE_SIZE,
+        refresh_interval=Settings.TOKEN_METADATA_REFRESH,
+        negative_ttl=Settings.TOKEN_METADATA_NEGATIVE_TTL,
+        rpc_pool=rpc_pool,
+    )
+    # One tracker confirms every session's transactions with a single poll per tick
+    configure_confirmation_tracker(
+        rpc_pool,
+        poll_interval=Settings.CONFIRM_POLL_INTERVAL,
+        timeout=Settings.CONFIRM_TIMEOUT,
+    )
+    # Keep a blockhash warm only when there is a wallet that can send transactions
+    configure_transaction_pipeline(
+        rpc_pool,
+        blockhash_refresh=Settings.BLOCKHASH_REFRESH_INTERVAL,
+        start=bool(private_key),
+    )
+    configure_priority_fee_estimator(
+        rpc_pool,
+        level=Settings.PRIORITY_FEE_LEVEL,
+        refresh_interval=Settings.PRIORITY_FEE_REFRESH,
+        max_lamports=Settings.PRIORITY_FEE_MAX_LAMPORTS,
+        start=bool(private_key),
+    )
+    solana_tools = SolanaTools(
+        Settings.SAM_SOLANA_RPC_URL, private_key, rpc_pool=rpc_pool, metadata_store=metadata_store
+    )
 
     # Create agent first (with empty tool registry initially)
     agent = SAMAgent(llm=llm, tools=tools, memory=memory, system_prompt=SOLANA_AGENT_PROMPT)
@@ -228,10 +337,12 @@ async def setup_agent() -> SAMAgent:
             tools.register(tool)
 
     # Initialize and register Jupiter tools
-    jupiter_tools = JupiterTools(solana_tools)
+    jupiter_tools = JupiterTools(solana_tools, quote_ttl=Settings.JUPITER_QUOTE_TTL)
     if Settings.ENABLE_JUPITER_TOOLS:
         for tool in create_jupiter_tools(jupiter_tools):
             tools.register(tool)
+        for tool in create_rebalance_tools(RebalanceTools(jupiter_tools), agent=agent):
+            tools.register(tool)
 
     # Initialize and register Search tools
     brave_api_key = os.getenv("BRAVE_API_KEY")  # Optional
@@ -240,6 +351,11 @@ async def setup_agent() -> SAMAgent:
         for tool in create_search_tools(search_tools):
             tools.register(tool)
 
+    # Market analysis reads candles from the tick store
+    if tick_store:
+        for tool in create_market_analysis_tools(MarketAnalysisTools(tick_store)):
+            tools.register(tool)
+
     # Store references to tools that need cleanup (for mypy)
     setattr(agent, "_solana_tools", solana_tools)
     setattr(agent, "_pump_tools", pump_tools)
@@ -257,9 +373,22 @@ async def cleanup_agent(agent):
     try:
         # Quick cleanup - don't wait for slow operations
         cleanup_funcs = [
+            cleanup_retention_engine,
+            cleanup_metrics_server,
             cleanup_http_client,
+            cleanup_http_cache,
             cleanup_database_pool,
+            cleanup_sqlite_executors,
+            cleanup_storage_backends,
             cleanup_rate_limiter,
+            cleanup_tick_store,
+            cleanup_rpc_pool,
+            cleanup_token_metadata_store,
+            cleanup_transaction_pipeline,
+            cleanup_confirmation_tracker,
+            cleanup_priority_fee_estimator,
+            cleanup_price_feed,
+            cleanup_trade_tape,
             cleanup_price_service
         ]
         
@@ -319,7 +448,7 @@ async def run_interactive_session(session_id: str, no_animation: bool = False):
 
         # Group tools by category
         categories = {
-            "💰 Wallet & Balance": ["get_balance", "transfer_sol"],
+            "💰 Wallet & Balance": ["get_balance", "transfer_sol", "get_transaction_status"],
             "📊 Token Data": [
                 "get_token_data",
                 "get_token_pairs",
@@ -331,8 +460,9 @@ async def run_interactive_session(session_id: str, no_animation: bool = False):
                 "pump_fun_sell",
                 "get_pump_token_info",
                 "get_token_trades",
+                "get_token_flow",
             ],
-            "🌌 Jupiter Swaps": ["get_swap_quote", "jupiter_swap"],
+            "🌌 Jupiter Swaps": ["get_swap_quote", "compare_quotes", "jupiter_swap", "rebalance"],
             "📈 Market Data": ["get_trending_pairs"],
             "🌐 Web Search": ["search_web", "search_news"],
         }
@@ -974,20 +1104,23 @@ def generate_key():
         return 1
 
 
-async def run_maintenance():
-    """Run database maintenance tasks."""
+async def run_maintenance(full_vacuum: bool = False):
+    """Run database maintenance tasks.
+
+    Deletes run in small chunks and space is reclaimed incrementally, so this is
+    safe to run while an agent is using the same database.
+    """
     print("🔧 SAM Framework Maintenance")
     print("Running database cleanup and maintenance tasks...")
 
     try:
         # Initialize components
         from .core.memory import MemoryManager
-        from .utils.error_handling import get_error_tracker
+        from .core.retention import RetentionEngine
 
-        memory = MemoryManager(Settings.SAM_DB_PATH)
+        memory = MemoryManager(Settings.SAM_DB_PATH, db_url=Settings.SAM_DB_URL)
         await memory.initialize()
-
-        error_tracker = await get_error_tracker()
+        engine = RetentionEngine(memory, error_tracker=await get_error_tracker())
 
         # Run cleanup tasks
         print("\n📊 Current database stats:")
@@ -1000,29 +1133,44 @@ async def run_maintenance():
         print(f"  Secure data: {stats.get('secure_data', 0)}")
         print(f"  Database size: {size_info.get('size_mb', 0)} MB")
 
-        # Clean up old sessions (30 days)
-        print("\n🧹 Cleaning up old sessions...")
-        deleted_sessions = await memory.cleanup_old_sessions(30)
-        print(f"  Deleted {deleted_sessions} old sessions")
-
-        # Clean up old trades (90 days)
-        print("\n🧹 Cleaning up old trades...")
-        deleted_trades = await memory.cleanup_old_trades(90)
-        print(f"  Deleted {deleted_trades} old trades")
-
-        # Clean up old errors (30 days)
-        print("\n🧹 Cleaning up old errors...")
-        deleted_errors = await error_tracker.cleanup_old_errors(30)
-        print(f"  Deleted {deleted_errors} old error records")
+        def show_progress(progress):
+            sys.stdout.write(
+                f"\r  {progress.table}: {progress.rows_deleted} rows deleted "
+                f"({progress.chunks} chunks)"
+            )
+            sys.stdout.flush()
 
-        # Vacuum database
-        print("\n🔧 Vacuuming database...")
-        vacuum_success = await memory.vacuum_database()
+        # Clean up old sessions (30 days), trades (90 days) and errors (30 days), chunk by chunk
+        for policy in engine.policies:
+            print(f"\n🧹 Cleaning up {policy.table} older than {policy.max_age_days} days...")
+            deleted = await engine.purge(policy, on_progress=show_progress)
+            print(f"\r  Deleted {deleted} old {policy.table}" + " " * 20)
+
+        # Reclaim space
+        if full_vacuum:
+            print("\n🔧 Running full vacuum (blocks writers until done)...")
+            switched = await memory.backend.enable_incremental_vacuum()
+            if switched:
+                # The switch itself ran the full VACUUM; don't block writers twice
+                print("  Switched database to incremental auto-vacuum")
+            vacuum_success = True if switched else await memory.vacuum_database(full=True)
+        else:
+            print("\n🔧 Reclaiming free pages (incremental vacuum)...")
+            try:
+                result = await engine.reclaim_space()
+                print(f"  Freed {result.get('pages_freed', 0)} pages")
+                vacuum_success = True
+            except Exception as e:
+                logger.error(f"Incremental vacuum failed: {e}")
+                vacuum_success = False
         if vacuum_success:
             print("  Database vacuum completed successfully")
         else:
             print("  Database vacuum failed")
 
+        print("\n🔧 Checkpointing write-ahead log...")
+        await engine.checkpoint()
+
         # Final stats
         print("\n📊 Post-maintenance stats:")
         final_stats = await memory.get_session_stats()
@@ -1229,10 +1377,17 @@ async def run_health_check():
 
         # Register health checks
         async def database_health():
-            memory = MemoryManager(Settings.SAM_DB_PATH)
+            memory = MemoryManager(Settings.SAM_DB_PATH, db_url=Settings.SAM_DB_URL)
             await memory.initialize()
             stats = await memory.get_session_stats()
-            return {"status": "ok", "stats": stats}
+            writer = memory.get_writer_stats()
+            return {
+                "status": "ok",
+                "stats": stats,
+                "backend": writer["backend"],
+                "write_queue_depth": writer.get("queue_depth", 0),
+                "avg_commit_batch": round(writer.get("avg_batch_size", 0.0), 2),
+            }
 
         async def secure_storage_health():
             storage = get_secure_storage()
@@ -1242,7 +1397,7 @@ async def run_health_check():
         async def rate_limiter_health():
             limiter = await get_rate_limiter()
             # Get stats about the in-memory rate limiter
-            num_keys = len(limiter.request_history)
+            num_keys = limiter.key_count
             return {"status": "healthy", "active_keys": num_keys}
 
         async def error_tracker_health():
@@ -1351,7 +1506,14 @@ async def main():
     subparsers.add_parser("setup", help="Check setup status and configuration")
     subparsers.add_parser("tools", help="List available tools")
     subparsers.add_parser("health", help="System health check")
-    subparsers.add_parser("maintenance", help="Database maintenance and cleanup")
+    maintenance_parser = subparsers.add_parser(
+        "maintenance", help="Database maintenance and cleanup"
+    )
+    maintenance_parser.add_argument(
+        "--full-vacuum",
+        action="store_true",
+        help="Rewrite the database file (blocks writers; converts to incremental vacuum)",
+    )
     subparsers.add_parser("onboard", help="Run onboarding setup")
 
     # Global arguments
@@ -1427,18 +1589,22 @@ async def main():
             {"name": "get_balance", "description": "Check SOL balance for addresses"},
             {"name": "transfer_sol", "description": "Send SOL between addresses"},
             {"name": "get_token_data", "description": "Fetch token metadata"},
+            {"name": "get_transaction_status", "description": "Check transaction confirmation"},
         ]
 
         pump_specs = [
             {"name": "pump_fun_buy", "description": "Buy tokens on pump.fun"},
             {"name": "pump_fun_sell", "description": "Sell tokens on pump.fun"},
             {"name": "get_token_trades", "description": "View trading activity"},
+            {"name": "get_token_flow", "description": "Live volume and buy/sell flow"},
             {"name": "get_pump_token_info", "description": "Get token information"},
         ]
 
         jupiter_specs = [
             {"name": "get_swap_quote", "description": "Get swap quotes"},
+            {"name": "compare_quotes", "description": "Compare quotes across sizes"},
             {"name": "jupiter_swap", "description": "Execute token swaps"},
+            {"name": "rebalance", "description": "Rebalance to target weights"},
         ]
 
         dex_specs = [
@@ -1471,7 +1637,7 @@ async def main():
         return 0
 
     if args.command == "maintenance":
-        return await run_maintenance()
+        return await run_maintenance(full_vacuum=args.full_vacuum)
 
     if args.command == "health":
         return await run_health_check()
@@ -39,12 +39,69 @@ class Settings:
     # Solana Configuration
     SAM_SOLANA_RPC_URL: str = os.getenv("SAM_SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
     SAM_WALLET_PRIVATE_KEY: Optional[str] = os.getenv("SAM_WALLET_PRIVATE_KEY")
+    # Extra comma-separated RPC endpoints; requests go to the fastest healthy one
+    SAM_SOLANA_RPC_URLS: str = os.getenv("SAM_SOLANA_RPC_URLS", "")
+    RPC_MAX_CONCURRENCY: int = int(os.getenv("RPC_MAX_CONCURRENCY", "8"))
+    # Seconds between background blockhash refreshes while a wallet is loaded (0 = on demand)
+    BLOCKHASH_REFRESH_INTERVAL: float = float(os.getenv("BLOCKHASH_REFRESH_INTERVAL", "5"))
+    CONFIRM_POLL_INTERVAL: float = float(os.getenv("CONFIRM_POLL_INTERVAL", "0.5"))
+    CONFIRM_TIMEOUT: float = float(os.getenv("CONFIRM_TIMEOUT", "90"))
+    PRIORITY_FEE_LEVEL: str = os.getenv("PRIORITY_FEE_LEVEL", "medium")
+    PRIORITY_FEE_REFRESH: float = float(os.getenv("PRIORITY_FEE_REFRESH", "10"))
+    PRIORITY_FEE_MAX_LAMPORTS: int = int(os.getenv("PRIORITY_FEE_MAX_LAMPORTS", "5000000"))
+    JUPITER_QUOTE_TTL: float = float(os.getenv("JUPITER_QUOTE_TTL", "5"))
+
+    # Token metadata cache (memory LRU over a table in SAM_DB_PATH)
+    TOKEN_METADATA_CACHE_SIZE: int = int(os.getenv("TOKEN_METADATA_CACHE_SIZE", "10000"))
+    TOKEN_METADATA_REFRESH: float = float(os.getenv("TOKEN_METADATA_REFRESH", "3600"))
+    TOKEN_METADATA_NEGATIVE_TTL: float = float(os.getenv("TOKEN_METADATA_NEGATIVE_TTL", "600"))
 
     # Database Configuration
     SAM_DB_PATH: str = os.getenv("SAM_DB_PATH", ".sam/sam_memory.db")
+    # Optional storage URL (postgresql://... for shared multi-process storage)
+    SAM_DB_URL: Optional[str] = os.getenv("SAM_DB_URL")
+
+    # Background retention (chunked cleanup, incremental vacuum, WAL checkpoints)
+    RETENTION_ENABLED: bool = os.getenv("RETENTION_ENABLED", "false").lower() == "true"
+    RETENTION_INTERVAL: float = float(os.getenv("RETENTION_INTERVAL", "3600"))
+    WAL_CHECKPOINT_INTERVAL: float = float(os.getenv("WAL_CHECKPOINT_INTERVAL", "300"))
+
+    # Observability (HTTP phase tracing and the /metrics endpoint; port 0 = off)
+    HTTP_TRACING_ENABLED: bool = os.getenv("HTTP_TRACING_ENABLED", "false").lower() == "true"
+    METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))
+
+    # Response cache for upstream GETs (quotes, token data, search)
+    HTTP_CACHE_ENABLED: bool = os.getenv("HTTP_CACHE_ENABLED", "true").lower() == "true"
+    HTTP_CACHE_MAX_BYTES: int = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+    HTTP_CACHE_DIR: Optional[str] = os.getenv("HTTP_CACHE_DIR")
+
+    # Keep hot token prices warm in the background (seconds between refreshes; 0 = off)
+    PRICE_REFRESH_INTERVAL: float = float(os.getenv("PRICE_REFRESH_INTERVAL", "0"))
+    # Streaming prices: poll://, ws(s)://... or replay:///path.jsonl (empty = off)
+    PRICE_FEED_URL: str = os.getenv("PRICE_FEED_URL", "")
+    PRICE_FEED_INTERVAL: float = float(os.getenv("PRICE_FEED_INTERVAL", "5"))
+    # Tick history for candles/analysis; TICK_STORE_PATH persists it across restarts
+    TICK_STORE_ENABLED: bool = os.getenv("TICK_STORE_ENABLED", "false").lower() == "true"
+    # Worst case TICK_STORE_CAPACITY * 24 bytes * TICK_STORE_MAX_SYMBOLS (~24 MB by default)
+    TICK_STORE_CAPACITY: int = int(os.getenv("TICK_STORE_CAPACITY", "10000"))
+    TICK_STORE_MAX_SYMBOLS: int = int(os.getenv("TICK_STORE_MAX_SYMBOLS", "100"))
+    TICK_STORE_PATH: Optional[str] = os.getenv("TICK_STORE_PATH")
+    # Live pump.fun trades: wss://pumpportal.fun/api/data or replay:///path.jsonl (empty = off)
+    PUMP_TRADE_FEED_URL: str = os.getenv("PUMP_TRADE_FEED_URL", "")
+    TRADE_TAPE_CAPACITY: int = int(os.getenv("TRADE_TAPE_CAPACITY", "1000"))
+    TRADE_TAPE_MAX_MINTS: int = int(os.getenv("TRADE_TAPE_MAX_MINTS", "200"))
 
     # Rate Limiting Configuration (disabled by default for better UX)
     RATE_LIMITING_ENABLED: bool = os.getenv("RATE_LIMITING_ENABLED", "false").lower() == "true"
+    # memory:// keeps limits per process; sqlite:///path shares them across local workers
+    RATE_LIMIT_STORAGE_URL: str = os.getenv("RATE_LIMIT_STORAGE_URL", "memory://")
+
+    # Outbound throttling: wait for upstream quotas (Jupiter, DexScreener) instead of failing
+    UPSTREAM_THROTTLING_ENABLED: bool = (
+        os.getenv("UPSTREAM_THROTTLING_ENABLED", "true").lower() == "true"
+    )
+    UPSTREAM_THROTTLE_TIMEOUT: float = float(os.getenv("UPSTREAM_THROTTLE_TIMEOUT", "30"))
 
     # Tool/Integration Toggles (enabled by default)
     ENABLE_SOLANA_TOOLS: bool = os.getenv("ENABLE_SOLANA_TOOLS", "true").lower() == "true"
@@ -98,12 +155,55 @@ class Settings:
             "SAM_SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com"
         )
         cls.SAM_WALLET_PRIVATE_KEY = os.getenv("SAM_WALLET_PRIVATE_KEY")
+        cls.SAM_SOLANA_RPC_URLS = os.getenv("SAM_SOLANA_RPC_URLS", "")
+        cls.RPC_MAX_CONCURRENCY = int(os.getenv("RPC_MAX_CONCURRENCY", "8"))
+        cls.BLOCKHASH_REFRESH_INTERVAL = float(os.getenv("BLOCKHASH_REFRESH_INTERVAL", "5"))
+        cls.CONFIRM_POLL_INTERVAL = float(os.getenv("CONFIRM_POLL_INTERVAL", "0.5"))
+        cls.CONFIRM_TIMEOUT = float(os.getenv("CONFIRM_TIMEOUT", "90"))
+        cls.PRIORITY_FEE_LEVEL = os.getenv("PRIORITY_FEE_LEVEL", "medium")
+        cls.PRIORITY_FEE_REFRESH = float(os.getenv("PRIORITY_FEE_REFRESH", "10"))
+        cls.PRIORITY_FEE_MAX_LAMPORTS = int(os.getenv("PRIORITY_FEE_MAX_LAMPORTS", "5000000"))
+        cls.JUPITER_QUOTE_TTL = float(os.getenv("JUPITER_QUOTE_TTL", "5"))
+        cls.TOKEN_METADATA_CACHE_SIZE = int(os.getenv("TOKEN_METADATA_CACHE_SIZE", "10000"))
+        cls.TOKEN_METADATA_REFRESH = float(os.getenv("TOKEN_METADATA_REFRESH", "3600"))
+        cls.TOKEN_METADATA_NEGATIVE_TTL = float(os.getenv("TOKEN_METADATA_NEGATIVE_TTL", "600"))
 
         # Database
         cls.SAM_DB_PATH = os.getenv("SAM_DB_PATH", ".sam/sam_memory.db")
+        cls.SAM_DB_URL = os.getenv("SAM_DB_URL")
+
+        # Retention
+        cls.RETENTION_ENABLED = os.getenv("RETENTION_ENABLED", "false").lower() == "true"
+        cls.RETENTION_INTERVAL = float(os.getenv("RETENTION_INTERVAL", "3600"))
+        cls.WAL_CHECKPOINT_INTERVAL = float(os.getenv("WAL_CHECKPOINT_INTERVAL", "300"))
+
+        # Observability
+        cls.HTTP_TRACING_ENABLED = os.getenv("HTTP_TRACING_ENABLED", "false").lower() == "true"
+        cls.METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+        cls.METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+        # Response cache
+        cls.HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "true").lower() == "true"
+        cls.HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+        cls.HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR")
+        cls.PRICE_REFRESH_INTERVAL = float(os.getenv("PRICE_REFRESH_INTERVAL", "0"))
+        cls.PRICE_FEED_URL = os.getenv("PRICE_FEED_URL", "")
+        cls.PRICE_FEED_INTERVAL = float(os.getenv("PRICE_FEED_INTERVAL", "5"))
+        cls.TICK_STORE_ENABLED = os.getenv("TICK_STORE_ENABLED", "false").lower() == "true"
+        cls.TICK_STORE_CAPACITY = int(os.getenv("TICK_STORE_CAPACITY", "10000"))
+        cls.TICK_STORE_MAX_SYMBOLS = int(os.getenv("TICK_STORE_MAX_SYMBOLS", "100"))
+        cls.TICK_STORE_PATH = os.getenv("TICK_STORE_PATH")
+        cls.PUMP_TRADE_FEED_URL = os.getenv("PUMP_TRADE_FEED_URL", "")
+        cls.TRADE_TAPE_CAPACITY = int(os.getenv("TRADE_TAPE_CAPACITY", "1000"))
+        cls.TRADE_TAPE_MAX_MINTS = int(os.getenv("TRADE_TAPE_MAX_MINTS", "200"))
 
         # Rate limiting
         cls.RATE_LIMITING_ENABLED = os.getenv("RATE_LIMITING_ENABLED", "false").lower() == "true"
+        cls.RATE_LIMIT_STORAGE_URL = os.getenv("RATE_LIMIT_STORAGE_URL", "memory://")
+        cls.UPSTREAM_THROTTLING_ENABLED = (
+            os.getenv("UPSTREAM_THROTTLING_ENABLED", "true").lower() == "true"
+        )
+        cls.UPSTREAM_THROTTLE_TIMEOUT = float(os.getenv("UPSTREAM_THROTTLE_TIMEOUT", "30"))
 
         # Tool/Integration Toggles
         cls.ENABLE_SOLANA_TOOLS = os.getenv("ENABLE_SOLANA_TOOLS", "true").lower() == "true"
@@ -184,6 +284,7 @@ class Settings:
             logger.info(f"  Compatible Base URL: {base}")
         logger.info(f"  Solana RPC: {cls.SAM_SOLANA_RPC_URL}")
         logger.info(f"  Database Path: {cls.SAM_DB_PATH}")
+        logger.info(f"  Database URL: {'Set' if cls.SAM_DB_URL else 'Not set (SQLite)'}")
         logger.info(f"  Rate Limiting: {'Enabled' if cls.RATE_LIMITING_ENABLED else 'Disabled'}")
         logger.info(
             "  Tools: Solana=%s, Pump.fun=%s, DexScreener=%s, Jupiter=%s, Search=%s",
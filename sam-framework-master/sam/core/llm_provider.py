@@ -80,7 +80,7 @@ class OpenAICompatibleProvider(LLMProvider):
 
         for attempt in range(max_retries + 1):
             try:
-                session = await get_session()
+                session = await get_session("llm")
                 async with session.post(
                     f"{self.base_url}/chat/completions", headers=headers, json=payload
                 ) as response:
@@ -227,7 +227,7 @@ class XAIProvider(OpenAICompatibleProvider):
 
         for attempt in range(max_retries + 1):
             try:
-                session = await get_session()
+                session = await get_session("llm")
                 async with session.post(
                     f"{self.base_url}/chat/completions",
                     headers={
@@ -480,7 +480,7 @@ class AnthropicProvider(LLMProvider):
 
         for attempt in range(max_retries + 1):
             try:
-                session = await get_session()
+                session = await get_session("llm")
                 async with session.post(url, headers=headers, json=payload) as response:
                     if response.status == 200:
                         data = await response.json()
@@ -2,10 +2,10 @@ from pydantic import BaseModel
 import json
 import asyncio
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Any
+from typing import Any, Callable, Dict, List, Optional
 import logging
-import os
-from ..utils.connection_pool import get_db_connection
+from ..utils.db_executor import SQLiteExecutor
+from .storage import SQLiteBackend, StorageBackend, TradeRow, get_storage_backend
 
 logger = logging.getLogger(__name__)
 
@@ -40,75 +40,50 @@ class SecureData(BaseModel):
 
 
 class MemoryManager:
-    def __init__(self, db_path: str):
+    def __init__(
+        self,
+        db_path: str,
+        db_url: Optional[str] = None,
+        backend: Optional[StorageBackend] = None,
+    ):
+        """
+        Initialize the memory manager.
+
+        Args:
+            db_path: SQLite database path, used when no database URL is given
+            db_url: Optional storage URL (``postgresql://...`` or ``sqlite:///path``)
+            backend: Explicit storage backend, overrides db_path/db_url
+        """
         self.db_path = db_path
+        self.db_url = db_url
+        self.backend = backend or get_storage_backend(db_path, db_url)
 
-        # Ensure directory exists (handle case where db_path has no directory)
-        dirpath = os.path.dirname(db_path) or "."
-        os.makedirs(dirpath, exist_ok=True)
-
-        logger.info(f"Initialized memory manager with database: {db_path}")
+        logger.info(
+            f"Initialized memory manager with {self.backend.name} storage: "
+            f"{self.backend.location}"
+        )
 
-    # Connection pooling is now handled by the connection_pool utility
+    @property
+    def db(self) -> SQLiteExecutor:
+        """Single-writer/multi-reader executor for this database (SQLite only)."""
+        if not isinstance(self.backend, SQLiteBackend):
+            raise AttributeError(f"{self.backend.name} storage has no SQLite executor")
+        return self.backend.db
 
     async def initialize(self):
         """Initialize database tables. Must be called after creating the manager."""
         await self._init_database()
-        logger.info(f"Database tables initialized: {self.db_path}")
+        logger.info(f"Database tables initialized: {self.backend.location}")
 
     async def _init_database(self):
-        """Initialize database tables using connection pool."""
+        """Initialize database tables through the storage backend."""
         max_retries = 3
         retry_delay = 0.5
 
         for attempt in range(max_retries):
             try:
-                async with get_db_connection(self.db_path) as conn:
-                    # Create sessions table
-                    await conn.execute("""
-                    CREATE TABLE IF NOT EXISTS sessions (
-                        session_id TEXT PRIMARY KEY,
-                        messages TEXT NOT NULL,
-                        created_at TEXT NOT NULL,
-                        updated_at TEXT NOT NULL
-                    )
-                    """)
-
-                    # Create preferences table
-                    await conn.execute("""
-                        CREATE TABLE IF NOT EXISTS preferences (
-                            user_id TEXT NOT NULL,
-                            key TEXT NOT NULL,
-                            value TEXT NOT NULL,
-                            created_at TEXT NOT NULL,
-                            PRIMARY KEY (user_id, key)
-                        )
-                    """)
-
-                    # Create trades table
-                    await conn.execute("""
-                        CREATE TABLE IF NOT EXISTS trades (
-                            id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            user_id TEXT NOT NULL,
-                            token_address TEXT NOT NULL,
-                            action TEXT NOT NULL,
-                            amount REAL NOT NULL,
-                            timestamp TEXT NOT NULL
-                        )
-                    """)
-
-                    # Create secure_data table
-                    await conn.execute("""
-                        CREATE TABLE IF NOT EXISTS secure_data (
-                            user_id TEXT PRIMARY KEY,
-                            encrypted_private_key TEXT NOT NULL,
-                            wallet_address TEXT NOT NULL,
-                            created_at TEXT NOT NULL
-                        )
-                    """)
-
-                    await conn.commit()
-                    return  # Success, exit retry loop
+                await self.backend.initialize()
+                return  # Success, exit retry loop
 
             except Exception as e:
                 logger.warning(f"Database initialization attempt {attempt + 1} failed: {e}")
@@ -119,83 +94,32 @@ class MemoryManager:
 
     async def save_session(self, session_id: str, messages: List[Dict]):
         """Save session messages to database."""
-        async with get_db_connection(self.db_path) as conn:
-            now = datetime.utcnow().isoformat()
+        now = datetime.utcnow().isoformat()
 
-            # Check if session exists
-            cursor = await conn.execute(
-                "SELECT created_at FROM sessions WHERE session_id = ?", (session_id,)
-            )
-            existing = await cursor.fetchone()
-
-            messages_json = json.dumps(messages)
-
-            if existing:
-                # Update existing session
-                await conn.execute(
-                    """
-                    UPDATE sessions 
-                    SET messages = ?, updated_at = ? 
-                    WHERE session_id = ?
-                """,
-                    (messages_json, now, session_id),
-                )
-            else:
-                # Create new session
-                await conn.execute(
-                    """
-                    INSERT INTO sessions (session_id, messages, created_at, updated_at)
-                    VALUES (?, ?, ?, ?)
-                """,
-                    (session_id, messages_json, now, now),
-                )
-
-            await conn.commit()
-            logger.debug(f"Saved session {session_id} with {len(messages)} messages")
+        # Single upsert keeps created_at from the first save
+        await self.backend.save_session(session_id, json.dumps(messages), now)
+
+        logger.debug(f"Saved session {session_id} with {len(messages)} messages")
 
     async def load_session(self, session_id: str) -> List[Dict]:
         """Load session messages from database."""
-        async with get_db_connection(self.db_path) as conn:
-            cursor = await conn.execute(
-                "SELECT messages FROM sessions WHERE session_id = ?", (session_id,)
-            )
-            result = await cursor.fetchone()
-
-            if result:
-                messages = json.loads(result[0])
-            else:
-                messages = []
+        result = await self.backend.load_session(session_id)
+        messages = json.loads(result) if result else []
 
         logger.debug(f"Loaded session {session_id} with {len(messages)} messages")
         return messages
 
     async def save_user_preference(self, user_id: str, key: str, value: str):
         """Save user preference."""
-        async with get_db_connection(self.db_path) as conn:
-            now = datetime.utcnow().isoformat()
-
-            # Use REPLACE to handle both insert and update
-            await conn.execute(
-                """
-                REPLACE INTO preferences (user_id, key, value, created_at)
-                VALUES (?, ?, ?, ?)
-            """,
-                (user_id, key, value, now),
-            )
+        now = datetime.utcnow().isoformat()
 
-            await conn.commit()
+        await self.backend.save_preference(user_id, key, value, now)
 
         logger.debug(f"Saved preference {key} for user {user_id}")
 
     async def get_user_preference(self, user_id: str, key: str) -> Optional[str]:
         """Get user preference."""
-        async with get_db_connection(self.db_path) as conn:
-            cursor = await conn.execute(
-                "SELECT value FROM preferences WHERE user_id = ? AND key = ?", (user_id, key)
-            )
-            result = await cursor.fetchone()
-
-            value = result[0] if result else None
+        value = await self.backend.get_preference(user_id, key)
 
         logger.debug(
             f"Retrieved preference {key} for user {user_id}: {'found' if value else 'not found'}"
@@ -206,47 +130,45 @@ class MemoryManager:
         self, user_id: str, token_address: str, action: str, amount: float
     ):
         """Save trade to history."""
-        async with get_db_connection(self.db_path) as conn:
-            now = datetime.utcnow().isoformat()
-
-            await conn.execute(
-                """
-                INSERT INTO trades (user_id, token_address, action, amount, timestamp)
-                VALUES (?, ?, ?, ?, ?)
-            """,
-                (user_id, token_address, action, amount, now),
-            )
+        now = datetime.utcnow().isoformat()
 
-            await conn.commit()
+        await self.backend.save_trades([(user_id, token_address, action, amount, now)])
 
         logger.info(f"Saved trade: {action} {amount} of {token_address} for user {user_id}")
 
-    async def get_trade_history(self, user_id: str, limit: int = 10) -> List[Dict]:
-        """Get recent trades for user."""
-        async with get_db_connection(self.db_path) as conn:
-            cursor = await conn.execute(
-                """
-                SELECT token_address, action, amount, timestamp
-                FROM trades 
-                WHERE user_id = ? 
-                ORDER BY timestamp DESC 
-                LIMIT ?
-            """,
-                (user_id, limit),
+    async def save_trade_history_batch(self, trades: List[Dict[str, Any]]) -> int:
+        """Save many trades at once (COPY on PostgreSQL, executemany on SQLite)."""
+        now = datetime.utcnow().isoformat()
+        rows: List[TradeRow] = [
+            (
+                t["user_id"],
+                t["token_address"],
+                t["action"],
+                float(t["amount"]),
+                t.get("timestamp") or now,
             )
+            for t in trades
+        ]
+
+        saved = await self.backend.save_trades(rows)
 
-            results = await cursor.fetchall()
+        logger.info(f"Saved {saved} trades in one batch")
+        return saved
 
-            trades = []
-            for row in results:
-                trades.append(
-                    {
-                        "token_address": row[0],
-                        "action": row[1],
-                        "amount": row[2],
-                        "timestamp": row[3],
-                    }
-                )
+    async def get_trade_history(self, user_id: str, limit: int = 10) -> List[Dict]:
+        """Get recent trades for user."""
+        results = await self.backend.get_trades(user_id, limit)
+
+        trades = []
+        for row in results:
+            trades.append(
+                {
+                    "token_address": row[0],
+                    "action": row[1],
+                    "amount": row[2],
+                    "timestamp": row[3],
+                }
+            )
 
         logger.debug(f"Retrieved {len(trades)} trades for user {user_id}")
         return trades
@@ -255,81 +177,81 @@ class MemoryManager:
         self, user_id: str, encrypted_private_key: str, wallet_address: str
     ):
         """Store encrypted private key and wallet address."""
-        async with get_db_connection(self.db_path) as conn:
-            now = datetime.utcnow().isoformat()
-
-            # Use REPLACE to handle both insert and update
-            await conn.execute(
-                """
-                REPLACE INTO secure_data (user_id, encrypted_private_key, wallet_address, created_at)
-                VALUES (?, ?, ?, ?)
-            """,
-                (user_id, encrypted_private_key, wallet_address, now),
-            )
+        now = datetime.utcnow().isoformat()
 
-            await conn.commit()
+        await self.backend.store_secure_data(user_id, encrypted_private_key, wallet_address, now)
 
         logger.info(f"Stored secure data for user {user_id}")
 
     async def get_secure_data(self, user_id: str) -> Optional[Dict[str, str]]:
         """Get encrypted private key and wallet address for user."""
-        async with get_db_connection(self.db_path) as conn:
-            cursor = await conn.execute(
-                """
-                SELECT encrypted_private_key, wallet_address 
-                FROM secure_data 
-                WHERE user_id = ?
-            """,
-                (user_id,),
-            )
-            result = await cursor.fetchone()
+        result = await self.backend.get_secure_data(user_id)
 
-            if result:
-                data = {"encrypted_private_key": result[0], "wallet_address": result[1]}
-            else:
-                data = None
+        if result:
+            data = {"encrypted_private_key": result[0], "wallet_address": result[1]}
+        else:
+            data = None
 
         logger.debug(
             f"Retrieved secure data for user {user_id}: {'found' if data else 'not found'}"
         )
         return data
 
-    async def cleanup_old_sessions(self, days_old: int = 30):
+    async def purge_expired(
+        self,
+        table: str,
+        cutoff: str,
+        chunk_size: int = 500,
+        pause: float = 0.0,
+        on_chunk: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """Delete rows older than cutoff in chunks of chunk_size.
+
+        Every chunk is its own short transaction and the loop yields to the event
+        loop in between, so other writers are never blocked for long.
+        """
+        total = 0
+        while True:
+            deleted = await self.backend.delete_expired_chunk(table, cutoff, chunk_size)
+            total += deleted
+            if on_chunk is not None:
+                on_chunk(deleted)
+            if deleted < chunk_size:
+                return total
+            await asyncio.sleep(pause)
+
+    async def cleanup_old_sessions(self, days_old: int = 30, chunk_size: int = 500):
         """Clean up sessions older than specified days."""
-        async with get_db_connection(self.db_path) as conn:
-            # Use timedelta for proper date arithmetic
-            cutoff_date = datetime.utcnow() - timedelta(days=days_old)
-            cutoff_str = cutoff_date.isoformat()
+        # Use timedelta for proper date arithmetic
+        cutoff_date = datetime.utcnow() - timedelta(days=days_old)
 
-            cursor = await conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff_str,))
-
-            deleted_count = cursor.rowcount
-            await conn.commit()
+        deleted_count = await self.purge_expired("sessions", cutoff_date.isoformat(), chunk_size)
 
         logger.info(f"Cleaned up {deleted_count} old sessions (older than {days_old} days)")
         return deleted_count
 
-    async def cleanup_old_trades(self, days_old: int = 90):
+    async def cleanup_old_trades(self, days_old: int = 90, chunk_size: int = 500):
         """Clean up old trade history."""
-        async with get_db_connection(self.db_path) as conn:
-            cutoff_date = datetime.utcnow() - timedelta(days=days_old)
-            cutoff_str = cutoff_date.isoformat()
-
-            cursor = await conn.execute("DELETE FROM trades WHERE timestamp < ?", (cutoff_str,))
+        cutoff_date = datetime.utcnow() - timedelta(days=days_old)
 
-            deleted_count = cursor.rowcount
-            await conn.commit()
+        deleted_count = await self.purge_expired("trades", cutoff_date.isoformat(), chunk_size)
 
         logger.info(f"Cleaned up {deleted_count} old trades (older than {days_old} days)")
         return deleted_count
 
-    async def vacuum_database(self):
-        """Vacuum the database to reclaim space after cleanup."""
+    async def vacuum_database(self, full: bool = False, pages: int = 0):
+        """Reclaim space after cleanup.
+
+        By default only free pages are released (incremental vacuum), which is
+        cheap enough for a live system. ``full=True`` rewrites the whole file.
+        """
         try:
-            async with get_db_connection(self.db_path) as conn:
-                await conn.execute("VACUUM")
-                logger.info("Database vacuum completed successfully")
-                return True
+            if full:
+                await self.backend.vacuum()
+            else:
+                await self.backend.reclaim_space(pages)
+            logger.info(f"Database {'full' if full else 'incremental'} vacuum completed")
+            return True
         except Exception as e:
             logger.error(f"Database vacuum failed: {e}")
             return False
@@ -337,23 +259,22 @@ class MemoryManager:
     async def get_database_size(self) -> Dict[str, Any]:
         """Get database size information."""
         try:
-            import os
+            size_bytes = await self.backend.get_size_bytes()
+            if size_bytes is None:
+                return {"error": "Database file not found"}
 
-            if os.path.exists(self.db_path):
-                size_bytes = os.path.getsize(self.db_path)
-                size_mb = size_bytes / (1024 * 1024)
+            size_mb = size_bytes / (1024 * 1024)
 
-                # Get row counts
-                stats = await self.get_session_stats()
+            # Get row counts
+            stats = await self.get_session_stats()
 
-                return {
-                    "size_bytes": size_bytes,
-                    "size_mb": round(size_mb, 2),
-                    "path": self.db_path,
-                    "tables": stats,
-                }
-            else:
-                return {"error": "Database file not found"}
+            return {
+                "size_bytes": size_bytes,
+                "size_mb": round(size_mb, 2),
+                "path": self.backend.location,
+                "backend": self.backend.name,
+                "tables": stats,
+            }
 
         except Exception as e:
             logger.error(f"Failed to get database size: {e}")
@@ -361,38 +282,24 @@ class MemoryManager:
 
     async def get_session_stats(self) -> Dict[str, int]:
         """Get database statistics."""
-        async with get_db_connection(self.db_path) as conn:
-            stats = {}
-
-            # Count sessions
-            cursor = await conn.execute("SELECT COUNT(*) FROM sessions")
-            result = await cursor.fetchone()
-            stats["sessions"] = result[0] if result else 0
-
-            # Count preferences
-            cursor = await conn.execute("SELECT COUNT(*) FROM preferences")
-            result = await cursor.fetchone()
-            stats["preferences"] = result[0] if result else 0
-
-            # Count trades
-            cursor = await conn.execute("SELECT COUNT(*) FROM trades")
-            result = await cursor.fetchone()
-            stats["trades"] = result[0] if result else 0
-
-            # Count secure data entries
-            cursor = await conn.execute("SELECT COUNT(*) FROM secure_data")
-            result = await cursor.fetchone()
-            stats["secure_data"] = result[0] if result else 0
+        counts = await self.backend.get_counts()
+        stats = {
+            "sessions": counts[0],
+            "preferences": counts[1],
+            "trades": counts[2],
+            "secure_data": counts[3],
+        }
 
         logger.debug(f"Database stats: {stats}")
         return stats
 
+    def get_writer_stats(self) -> Dict[str, Any]:
+        """Get storage backend metrics (write queue and batching on SQLite, pool on Postgres)."""
+        return self.backend.get_stats()
+
     async def clear_session(self, session_id: str) -> int:
         """Clear session messages from database."""
-        async with get_db_connection(self.db_path) as conn:
-            cursor = await conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
-            deleted_count = cursor.rowcount
-            await conn.commit()
+        deleted_count = await self.backend.delete_session(session_id)
 
         logger.info(f"Cleared session {session_id}")
         return deleted_count
@@ -0,0 +1,280 @@
+"""Incremental retention, space reclamation and WAL checkpointing.
+
+Expired rows are deleted a chunk at a time, freed pages are returned with
+``incremental_vacuum`` and the WAL is truncated on its own schedule, so none
+of the jobs holds the write lock long enough to stall a live agent.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from .memory import MemoryManager
+from ..utils.error_handling import ErrorTracker
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetentionPolicy:
+    """Delete rows of a table once they are older than max_age_days."""
+
+    table: str
+    max_age_days: int
+
+
+DEFAULT_POLICIES = [RetentionPolicy("sessions", 30), RetentionPolicy("trades", 90)]
+
+# Purged through the error tracker, whose table lives in its own database
+ERRORS_POLICY = RetentionPolicy("errors", 30)
+
+
+@dataclass
+class RetentionProgress:
+    """Progress of the current or last purge of one table."""
+
+    table: str
+    rows_deleted: int = 0
+    chunks: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self.started_at is not None and self.finished_at is None
+
+
+@dataclass
+class RetentionStats:
+    """Cumulative retention engine metrics."""
+
+    runs: int = 0
+    rows_deleted: int = 0
+    chunks: int = 0
+    pages_freed: int = 0
+    checkpoints: int = 0
+    checkpoint_busy: int = 0
+    errors: int = 0
+    last_run_at: Optional[float] = None
+    last_run_seconds: float = 0.0
+    last_checkpoint_at: Optional[float] = None
+    progress: Dict[str, RetentionProgress] = field(default_factory=dict)
+
+
+class RetentionEngine:
+    """Run retention and maintenance jobs in small steps, optionally on a schedule."""
+
+    def __init__(
+        self,
+        memory: MemoryManager,
+        policies: Optional[List[RetentionPolicy]] = None,
+        chunk_size: int = 500,
+        chunk_pause: float = 0.05,
+        vacuum_pages: int = 1000,
+        interval: float = 3600.0,
+        checkpoint_interval: float = 300.0,
+        error_tracker: Optional[ErrorTracker] = None,
+    ):
+        """
+        Initialize the engine.
+
+        Args:
+            memory: Memory manager whose storage is maintained
+            policies: Retention policies (defaults to 30 day sessions, 90 day trades)
+            chunk_size: Rows deleted per transaction
+            chunk_pause: Seconds to yield between chunks
+            vacuum_pages: Free pages released per incremental vacuum (0 = all)
+            interval: Seconds between scheduled retention runs
+            checkpoint_interval: Seconds between scheduled WAL checkpoints
+            error_tracker: Error tracker whose errors table is purged (30 days by default)
+        """
+        self.memory = memory
+        self.error_tracker = error_tracker
+        self.policies = list(policies if policies is not None else DEFAULT_POLICIES)
+        if error_tracker is not None and all(p.table != "errors" for p in self.policies):
+            self.policies.append(ERRORS_POLICY)
+        self.chunk_size = chunk_size
+        self.chunk_pause = chunk_pause
+        self.vacuum_pages = vacuum_pages
+        self.interval = interval
+        self.checkpoint_interval = checkpoint_interval
+
+        self.stats = RetentionStats()
+        self._run_lock = asyncio.Lock()
+        self._tasks: List[asyncio.Task] = []
+
+    async def purge(
+        self,
+        policy: RetentionPolicy,
+        on_progress: Optional[Callable[[RetentionProgress], None]] = None,
+    ) -> int:
+        """Delete expired rows of one table chunk by chunk."""
+        cutoff = (datetime.utcnow() - timedelta(days=policy.max_age_days)).isoformat()
+        progress = RetentionProgress(table=policy.table, started_at=time.time())
+        self.stats.progress[policy.table] = progress
+
+        def _on_chunk(deleted: int):
+            progress.rows_deleted += deleted
+            progress.chunks += 1
+            self.stats.rows_deleted += deleted
+            self.stats.chunks += 1
+            if on_progress is not None:
+                on_progress(progress)
+
+        try:
+            if policy.table == "errors" and self.error_tracker is not None:
+                return await self.error_tracker.cleanup_old_errors(
+                    policy.max_age_days, self.chunk_size, self.chunk_pause, _on_chunk
+                )
+            return await self.memory.purge_expired(
+                policy.table, cutoff, self.chunk_size, self.chunk_pause, _on_chunk
+            )
+        finally:
+            progress.finished_at = time.time()
+            logger.info(
+                f"Retention purged {progress.rows_deleted} rows from {policy.table} "
+                f"in {progress.chunks} chunks"
+            )
+
+    async def reclaim_space(self) -> Dict[str, Any]:
+        """Release free pages left behind by deletes."""
+        result = await self.memory.backend.reclaim_space(self.vacuum_pages)
+        self.stats.pages_freed += int(result.get("pages_freed", 0))
+        return result
+
+    async def checkpoint(self) -> Dict[str, Any]:
+        """Checkpoint and truncate the WAL."""
+        result = await self.memory.backend.checkpoint()
+        self.stats.checkpoints += 1
+        self.stats.checkpoint_busy += int(result.get("busy", 0))
+        self.stats.last_checkpoint_at = time.time()
+        return result
+
+    async def run_once(
+        self, on_progress: Optional[Callable[[RetentionProgress], None]] = None
+    ) -> Dict[str, Any]:
+        """Purge every policy, reclaim space and checkpoint; skipped if already running."""
+        if self._run_lock.locked():
+            return {"skipped": "retention run already in progress"}
+
+        async with self._run_lock:
+            started = time.perf_counter()
+            deleted: Dict[str, int] = {}
+            for policy in self.policies:
+                deleted[policy.table] = await self.purge(policy, on_progress)
+
+            vacuum = await self.reclaim_space()
+            checkpoint = await self.checkpoint()
+
+            self.stats.runs += 1
+            self.stats.last_run_at = time.time()
+            self.stats.last_run_seconds = time.perf_counter() - started
+
+            return {"deleted": deleted, "vacuum": vacuum, "checkpoint": checkpoint}
+
+    async def _retention_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats.errors += 1
+                logger.error(f"Scheduled retention run failed: {e}")
+
+    async def _checkpoint_loop(self):
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            try:
+                await self.checkpoint()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats.errors += 1
+                logger.error(f"Scheduled WAL checkpoint failed: {e}")
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self):
+        """Start the background retention and checkpoint schedules."""
+        if self.running:
+            return
+        self._tasks = [
+            asyncio.create_task(self._retention_loop()),
+            asyncio.create_task(self._checkpoint_loop()),
+        ]
+        logger.info(
+            f"Retention scheduler started (every {self.interval}s, "
+            f"checkpoint every {self.checkpoint_interval}s)"
+        )
+
+    async def stop(self):
+        """Stop the background schedules."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error(f"Error stopping retention task: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cumulative metrics and per-table progress."""
+        s = self.stats
+        return {
+            "scheduler_running": self.running,
+            "run_in_progress": self._run_lock.locked(),
+            "runs": s.runs,
+            "rows_deleted": s.rows_deleted,
+            "chunks": s.chunks,
+            "pages_freed": s.pages_freed,
+            "checkpoints": s.checkpoints,
+            "checkpoint_busy": s.checkpoint_busy,
+            "errors": s.errors,
+            "last_run_at": s.last_run_at,
+            "last_run_seconds": round(s.last_run_seconds, 3),
+            "last_checkpoint_at": s.last_checkpoint_at,
+            "tables": {
+                table: {
+                    "rows_deleted": p.rows_deleted,
+                    "chunks": p.chunks,
+                    "running": p.running,
+                }
+                for table, p in s.progress.items()
+            },
+        }
+
+
+# Global retention engine
+_global_retention_engine: Optional[RetentionEngine] = None
+
+
+async def start_retention_engine(memory: MemoryManager, **kwargs: Any) -> RetentionEngine:
+    """Create and start the global retention scheduler."""
+    global _global_retention_engine
+    if _global_retention_engine is None:
+        _global_retention_engine = RetentionEngine(memory, **kwargs)
+    _global_retention_engine.start()
+    return _global_retention_engine
+
+
+def get_retention_engine() -> Optional[RetentionEngine]:
+    """Get the global retention engine, if one was started."""
+    return _global_retention_engine
+
+
+async def cleanup_retention_engine():
+    """Stop the global retention scheduler."""
+    global _global_retention_engine
+    if _global_retention_engine:
+        await _global_retention_engine.stop()
+        _global_retention_engine = None
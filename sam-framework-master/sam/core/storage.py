@@ -0,0 +1,675 @@
+"""Storage backends behind MemoryManager.
+
+``SQLiteBackend`` is the default single-host store. ``PostgresBackend`` uses
+asyncpg so several backend processes can share sessions, preferences and
+trade history. The backend is selected from ``SAM_DB_URL``.
+"""
+
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..utils.db_executor import SQLiteExecutor, get_sqlite_executor
+
+logger = logging.getLogger(__name__)
+
+# (user_id, token_address, action, amount, timestamp)
+TradeRow = Tuple[str, str, str, float, str]
+
+TRADE_COLUMNS = ["user_id", "token_address", "action", "amount", "timestamp"]
+
+POSTGRES_SCHEMES = ("postgres://", "postgresql://")
+
+# Tables with time based retention and the column their age is measured by
+RETENTION_COLUMNS = {"sessions": "updated_at", "trades": "timestamp"}
+
+
+def _retention_column(table: str) -> str:
+    column = RETENTION_COLUMNS.get(table)
+    if column is None:
+        raise ValueError(f"No retention policy for table: {table}")
+    return column
+
+
+class StorageBackend(ABC):
+    """Persistence operations used by MemoryManager."""
+
+    name: str = "base"
+
+    @property
+    @abstractmethod
+    def location(self) -> str:
+        """Human readable location of the store (path or redacted URL)."""
+
+    @abstractmethod
+    async def initialize(self):
+        """Create tables and open connections."""
+
+    @abstractmethod
+    async def close(self):
+        """Release connections."""
+
+    @abstractmethod
+    async def save_session(self, session_id: str, messages_json: str, now: str):
+        """Insert or update a session, keeping its original created_at."""
+
+    @abstractmethod
+    async def load_session(self, session_id: str) -> Optional[str]:
+        """Return the JSON encoded messages of a session."""
+
+    @abstractmethod
+    async def delete_session(self, session_id: str) -> int:
+        """Delete one session."""
+
+    @abstractmethod
+    async def save_preference(self, user_id: str, key: str, value: str, now: str):
+        """Insert or replace a user preference."""
+
+    @abstractmethod
+    async def get_preference(self, user_id: str, key: str) -> Optional[str]:
+        """Return a user preference value."""
+
+    @abstractmethod
+    async def save_trades(self, rows: Sequence[TradeRow]) -> int:
+        """Append trade rows."""
+
+    @abstractmethod
+    async def get_trades(self, user_id: str, limit: int) -> List[Tuple[Any, ...]]:
+        """Return (token_address, action, amount, timestamp) rows, newest first."""
+
+    @abstractmethod
+    async def store_secure_data(
+        self, user_id: str, encrypted_private_key: str, wallet_address: str, now: str
+    ):
+        """Insert or replace encrypted wallet data."""
+
+    @abstractmethod
+    async def get_secure_data(self, user_id: str) -> Optional[Tuple[str, str]]:
+        """Return (encrypted_private_key, wallet_address)."""
+
+    @abstractmethod
+    async def delete_expired_chunk(self, table: str, cutoff: str, limit: int) -> int:
+        """Delete at most `limit` rows of a retention table older than cutoff."""
+
+    @abstractmethod
+    async def get_counts(self) -> Tuple[int, int, int, int]:
+        """Return row counts of sessions, preferences, trades and secure_data."""
+
+    @abstractmethod
+    async def get_size_bytes(self) -> Optional[int]:
+        """Return the on-disk size of the store, or None if unknown."""
+
+    @abstractmethod
+    async def vacuum(self):
+        """Reclaim space after cleanup."""
+
+    @abstractmethod
+    async def reclaim_space(self, pages: int = 0) -> Dict[str, Any]:
+        """Reclaim free space without blocking other writers for long."""
+
+    @abstractmethod
+    async def checkpoint(self) -> Dict[str, Any]:
+        """Flush the write-ahead log, if the backend keeps one locally."""
+
+    @abstractmethod
+    async def enable_incremental_vacuum(self) -> bool:
+        """One-off switch to incremental space reclamation; True if it changed."""
+
+    @abstractmethod
+    def get_stats(self) -> Dict[str, Any]:
+        """Return backend specific runtime metrics."""
+
+
+class SQLiteBackend(StorageBackend):
+    """SQLite store served by the single-writer/multi-reader executor."""
+
+    name = "sqlite"
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+        # Ensure directory exists (handle case where db_path has no directory)
+        dirpath = os.path.dirname(db_path) or "."
+        os.makedirs(dirpath, exist_ok=True)
+
+    @property
+    def db(self) -> SQLiteExecutor:
+        """Single-writer/multi-reader executor for this database."""
+        return get_sqlite_executor(self.db_path)
+
+    @property
+    def location(self) -> str:
+        return self.db_path
+
+    async def initialize(self):
+        await self.db.transaction(
+            [
+                (
+                    """
+                    CREATE TABLE IF NOT EXISTS sessions (
+                        session_id TEXT PRIMARY KEY,
+                        messages TEXT NOT NULL,
+                        created_at TEXT NOT NULL,
+                        updated_at TEXT NOT NULL
+                    )
+                    """,
+                    (),
+                ),
+                (
+                    """
+                    CREATE TABLE IF NOT EXISTS preferences (
+                        user_id TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        created_at TEXT NOT NULL,
+                        PRIMARY KEY (user_id, key)
+                    )
+                    """,
+                    (),
+                ),
+                (
+                    """
+                    CREATE TABLE IF NOT EXISTS trades (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user_id TEXT NOT NULL,
+                        token_address TEXT NOT NULL,
+                        action TEXT NOT NULL,
+                        amount REAL NOT NULL,
+                        timestamp TEXT NOT NULL
+                    )
+                    """,
+                    (),
+                ),
+                (
+                    """
+                    CREATE TABLE IF NOT EXISTS secure_data (
+                        user_id TEXT PRIMARY KEY,
+                        encrypted_private_key TEXT NOT NULL,
+                        wallet_address TEXT NOT NULL,
+                        created_at TEXT NOT NULL
+                    )
+                    """,
+                    (),
+                ),
+            ]
+        )
+
+    async def close(self):
+        # Executors are shared per path and closed by cleanup_sqlite_executors
+        pass
+
+    async def save_session(self, session_id: str, messages_json: str, now: str):
+        await self.db.execute(
+            """
+            INSERT INTO sessions (session_id, messages, created_at, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(session_id) DO UPDATE SET
+                messages = excluded.messages,
+                updated_at = excluded.updated_at
+        """,
+            (session_id, messages_json, now, now),
+        )
+
+    async def load_session(self, session_id: str) -> Optional[str]:
+        result = await self.db.fetchone(
+            "SELECT messages FROM sessions WHERE session_id = ?", (session_id,)
+        )
+        return result[0] if result else None
+
+    async def delete_session(self, session_id: str) -> int:
+        return await self.db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    async def save_preference(self, user_id: str, key: str, value: str, now: str):
+        await self.db.execute(
+            """
+            REPLACE INTO preferences (user_id, key, value, created_at)
+            VALUES (?, ?, ?, ?)
+        """,
+            (user_id, key, value, now),
+        )
+
+    async def get_preference(self, user_id: str, key: str) -> Optional[str]:
+        result = await self.db.fetchone(
+            "SELECT value FROM preferences WHERE user_id = ? AND key = ?", (user_id, key)
+        )
+        return result[0] if result else None
+
+    async def save_trades(self, rows: Sequence[TradeRow]) -> int:
+        if not rows:
+            return 0
+        return await self.db.executemany(
+            """
+            INSERT INTO trades (user_id, token_address, action, amount, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+        """,
+            list(rows),
+        )
+
+    async def get_trades(self, user_id: str, limit: int) -> List[Tuple[Any, ...]]:
+        return await self.db.fetchall(
+            """
+            SELECT token_address, action, amount, timestamp
+            FROM trades
+            WHERE user_id = ?
+            ORDER BY timestamp DESC
+            LIMIT ?
+        """,
+            (user_id, limit),
+        )
+
+    async def store_secure_data(
+        self, user_id: str, encrypted_private_key: str, wallet_address: str, now: str
+    ):
+        await self.db.execute(
+            """
+            REPLACE INTO secure_data (user_id, encrypted_private_key, wallet_address, created_at)
+            VALUES (?, ?, ?, ?)
+        """,
+            (user_id, encrypted_private_key, wallet_address, now),
+        )
+
+    async def get_secure_data(self, user_id: str) -> Optional[Tuple[str, str]]:
+        result = await self.db.fetchone(
+            """
+            SELECT encrypted_private_key, wallet_address
+            FROM secure_data
+            WHERE user_id = ?
+        """,
+            (user_id,),
+        )
+        return (result[0], result[1]) if result else None
+
+    async def delete_expired_chunk(self, table: str, cutoff: str, limit: int) -> int:
+        column = _retention_column(table)
+        # One small writer op per chunk, so queued writes interleave between chunks
+        return await self.db.execute(
+            f"""
+            DELETE FROM {table} WHERE rowid IN (
+                SELECT rowid FROM {table} WHERE {column} < ? LIMIT ?
+            )
+        """,
+            (cutoff, limit),
+        )
+
+    async def get_counts(self) -> Tuple[int, int, int, int]:
+        result = await self.db.fetchone(
+            """
+            SELECT
+                (SELECT COUNT(*) FROM sessions),
+                (SELECT COUNT(*) FROM preferences),
+                (SELECT COUNT(*) FROM trades),
+                (SELECT COUNT(*) FROM secure_data)
+        """
+        )
+        return tuple(result) if result else (0, 0, 0, 0)  # type: ignore[return-value]
+
+    async def get_size_bytes(self) -> Optional[int]:
+        if not os.path.exists(self.db_path):
+            return None
+        return os.path.getsize(self.db_path)
+
+    async def vacuum(self):
+        await self.db.vacuum()
+
+    async def reclaim_space(self, pages: int = 0) -> Dict[str, Any]:
+        return await self.db.incremental_vacuum(pages)
+
+    async def checkpoint(self) -> Dict[str, Any]:
+        return await self.db.wal_checkpoint("TRUNCATE")
+
+    async def enable_incremental_vacuum(self) -> bool:
+        return await self.db.enable_incremental_vacuum()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, **self.db.get_stats()}
+
+
+class PostgresBackend(StorageBackend):
+    """PostgreSQL store on an asyncpg connection pool.
+
+    Queries are fixed strings, so asyncpg prepares each one once per pooled
+    connection and reuses it from its statement cache. Bulk trade inserts use
+    the binary COPY protocol.
+    """
+
+    name = "postgres"
+
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        schema: str = "sam",
+        statement_cache_size: int = 128,
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+            dsn: postgres:// connection URL
+            min_size: Minimum pooled connections
+            max_size: Maximum pooled connections
+            schema: Schema holding the SAM tables (kept apart from other app tables)
+            statement_cache_size: Prepared statements cached per connection
+        """
+        if not schema.isidentifier():
+            raise ValueError(f"Invalid schema name: {schema}")
+
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.schema = schema
+        self.statement_cache_size = statement_cache_size
+        self._pool: Any = None
+
+        # Metrics
+        self.copy_batches = 0
+        self.copy_rows = 0
+
+    @property
+    def location(self) -> str:
+        # Hide credentials
+        head, sep, tail = self.dsn.rpartition("@")
+        if not sep:
+            return self.dsn
+        scheme = head.split("://", 1)[0]
+        return f"{scheme}://***@{tail}"
+
+    @property
+    def pool(self) -> Any:
+        if self._pool is None:
+            raise RuntimeError("PostgresBackend is not initialized")
+        return self._pool
+
+    async def initialize(self):
+        if self._pool is None:
+            try:
+                import asyncpg
+            except ImportError as e:
+                raise RuntimeError(
+                    "asyncpg is required for PostgreSQL storage (pip install asyncpg)"
+                ) from e
+
+            self._pool = await asyncpg.create_pool(
+                self.dsn,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                statement_cache_size=self.statement_cache_size,
+                server_settings={"search_path": self.schema},
+            )
+            logger.info(f"Opened PostgreSQL pool: {self.location}")
+
+        s = self.schema
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(f"CREATE SCHEMA IF NOT EXISTS {s}")
+                await conn.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {s}.sessions (
+                        session_id TEXT PRIMARY KEY,
+                        messages TEXT NOT NULL,
+                        created_at TEXT NOT NULL,
+                        updated_at TEXT NOT NULL
+                    )
+                    """
+                )
+                await conn.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {s}.preferences (
+                        user_id TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        created_at TEXT NOT NULL,
+                        PRIMARY KEY (user_id, key)
+                    )
+                    """
+                )
+                await conn.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {s}.trades (
+                        id BIGSERIAL PRIMARY KEY,
+                        user_id TEXT NOT NULL,
+                        token_address TEXT NOT NULL,
+                        action TEXT NOT NULL,
+                        amount DOUBLE PRECISION NOT NULL,
+                        timestamp TEXT NOT NULL
+                    )
+                    """
+                )
+                await conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_trades_user_ts "
+                    f"ON {s}.trades (user_id, timestamp DESC)"
+                )
+                await conn.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {s}.secure_data (
+                        user_id TEXT PRIMARY KEY,
+                        encrypted_private_key TEXT NOT NULL,
+                        wallet_address TEXT NOT NULL,
+                        created_at TEXT NOT NULL
+                    )
+                    """
+                )
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+            logger.info(f"Closed PostgreSQL pool: {self.location}")
+
+    @staticmethod
+    def _rowcount(status: str) -> int:
+        """Parse the row count from a command tag such as 'DELETE 3'."""
+        try:
+            return int(status.rsplit(" ", 1)[-1])
+        except (ValueError, AttributeError):
+            return 0
+
+    async def save_session(self, session_id: str, messages_json: str, now: str):
+        await self.pool.execute(
+            f"""
+            INSERT INTO {self.schema}.sessions (session_id, messages, created_at, updated_at)
+            VALUES ($1, $2, $3, $3)
+            ON CONFLICT (session_id) DO UPDATE SET
+                messages = EXCLUDED.messages,
+                updated_at = EXCLUDED.updated_at
+        """,
+            session_id,
+            messages_json,
+            now,
+        )
+
+    async def load_session(self, session_id: str) -> Optional[str]:
+        return await self.pool.fetchval(
+            f"SELECT messages FROM {self.schema}.sessions WHERE session_id = $1", session_id
+        )
+
+    async def delete_session(self, session_id: str) -> int:
+        status = await self.pool.execute(
+            f"DELETE FROM {self.schema}.sessions WHERE session_id = $1", session_id
+        )
+        return self._rowcount(status)
+
+    async def save_preference(self, user_id: str, key: str, value: str, now: str):
+        await self.pool.execute(
+            f"""
+            INSERT INTO {self.schema}.preferences (user_id, key, value, created_at)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (user_id, key) DO UPDATE SET
+                value = EXCLUDED.value,
+                created_at = EXCLUDED.created_at
+        """,
+            user_id,
+            key,
+            value,
+            now,
+        )
+
+    async def get_preference(self, user_id: str, key: str) -> Optional[str]:
+        return await self.pool.fetchval(
+            f"SELECT value FROM {self.schema}.preferences WHERE user_id = $1 AND key = $2",
+            user_id,
+            key,
+        )
+
+    async def save_trades(self, rows: Sequence[TradeRow]) -> int:
+        if not rows:
+            return 0
+        async with self.pool.acquire() as conn:
+            await conn.copy_records_to_table(
+                "trades",
+                records=[(u, t, a, float(amt), ts) for u, t, a, amt, ts in rows],
+                columns=TRADE_COLUMNS,
+                schema_name=self.schema,
+            )
+        self.copy_batches += 1
+        self.copy_rows += len(rows)
+        return len(rows)
+
+    async def get_trades(self, user_id: str, limit: int) -> List[Tuple[Any, ...]]:
+        records = await self.pool.fetch(
+            f"""
+            SELECT token_address, action, amount, timestamp
+            FROM {self.schema}.trades
+            WHERE user_id = $1
+            ORDER BY timestamp DESC
+            LIMIT $2
+        """,
+            user_id,
+            limit,
+        )
+        return [tuple(r) for r in records]
+
+    async def store_secure_data(
+        self, user_id: str, encrypted_private_key: str, wallet_address: str, now: str
+    ):
+        await self.pool.execute(
+            f"""
+            INSERT INTO {self.schema}.secure_data
+                (user_id, encrypted_private_key, wallet_address, created_at)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (user_id) DO UPDATE SET
+                encrypted_private_key = EXCLUDED.encrypted_private_key,
+                wallet_address = EXCLUDED.wallet_address,
+                created_at = EXCLUDED.created_at
+        """,
+            user_id,
+            encrypted_private_key,
+            wallet_address,
+            now,
+        )
+
+    async def get_secure_data(self, user_id: str) -> Optional[Tuple[str, str]]:
+        record = await self.pool.fetchrow(
+            f"""
+            SELECT encrypted_private_key, wallet_address
+            FROM {self.schema}.secure_data
+            WHERE user_id = $1
+        """,
+            user_id,
+        )
+        return (record[0], record[1]) if record else None
+
+    async def delete_expired_chunk(self, table: str, cutoff: str, limit: int) -> int:
+        column = _retention_column(table)
+        status = await self.pool.execute(
+            f"""
+            DELETE FROM {self.schema}.{table} WHERE ctid IN (
+                SELECT ctid FROM {self.schema}.{table} WHERE {column} < $1 LIMIT $2
+            )
+        """,
+            cutoff,
+            limit,
+        )
+        return self._rowcount(status)
+
+    async def get_counts(self) -> Tuple[int, int, int, int]:
+        s = self.schema
+        record = await self.pool.fetchrow(
+            f"""
+            SELECT
+                (SELECT COUNT(*) FROM {s}.sessions),
+                (SELECT COUNT(*) FROM {s}.preferences),
+                (SELECT COUNT(*) FROM {s}.trades),
+                (SELECT COUNT(*) FROM {s}.secure_data)
+        """
+        )
+        return tuple(int(v) for v in record) if record else (0, 0, 0, 0)  # type: ignore[return-value]
+
+    async def get_size_bytes(self) -> Optional[int]:
+        return await self.pool.fetchval(
+            """
+            SELECT COALESCE(SUM(pg_total_relation_size(c.oid)), 0)::BIGINT
+            FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = $1 AND c.relkind = 'r'
+        """,
+            self.schema,
+        )
+
+    async def vacuum(self):
+        # VACUUM cannot run inside a transaction block; pool.execute runs it bare
+        for table in ("sessions", "preferences", "trades", "secure_data"):
+            await self.pool.execute(f"VACUUM ANALYZE {self.schema}.{table}")
+
+    async def reclaim_space(self, pages: int = 0) -> Dict[str, Any]:
+        # Plain VACUUM does not take exclusive locks, so it is already incremental
+        for table in RETENTION_COLUMNS:
+            await self.pool.execute(f"VACUUM {self.schema}.{table}")
+        return {"vacuumed_tables": len(RETENTION_COLUMNS)}
+
+    async def checkpoint(self) -> Dict[str, Any]:
+        # The server schedules its own checkpoints
+        return {}
+
+    async def enable_incremental_vacuum(self) -> bool:
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "backend": self.name,
+            "location": self.location,
+            "copy_batches": self.copy_batches,
+            "copy_rows": self.copy_rows,
+        }
+        if self._pool is not None:
+            stats["pool_size"] = self._pool.get_size()
+            stats["pool_idle"] = self._pool.get_idle_size()
+            stats["pool_max_size"] = self._pool.get_max_size()
+        return stats
+
+
+def create_storage_backend(db_path: str, db_url: Optional[str] = None) -> StorageBackend:
+    """Create the backend selected by db_url, falling back to SQLite at db_path."""
+    if db_url:
+        if db_url.startswith(POSTGRES_SCHEMES):
+            return PostgresBackend(db_url)
+        if db_url.startswith("sqlite:///"):
+            return SQLiteBackend(db_url[len("sqlite:///") :])
+        raise ValueError(f"Unsupported SAM_DB_URL scheme: {db_url.split('://', 1)[0]}")
+    return SQLiteBackend(db_path)
+
+
+# Shared backends keyed by location so every MemoryManager reuses one pool
+_backends: Dict[str, StorageBackend] = {}
+
+
+def get_storage_backend(db_path: str, db_url: Optional[str] = None) -> StorageBackend:
+    """Get the shared backend for a database path or URL."""
+    key = db_url or os.path.abspath(db_path)
+    backend = _backends.get(key)
+    if backend is None:
+        backend = create_storage_backend(db_path, db_url)
+        _backends[key] = backend
+    return backend
+
+
+async def cleanup_storage_backends():
+    """Close all shared storage backends."""
+    backends = list(_backends.values())
+    _backends.clear()
+    for backend in backends:
+        try:
+            await backend.close()
+        except Exception as e:
+            logger.warning(f"Error closing {backend.name} backend: {e}")
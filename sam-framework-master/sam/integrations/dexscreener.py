@@ -1,23 +1,60 @@
 from dexscreener import DexscreenerClient
 import logging
 import asyncio
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable
 
 from ..core.tools import Tool, ToolSpec
+from ..utils.decorators import wait_for_upstream
+from ..utils.rate_limiter import declare_upstream_quota
+from ..utils.token_metadata import get_token_metadata_store
 
 logger = logging.getLogger(__name__)
 
+# DexScreener allows 300 requests per minute on its pair endpoints
+DEXSCREENER_API = declare_upstream_quota("dexscreener_api", requests=300, window=60, burst=20)
+
 
 class DexScreenerTools:
     def __init__(self):
         self.client = DexscreenerClient()
         logger.info("Initialized DexScreener client")
 
+    async def _fetch(self, method: Callable, *args: Any) -> Any:
+        """Run a synchronous client call in a thread once the DexScreener quota allows it."""
+        allowed, info = await wait_for_upstream(DEXSCREENER_API)
+        if not allowed:
+            raise RuntimeError(
+                f"DexScreener is busy. Please wait {info.get('retry_after', 0):.0f} seconds."
+            )
+        return await asyncio.to_thread(method, *args)
+
+    async def _add_token_metadata(self, pairs: List[Dict[str, Any]]):
+        """Add decimals and image to Solana pair tokens from the shared metadata cache."""
+        store = get_token_metadata_store()
+        tokens = [
+            pair[side]
+            for pair in pairs
+            if pair.get("chain_id") == "solana"
+            for side in ("base_token", "quote_token")
+        ]
+        if store is None or not tokens:
+            return
+        try:
+            metadata = await store.get_many(token["address"] for token in tokens)
+        except Exception as e:
+            logger.debug(f"Token metadata unavailable for pairs: {e}")
+            return
+        for token in tokens:
+            info = metadata.get(token["address"])
+            if info:
+                token["decimals"] = info["decimals"]
+                token["image"] = info["image"]
+
     async def search_pairs(self, query: str) -> Dict[str, Any]:
         """Search for trading pairs by query."""
         try:
             # Run synchronous client in thread to avoid blocking event loop
-            results = await asyncio.to_thread(self.client.search_pairs, query)
+            results = await self._fetch(self.client.search_pairs, query)
 
             # DexScreener client returns a list of TokenPair objects
             if not isinstance(results, list):
@@ -50,6 +87,7 @@ class DexScreenerTools:
                     }
                 )
 
+            await self._add_token_metadata(pairs)
             logger.info(f"Found {len(pairs)} pairs for query: {query}")
             return {"query": query, "pairs": pairs, "total_pairs": len(pairs)}
 
@@ -61,7 +99,7 @@ class DexScreenerTools:
         """Get all trading pairs for a specific token."""
         try:
             # Run synchronous client in thread to avoid blocking event loop
-            results = await asyncio.to_thread(self.client.get_token_pairs, token_address)
+            results = await self._fetch(self.client.get_token_pairs, token_address)
 
             # DexScreener client returns a list of TokenPair objects
             if not isinstance(results, list):
@@ -94,6 +132,7 @@ class DexScreenerTools:
                     }
                 )
 
+            await self._add_token_metadata(pairs)
             logger.info(f"Found {len(pairs)} pairs for token: {token_address}")
             return {"token_address": token_address, "pairs": pairs, "total_pairs": len(pairs)}
 
@@ -105,7 +144,7 @@ class DexScreenerTools:
         """Get detailed information for a specific Solana pair."""
         try:
             # Run synchronous client in thread to avoid blocking event loop
-            results = await asyncio.to_thread(self.client.get_token_pair, "solana", pair_address)
+            results = await self._fetch(self.client.get_token_pair, "solana", pair_address)
 
             if not results:
                 return {"error": "Pair not found"}
@@ -207,7 +246,7 @@ class DexScreenerTools:
 
             for token in popular_tokens:
                 try:
-                    results = await asyncio.to_thread(self.client.search_pairs, f"{token} {chain}")
+                    results = await self._fetch(self.client.search_pairs, f"{token} {chain}")
                     if results:  # results is a list of TokenPair objects
                         all_pairs.extend(results[:5])  # Take top 5 for each
                 except Exception as e:
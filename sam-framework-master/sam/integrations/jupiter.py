@@ -1,19 +1,125 @@
 import aiohttp
+import asyncio
+import itertools
 import logging
-from typing import Dict, Any, List
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 import base64
 
+from solders.transaction import VersionedTransaction
+
 from ..core.tools import Tool, ToolSpec
-from ..utils.decorators import rate_limit, retry_with_backoff, log_execution
+from ..utils.decorators import rate_limit, retry_with_backoff, log_execution, throttle
 from ..utils.http_client import get_session
+from ..utils.http_cache import cached_get
+from ..utils.priority_fees import PriorityFeeEstimator, get_priority_fee_estimator
+from ..utils.rate_limiter import declare_upstream_quota
 
 logger = logging.getLogger(__name__)
 
+# Jupiter's public API allows 60 requests per minute
+JUPITER_API = declare_upstream_quota("jupiter_api", requests=60, window=60, burst=10)
+# maxLamports floor (and the cap used before any fee samples exist)
+DEFAULT_MAX_PRIORITY_LAMPORTS = 1000
+# Typical compute units of a routed swap
+SWAP_COMPUTE_UNITS = 300_000
+# Our levels mapped onto Jupiter's priorityLevel values
+JUPITER_PRIORITY_LEVELS = {
+    "low": "medium",
+    "medium": "medium",
+    "high": "high",
+    "very_high": "veryHigh",
+}
+# Amounts agreeing in this many significant digits share a cached quote
+QUOTE_AMOUNT_DIGITS = 3
+# Most quotes one compare_quotes call may request (Jupiter's burst allowance)
+MAX_COMPARED_QUOTES = 10
+
+QuoteKey = Tuple[str, str, int, int]
+
+
+def amount_bucket(amount: int, digits: int = QUOTE_AMOUNT_DIGITS) -> int:
+    """Round amount to `digits` significant digits."""
+    if amount <= 0:
+        return amount
+    scale = 10 ** max(len(str(amount)) - digits, 0)
+    return (amount + scale // 2) // scale * scale
+
+
+class QuoteCache:
+    """Short-lived quotes keyed by (input mint, output mint, amount bucket, slippage)."""
+
+    def __init__(self, ttl: float = 5.0, max_entries: int = 512):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[QuoteKey, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: QuoteKey, ttl: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        max_age = self.ttl if ttl is None else ttl
+        if entry is None or time.monotonic() - entry[1] >= max_age:
+            self._stats["misses"] += 1
+            return None
+        self._stats["hits"] += 1
+        return entry[0]
+
+    def put(self, key: QuoteKey, result: Dict[str, Any]):
+        self._entries[key] = (result, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "ttl": self.ttl, **self._stats}
+
+
+def _rescale(result: Dict[str, Any], amount: int) -> Dict[str, Any]:
+    """A quote for a nearby amount in the same bucket, scaled linearly to amount.
+
+    The result is an estimate only: Jupiter's raw quote (still for the quoted
+    amount) is removed so it can never be used to build a swap.
+    """
+    quoted = result["input_amount"]
+    if quoted == amount or not quoted:
+        return result
+    output = int(result["output_amount"]) * amount // quoted
+    return {
+        **result,
+        "quote": None,
+        "input_amount": amount,
+        "output_amount": str(output),
+        "quoted_amount": quoted,
+        "estimated": True,
+    }
+
 
 class JupiterTools:
-    def __init__(self, solana_tools=None):
+    def __init__(
+        self,
+        solana_tools=None,
+        fee_estimator: Optional[PriorityFeeEstimator] = None,
+        quote_ttl: float = 5.0,
+    ):
         self.base_url = "https://quote-api.jup.ag"
         self.solana_tools = solana_tools
+        self.fee_estimator = fee_estimator or get_priority_fee_estimator()
+        self.quote_cache = QuoteCache(ttl=quote_ttl)
+        self._inflight: Dict[QuoteKey, asyncio.Future] = {}
+
+    def _priority_fee_config(self, max_lamports: Optional[int]) -> Dict[str, Any]:
+        """priorityLevelWithMaxLamports sized from recent cluster fees."""
+        if self.fee_estimator is None:
+            level = "medium"
+            max_lamports = max_lamports or DEFAULT_MAX_PRIORITY_LAMPORTS
+        else:
+            level = JUPITER_PRIORITY_LEVELS[self.fee_estimator.level]
+            if max_lamports is None:
+                max_lamports = self.fee_estimator.estimate_lamports(
+                    SWAP_COMPUTE_UNITS, minimum=DEFAULT_MAX_PRIORITY_LAMPORTS
+                )
+        return {"priorityLevel": level, "maxLamports": max_lamports}
 
     async def close(self):
         """Close method for compatibility - shared client handles cleanup."""
@@ -23,11 +129,114 @@ class JupiterTools:
     @retry_with_backoff(max_retries=3)
     @log_execution()
     async def get_quote(
-        self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = 50
+        self,
+        input_mint: str,
+        output_mint: str,
+        amount: int,
+        slippage_bps: int = 50,
+        cache_ttl: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Get a swap quote from Jupiter (cache_ttl=0 forces a fresh quote)."""
+        return await self.quote(input_mint, output_mint, amount, slippage_bps, cache_ttl)
+
+    async def quote(
+        self,
+        input_mint: str,
+        output_mint: str,
+        amount: int,
+        slippage_bps: int,
+        cache_ttl: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Quote from the cache, a fetch already in flight for the same bucket, or Jupiter."""
+        if cache_ttl == 0:
+            return await self._fetch_quote(input_mint, output_mint, amount, slippage_bps, 0)
+
+        key = (input_mint, output_mint, amount_bucket(amount), slippage_bps)
+        cached = self.quote_cache.get(key, cache_ttl)
+        if cached is not None:
+            return {**_rescale(cached, amount), "cached": True}
+
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(
+                self._fetch_quote(input_mint, output_mint, amount, slippage_bps, cache_ttl)
+            )
+            self._inflight[key] = inflight
+
+            def finish(future: asyncio.Future):
+                self._inflight.pop(key, None)
+                if not future.cancelled() and future.exception() is None:
+                    if "error" not in future.result():
+                        self.quote_cache.put(key, future.result())
+
+            inflight.add_done_callback(finish)
+        result = await asyncio.shield(inflight)
+        return result if "error" in result else _rescale(result, amount)
+
+    @rate_limit("jupiter")
+    @log_execution()
+    async def compare_quotes(
+        self,
+        input_mint: str,
+        output_mint: str,
+        amounts: Sequence[int],
+        slippage_bps: Sequence[int] = (50,),
+    ) -> Dict[str, Any]:
+        """Quote every (amount, slippage) combination concurrently to compare price impact.
+
+        Fetches are paced by the Jupiter quota; cached buckets cost nothing.
+        """
+        combos = list(itertools.product(dict.fromkeys(amounts), dict.fromkeys(slippage_bps)))
+        if not combos:
+            return {"error": "Provide at least one amount"}
+        if len(combos) > MAX_COMPARED_QUOTES:
+            return {
+                "error": f"At most {MAX_COMPARED_QUOTES} amount/slippage combinations per call"
+            }
+
+        results = await asyncio.gather(
+            *(self.quote(input_mint, output_mint, a, s) for a, s in combos)
+        )
+
+        quotes = []
+        for (amount, slippage), result in zip(combos, results):
+            entry: Dict[str, Any] = {"amount": amount, "slippage_bps": slippage}
+            if "error" in result:
+                entry["error"] = result["error"]
+            else:
+                output = int(result["output_amount"])
+                entry.update(
+                    {
+                        "output_amount": output,
+                        "price": output / amount if amount else 0.0,
+                        "price_impact_pct": float(result.get("price_impact_pct") or 0),
+                        # ExactIn: what the swap guarantees after slippage
+                        "min_output_amount": output * (10_000 - slippage) // 10_000,
+                        "cached": result.get("cached", False),
+                    }
+                )
+            quotes.append(entry)
+
+        priced = [q for q in quotes if "price" in q]
+        best = max(priced, key=lambda q: q["price"]) if priced else None
+        return {
+            "input_mint": input_mint,
+            "output_mint": output_mint,
+            "quotes": quotes,
+            "best_price_amount": best["amount"] if best else None,
+        }
+
+    @throttle(JUPITER_API)
+    async def _fetch_quote(
+        self,
+        input_mint: str,
+        output_mint: str,
+        amount: int,
+        slippage_bps: int,
+        cache_ttl: Optional[float] = None,
     ) -> Dict[str, Any]:
-        """Get a swap quote from Jupiter."""
         try:
-            session = await get_session()
+            session = await get_session("trading")
 
             params = {
                 "inputMint": input_mint,
@@ -37,7 +246,9 @@ class JupiterTools:
                 "swapMode": "ExactIn",
             }
 
-            async with session.get(f"{self.base_url}/v6/quote", params=params) as response:
+            async with cached_get(
+                session, f"{self.base_url}/v6/quote", params=params, ttl=cache_ttl
+            ) as response:
                 if response.status != 200:
                     error_text = await response.text()
                     logger.error(f"Jupiter quote API error {response.status}: {error_text}")
@@ -65,21 +276,25 @@ class JupiterTools:
             logger.error(f"Unexpected error getting quote: {e}")
             return {"error": str(e)}
 
+    @throttle(JUPITER_API)
     async def create_swap_transaction(
-        self, user_public_key: str, quote_response: Dict[str, Any], priority_fee: int = 1000
+        self,
+        user_public_key: str,
+        quote_response: Dict[str, Any],
+        priority_fee: Optional[int] = None,
     ) -> Dict[str, Any]:
-        """Create a swap transaction from a quote."""
+        """Create a swap transaction from a quote.
+
+        priority_fee caps the priority fee in lamports; by default it follows recent fees.
+        """
         try:
-            session = await get_session()
+            session = await get_session("trading")
 
             payload = {
                 "userPublicKey": user_public_key,
                 "quoteResponse": quote_response,
                 "config": {
-                    "priorityLevelWithMaxLamports": {
-                        "priorityLevel": "medium",
-                        "maxLamports": priority_fee,
-                    },
+                    "priorityLevelWithMaxLamports": self._priority_fee_config(priority_fee),
                     "dynamicComputeUnitLimit": True,
                     "dynamicSlippage": {"maxBps": 300},
                 },
@@ -137,6 +352,36 @@ class JupiterTools:
             logger.error(f"Unexpected error creating swap: {e}")
             return {"error": str(e)}
 
+    async def sign_swap(self, quote_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the swap transaction for a quote and sign it with the configured wallet.
+
+        Returns {"transaction", "last_valid_block_height", "priority_fee_lamports"}
+        or an error dict; nothing is sent.
+        """
+        if not self.solana_tools or not self.solana_tools.keypair:
+            return {"error": "No Solana wallet configured for swaps"}
+        if not quote_result.get("quote"):
+            return {"error": "Quote is an estimate for a nearby amount; get a fresh quote to swap"}
+
+        user_public_key = str(self.solana_tools.keypair.pubkey())
+        swap_result = await self.create_swap_transaction(user_public_key, quote_result["quote"])
+        if "error" in swap_result:
+            return swap_result
+        if not swap_result.get("transaction"):
+            return {"error": "No transaction data received from Jupiter"}
+
+        try:
+            unsigned = VersionedTransaction.from_bytes(base64.b64decode(swap_result["transaction"]))
+            signed = VersionedTransaction(unsigned.message, [self.solana_tools.keypair])
+        except Exception as e:
+            logger.error(f"Failed to sign swap transaction: {e}")
+            return {"error": f"Swap failed: {str(e)}"}
+        return {
+            "transaction": signed,
+            "last_valid_block_height": swap_result.get("last_valid_block_height"),
+            "priority_fee_lamports": swap_result.get("priority_fee_lamports", 0),
+        }
+
     async def execute_swap(
         self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = 50
     ) -> Dict[str, Any]:
@@ -145,57 +390,38 @@ class JupiterTools:
             return {"error": "No Solana wallet configured for swaps"}
 
         try:
-            # Get quote
-            quote_result = await self.get_quote(input_mint, output_mint, amount, slippage_bps)
+            # Get a fresh quote; never execute against a cached one
+            quote_result = await self.get_quote(
+                input_mint, output_mint, amount, slippage_bps, cache_ttl=0
+            )
             if "error" in quote_result:
                 return quote_result
 
-            # Create swap transaction
-            user_public_key = str(self.solana_tools.keypair.pubkey())
-            swap_result = await self.create_swap_transaction(user_public_key, quote_result["quote"])
-
-            if "error" in swap_result:
-                return swap_result
-
-            if not swap_result.get("transaction"):
-                return {"error": "No transaction data received from Jupiter"}
+            signed = await self.sign_swap(quote_result)
+            if "error" in signed:
+                return signed
 
-            # Deserialize and sign the transaction
-            transaction_data = base64.b64decode(swap_result["transaction"])
-
-            # Parse the transaction
             try:
-                # Import solders for transaction handling
-                from solders.transaction import VersionedTransaction
-
-                # Deserialize the versioned transaction
-                versioned_tx = VersionedTransaction.from_bytes(transaction_data)
-
-                # Create a new signed transaction with the keypair
-                signed_tx = VersionedTransaction(versioned_tx.message, [self.solana_tools.keypair])
-
-                # Send the transaction to Solana
-                from solana.rpc.types import TxOpts
-
-                tx_hash = await self.solana_tools.client.send_transaction(
-                    signed_tx, opts=TxOpts(skip_preflight=False, max_retries=3)
+                # Send the transaction; confirmation is tracked in the background
+                pending = await self.solana_tools.submit_transaction(
+                    signed["transaction"], signed["last_valid_block_height"], max_retries=3
                 )
-
-                logger.info(f"Swap transaction executed successfully: {tx_hash}")
-
-                return {
-                    "success": True,
-                    "input_mint": input_mint,
-                    "output_mint": output_mint,
-                    "input_amount": amount,
-                    "expected_output_amount": quote_result.get("output_amount", 0),
-                    "price_impact_pct": quote_result.get("price_impact_pct", 0),
-                    "transaction_id": str(tx_hash),
-                }
-
-            except Exception as sign_error:
-                logger.error(f"Failed to execute swap transaction: {sign_error}")
-                return {"error": f"Swap failed: {str(sign_error)}"}
+            except Exception as send_error:
+                logger.error(f"Failed to execute swap transaction: {send_error}")
+                return {"error": f"Swap failed: {str(send_error)}"}
+
+            logger.info(f"Swap transaction executed successfully: {pending.signature}")
+
+            return {
+                "success": True,
+                "input_mint": input_mint,
+                "output_mint": output_mint,
+                "input_amount": amount,
+                "expected_output_amount": quote_result.get("output_amount", 0),
+                "price_impact_pct": quote_result.get("price_impact_pct", 0),
+                "transaction_id": pending.signature,
+                "status": pending.status,
+            }
 
         except Exception as e:
             logger.error(f"Swap execution failed: {e}")
@@ -221,6 +447,14 @@ def create_jupiter_tools(jupiter_tools: JupiterTools) -> List[Tool]:
 
         return await jupiter_tools.execute_swap(input_mint, output_mint, amount, slippage_bps)
 
+    async def handle_compare_quotes(args: Dict[str, Any]) -> Dict[str, Any]:
+        input_mint = args.get("input_mint", "")
+        output_mint = args.get("output_mint", "")
+        amounts = [int(a) for a in args.get("amounts", [])]
+        slippage_bps = [int(s) for s in args.get("slippage_bps", [50])]
+
+        return await jupiter_tools.compare_quotes(input_mint, output_mint, amounts, slippage_bps)
+
     tools = [
         Tool(
             spec=ToolSpec(
@@ -294,6 +528,42 @@ def create_jupiter_tools(jupiter_tools: JupiterTools) -> List[Tool]:
             ),
             handler=handle_jupiter_swap,
         ),
+        Tool(
+            spec=ToolSpec(
+                name="compare_quotes",
+                description="Compare Jupiter quotes for several amounts or slippage settings in one call, e.g. to show price impact across trade sizes",
+                input_schema={
+                    "name": "compare_quotes",
+                    "description": "Compare Jupiter quotes across amounts and slippage",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "input_mint": {
+                                "type": "string",
+                                "description": "Input token mint address",
+                            },
+                            "output_mint": {
+                                "type": "string",
+                                "description": "Output token mint address",
+                            },
+                            "amounts": {
+                                "type": "array",
+                                "items": {"type": "integer"},
+                                "description": "Input amounts in the token's smallest unit",
+                                "minItems": 1,
+                            },
+                            "slippage_bps": {
+                                "type": "array",
+                                "items": {"type": "integer", "minimum": 1, "maximum": 1000},
+                                "description": "Slippage tolerances in basis points (default: [50])",
+                            },
+                        },
+                        "required": ["input_mint", "output_mint", "amounts"],
+                    },
+                },
+            ),
+            handler=handle_compare_quotes,
+        ),
     ]
 
     return tools
@@ -0,0 +1,169 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..core.tools import Tool, ToolSpec
+from ..utils.indicators import IndicatorState
+from ..utils.price_service import get_price_service
+from ..utils.tick_store import TickStore, get_tick_store, interval_seconds
+
+logger = logging.getLogger(__name__)
+
+MAX_SYMBOLS = 500
+# Indicator states kept across calls, one per (mint, interval)
+MAX_STATES = 2 * MAX_SYMBOLS
+
+
+def _closed(candles: np.ndarray, seconds: float, now: float) -> np.ndarray:
+    """Drop the still-forming candle, whose bucket has not ended yet."""
+    return candles[candles["ts"] + seconds <= now]
+
+
+class MarketAnalysisTools:
+    """Technical indicators over locally recorded price history.
+
+    Each (mint, interval) keeps an IndicatorState. It is seeded once from the
+    stored candles and then advanced only by candles that closed since the
+    last call, so repeat analyses cost O(1) per new candle.
+    """
+
+    def __init__(self, tick_store: Optional[TickStore] = None):
+        self._tick_store = tick_store
+        self._states: "OrderedDict[Tuple[str, float], IndicatorState]" = OrderedDict()
+        self._states_store: Optional[TickStore] = None
+
+    @property
+    def tick_store(self) -> Optional[TickStore]:
+        return self._tick_store or get_tick_store()
+
+    async def _resolve(self, tokens: List[str]) -> Dict[str, str]:
+        """Map symbols like "SOL" to mint addresses; anything else is used as-is."""
+        common = (await get_price_service()).COMMON_TOKENS
+        return {token: common.get(token.upper(), token) for token in tokens}
+
+    def _state(
+        self, store: TickStore, mint: str, seconds: float, limit: int, now: float
+    ) -> IndicatorState:
+        """Indicator state for mint brought up to the last closed candle."""
+        if store is not self._states_store:
+            self._states.clear()
+            self._states_store = store
+        key = (mint, seconds)
+        state = self._states.get(key)
+        if state is None or state.last_ts is None:
+            candles = _closed(store.candles(mint, seconds), seconds, now)[-limit:]
+            state = self._states[key] = IndicatorState.from_candles(candles, interval=seconds)
+            if len(self._states) > MAX_STATES:
+                self._states.popitem(last=False)
+            return state
+
+        self._states.move_to_end(key)
+        since = state.last_ts + seconds
+        for candle in _closed(store.candles(mint, seconds, since=since), seconds, now):
+            state.update(
+                float(candle["ts"]),
+                float(candle["high"]),
+                float(candle["low"]),
+                float(candle["close"]),
+                float(candle["volume"]),
+            )
+        return state
+
+    async def analyze_market(
+        self, tokens: List[str], interval: str = "5m", limit: int = 200
+    ) -> Dict[str, Any]:
+        """Indicator summaries for each token from its closed candles.
+
+        limit bounds the candles a token's state is first seeded from.
+        """
+        store = self.tick_store
+        if store is None:
+            return {"error": "No price history recorded. Enable TICK_STORE_ENABLED to use this."}
+        if not tokens:
+            return {"error": "At least one token is required"}
+        if len(tokens) > MAX_SYMBOLS:
+            return {"error": f"At most {MAX_SYMBOLS} tokens per analysis"}
+        try:
+            seconds = interval_seconds(interval)
+        except ValueError as e:
+            return {"error": str(e)}
+
+        started = time.perf_counter()
+        now = time.time()
+        mints = await self._resolve(tokens)
+        results: Dict[str, Dict[str, Any]] = {}
+        for token, mint in mints.items():
+            state = self._state(store, mint, seconds, limit, now)
+            if state.count >= 2:
+                summary = state.summary()
+                # Recorded prices carry no volume, so VWAP would always be empty
+                summary.pop("vwap", None)
+                results[token] = summary
+        insufficient = [token for token in tokens if token not in results]
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.debug(f"Analyzed {len(results)} tokens in {elapsed_ms:.1f}ms")
+        return {
+            "interval": interval,
+            "analysis": results,
+            "insufficient_history": insufficient,
+            "elapsed_ms": round(elapsed_ms, 2),
+        }
+
+
+def create_market_analysis_tools(analysis_tools: MarketAnalysisTools) -> List[Tool]:
+    """Create market analysis tool instances."""
+
+    async def handle_analyze_market(args: Dict[str, Any]) -> Dict[str, Any]:
+        tokens = args.get("tokens") or []
+        if isinstance(tokens, str):
+            tokens = [t.strip() for t in tokens.split(",") if t.strip()]
+        return await analysis_tools.analyze_market(
+            tokens, args.get("interval", "5m"), int(args.get("limit", 200))
+        )
+
+    tools = [
+        Tool(
+            spec=ToolSpec(
+                name="analyze_market",
+                description=(
+                    "Technical indicators (SMA, EMA, RSI, MACD, Bollinger Bands, ATR, "
+                    "realized volatility) from recorded price history for one or more tokens"
+                ),
+                input_schema={
+                    "name": "analyze_market",
+                    "description": "Analyze token price action",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "tokens": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Token mint addresses or symbols (SOL, USDC, ...)",
+                            },
+                            "interval": {
+                                "type": "string",
+                                "description": "Candle interval",
+                                "enum": ["1m", "5m", "15m", "1h", "4h", "1d"],
+                                "default": "5m",
+                            },
+                            "limit": {
+                                "type": "integer",
+                                "description": "Most recent candles to start the analysis from",
+                                "default": 200,
+                                "minimum": 2,
+                                "maximum": 1000,
+                            },
+                        },
+                        "required": ["tokens"],
+                    },
+                },
+            ),
+            handler=handle_analyze_market,
+        ),
+    ]
+
+    return tools
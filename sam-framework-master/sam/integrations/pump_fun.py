@@ -1,21 +1,48 @@
 import aiohttp
 import logging
-from typing import Dict, Any, List
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
 
 from ..core.tools import Tool, ToolSpec
 from ..utils.validators import validate_tool_input
 from ..utils.decorators import rate_limit, retry_with_backoff, log_execution
 from ..utils.http_client import get_session
+from ..utils.http_cache import cached_get
 from ..utils.error_messages import handle_error_gracefully
 from ..utils.transaction_validator import validate_pump_buy, validate_pump_sell
+from ..utils.priority_fees import PriorityFeeEstimator, get_priority_fee_estimator
+from ..utils.trade_tape import TradeTapeStore, get_trade_tape
+from ..utils.tx_pipeline import prepare
 
 logger = logging.getLogger(__name__)
 
+# Floor (and the fee used before any fee samples exist), in SOL
+DEFAULT_PRIORITY_FEE = 0.00001
+# Typical compute units of a bonding-curve buy or sell
+PUMP_FUN_COMPUTE_UNITS = 100_000
+# Default window for get_token_flow, in seconds
+DEFAULT_FLOW_WINDOW = 300
+
 
 class PumpFunTools:
-    def __init__(self, solana_tools=None):
+    def __init__(
+        self,
+        solana_tools=None,
+        fee_estimator: Optional[PriorityFeeEstimator] = None,
+        trade_tape: Optional[TradeTapeStore] = None,
+    ):
         self.base_url = "https://pumpportal.fun/api"
         self.solana_tools = solana_tools  # For transaction signing and sending
+        self.fee_estimator = fee_estimator or get_priority_fee_estimator()
+        self.trade_tape = trade_tape or get_trade_tape()
+
+    def _priority_fee(self) -> float:
+        """priorityFee (SOL) for a trade, from recent fees paid around pump.fun."""
+        if self.fee_estimator is None:
+            return DEFAULT_PRIORITY_FEE
+        lamports = self.fee_estimator.estimate_lamports(
+            PUMP_FUN_COMPUTE_UNITS, scope="pump_fun", minimum=int(DEFAULT_PRIORITY_FEE * 1e9)
+        )
+        return lamports / 1e9
 
     async def close(self):
         """Close method for compatibility - shared client handles cleanup."""
@@ -42,12 +69,10 @@ class PumpFunTools:
             signed_tx = VersionedTransaction(versioned_tx.message, [self.solana_tools.keypair])
 
             # Send the transaction to Solana with optimized settings
-            from solana.rpc.types import TxOpts
-
             # Try sending with skip preflight first for better success rate on pump.fun
             try:
-                result = await self.solana_tools.client.send_transaction(
-                    signed_tx, opts=TxOpts(skip_preflight=True, max_retries=2)
+                tx_signature = await self.solana_tools.send_transaction(
+                    signed_tx, skip_preflight=True, max_retries=2
                 )
             except Exception as first_attempt_error:
                 error_msg = str(first_attempt_error)
@@ -61,12 +86,11 @@ class PumpFunTools:
                         f"Preflight skip failed, retrying with preflight: {first_attempt_error}"
                     )
                     # If that fails, try with preflight enabled
-                    result = await self.solana_tools.client.send_transaction(
-                        signed_tx, opts=TxOpts(skip_preflight=False, max_retries=1)
+                    tx_signature = await self.solana_tools.send_transaction(
+                        signed_tx, skip_preflight=False, max_retries=1
                     )
 
-            if result.value:
-                tx_signature = str(result.value)
+            if tx_signature:
                 logger.info(f"Pump.fun {action} transaction executed successfully: {tx_signature}")
 
                 return {"success": True, "transaction_id": tx_signature, "action": action}
@@ -79,13 +103,28 @@ class PumpFunTools:
             return {"error": f"Transaction failed: {str(e)}"}
 
     async def get_token_trades(self, mint: str, limit: int = 10) -> Dict[str, Any]:
-        """Get recent trades for a token."""
+        """Get recent trades for a token.
+
+        Served from the live trade tape once it holds limit trades for mint;
+        until then the REST API answers and the mint is subscribed on the tape.
+        """
+        if self.trade_tape is not None:
+            tape = self.trade_tape.tape(mint)
+            if tape is not None and tape.count >= limit:
+                trades = tape.recent(limit)
+                return {
+                    "mint": mint,
+                    "trades": trades,
+                    "total_trades": len(trades),
+                    "source": "tape",
+                }
+            self.trade_tape.track([mint])
         try:
-            session = await get_session()
+            session = await get_session("market_data")
 
             params = {"mint": mint, "limit": str(limit)}
 
-            async with session.get(f"{self.base_url}/trades", params=params) as response:
+            async with cached_get(session, f"{self.base_url}/trades", params=params) as response:
                 if response.status != 200:
                     error_text = await response.text()
                     logger.error(f"Pump.fun API error {response.status}: {error_text}")
@@ -107,16 +146,55 @@ class PumpFunTools:
             logger.error(f"Unexpected error getting trades: {e}")
             return {"error": str(e)}
 
+    async def get_token_flow(
+        self, mint: str, window_seconds: Optional[float] = DEFAULT_FLOW_WINDOW
+    ) -> Dict[str, Any]:
+        """Volume, buy/sell ratio and unique traders for mint from the live trade tape."""
+        if self.trade_tape is None:
+            return {"error": "Live trade tape is not enabled (set PUMP_TRADE_FEED_URL)"}
+        tape = self.trade_tape.tape(mint)
+        if tape is None:
+            self.trade_tape.track([mint])
+            return {
+                "mint": mint,
+                "trades": 0,
+                "message": "Now streaming this token's trades; none recorded yet",
+            }
+        flow = tape.flow(window_seconds)
+        newest = tape.recent(1)[0]
+        return {"mint": mint, **flow, "last_trade_timestamp": newest["timestamp"]}
+
+    async def _fetch_trade_transaction(self, payload: Dict[str, Any]) -> Union[bytes, Dict]:
+        """Unsigned transaction bytes from pump.fun, or an error dict."""
+        session = await get_session("trading")
+        async with session.post(f"{self.base_url}/trade-local", json=payload) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                logger.error(
+                    f"{payload['action'].capitalize()} transaction creation failed "
+                    f"{response.status}: {error_text}"
+                )
+                return {"error": f"Transaction creation failed: {error_text}"}
+            # Response is raw transaction data
+            return await response.read()
+
     @rate_limit("pump_fun_buy", identifier_key="mint")
     @retry_with_backoff(max_retries=2)
     @log_execution()
     async def create_buy_transaction(
-        self, public_key: str, mint: str, amount: float, slippage: int = 1
+        self,
+        public_key: str,
+        mint: str,
+        amount: float,
+        slippage: int = 1,
+        check: Optional[Callable[[], Awaitable[Optional[Dict[str, Any]]]]] = None,
     ) -> Dict[str, Any]:
-        """Create a buy transaction for a token on pump.fun."""
-        try:
-            session = await get_session()
+        """Create a buy transaction for a token on pump.fun.
 
+        check runs concurrently with building the transaction; if it returns an
+        error dict the transaction is dropped unsigned and that error returned.
+        """
+        try:
             payload = {
                 "publicKey": public_key,
                 "action": "buy",
@@ -124,31 +202,32 @@ class PumpFunTools:
                 "denominatedInSol": True,
                 "amount": amount,
                 "slippage": slippage,
-                "priorityFee": 0.00001,
+                "priorityFee": self._priority_fee(),
             }
 
             logger.info(f"Creating buy transaction: {amount} SOL for {mint}")
 
-            async with session.post(f"{self.base_url}/trade-local", json=payload) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"Buy transaction creation failed {response.status}: {error_text}")
-                    return {"error": f"Transaction creation failed: {error_text}"}
-
-                # Response is raw transaction data
-                transaction_data = await response.read()
-                transaction_hex = transaction_data.hex()
+            if check is None:
+                check_error, transaction_data = None, await self._fetch_trade_transaction(payload)
+            else:
+                check_error, transaction_data = await prepare(
+                    check(), self._fetch_trade_transaction(payload)
+                )
+            if check_error:
+                return check_error
+            if isinstance(transaction_data, dict):
+                return transaction_data
 
-                logger.info(f"Buy transaction created successfully for {mint}")
+            logger.info(f"Buy transaction created successfully for {mint}")
 
-                # Sign and send the transaction automatically
-                sign_result = await self._sign_and_send_transaction(transaction_hex, "buy")
+            # Sign and send the transaction automatically
+            sign_result = await self._sign_and_send_transaction(transaction_data.hex(), "buy")
 
-                # Add transaction details to the result
-                if "success" in sign_result:
-                    sign_result.update({"mint": mint, "amount_sol": amount, "slippage": slippage})
+            # Add transaction details to the result
+            if "success" in sign_result:
+                sign_result.update({"mint": mint, "amount_sol": amount, "slippage": slippage})
 
-                return sign_result
+            return sign_result
 
         except aiohttp.ClientError as e:
             logger.error(f"Network error creating buy transaction: {e}")
@@ -165,8 +244,6 @@ class PumpFunTools:
     ) -> Dict[str, Any]:
         """Create a sell transaction for a token on pump.fun."""
         try:
-            session = await get_session()
-
             payload = {
                 "publicKey": public_key,
                 "action": "sell",
@@ -174,35 +251,25 @@ class PumpFunTools:
                 "denominatedInSol": False,
                 "amount": percentage,  # Percentage of holdings to sell
                 "slippage": slippage,
-                "priorityFee": 0.00001,
+                "priorityFee": self._priority_fee(),
             }
 
             logger.info(f"Creating sell transaction: {percentage}% of {mint}")
 
-            async with session.post(f"{self.base_url}/trade-local", json=payload) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(
-                        f"Sell transaction creation failed {response.status}: {error_text}"
-                    )
-                    return {"error": f"Transaction creation failed: {error_text}"}
-
-                # Response is raw transaction data
-                transaction_data = await response.read()
-                transaction_hex = transaction_data.hex()
+            transaction_data = await self._fetch_trade_transaction(payload)
+            if isinstance(transaction_data, dict):
+                return transaction_data
 
-                logger.info(f"Sell transaction created successfully for {mint}")
+            logger.info(f"Sell transaction created successfully for {mint}")
 
-                # Sign and send the transaction automatically
-                sign_result = await self._sign_and_send_transaction(transaction_hex, "sell")
+            # Sign and send the transaction automatically
+            sign_result = await self._sign_and_send_transaction(transaction_data.hex(), "sell")
 
-                # Add transaction details to the result
-                if "success" in sign_result:
-                    sign_result.update(
-                        {"mint": mint, "percentage": percentage, "slippage": slippage}
-                    )
+            # Add transaction details to the result
+            if "success" in sign_result:
+                sign_result.update({"mint": mint, "percentage": percentage, "slippage": slippage})
 
-                return sign_result
+            return sign_result
 
         except aiohttp.ClientError as e:
             logger.error(f"Network error creating sell transaction: {e}")
@@ -214,9 +281,9 @@ class PumpFunTools:
     async def get_token_info(self, mint: str) -> Dict[str, Any]:
         """Get basic information about a token."""
         try:
-            session = await get_session()
+            session = await get_session("market_data")
 
-            async with session.get(f"{self.base_url}/coin-data/{mint}") as response:
+            async with cached_get(session, f"{self.base_url}/coin-data/{mint}") as response:
                 if response.status != 200:
                     error_text = await response.text()
                     logger.error(f"Token info API error {response.status}: {error_text}")
@@ -261,48 +328,50 @@ def create_pump_fun_tools(pump_fun_tools: PumpFunTools, agent=None) -> List[Tool
                 ValueError("No wallet configured for trading"), {"operation": "pump_fun_buy"}
             )
 
-        # Get current balance for validation
-        try:
+        async def check_balance() -> Optional[Dict[str, Any]]:
+            """Validate against the wallet balance while pump.fun builds the transaction."""
             wallet_balance = 0.0
-            if pump_fun_tools.solana_tools:
+            try:
                 balance_result = await pump_fun_tools.solana_tools.get_balance()
                 if "sol_balance" in balance_result:
                     wallet_balance = balance_result["sol_balance"]
-        except Exception as e:
-            logger.warning(f"Could not get balance for validation: {e}")
-
-        # Pre-transaction validation
-        validation_result = await validate_pump_buy(
-            wallet_balance,
-            validated_args["amount"],
-            validated_args.get("slippage", 5),
-            validated_args["mint"],
-        )
+            except Exception as e:
+                logger.warning(f"Could not get balance for validation: {e}")
+
+            # Pre-transaction validation
+            validation_result = await validate_pump_buy(
+                wallet_balance,
+                validated_args["amount"],
+                validated_args.get("slippage", 5),
+                validated_args["mint"],
+            )
 
-        # If validation fails, return error
-        if not validation_result.is_valid:
-            from ..utils.transaction_validator import TransactionValidator
+            # If validation fails, return error
+            if not validation_result.is_valid:
+                from ..utils.transaction_validator import TransactionValidator
 
-            validator = TransactionValidator()
-            error_message = validator.format_validation_result(validation_result)
-            return {
-                "error": True,
-                "category": "validation",
-                "title": "Transaction Validation Failed",
-                "message": "Cannot proceed with pump.fun buy",
-                "validation_details": error_message,
-                "solutions": validation_result.suggestions[:3],  # Top 3 suggestions
-            }
+                validator = TransactionValidator()
+                error_message = validator.format_validation_result(validation_result)
+                return {
+                    "error": True,
+                    "category": "validation",
+                    "title": "Transaction Validation Failed",
+                    "message": "Cannot proceed with pump.fun buy",
+                    "validation_details": error_message,
+                    "solutions": validation_result.suggestions[:3],  # Top 3 suggestions
+                }
 
-        # Show warnings if any (but proceed)
-        if validation_result.warnings:
-            logger.warning(f"Transaction warnings: {validation_result.warnings}")
+            # Show warnings if any (but proceed)
+            if validation_result.warnings:
+                logger.warning(f"Transaction warnings: {validation_result.warnings}")
+            return None
 
         result = await pump_fun_tools.create_buy_transaction(
             public_key,
             validated_args["mint"],
             validated_args["amount"],
             validated_args.get("slippage", 5),  # Default to 5% for pump.fun
+            check=check_balance,
         )
 
         # Invalidate balance cache after successful transaction
@@ -367,6 +436,12 @@ def create_pump_fun_tools(pump_fun_tools: PumpFunTools, agent=None) -> List[Tool
         limit = args.get("limit", 10)
         return await pump_fun_tools.get_token_trades(mint, limit)
 
+    async def handle_get_token_flow(args: Dict[str, Any]) -> Dict[str, Any]:
+        mint = args.get("mint", "")
+        # 0 covers everything still on the tape
+        window_seconds = args.get("window_seconds", DEFAULT_FLOW_WINDOW) or None
+        return await pump_fun_tools.get_token_flow(mint, window_seconds)
+
     async def handle_get_pump_token_info(args: Dict[str, Any]) -> Dict[str, Any]:
         mint = args.get("mint", "")
         return await pump_fun_tools.get_token_info(mint)
@@ -460,6 +535,30 @@ def create_pump_fun_tools(pump_fun_tools: PumpFunTools, agent=None) -> List[Tool
             ),
             handler=handle_get_token_trades,
         ),
+        Tool(
+            spec=ToolSpec(
+                name="get_token_flow",
+                description="Live order flow for a pump.fun token from the streamed trade tape: SOL volume, buy/sell ratio, net flow and unique traders over a recent window",
+                input_schema={
+                    "name": "get_token_flow",
+                    "description": "Get live pump.fun token order flow",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "mint": {"type": "string", "description": "Token mint address"},
+                            "window_seconds": {
+                                "type": "number",
+                                "description": "Look-back window in seconds (default: 300, 0 for all recorded trades)",
+                                "minimum": 0,
+                                "default": DEFAULT_FLOW_WINDOW,
+                            },
+                        },
+                        "required": ["mint"],
+                    },
+                },
+            ),
+            handler=handle_get_token_flow,
+        ),
         Tool(
             spec=ToolSpec(
                 name="get_pump_token_info",
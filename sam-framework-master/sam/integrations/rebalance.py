@@ -0,0 +1,279 @@
+"""Multi-leg portfolio rebalancing on top of Jupiter swaps.
+
+One call replaces a swap per leg spread over several agent iterations:
+current balances and prices are fetched in batches, the legs needed to reach
+the target weights are planned (each over-weight token sells directly into
+an under-weight one), all legs are quoted concurrently and every transaction
+is built and signed before anything is sent. Signed legs then go out through
+a bounded queue; each holds its slot until the confirmation tracker reports
+it confirmed, failed or expired.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from ..core.tools import Tool, ToolSpec
+from ..utils.decorators import log_execution
+from ..utils.price_service import SOL_MINT, get_price_service
+from ..utils.validators import validate_tool_input
+from .jupiter import JupiterTools
+
+logger = logging.getLogger(__name__)
+
+SOL_ALIASES = {"SOL", "sol", SOL_MINT}
+# Tokens one rebalance may touch; at most MAX_TARGETS - 1 legs result
+MAX_TARGETS = 10
+# SOL never sold, kept for transaction fees and token account rent
+SOL_RESERVE_LAMPORTS = 20_000_000
+
+
+@dataclass
+class RebalanceLeg:
+    """Swap `amount` (smallest units) of input_mint, worth value_usd, into output_mint."""
+
+    input_mint: str
+    output_mint: str
+    amount: int
+    value_usd: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "input_mint": self.input_mint,
+            "output_mint": self.output_mint,
+            "amount": self.amount,
+            "value_usd": round(self.value_usd, 2),
+        }
+
+
+def plan_rebalance(
+    holdings: Dict[str, Tuple[int, int]],
+    prices: Dict[str, float],
+    targets: Dict[str, float],
+    min_trade_usd: float = 1.0,
+) -> Tuple[List[RebalanceLeg], Dict[str, Any]]:
+    """Legs that move the target tokens to their weights.
+
+    Args:
+        holdings: mint -> (amount in smallest units, decimals) for what may be sold
+        prices: mint -> USD price for every target mint
+        targets: mint -> weight; weights are normalized, tokens outside targets are untouched
+        min_trade_usd: Deviations (and legs) smaller than this are ignored
+
+    The largest seller is matched with the largest buyer until every
+    remaining deviation is under min_trade_usd, so n tokens need at most
+    n - 1 legs.
+    """
+    if any(w < 0 for w in targets.values()) or sum(targets.values()) <= 0:
+        raise ValueError("Target weights must be non-negative and not all zero")
+    unpriced = [m for m in targets if not prices.get(m)]
+    if unpriced:
+        raise ValueError(f"No price available for: {', '.join(unpriced)}")
+
+    total_weight = sum(targets.values())
+    values = {}
+    for mint in targets:
+        amount, decimals = holdings.get(mint, (0, 0))
+        values[mint] = amount / 10**decimals * prices[mint]
+    total = sum(values.values())
+    deltas = {m: targets[m] / total_weight * total - values[m] for m in targets}
+
+    # [remaining USD, mint], largest first
+    sellers = sorted(([-d, m] for m, d in deltas.items() if -d >= min_trade_usd), reverse=True)
+    buyers = sorted(([d, m] for m, d in deltas.items() if d >= min_trade_usd), reverse=True)
+
+    legs: List[RebalanceLeg] = []
+    i = j = 0
+    while i < len(sellers) and j < len(buyers):
+        value = min(sellers[i][0], buyers[j][0])
+        seller, buyer = sellers[i][1], buyers[j][1]
+        if value >= min_trade_usd:
+            amount, decimals = holdings[seller]
+            units = min(round(value / prices[seller] * 10**decimals), amount)
+            if units > 0:
+                legs.append(RebalanceLeg(seller, buyer, units, value))
+        sellers[i][0] -= value
+        buyers[j][0] -= value
+        if sellers[i][0] < min_trade_usd:
+            i += 1
+        if buyers[j][0] < min_trade_usd:
+            j += 1
+
+    summary = {
+        "total_value_usd": round(total, 2),
+        "current_weights": {m: round(v / total, 4) if total else 0.0 for m, v in values.items()},
+        "target_weights": {m: round(w / total_weight, 4) for m, w in targets.items()},
+    }
+    return legs, summary
+
+
+class RebalanceTools:
+    """Plan, sign and submit every leg of a rebalance in one call."""
+
+    def __init__(
+        self, jupiter_tools: JupiterTools, max_in_flight: int = 4, confirm_timeout: float = 60.0
+    ):
+        """
+        Args:
+            jupiter_tools: Quotes and builds swaps; its solana_tools holds the wallet
+            max_in_flight: Legs sent but not yet confirmed at any time
+            confirm_timeout: Seconds to wait for each leg's confirmation
+        """
+        self.jupiter_tools = jupiter_tools
+        self.solana_tools = jupiter_tools.solana_tools
+        self.max_in_flight = max_in_flight
+        self.confirm_timeout = confirm_timeout
+
+    async def _holdings(
+        self, targets: Dict[str, float]
+    ) -> Tuple[Dict[str, Tuple[int, int]], Dict[str, float]]:
+        """Sellable balances (one batched RPC call) and USD prices (one batched lookup)."""
+        balance = await self.solana_tools.get_balance()
+        if "error" in balance:
+            raise RuntimeError(balance["error"])
+        holdings = {
+            SOL_MINT: (max(balance["sol_balance_lamports"] - SOL_RESERVE_LAMPORTS, 0), 9)
+        }
+        for token in balance.get("tokens", []):
+            holdings[token["mint"]] = (int(token["amount"]), int(token["decimals"]))
+        price_service = await get_price_service()
+        prices = await price_service.get_prices(list(targets))
+        return holdings, prices
+
+    async def _submit(self, semaphore: asyncio.Semaphore, signed: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                pending = await self.solana_tools.submit_transaction(
+                    signed["transaction"], signed["last_valid_block_height"], max_retries=3
+                )
+            except Exception as e:
+                logger.error(f"Rebalance leg failed to send: {e}")
+                return {"status": "failed", "error": str(e)}
+            # Keep the slot until the leg settles so at most max_in_flight are pending
+            return await pending.wait(self.confirm_timeout)
+
+    @log_execution()
+    async def rebalance(
+        self,
+        targets: Dict[str, float],
+        slippage_bps: int = 50,
+        min_trade_usd: float = 1.0,
+        dry_run: bool = False,
+    ) -> Dict[str, Any]:
+        """Move the wallet to the target weights (mint -> weight, "SOL" allowed)."""
+        if not self.solana_tools or not self.solana_tools.keypair:
+            return {"error": "No Solana wallet configured for rebalancing"}
+        targets = {SOL_MINT if m in SOL_ALIASES else m: float(w) for m, w in targets.items()}
+        if not 2 <= len(targets) <= MAX_TARGETS:
+            return {"error": f"Rebalance between 2 and {MAX_TARGETS} tokens"}
+
+        try:
+            holdings, prices = await self._holdings(targets)
+            legs, summary = plan_rebalance(holdings, prices, targets, min_trade_usd)
+        except (RuntimeError, ValueError) as e:
+            return {"error": str(e)}
+        if not legs:
+            message = "Portfolio already on target"
+            return {"success": True, "legs": [], "message": message, **summary}
+
+        quotes = await asyncio.gather(
+            *(
+                self.jupiter_tools.quote(
+                    leg.input_mint, leg.output_mint, leg.amount, slippage_bps, cache_ttl=0
+                )
+                for leg in legs
+            )
+        )
+        planned = [
+            {
+                **leg.to_dict(),
+                "expected_output_amount": q.get("output_amount"),
+                "price_impact_pct": q.get("price_impact_pct"),
+            }
+            for leg, q in zip(legs, quotes)
+        ]
+        errors = [
+            f"{leg['input_mint']} -> {leg['output_mint']}: {q['error']}"
+            for leg, q in zip(planned, quotes)
+            if "error" in q
+        ]
+        if errors:
+            return {"error": "Could not quote every leg; nothing was sent", "details": errors}
+        if dry_run:
+            return {"success": True, "dry_run": True, "legs": planned, **summary}
+
+        # Build and sign everything before sending anything
+        signed = await asyncio.gather(*(self.jupiter_tools.sign_swap(q) for q in quotes))
+        errors = [s["error"] for s in signed if "error" in s]
+        if errors:
+            return {"error": "Could not prepare every leg; nothing was sent", "details": errors}
+
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        results = await asyncio.gather(*(self._submit(semaphore, s) for s in signed))
+        for leg, result in zip(planned, results):
+            leg.update(result)
+        confirmed = sum(1 for r in results if r["status"] == "confirmed")
+        return {
+            "success": confirmed == len(results),
+            "legs": planned,
+            "confirmed": confirmed,
+            "unconfirmed": len(results) - confirmed,
+            **summary,
+        }
+
+
+def create_rebalance_tools(rebalance_tools: RebalanceTools, agent=None) -> List[Tool]:
+    """Create the rebalance tool."""
+
+    async def handle_rebalance(args: Dict[str, Any]) -> Dict[str, Any]:
+        validated_args = validate_tool_input("rebalance", args)
+        result = await rebalance_tools.rebalance(**validated_args)
+
+        # Balances changed (or may have) once anything was sent
+        if agent and "legs" in result and not result.get("dry_run"):
+            agent.invalidate_balance_cache()
+
+        return result
+
+    return [
+        Tool(
+            spec=ToolSpec(
+                name="rebalance",
+                description="Rebalance the wallet to target weights across several tokens in one call: plans the swaps, quotes them concurrently and sends them with confirmation tracking",
+                input_schema={
+                    "name": "rebalance",
+                    "description": "Rebalance portfolio to target weights via Jupiter",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "targets": {
+                                "type": "object",
+                                "description": 'Token mint (or "SOL") -> target weight, e.g. {"SOL": 0.5, "<USDC mint>": 0.5}; weight 0 sells the token out',
+                                "additionalProperties": {"type": "number", "minimum": 0},
+                            },
+                            "slippage_bps": {
+                                "type": "integer",
+                                "description": "Slippage tolerance per leg in basis points (default: 50)",
+                                "default": 50,
+                                "minimum": 1,
+                                "maximum": 1000,
+                            },
+                            "min_trade_usd": {
+                                "type": "number",
+                                "description": "Skip deviations smaller than this many USD (default: 1)",
+                                "default": 1.0,
+                            },
+                            "dry_run": {
+                                "type": "boolean",
+                                "description": "Only plan and quote the legs without sending",
+                                "default": False,
+                            },
+                        },
+                        "required": ["targets"],
+                    },
+                },
+            ),
+            handler=handle_rebalance,
+        )
+    ]
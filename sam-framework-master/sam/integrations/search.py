@@ -6,6 +6,7 @@ from typing import Dict, Any, Union, List, Optional
 from ..core.tools import Tool, ToolSpec
 from ..utils.decorators import rate_limit, retry_with_backoff, log_execution
 from ..utils.http_client import get_session
+from ..utils.http_cache import cached_get
 
 logger = logging.getLogger(__name__)
 
@@ -67,7 +68,7 @@ class SearchTools:
     ) -> Dict[str, Any]:
         """Search using Brave Search API."""
         try:
-            session = await get_session()
+            session = await get_session("search")
 
             url = "https://api.search.brave.com/res/v1/web/search"
             if search_type == "news":
@@ -80,7 +81,7 @@ class SearchTools:
             if freshness:
                 params["freshness"] = freshness
 
-            async with session.get(url, headers=headers, params=params) as response:
+            async with cached_get(session, url, params=params, headers=headers) as response:
                 if response.status == 200:
                     data = await response.json()
 
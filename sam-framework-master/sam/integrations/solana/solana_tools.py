@@ -1,29 +1,55 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+import asyncio
+import base64
 import logging
 import base58
 
-from solana.rpc.async_api import AsyncClient
-from solana.rpc.types import TxOpts
+from solders.hash import Hash
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
 from solders.system_program import transfer, TransferParams
+from solders.transaction import VersionedTransaction
 
 from ...core.tools import Tool, ToolSpec
 from ...utils.validators import validate_tool_input
 from ...utils.decorators import rate_limit, retry_with_backoff, log_execution
-from ...utils.http_client import get_session
 from ...utils.error_messages import handle_error_gracefully
-from ...utils.price_service import get_price_service
+from ...utils.price_service import get_price_service, SOL_MINT
+from ...utils.rpc_pool import RPCPool
+from ...utils.token_metadata import TokenMetadataStore, get_token_metadata_store
+from ...utils.tx_pipeline import PendingTransaction, TransactionPipeline, get_transaction_pipeline
 
 logger = logging.getLogger(__name__)
 
+TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+TOKEN_2022_PROGRAM_ID = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"
+# Addresses whose mints are remembered for price prefetching (least recently used dropped)
+MAX_KNOWN_ADDRESSES = 256
+
 
 class SolanaTools:
-    def __init__(self, rpc_url: str, private_key: Optional[str] = None):
+    def __init__(
+        self,
+        rpc_url: str,
+        private_key: Optional[str] = None,
+        rpc_pool: Optional[RPCPool] = None,
+        metadata_store: Optional[TokenMetadataStore] = None,
+        pipeline: Optional[TransactionPipeline] = None,
+    ):
         self.rpc_url = rpc_url
-        self.client = AsyncClient(rpc_url)
+        # All JSON-RPC traffic goes through the pool on the shared HTTP session
+        # (a single-endpoint pool by default); transactions are built with solders
+        self.rpc_pool = rpc_pool or RPCPool([rpc_url])
+        # Shared metadata cache when configured, otherwise a private in-memory one
+        self.metadata_store = metadata_store or get_token_metadata_store()
+        if self.metadata_store is None:
+            self.metadata_store = TokenMetadataStore(rpc_pool=self.rpc_pool)
+        self.pipeline = pipeline or get_transaction_pipeline() or TransactionPipeline(self.rpc_pool)
         self.keypair = None
         self.wallet_address = None
+        # Mints last seen per address, so their prices can be fetched alongside the RPC
+        self._known_mints: "OrderedDict[str, List[str]]" = OrderedDict()
 
         if private_key:
             try:
@@ -39,77 +65,172 @@ class SolanaTools:
             logger.info("Initialized Solana tools without wallet")
 
     async def close(self):
-        """Close the Solana client connection."""
-        if self.client:
-            await self.client.close()
-            logger.info("Closed Solana client connection")
+        """Stop this instance's own pipeline; the shared HTTP session is cleaned up globally."""
+        if self.pipeline is not get_transaction_pipeline():
+            await self.pipeline.close()
+
+    async def get_latest_blockhash(self) -> Hash:
+        """Recent blockhash, served from the pipeline's background-refreshed cache."""
+        return (await self.pipeline.blockhash.get()).blockhash
+
+    async def submit_transaction(
+        self,
+        transaction: VersionedTransaction,
+        last_valid_block_height: Optional[int] = None,
+        skip_preflight: bool = False,
+        max_retries: Optional[int] = None,
+    ) -> PendingTransaction:
+        """Send a signed transaction; its confirmation is tracked in the background."""
+        return await self.pipeline.submit(
+            transaction,
+            last_valid_block_height,
+            skip_preflight=skip_preflight,
+            max_retries=max_retries,
+        )
+
+    async def send_transaction(
+        self,
+        transaction: VersionedTransaction,
+        skip_preflight: bool = False,
+        max_retries: Optional[int] = None,
+    ) -> str:
+        """Send a signed transaction through the RPC pool and return its signature."""
+        pending = await self.submit_transaction(
+            transaction, skip_preflight=skip_preflight, max_retries=max_retries
+        )
+        return pending.signature
+
+    async def get_transaction_status(self, signature: str) -> Dict[str, Any]:
+        """Transaction status from the confirmation tracker if sent here, else from the RPC."""
+        tracked = self.pipeline.status(signature)
+        if tracked is not None:
+            return {"success": True, **tracked}
+        try:
+            result = await self.rpc_pool.request(
+                "getSignatureStatuses", [[signature], {"searchTransactionHistory": True}]
+            )
+        except Exception as e:
+            logger.error(f"Failed to get transaction status: {e}")
+            return {"error": str(e)}
+
+        status = ((result or {}).get("value") or [None])[0]
+        if status is None:
+            return {"success": True, "signature": signature, "status": "not_found"}
+        response = {
+            "success": True,
+            "signature": signature,
+            "status": "failed" if status.get("err") else status.get("confirmationStatus"),
+            "slot": status.get("slot"),
+        }
+        if status.get("err"):
+            response["error"] = str(status["err"])
+        return response
+
+    @staticmethod
+    def _parse_token_accounts(result: Optional[Dict[str, Any]], program: str, tokens: List):
+        """Append non-zero jsonParsed token balances to tokens."""
+        for account in (result or {}).get("value") or ():
+            info = account["account"]["data"]["parsed"]["info"]
+            amount = info["tokenAmount"]
+            if amount["amount"] == "0":
+                continue
+            tokens.append(
+                {
+                    "mint": info["mint"],
+                    "amount": int(amount["amount"]),
+                    "uiAmount": float(amount["uiAmount"] or 0),
+                    "decimals": amount["decimals"],
+                    "program": program,
+                }
+            )
+
+    async def _token_names(self, mints: List[str]) -> Dict[str, Dict[str, str]]:
+        """Symbol and name per mint from the metadata cache; empty if unavailable."""
+        if not mints:
+            return {}
+        try:
+            metadata = await self.metadata_store.get_many(mints, rpc_pool=self.rpc_pool)
+        except Exception as e:
+            logger.debug(f"Token metadata unavailable for balance: {e}")
+            return {}
+        return {
+            mint: {"symbol": info["symbol"], "name": info["name"]}
+            for mint, info in metadata.items()
+            if info
+        }
 
     @rate_limit("solana_rpc")
     @retry_with_backoff(max_retries=2)
     @log_execution()
     async def get_balance(self, address: Optional[str] = None) -> Dict[str, Any]:
-        """Get SOL balance and all SPL token balances for an address or the configured wallet."""
+        """Get SOL balance and all SPL and Token-2022 balances for an address or the wallet.
+
+        The SOL balance and both token programs are fetched in one JSON-RPC batch
+        while prices for SOL and previously held mints are fetched concurrently.
+        """
         try:
             target_address = address or self.wallet_address
             if not target_address:
                 return {"error": "No address provided and no wallet configured"}
 
-            # Convert address string to Pubkey
-            pubkey = Pubkey.from_string(target_address)
+            # Validate the address before any network traffic
+            Pubkey.from_string(target_address)
 
-            # Get SOL balance
-            response = await self.client.get_balance(pubkey)
+            price_service = await get_price_service()
+            prefetch = asyncio.create_task(
+                price_service.get_prices([SOL_MINT, *self._known_mints.get(target_address, ())])
+            )
+            try:
+                balance_result, spl_result, token_2022_result = await self.rpc_pool.batch(
+                    [
+                        ("getBalance", [target_address]),
+                        (
+                            "getTokenAccountsByOwner",
+                            [
+                                target_address,
+                                {"programId": TOKEN_PROGRAM_ID},
+                                {"encoding": "jsonParsed"},
+                            ],
+                        ),
+                        (
+                            "getTokenAccountsByOwner",
+                            [
+                                target_address,
+                                {"programId": TOKEN_2022_PROGRAM_ID},
+                                {"encoding": "jsonParsed"},
+                            ],
+                        ),
+                    ]
+                )
+            except Exception:
+                prefetch.cancel()
+                raise
 
-            if response.value is None:
+            if not balance_result or balance_result.get("value") is None:
                 logger.error(f"Failed to get SOL balance for {target_address}")
+                prefetch.cancel()
                 return {"error": "Failed to retrieve SOL balance from RPC"}
 
-            balance_lamports = response.value
+            balance_lamports = balance_result["value"]
             balance_sol = balance_lamports / 1e9  # Convert lamports to SOL
 
-            # Get SPL token balances using getTokenAccountsByOwner
-            payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "getTokenAccountsByOwner",
-                "params": [
-                    target_address,
-                    {
-                        "programId": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"  # SPL Token program
-                    },
-                    {"encoding": "jsonParsed"},
-                ],
-            }
-
-            session = await get_session()
-            tokens = []
-
-            async with session.post(
-                self.rpc_url, json=payload, headers={"Content-Type": "application/json"}
-            ) as token_response:
-                if token_response.status == 200:
-                    token_data = await token_response.json()
-                    token_accounts = token_data.get("result", {}).get("value", [])
-
-                    # Parse token balances
-                    for account in token_accounts:
-                        info = account["account"]["data"]["parsed"]["info"]
-                        if (
-                            float(info["tokenAmount"]["uiAmount"] or 0) > 0
-                        ):  # Only include tokens with balance
-                            tokens.append(
-                                {
-                                    "mint": info["mint"],
-                                    "amount": int(info["tokenAmount"]["amount"]),
-                                    "uiAmount": float(info["tokenAmount"]["uiAmount"] or 0),
-                                    "decimals": info["tokenAmount"]["decimals"],
-                                }
-                            )
-
-            # Add USD pricing information
+            tokens: List[Dict[str, Any]] = []
+            self._parse_token_accounts(spl_result, "spl-token", tokens)
+            self._parse_token_accounts(token_2022_result, "token-2022", tokens)
+            self._known_mints[target_address] = [t["mint"] for t in tokens]
+            self._known_mints.move_to_end(target_address)
+            if len(self._known_mints) > MAX_KNOWN_ADDRESSES:
+                self._known_mints.popitem(last=False)
+
+            # Add USD pricing information, naming tokens while prices are fetched
             try:
-                price_service = await get_price_service()
-                portfolio_info = await price_service.format_portfolio_value(balance_sol, tokens)
+                await prefetch
+                portfolio_info, names = await asyncio.gather(
+                    price_service.format_portfolio_value(balance_sol, tokens),
+                    self._token_names([t["mint"] for t in tokens]),
+                )
+                for token in portfolio_info.get("tokens", tokens):
+                    token.update(names.get(token["mint"], {}))
 
                 result = {
                     "address": target_address,
@@ -118,8 +239,9 @@ class SolanaTools:
                     "sol_usd": portfolio_info.get("sol_usd", 0.0),
                     "sol_price": portfolio_info.get("sol_price", 0.0),
                     "formatted_sol": portfolio_info.get("formatted_sol", f"{balance_sol:.4f} SOL"),
-                    "tokens": tokens,
+                    "tokens": portfolio_info.get("tokens", tokens),
                     "token_count": len(tokens),
+                    "tokens_usd": portfolio_info.get("tokens_usd", 0.0),
                     "total_portfolio_usd": portfolio_info.get("total_usd", 0.0),
                 }
 
@@ -172,31 +294,24 @@ class SolanaTools:
                 )
             )
 
-            # Get recent blockhash
-            recent_blockhash = await self.client.get_latest_blockhash()
-            if not recent_blockhash.value:
-                return {"error": "Failed to get recent blockhash"}
-
-            # Create and sign transaction
-            from solders.transaction import VersionedTransaction
-            from solders.message import MessageV0
-
-            # Create a simple versioned transaction
-            message = MessageV0.try_compile(
-                payer=self.keypair.pubkey(),
-                instructions=[transfer_instruction],
-                address_lookup_table_accounts=[],
-                recent_blockhash=recent_blockhash.value.blockhash,
-            )
-
-            # Create versioned transaction and sign
-            versioned_tx = VersionedTransaction(message, [self.keypair])
-
-            # Send transaction
-            result = await self.client.send_transaction(versioned_tx, TxOpts(skip_preflight=False))
-
-            if result.value:
-                tx_signature = str(result.value)
+            # Build from the warm blockhash and a cached message template
+            for attempt in range(2):
+                transaction, recent = await self.pipeline.build(
+                    self.keypair, [transfer_instruction]
+                )
+                try:
+                    pending = await self.submit_transaction(
+                        transaction, recent.last_valid_block_height
+                    )
+                    break
+                except Exception as e:
+                    if attempt or "blockhash" not in str(e).lower():
+                        raise
+                    # The cached blockhash was rejected; fetch a new one and rebuild once
+                    self.pipeline.blockhash.invalidate()
+            tx_signature = pending.signature
+
+            if tx_signature:
                 logger.info(
                     f"Transfer successful: {amount} SOL from {self.wallet_address} to {to_address}"
                 )
@@ -209,6 +324,7 @@ class SolanaTools:
                     "to_address": to_address,
                     "amount_sol": amount,
                     "amount_lamports": amount_lamports,
+                    "status": pending.status,
                 }
             else:
                 return {"error": "Transaction failed to send"}
@@ -229,47 +345,40 @@ class SolanaTools:
             if not target_address:
                 return {"error": "No address provided and no wallet configured"}
 
-            # Convert address to Pubkey
-            pubkey = Pubkey.from_string(target_address)
-
-            # Get token accounts by owner using jsonParsed encoding
-            from solana.rpc.commitment import Commitment
-
-            from solana.rpc.types import TokenAccountOpts
-
-            response = await self.client.get_token_accounts_by_owner(
-                pubkey,
-                TokenAccountOpts(
-                    program_id=Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
-                ),
-                commitment=Commitment("confirmed"),
+            # Validate the address before any network traffic
+            Pubkey.from_string(target_address)
+
+            # Both token programs in one JSON-RPC batch
+            spl_result, token_2022_result = await self.rpc_pool.batch(
+                [
+                    (
+                        "getTokenAccountsByOwner",
+                        [
+                            target_address,
+                            {"programId": program_id},
+                            {"encoding": "jsonParsed", "commitment": "confirmed"},
+                        ],
+                    )
+                    for program_id in (TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID)
+                ]
             )
 
             accounts = []
-            if response.value:
-                for account_info in response.value:
+            for program, result in (("spl-token", spl_result), ("token-2022", token_2022_result)):
+                for account_info in (result or {}).get("value") or ():
                     try:
-                        # Use jsonParsed data instead of manual byte parsing
-                        account_data = account_info.account.data
-                        if hasattr(account_data, "parsed"):
-                            parsed_data = account_data.parsed
-                        else:
-                            # Handle raw data case
-                            parsed_data = None
-                        if parsed_data and "info" in parsed_data:
-                            info = parsed_data["info"]
-
-                            accounts.append(
-                                {
-                                    "account": str(account_info.pubkey),
-                                    "mint": info.get("mint", ""),
-                                    "amount": int(info.get("tokenAmount", {}).get("amount", 0)),
-                                    "decimals": int(info.get("tokenAmount", {}).get("decimals", 9)),
-                                    "uiAmount": float(
-                                        info.get("tokenAmount", {}).get("uiAmount", 0)
-                                    ),
-                                }
-                            )
+                        info = account_info["account"]["data"]["parsed"]["info"]
+                        token_amount = info.get("tokenAmount", {})
+                        accounts.append(
+                            {
+                                "account": account_info["pubkey"],
+                                "mint": info.get("mint", ""),
+                                "amount": int(token_amount.get("amount", 0)),
+                                "decimals": int(token_amount.get("decimals", 9)),
+                                "uiAmount": float(token_amount.get("uiAmount") or 0),
+                                "program": program,
+                            }
+                        )
                     except Exception as parse_error:
                         logger.warning(f"Failed to parse token account: {parse_error}")
                         continue
@@ -285,49 +394,14 @@ class SolanaTools:
     @retry_with_backoff(max_retries=2)
     @log_execution()
     async def get_token_metadata(self, mint_address: str) -> Dict[str, Any]:
-        """Get comprehensive token metadata using Helius getAsset method."""
+        """Get comprehensive token metadata (Helius DAS), served from the metadata cache."""
         try:
-            # Use Helius getAsset method for comprehensive token data
-            payload = {
-                "jsonrpc": "2.0",
-                "id": "1",
-                "method": "getAsset",
-                "params": {"id": mint_address},
-            }
-
-            session = await get_session()
-            async with session.post(
-                self.rpc_url, json=payload, headers={"Content-Type": "application/json"}
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-
-                    if "result" in data and data["result"]:
-                        asset = data["result"]
-                        content = asset.get("content", {})
-
-                        logger.info(f"Retrieved comprehensive token data for {mint_address}")
-                        return {
-                            "success": True,
-                            "mint": mint_address,
-                            "name": content.get("metadata", {}).get("name", "Unknown"),
-                            "symbol": content.get("metadata", {}).get("symbol", "Unknown"),
-                            "description": content.get("metadata", {}).get("description", ""),
-                            "image": content.get("files", [{}])[0].get("uri", "")
-                            if content.get("files")
-                            else "",
-                            "supply": asset.get("supply", {}),
-                            "creators": asset.get("creators", []),
-                            "ownership": asset.get("ownership", {}),
-                            "token_info": asset.get("token_info", {}),
-                            "mutable": asset.get("mutable", False),
-                            "burnt": asset.get("burnt", False),
-                        }
-                    else:
-                        return {"error": f"Asset not found for mint: {mint_address}"}
-                else:
-                    error_text = await response.text()
-                    return {"error": f"RPC error {response.status}: {error_text}"}
+            metadata = await self.metadata_store.get(mint_address, rpc_pool=self.rpc_pool)
+            if metadata is None:
+                return {"error": f"Asset not found for mint: {mint_address}"}
+
+            logger.info(f"Retrieved comprehensive token data for {mint_address}")
+            return {"success": True, "mint": mint_address, **metadata}
 
         except Exception as e:
             logger.error(f"Failed to get token metadata: {e}")
@@ -372,20 +446,12 @@ def create_solana_tools(solana_tools: SolanaTools, agent=None) -> list[Tool]:
         validated_args = validate_tool_input("get_token_data", args)
         mint = validated_args["address"]
 
-        # Check agent cache first
-        if agent:
-            cached_metadata = agent.get_cached_token_metadata(mint)
-            if cached_metadata:
-                return cached_metadata
-
-        # Fetch fresh data
-        result = await solana_tools.get_token_metadata(mint)
-
-        # Cache the result
-        if agent and "error" not in result:
-            agent.cache_token_metadata(mint, result)
+        # Served from the shared metadata cache (memory, then SQLite, then RPC)
+        return await solana_tools.get_token_metadata(mint)
 
-        return result
+    async def handle_get_transaction_status(args: Dict[str, Any]) -> Dict[str, Any]:
+        validated_args = validate_tool_input("get_transaction_status", args)
+        return await solana_tools.get_transaction_status(validated_args["signature"])
 
     tools = [
         Tool(
@@ -451,6 +517,27 @@ def create_solana_tools(solana_tools: SolanaTools, agent=None) -> list[Tool]:
             ),
             handler=handle_get_token_data,
         ),
+        Tool(
+            spec=ToolSpec(
+                name="get_transaction_status",
+                description="Check whether a submitted transaction is confirmed, failed or expired",
+                input_schema={
+                    "name": "get_transaction_status",
+                    "description": "Get transaction confirmation status",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "signature": {
+                                "type": "string",
+                                "description": "Transaction signature",
+                            }
+                        },
+                        "required": ["signature"],
+                    },
+                },
+            ),
+            handler=handle_get_transaction_status,
+        ),
     ]
 
     return tools
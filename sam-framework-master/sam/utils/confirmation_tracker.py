@@ -0,0 +1,249 @@
+"""Batched transaction confirmation tracking.
+
+Every submitted signature is registered with one tracker. Each tick it asks
+for all of them at once with ``getSignatureStatuses`` (256 signatures per
+call, all chunks plus ``getBlockHeight`` in a single JSON-RPC batch), so N
+pending transactions cost one round trip per tick instead of N polls.
+Signatures are grouped by the endpoint that accepted them (see
+``RPCPool.send_transaction``), because other nodes may not have seen them yet.
+Each signature resolves to confirmed, failed or expired; the latter once the
+chain passes its blockhash's ``lastValidBlockHeight`` or the timeout elapses.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from .http_tracing import Histogram
+from .rpc_pool import RPCPool
+
+logger = logging.getLogger(__name__)
+
+MAX_SIGNATURES_PER_CALL = 256
+# Time-to-confirm histogram upper bounds (seconds)
+CONFIRM_BUCKETS = (0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0, 60.0, 90.0)
+
+Callback = Callable[[Dict[str, Any]], None]
+
+
+@dataclass
+class _Tracked:
+    signature: str
+    last_valid_block_height: Optional[int]
+    submitted_at: float
+    future: asyncio.Future
+    callbacks: List[Callback] = field(default_factory=list)
+
+
+class ConfirmationTracker:
+    """Poll pending signatures in batches and resolve a future per signature."""
+
+    def __init__(
+        self,
+        rpc_pool: RPCPool,
+        poll_interval: float = 0.5,
+        commitment: str = "confirmed",
+        timeout: float = 90.0,
+    ):
+        """
+        Args:
+            rpc_pool: Pool to poll through; groups follow its sticky endpoints
+            poll_interval: Seconds between ticks while anything is pending
+            commitment: "confirmed" or "finalized"
+            timeout: Seconds after submission before a signature counts as expired
+        """
+        self.rpc_pool = rpc_pool
+        self.poll_interval = poll_interval
+        self.wanted = ("confirmed", "finalized") if commitment == "confirmed" else ("finalized",)
+        self.timeout = timeout
+        self._pending: Dict[str, _Tracked] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.confirm_seconds = Histogram(CONFIRM_BUCKETS)
+        self._stats = {
+            "ticks": 0,
+            "rpc_calls": 0,
+            "signatures_polled": 0,
+            "confirmed": 0,
+            "failed": 0,
+            "expired": 0,
+            "poll_errors": 0,
+        }
+
+    def track(
+        self,
+        signature: str,
+        last_valid_block_height: Optional[int] = None,
+        submitted_at: Optional[float] = None,
+        callback: Optional[Callback] = None,
+    ) -> asyncio.Future:
+        """Watch signature; the future resolves to a status dict.
+
+        Tracking the same signature twice shares one future.
+        """
+        tracked = self._pending.get(signature)
+        if tracked is None:
+            tracked = _Tracked(
+                signature,
+                last_valid_block_height,
+                time.monotonic() if submitted_at is None else submitted_at,
+                asyncio.get_running_loop().create_future(),
+            )
+            self._pending[signature] = tracked
+        if callback is not None:
+            tracked.callbacks.append(callback)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return tracked.future
+
+    async def wait(self, signature: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Track signature (if needed) and wait for its final status."""
+        return await asyncio.wait_for(asyncio.shield(self.track(signature)), timeout)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def _run(self):
+        """Tick while anything is pending; exit when idle so an idle tracker costs nothing."""
+        while self._pending:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._stats["poll_errors"] += 1
+                logger.warning(f"Confirmation poll failed: {e}")
+
+    async def poll(self):
+        """One tick: one batched request per accepting endpoint."""
+        self._stats["ticks"] += 1
+        now = time.monotonic()
+        for tracked in list(self._pending.values()):
+            if now - tracked.submitted_at >= self.timeout:
+                self._resolve(tracked, "expired")
+
+        groups: Dict[Optional[str], List[_Tracked]] = {}
+        for tracked in self._pending.values():
+            endpoint = self.rpc_pool.sticky_endpoint(tracked.signature)
+            groups.setdefault(endpoint.url if endpoint else None, []).append(tracked)
+        if groups:
+            await asyncio.gather(*(self._poll_group(group) for group in groups.values()))
+
+    async def _poll_group(self, group: List[_Tracked]):
+        chunks = [
+            group[i : i + MAX_SIGNATURES_PER_CALL]
+            for i in range(0, len(group), MAX_SIGNATURES_PER_CALL)
+        ]
+        calls: List = [
+            ("getSignatureStatuses", [[t.signature for t in chunk]]) for chunk in chunks
+        ]
+        check_expiry = any(t.last_valid_block_height is not None for t in group)
+        if check_expiry:
+            calls.append(("getBlockHeight", [{"commitment": "confirmed"}]))
+
+        self._stats["rpc_calls"] += 1
+        self._stats["signatures_polled"] += len(group)
+        try:
+            results = await self.rpc_pool.batch(calls, sticky_key=group[0].signature)
+        except Exception as e:
+            self._stats["poll_errors"] += 1
+            logger.debug(f"Status poll for {len(group)} signatures failed: {e}")
+            return
+
+        block_height = results[-1] if check_expiry else None
+        for chunk, result in zip(chunks, results):
+            statuses = (result or {}).get("value") or []
+            for tracked, status in zip(chunk, statuses):
+                if status and status.get("err"):
+                    self._resolve(tracked, "failed", status.get("slot"), status["err"])
+                elif status and status.get("confirmationStatus") in self.wanted:
+                    self._resolve(tracked, "confirmed", status.get("slot"))
+                elif (
+                    block_height is not None
+                    and tracked.last_valid_block_height is not None
+                    and block_height > tracked.last_valid_block_height
+                ):
+                    self._resolve(tracked, "expired")
+
+    def _resolve(
+        self, tracked: _Tracked, status: str, slot: Optional[int] = None, error: Any = None
+    ):
+        if self._pending.pop(tracked.signature, None) is None:
+            return
+        seconds = time.monotonic() - tracked.submitted_at
+        self._stats[status] += 1
+        if status == "confirmed":
+            self.confirm_seconds.observe(seconds)
+        elif status == "expired":
+            logger.warning(f"Transaction {tracked.signature} expired before confirmation")
+
+        result: Dict[str, Any] = {
+            "signature": tracked.signature,
+            "status": status,
+            "seconds": round(seconds, 3),
+        }
+        if slot is not None:
+            result["slot"] = slot
+        if error is not None:
+            result["error"] = str(error)
+
+        if not tracked.future.done():
+            tracked.future.set_result(result)
+        for callback in tracked.callbacks:
+            try:
+                callback(result)
+            except Exception as e:
+                logger.error(f"Confirmation callback failed for {tracked.signature}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            **self._stats,
+            "confirm_seconds": self.confirm_seconds.snapshot(),
+        }
+
+    async def close(self):
+        """Stop polling; pending futures are cancelled."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        for tracked in self._pending.values():
+            tracked.future.cancel()
+        self._pending.clear()
+
+
+# Global confirmation tracker
+_global_tracker: Optional[ConfirmationTracker] = None
+
+
+def configure_confirmation_tracker(
+    rpc_pool: RPCPool, poll_interval: float = 0.5, timeout: float = 90.0
+) -> ConfirmationTracker:
+    """Create the global tracker shared by every session."""
+    global _global_tracker
+    _global_tracker = ConfirmationTracker(rpc_pool, poll_interval=poll_interval, timeout=timeout)
+    return _global_tracker
+
+
+def get_confirmation_tracker() -> Optional[ConfirmationTracker]:
+    """Global confirmation tracker, or None before configure_confirmation_tracker()."""
+    return _global_tracker
+
+
+def get_confirmation_stats() -> Dict[str, Any]:
+    """Stats of the global tracker (empty when none is configured)."""
+    return _global_tracker.get_stats() if _global_tracker is not None else {}
+
+
+async def cleanup_confirmation_tracker():
+    """Stop the global tracker."""
+    global _global_tracker
+    if _global_tracker is not None:
+        await _global_tracker.close()
+        _global_tracker = None
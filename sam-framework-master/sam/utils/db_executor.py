@@ -0,0 +1,492 @@
+"""Single-writer / multi-reader SQLite execution model.
+
+All writes for a database file are funnelled through one writer task that
+drains a queue and applies everything it finds in a single grouped
+transaction. Reads are served by a small pool of ``query_only`` connections
+so they never contend with the writer for SQLite's write lock.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (sql, params, is_many)
+Statement = Tuple[str, Any, bool]
+
+# Upper bounds of the commit batch size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 4, 16, 64, 256)
+
+WAL_CHECKPOINT_MODES = ("PASSIVE", "FULL", "RESTART", "TRUNCATE")
+
+
+@dataclass
+class WriteOp:
+    """A queued unit of work applied atomically by the writer."""
+
+    statements: List[Statement]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class SQLiteExecutor:
+    """Serialize writes through one connection and fan reads out to a pool."""
+
+    def __init__(
+        self,
+        db_path: str,
+        read_pool_size: int = 4,
+        max_batch_size: int = 256,
+        busy_timeout: float = 30.0,
+    ):
+        """
+        Initialize the executor.
+
+        Args:
+            db_path: Path to SQLite database file
+            read_pool_size: Number of read-only connections (and reader threads)
+            max_batch_size: Maximum number of write operations per transaction
+            busy_timeout: Seconds to wait on a lock held by another process
+        """
+        self.db_path = db_path
+        self.read_pool_size = read_pool_size
+        self.max_batch_size = max_batch_size
+        self.busy_timeout = busy_timeout
+
+        dirpath = os.path.dirname(db_path) or "."
+        os.makedirs(dirpath, exist_ok=True)
+
+        # One thread owns the write connection; readers get one connection per thread
+        self._write_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sam-db-writer")
+        self._read_threads = ThreadPoolExecutor(
+            max_workers=read_pool_size, thread_name_prefix="sam-db-reader"
+        )
+        self._write_conn: Optional[sqlite3.Connection] = None
+        self._read_local = threading.local()
+        self._read_conns: List[sqlite3.Connection] = []
+        self._read_conns_lock = threading.Lock()
+
+        # Writer task and queue are bound to the loop that first uses them
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue[Optional[WriteOp]]] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        # Metrics
+        self._max_queue_depth = 0
+        self._batches_committed = 0
+        self._ops_committed = 0
+        self._ops_failed = 0
+        self._max_batch_size_seen = 0
+        self._batch_histogram: Dict[str, int] = {
+            f"le_{bound}": 0 for bound in BATCH_SIZE_BUCKETS
+        }
+        self._batch_histogram[f"gt_{BATCH_SIZE_BUCKETS[-1]}"] = 0
+        self._total_commit_time = 0.0
+        self._total_queue_wait = 0.0
+        self._reads = 0
+
+        logger.info(
+            f"Initialized SQLite executor: {db_path} "
+            f"(readers: {read_pool_size}, max_batch: {max_batch_size})"
+        )
+
+    # ------------------------------------------------------------------
+    # Connections
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the same tuning as the legacy pool."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            isolation_level=None,  # Explicit transaction control
+        )
+        try:
+            # Must precede journal_mode and the first table; older files are
+            # converted by enable_incremental_vacuum()
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA cache_size=10000")
+            conn.execute("PRAGMA temp_store=memory")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+            # Skip mmap for better compatibility with temp files
+            if not self.db_path.startswith("/tmp") and "/TemporaryItems/" not in self.db_path:
+                conn.execute("PRAGMA mmap_size=268435456")  # 256MB
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to set PRAGMA options: {e}")
+        return conn
+
+    def _get_write_conn(self) -> sqlite3.Connection:
+        """Return the writer connection (writer thread only)."""
+        if self._write_conn is None:
+            conn = self._connect()
+            conn.execute("PRAGMA wal_autocheckpoint=1000")
+            self._write_conn = conn
+        return self._write_conn
+
+    def _get_read_conn(self) -> sqlite3.Connection:
+        """Return this reader thread's read-only connection."""
+        conn = getattr(self._read_local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            conn.execute("PRAGMA query_only=ON")
+            self._read_local.conn = conn
+            with self._read_conns_lock:
+                self._read_conns.append(conn)
+        return conn
+
+    # ------------------------------------------------------------------
+    # Writer
+    # ------------------------------------------------------------------
+
+    def _ensure_writer(self) -> asyncio.Queue:
+        """Start the writer task for the running loop if needed."""
+        if self._closed:
+            raise RuntimeError("SQLite executor is closed")
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._writer_task is None or self._writer_task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._writer_task = loop.create_task(self._writer_loop(self._queue))
+        assert self._queue is not None
+        return self._queue
+
+    async def _writer_loop(self, queue: "asyncio.Queue[Optional[WriteOp]]"):
+        """Drain the queue and commit everything pending as one transaction."""
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            op = await queue.get()
+            if op is None:
+                break
+
+            batch = [op]
+            while len(batch) < self.max_batch_size:
+                try:
+                    nxt = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if nxt is None:
+                    stopping = True
+                    break
+                batch.append(nxt)
+
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self._write_thread, self._apply_batch, batch)
+            except Exception as e:
+                results = [(False, e)] * len(batch)
+            commit_time = time.perf_counter() - start
+
+            self._record_batch(batch, results, start, commit_time)
+
+            for pending, (ok, value) in zip(batch, results):
+                if pending.future.done():
+                    continue
+                if ok:
+                    pending.future.set_result(value)
+                else:
+                    pending.future.set_exception(value)
+
+    def _apply_batch(self, batch: List[WriteOp]) -> List[Tuple[bool, Any]]:
+        """Apply a batch in one transaction, isolating failures per operation."""
+        conn = self._get_write_conn()
+        results: List[Tuple[bool, Any]] = []
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for op in batch:
+                conn.execute("SAVEPOINT sam_op")
+                try:
+                    rowcounts = []
+                    for sql, params, many in op.statements:
+                        if many:
+                            cursor = conn.executemany(sql, params)
+                        else:
+                            cursor = conn.execute(sql, params)
+                        rowcounts.append(cursor.rowcount)
+                    conn.execute("RELEASE sam_op")
+                    results.append((True, rowcounts))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO sam_op")
+                    conn.execute("RELEASE sam_op")
+                    results.append((False, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            logger.error(f"Write batch commit failed: {e}")
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            return [(False, e)] * len(batch)
+
+        return results
+
+    def _record_batch(
+        self,
+        batch: List[WriteOp],
+        results: List[Tuple[bool, Any]],
+        started: float,
+        commit_time: float,
+    ):
+        """Update writer metrics after a batch."""
+        size = len(batch)
+        self._batches_committed += 1
+        self._max_batch_size_seen = max(self._max_batch_size_seen, size)
+        self._total_commit_time += commit_time
+
+        for bound in BATCH_SIZE_BUCKETS:
+            if size <= bound:
+                self._batch_histogram[f"le_{bound}"] += 1
+                break
+        else:
+            self._batch_histogram[f"gt_{BATCH_SIZE_BUCKETS[-1]}"] += 1
+
+        for op, (ok, _) in zip(batch, results):
+            self._total_queue_wait += started - op.enqueued_at
+            if ok:
+                self._ops_committed += 1
+            else:
+                self._ops_failed += 1
+
+        if size > 1:
+            logger.debug(f"Committed write batch of {size} ops in {commit_time * 1000:.1f}ms")
+
+    async def _submit(self, statements: List[Statement]) -> List[int]:
+        """Queue statements as one atomic operation and wait for the commit."""
+        queue = self._ensure_writer()
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait(WriteOp(statements=statements, future=future))
+        self._max_queue_depth = max(self._max_queue_depth, queue.qsize())
+        return await future
+
+    async def execute(self, sql: str, params: Sequence[Any] = ()) -> int:
+        """Queue a write statement; returns its rowcount once committed."""
+        rowcounts = await self._submit([(sql, params, False)])
+        return rowcounts[0]
+
+    async def executemany(self, sql: str, seq_of_params: Sequence[Sequence[Any]]) -> int:
+        """Queue a statement for many parameter sets; returns the rowcount."""
+        rowcounts = await self._submit([(sql, list(seq_of_params), True)])
+        return rowcounts[0]
+
+    async def transaction(self, statements: Sequence[Tuple[str, Sequence[Any]]]) -> List[int]:
+        """Queue several statements that must commit or fail together."""
+        return await self._submit([(sql, params, False) for sql, params in statements])
+
+    async def _call_on_writer(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn(write_conn) on the writer thread, serialized with batches."""
+        if self._closed:
+            raise RuntimeError("SQLite executor is closed")
+
+        def _run():
+            return fn(self._get_write_conn())
+
+        return await asyncio.get_running_loop().run_in_executor(self._write_thread, _run)
+
+    async def run_in_transaction(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn(conn) inside one IMMEDIATE transaction on the writer thread.
+
+        For read-modify-write logic that must be atomic across processes; the
+        write lock is taken up front so concurrent writers queue on busy_timeout.
+        """
+
+        def _run(conn: sqlite3.Connection):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+
+        return await self._call_on_writer(_run)
+
+    async def run_on_writer(self, sql: str) -> List[Tuple[Any, ...]]:
+        """Run a statement that cannot live in a transaction (VACUUM, checkpoints).
+
+        The writer thread is single-threaded, so this is serialized with batches.
+        """
+
+        def _run(conn: sqlite3.Connection):
+            cursor = conn.execute(sql)
+            try:
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+
+        return await self._call_on_writer(_run)
+
+    async def vacuum(self):
+        """Run a full VACUUM on the writer connection."""
+        await self.run_on_writer("VACUUM")
+
+    async def get_auto_vacuum_mode(self) -> int:
+        """Return the auto_vacuum mode (0 none, 1 full, 2 incremental)."""
+        rows = await self.run_on_writer("PRAGMA auto_vacuum")
+        return int(rows[0][0]) if rows else 0
+
+    async def enable_incremental_vacuum(self) -> bool:
+        """Switch an existing file to auto_vacuum=INCREMENTAL.
+
+        This needs one full VACUUM, so it is only done when explicitly asked for.
+        Returns True if the database was converted.
+        """
+        if await self.get_auto_vacuum_mode() == 2:
+            return False
+        await self.run_on_writer("PRAGMA auto_vacuum=INCREMENTAL")
+        await self.vacuum()
+        return await self.get_auto_vacuum_mode() == 2
+
+    async def incremental_vacuum(self, pages: int = 0) -> Dict[str, int]:
+        """Return up to `pages` free pages to the OS (0 = all of them)."""
+
+        def _run(conn: sqlite3.Connection):
+            before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            # execute() steps a pragma only once (one page); executescript runs it to the end
+            conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+            after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            return {"pages_freed": before - after, "free_pages": after}
+
+        return await self._call_on_writer(_run)
+
+    async def wal_checkpoint(self, mode: str = "TRUNCATE") -> Dict[str, int]:
+        """Checkpoint the WAL; TRUNCATE also resets the -wal file to zero bytes."""
+        mode = mode.upper()
+        if mode not in WAL_CHECKPOINT_MODES:
+            raise ValueError(f"Invalid checkpoint mode: {mode}")
+        rows = await self.run_on_writer(f"PRAGMA wal_checkpoint({mode})")
+        busy, wal_pages, checkpointed = rows[0] if rows else (0, 0, 0)
+        return {"busy": busy, "wal_pages": wal_pages, "checkpointed_pages": checkpointed}
+
+    # ------------------------------------------------------------------
+    # Readers
+    # ------------------------------------------------------------------
+
+    def _read(self, sql: str, params: Sequence[Any], one: bool) -> Any:
+        cursor = self._get_read_conn().execute(sql, params)
+        try:
+            return cursor.fetchone() if one else cursor.fetchall()
+        finally:
+            cursor.close()
+
+    async def fetchone(self, sql: str, params: Sequence[Any] = ()) -> Optional[Tuple[Any, ...]]:
+        """Run a query on a read-only connection and return the first row."""
+        if self._closed:
+            raise RuntimeError("SQLite executor is closed")
+        self._reads += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_threads, self._read, sql, params, True)
+
+    async def fetchall(self, sql: str, params: Sequence[Any] = ()) -> List[Tuple[Any, ...]]:
+        """Run a query on a read-only connection and return all rows."""
+        if self._closed:
+            raise RuntimeError("SQLite executor is closed")
+        self._reads += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_threads, self._read, sql, params, False)
+
+    # ------------------------------------------------------------------
+    # Lifecycle and stats
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get writer queue and batching statistics."""
+        queue_depth = self._queue.qsize() if self._queue is not None else 0
+        batches = self._batches_committed
+        ops = self._ops_committed + self._ops_failed
+        return {
+            "db_path": self.db_path,
+            "queue_depth": queue_depth,
+            "max_queue_depth": self._max_queue_depth,
+            "batches_committed": batches,
+            "ops_committed": self._ops_committed,
+            "ops_failed": self._ops_failed,
+            "avg_batch_size": (ops / batches) if batches else 0.0,
+            "max_batch_size": self._max_batch_size_seen,
+            "batch_size_histogram": dict(self._batch_histogram),
+            "avg_commit_ms": (self._total_commit_time / batches * 1000) if batches else 0.0,
+            "avg_queue_wait_ms": (self._total_queue_wait / ops * 1000) if ops else 0.0,
+            "reads": self._reads,
+            "read_pool_size": self.read_pool_size,
+            "closed": self._closed,
+        }
+
+    async def close(self):
+        """Flush pending writes and close all connections."""
+        if self._closed:
+            return
+
+        running_loop = asyncio.get_running_loop()
+        if (
+            self._writer_task is not None
+            and not self._writer_task.done()
+            and self._loop is running_loop
+            and self._queue is not None
+        ):
+            self._queue.put_nowait(None)
+            try:
+                await self._writer_task
+            except Exception as e:
+                logger.error(f"Error stopping database writer: {e}")
+        self._closed = True
+
+        def _close_write():
+            if self._write_conn is not None:
+                self._write_conn.close()
+                self._write_conn = None
+
+        try:
+            await running_loop.run_in_executor(self._write_thread, _close_write)
+        except Exception as e:
+            logger.error(f"Error closing write connection: {e}")
+
+        with self._read_conns_lock:
+            for conn in self._read_conns:
+                try:
+                    conn.close()
+                except Exception as e:
+                    logger.error(f"Error closing read connection: {e}")
+            self._read_conns.clear()
+
+        self._write_thread.shutdown(wait=False)
+        self._read_threads.shutdown(wait=False)
+        logger.info(f"Closed SQLite executor: {self.db_path}")
+
+
+# Global executors, one per database file
+_executors: Dict[str, SQLiteExecutor] = {}
+
+
+def get_sqlite_executor(db_path: str) -> SQLiteExecutor:
+    """Get the shared executor for a database file."""
+    key = os.path.abspath(db_path)
+    executor = _executors.get(key)
+    if executor is None or executor._closed:
+        executor = SQLiteExecutor(db_path)
+        _executors[key] = executor
+    return executor
+
+
+async def cleanup_sqlite_executors():
+    """Close all global executors."""
+    executors = list(_executors.values())
+    _executors.clear()
+    for executor in executors:
+        try:
+            await executor.close()
+        except Exception as e:
+            logger.error(f"Error closing SQLite executor: {e}")
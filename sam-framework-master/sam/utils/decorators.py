@@ -1,7 +1,7 @@
 import functools
 import logging
 from typing import Dict, Any, Callable, Optional
-from .rate_limiter import check_rate_limit
+from .rate_limiter import check_rate_limit, wait_for_rate_limit, UPSTREAM_QUOTAS
 from ..config.settings import Settings
 
 logger = logging.getLogger(__name__)
@@ -85,6 +85,53 @@ def rate_limit(limit_type: str = "default", identifier_key: Optional[str] = None
     return decorator
 
 
+async def wait_for_upstream(
+    upstream: str, timeout: Optional[float] = None
+) -> tuple[bool, Dict[str, Any]]:
+    """Wait until the upstream's declared quota admits one more request.
+
+    Always allowed when throttling is disabled or the upstream declared no quota.
+    """
+    if not Settings.UPSTREAM_THROTTLING_ENABLED or upstream not in UPSTREAM_QUOTAS:
+        return True, {"allowed": True, "waited": 0.0}
+
+    wait = timeout if timeout is not None else Settings.UPSTREAM_THROTTLE_TIMEOUT
+    allowed, info = await wait_for_rate_limit(f"upstream:{upstream}", upstream, wait)
+    if not allowed:
+        logger.warning(f"Throttle deadline of {wait}s exceeded for {upstream}")
+    elif info["waited"] > 0.001:
+        logger.debug(f"Throttled {upstream} request for {info['waited']:.3f}s")
+    return allowed, info
+
+
+def throttle(upstream: str, timeout: Optional[float] = None):
+    """
+    Decorator to shape outbound calls to an upstream's declared quota.
+
+    Unlike rate_limit, over-quota calls wait (in FIFO order) until the
+    upstream's token bucket admits them instead of failing immediately.
+
+    Args:
+        upstream: Quota name declared with declare_upstream_quota
+        timeout: Maximum seconds to wait (defaults to Settings.UPSTREAM_THROTTLE_TIMEOUT)
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs) -> Any:
+            allowed, info = await wait_for_upstream(upstream, timeout)
+            if not allowed:
+                return {
+                    "error": f"{upstream} is busy. Please wait {info.get('retry_after', 0):.0f} seconds before trying again.",
+                    "rate_limit_info": info,
+                }
+            return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
 def retry_with_backoff(max_retries: int = 3, base_delay: float = 1.0, backoff_factor: float = 2.0):
     """
     Decorator to add retry logic with exponential backoff for API calls.
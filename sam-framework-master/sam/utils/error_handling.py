@@ -7,8 +7,8 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, Callable
 from dataclasses import dataclass
 from enum import Enum
-import aiosqlite
 import os
+from .db_executor import get_sqlite_executor
 
 logger = logging.getLogger(__name__)
 
@@ -53,28 +53,31 @@ class ErrorTracker:
 
     async def initialize(self):
         """Initialize error tracking database."""
-        async with aiosqlite.connect(self.db_path) as conn:
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS errors (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL,
-                    error_type TEXT NOT NULL,
-                    error_message TEXT NOT NULL,
-                    severity TEXT NOT NULL,
-                    component TEXT NOT NULL,
-                    session_id TEXT,
-                    user_id TEXT,
-                    context TEXT,
-                    stack_trace TEXT
-                )
-            """)
-
-            # Create indexes for performance
-            await conn.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON errors(timestamp)")
-            await conn.execute("CREATE INDEX IF NOT EXISTS idx_component ON errors(component)")
-            await conn.execute("CREATE INDEX IF NOT EXISTS idx_severity ON errors(severity)")
-
-            await conn.commit()
+        await get_sqlite_executor(self.db_path).transaction(
+            [
+                (
+                    """
+                    CREATE TABLE IF NOT EXISTS errors (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        timestamp TEXT NOT NULL,
+                        error_type TEXT NOT NULL,
+                        error_message TEXT NOT NULL,
+                        severity TEXT NOT NULL,
+                        component TEXT NOT NULL,
+                        session_id TEXT,
+                        user_id TEXT,
+                        context TEXT,
+                        stack_trace TEXT
+                    )
+                    """,
+                    (),
+                ),
+                # Create indexes for performance
+                ("CREATE INDEX IF NOT EXISTS idx_timestamp ON errors(timestamp)", ()),
+                ("CREATE INDEX IF NOT EXISTS idx_component ON errors(component)", ()),
+                ("CREATE INDEX IF NOT EXISTS idx_severity ON errors(severity)", ()),
+            ]
+        )
 
         logger.info("Error tracking database initialized")
 
@@ -124,27 +127,25 @@ class ErrorTracker:
     async def _store_error(self, error_record: ErrorRecord):
         """Store error record in database."""
         try:
-            async with aiosqlite.connect(self.db_path) as conn:
-                await conn.execute(
-                    """
-                    INSERT INTO errors (
-                        timestamp, error_type, error_message, severity,
-                        component, session_id, user_id, context, stack_trace
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                    (
-                        error_record.timestamp.isoformat(),
-                        error_record.error_type,
-                        error_record.error_message,
-                        error_record.severity.value,
-                        error_record.component,
-                        error_record.session_id,
-                        error_record.user_id,
-                        json.dumps(error_record.context) if error_record.context else None,
-                        error_record.stack_trace,
-                    ),
-                )
-                await conn.commit()
+            await get_sqlite_executor(self.db_path).execute(
+                """
+                INSERT INTO errors (
+                    timestamp, error_type, error_message, severity,
+                    component, session_id, user_id, context, stack_trace
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                (
+                    error_record.timestamp.isoformat(),
+                    error_record.error_type,
+                    error_record.error_message,
+                    error_record.severity.value,
+                    error_record.component,
+                    error_record.session_id,
+                    error_record.user_id,
+                    json.dumps(error_record.context) if error_record.context else None,
+                    error_record.stack_trace,
+                ),
+            )
 
         except Exception as e:
             logger.error(f"Failed to store error record: {e}")
@@ -155,86 +156,101 @@ class ErrorTracker:
         cutoff_str = cutoff_time.isoformat()
 
         try:
-            async with aiosqlite.connect(self.db_path) as conn:
-                # Total errors by severity
-                cursor = await conn.execute(
-                    """
-                    SELECT severity, COUNT(*) 
-                    FROM errors 
-                    WHERE timestamp > ? 
-                    GROUP BY severity
-                """,
-                    (cutoff_str,),
-                )
-
-                severity_counts: Dict[str, int] = {
-                    row[0]: row[1] for row in await cursor.fetchall()
-                }
+            db = get_sqlite_executor(self.db_path)
+
+            # Total errors by severity
+            rows = await db.fetchall(
+                """
+                SELECT severity, COUNT(*) 
+                FROM errors 
+                WHERE timestamp > ? 
+                GROUP BY severity
+            """,
+                (cutoff_str,),
+            )
 
-                # Errors by component
-                cursor = await conn.execute(
-                    """
-                    SELECT component, COUNT(*) 
-                    FROM errors 
-                    WHERE timestamp > ? 
-                    GROUP BY component 
-                    ORDER BY COUNT(*) DESC 
-                    LIMIT 10
-                """,
-                    (cutoff_str,),
-                )
+            severity_counts: Dict[str, int] = {row[0]: row[1] for row in rows}
+
+            # Errors by component
+            rows = await db.fetchall(
+                """
+                SELECT component, COUNT(*) 
+                FROM errors 
+                WHERE timestamp > ? 
+                GROUP BY component 
+                ORDER BY COUNT(*) DESC 
+                LIMIT 10
+            """,
+                (cutoff_str,),
+            )
 
-                component_counts: Dict[str, int] = {
-                    row[0]: row[1] for row in await cursor.fetchall()
-                }
+            component_counts: Dict[str, int] = {row[0]: row[1] for row in rows}
+
+            # Recent critical errors
+            rows = await db.fetchall(
+                """
+                SELECT timestamp, component, error_type, error_message 
+                FROM errors 
+                WHERE timestamp > ? AND severity = 'critical'
+                ORDER BY timestamp DESC 
+                LIMIT 5
+            """,
+                (cutoff_str,),
+            )
 
-                # Recent critical errors
-                cursor = await conn.execute(
-                    """
-                    SELECT timestamp, component, error_type, error_message 
-                    FROM errors 
-                    WHERE timestamp > ? AND severity = 'critical'
-                    ORDER BY timestamp DESC 
-                    LIMIT 5
-                """,
-                    (cutoff_str,),
+            critical_errors = []
+            for row in rows:
+                critical_errors.append(
+                    {
+                        "timestamp": row[0],
+                        "component": row[1],
+                        "error_type": row[2],
+                        "error_message": row[3],
+                    }
                 )
 
-                critical_errors = []
-                for row in await cursor.fetchall():
-                    critical_errors.append(
-                        {
-                            "timestamp": row[0],
-                            "component": row[1],
-                            "error_type": row[2],
-                            "error_message": row[3],
-                        }
-                    )
-
-                return {
-                    "time_window_hours": hours_back,
-                    "severity_counts": severity_counts,
-                    "component_counts": component_counts,
-                    "critical_errors": critical_errors,
-                    "total_errors": sum(severity_counts.values()),
-                    "in_memory_counts": dict(self.error_counts),
-                }
+            return {
+                "time_window_hours": hours_back,
+                "severity_counts": severity_counts,
+                "component_counts": component_counts,
+                "critical_errors": critical_errors,
+                "total_errors": sum(severity_counts.values()),
+                "in_memory_counts": dict(self.error_counts),
+            }
 
         except Exception as e:
             logger.error(f"Failed to get error stats: {e}")
             return {"error": str(e)}
 
-    async def cleanup_old_errors(self, days_old: int = 30) -> int:
-        """Clean up old error records."""
+    async def cleanup_old_errors(
+        self,
+        days_old: int = 30,
+        chunk_size: int = 500,
+        pause: float = 0.0,
+        on_chunk: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """Clean up old error records in short chunked transactions."""
         cutoff_date = datetime.utcnow() - timedelta(days=days_old)
         cutoff_str = cutoff_date.isoformat()
 
         try:
-            async with aiosqlite.connect(self.db_path) as conn:
-                cursor = await conn.execute("DELETE FROM errors WHERE timestamp < ?", (cutoff_str,))
-
-                deleted_count = cursor.rowcount
-                await conn.commit()
+            db = get_sqlite_executor(self.db_path)
+            deleted_count = 0
+            while True:
+                deleted = await db.execute(
+                    """
+                    DELETE FROM errors WHERE id IN (
+                        SELECT id FROM errors WHERE timestamp < ? LIMIT ?
+                    )
+                """,
+                    (cutoff_str, chunk_size),
+                )
+                deleted_count += deleted
+                if on_chunk is not None:
+                    on_chunk(deleted)
+                if deleted < chunk_size:
+                    break
+                await asyncio.sleep(pause)
 
             logger.info(f"Cleaned up {deleted_count} old error records")
             return deleted_count
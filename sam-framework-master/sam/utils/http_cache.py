@@ -0,0 +1,609 @@
+"""HTTP response cache for upstream GETs.
+
+Honors ``Cache-Control``, ``Expires``, ``ETag`` and ``Last-Modified`` with
+conditional revalidation, falls back to per-endpoint TTLs for APIs that send
+no caching headers, and can serve stale entries when the upstream fails.
+Entries live in a byte-bounded in-memory LRU with an optional on-disk tier.
+
+Call sites opt in explicitly::
+
+    session = await get_session("market_data")
+    async with cached_get(session, url, params=params, ttl=10) as response:
+        data = await response.json()
+"""
+
+import asyncio
+import email.utils
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Request headers that change the response and therefore the cache key
+KEY_HEADERS = ("accept", "authorization", "x-subscription-token", "x-api-key")
+
+# Response headers kept with a cached entry
+STORED_HEADERS = (
+    "content-type",
+    "cache-control",
+    "etag",
+    "last-modified",
+    "expires",
+    "date",
+    "age",
+)
+
+
+@dataclass
+class CacheEntry:
+    """A stored response body with its freshness information."""
+
+    key: str
+    url: str
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    stored_at: float
+    expires_at: float
+    stale_if_error: float = 0.0
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+    def usable_on_error(self, now: float) -> bool:
+        return now < self.expires_at + self.stale_if_error
+
+    @property
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def to_meta(self) -> Dict[str, Any]:
+        return {
+            "key": self.key,
+            "url": self.url,
+            "status": self.status,
+            "headers": self.headers,
+            "stored_at": self.stored_at,
+            "expires_at": self.expires_at,
+            "stale_if_error": self.stale_if_error,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+        }
+
+
+class CachedResponse:
+    """Response-like view of a cache entry (status, headers, read/text/json)."""
+
+    def __init__(self, entry: CacheEntry, from_cache: bool, revalidated=False, stale=False):
+        self.status = entry.status
+        self.headers = entry.headers
+        self.url = entry.url
+        self.from_cache = from_cache
+        self.revalidated = revalidated
+        self.stale = stale
+        self._body = entry.body
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self, encoding: str = "utf-8") -> str:
+        return self._body.decode(encoding, errors="replace")
+
+    async def json(self, **kwargs: Any) -> Any:
+        return json.loads(self._body)
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """Parse a Cache-Control header into lower-cased directives."""
+    directives: Dict[str, Optional[str]] = {}
+    if not value:
+        return directives
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else None
+    return directives
+
+
+def _seconds(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_lifetime(
+    headers: Mapping[str, str], fallback_ttl: float, now: float
+) -> Tuple[Optional[float], float]:
+    """Return (ttl, stale_if_error) for a response; ttl None means do not store."""
+    cc = parse_cache_control(headers.get("cache-control"))
+    stale_if_error = _seconds(cc.get("stale-if-error")) or 0.0
+
+    if "no-store" in cc:
+        return None, 0.0
+    if "no-cache" in cc:
+        return 0.0, stale_if_error
+
+    max_age = _seconds(cc.get("s-maxage")) or _seconds(cc.get("max-age"))
+    if max_age is None and "max-age" in cc:
+        max_age = 0.0
+    if max_age is not None:
+        age = _seconds(headers.get("age")) or 0.0
+        return max(0.0, max_age - age), stale_if_error
+
+    expires = _http_date(headers.get("expires"))
+    if expires is not None:
+        date = _http_date(headers.get("date")) or now
+        return max(0.0, expires - date), stale_if_error
+
+    # No explicit freshness: per-endpoint or call-site TTL
+    return fallback_ttl, stale_if_error
+
+
+@dataclass
+class CacheStats:
+    """Cache effectiveness counters."""
+
+    lookups: int = 0
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    revalidations: int = 0
+    not_modified: int = 0
+    stale_served: int = 0
+    stores: int = 0
+    evictions: int = 0
+    bytes_saved: int = 0
+    bytes_fetched: int = 0
+
+
+@dataclass
+class _DiskIndex:
+    sizes: Dict[str, int] = field(default_factory=dict)
+    total: int = 0
+
+
+class HTTPResponseCache:
+    """Byte-bounded LRU of HTTP responses with an optional disk tier."""
+
+    def __init__(
+        self,
+        max_bytes: int = 16 * 1024 * 1024,
+        max_entry_bytes: int = 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 128 * 1024 * 1024,
+        default_stale_if_error: float = 300.0,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Memory budget for cached bodies
+            max_entry_bytes: Larger responses are passed through uncached
+            disk_dir: Directory for the on-disk tier (None disables it)
+            disk_max_bytes: Disk budget; oldest files are removed first
+            default_stale_if_error: Seconds an expired entry may be served on upstream errors
+        """
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.default_stale_if_error = default_stale_if_error
+
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._ttl_rules: List[Tuple[str, float]] = []
+        self._disk = _DiskIndex()
+        self.stats = CacheStats()
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._scan_disk()
+
+        logger.info(
+            f"Initialized HTTP response cache ({max_bytes} bytes"
+            f"{', disk: ' + disk_dir if disk_dir else ''})"
+        )
+
+    # ------------------------------------------------------------------
+    # Configuration
+    # ------------------------------------------------------------------
+
+    def set_ttl(self, url_prefix: str, ttl: float):
+        """TTL for responses under url_prefix that carry no caching headers."""
+        self._ttl_rules = [r for r in self._ttl_rules if r[0] != url_prefix]
+        self._ttl_rules.append((url_prefix, ttl))
+        # Longest prefix wins
+        self._ttl_rules.sort(key=lambda r: len(r[0]), reverse=True)
+
+    def ttl_for(self, url: str, default: float = 0.0) -> float:
+        for prefix, ttl in self._ttl_rules:
+            if url.startswith(prefix):
+                return ttl
+        return default
+
+    @staticmethod
+    def make_key(
+        method: str,
+        url: str,
+        params: Optional[Mapping[str, Any]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> str:
+        parts = [method.upper(), url]
+        if params:
+            parts.append("&".join(f"{k}={params[k]}" for k in sorted(params)))
+        if headers:
+            lowered = {k.lower(): v for k, v in headers.items()}
+            parts.extend(f"{h}:{lowered[h]}" for h in KEY_HEADERS if h in lowered)
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Memory tier
+    # ------------------------------------------------------------------
+
+    def _put_memory(self, entry: CacheEntry):
+        old = self._entries.pop(entry.key, None)
+        if old is not None:
+            self._bytes -= old.size
+        self._entries[entry.key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.stats.evictions += 1
+
+    def _get_memory(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    # ------------------------------------------------------------------
+    # Disk tier
+    # ------------------------------------------------------------------
+
+    def _disk_path(self, key: str) -> str:
+        assert self.disk_dir is not None
+        return os.path.join(self.disk_dir, f"{key}.cache")
+
+    def _scan_disk(self):
+        assert self.disk_dir is not None
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".cache"):
+                size = os.path.getsize(os.path.join(self.disk_dir, name))
+                self._disk.sizes[name[: -len(".cache")]] = size
+                self._disk.total += size
+
+    def _write_disk(self, entry: CacheEntry):
+        path = self._disk_path(entry.key)
+        meta = json.dumps(entry.to_meta()).encode()
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(meta + b"\n" + entry.body)
+        os.replace(tmp, path)
+
+        size = os.path.getsize(path)
+        self._disk.total += size - self._disk.sizes.get(entry.key, 0)
+        self._disk.sizes[entry.key] = size
+
+        if self._disk.total > self.disk_max_bytes:
+            # Oldest files first
+            by_age = sorted(
+                self._disk.sizes, key=lambda k: os.path.getmtime(self._disk_path(k))
+            )
+            for key in by_age:
+                if self._disk.total <= self.disk_max_bytes:
+                    break
+                self._remove_disk(key)
+
+    def _remove_disk(self, key: str):
+        try:
+            os.remove(self._disk_path(key))
+        except FileNotFoundError:
+            pass
+        self._disk.total -= self._disk.sizes.pop(key, 0)
+
+    def _read_disk(self, key: str) -> Optional[CacheEntry]:
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                raw = f.read()
+            meta_raw, _, body = raw.partition(b"\n")
+            meta = json.loads(meta_raw)
+            return CacheEntry(body=body, **meta)
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Dropping corrupt HTTP cache file {key}: {e}")
+            self._remove_disk(key)
+            return None
+
+    # ------------------------------------------------------------------
+    # Lookup and store
+    # ------------------------------------------------------------------
+
+    async def lookup(self, key: str) -> Optional[CacheEntry]:
+        entry = self._get_memory(key)
+        if entry is None and self.disk_dir and key in self._disk.sizes:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None:
+                self.stats.disk_hits += 1
+                self._put_memory(entry)
+        return entry
+
+    async def store(self, entry: CacheEntry):
+        if entry.size > self.max_entry_bytes:
+            return
+        self._put_memory(entry)
+        self.stats.stores += 1
+        if self.disk_dir:
+            try:
+                await asyncio.to_thread(self._write_disk, entry)
+            except OSError as e:
+                logger.warning(f"Failed to write HTTP cache file: {e}")
+
+    async def invalidate(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        if self.disk_dir and key in self._disk.sizes:
+            await asyncio.to_thread(self._remove_disk, key)
+
+    async def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+        if self.disk_dir:
+            for key in list(self._disk.sizes):
+                await asyncio.to_thread(self._remove_disk, key)
+
+    def _entry_from_response(
+        self,
+        key: str,
+        url: str,
+        status: int,
+        headers: Mapping[str, str],
+        body: bytes,
+        fallback_ttl: float,
+        stale_if_error: Optional[float],
+        now: float,
+    ) -> Optional[CacheEntry]:
+        ttl, header_sie = freshness_lifetime(headers, fallback_ttl, now)
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if ttl is None or (ttl <= 0 and not (etag or last_modified)):
+            return None
+        if stale_if_error is None:
+            stale_if_error = header_sie or self.default_stale_if_error
+        return CacheEntry(
+            key=key,
+            url=url,
+            status=status,
+            headers={h: headers[h] for h in STORED_HEADERS if h in headers},
+            body=body,
+            stored_at=now,
+            expires_at=now + ttl,
+            stale_if_error=stale_if_error,
+            etag=etag,
+            last_modified=last_modified,
+        )
+
+    @asynccontextmanager
+    async def request(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        params: Optional[Mapping[str, Any]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        ttl: Optional[float] = None,
+        stale_if_error: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[Any]:
+        """GET through the cache; yields a CachedResponse or the live response.
+
+        Live responses are only yielded for statuses that are not cached, so
+        error handling at call sites keeps working unchanged.
+        """
+        key = self.make_key("GET", url, params, headers)
+        fallback_ttl = self.ttl_for(url, ttl if ttl is not None else 0.0)
+        now = time.time()
+        self.stats.lookups += 1
+
+        entry = await self.lookup(key)
+        if entry is not None and entry.is_fresh(now):
+            self.stats.hits += 1
+            self.stats.bytes_saved += entry.size
+            yield CachedResponse(entry, from_cache=True)
+            return
+
+        request_headers = dict(headers or {})
+        if entry is not None and entry.has_validators:
+            self.stats.revalidations += 1
+            if entry.etag:
+                request_headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                request_headers["If-Modified-Since"] = entry.last_modified
+        else:
+            self.stats.misses += 1
+
+        # Only the request and body read are guarded; the caller's own body runs
+        # after the try, so its exceptions propagate instead of re-entering here.
+        async with AsyncExitStack() as stack:
+            try:
+                response = await stack.enter_async_context(
+                    session.get(url, params=params, headers=request_headers or None, **kwargs)
+                )
+                result = await self._handle_response(
+                    response, key, url, entry, fallback_ttl, stale_if_error
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if entry is None or not entry.usable_on_error(time.time()):
+                    raise
+                logger.warning(f"Serving stale cached response for {url}: {e}")
+                self.stats.stale_served += 1
+                result = CachedResponse(entry, from_cache=True, stale=True)
+            # Live responses stay open (via the exit stack) while the caller reads them
+            yield result
+
+    async def _handle_response(
+        self,
+        response: Any,
+        key: str,
+        url: str,
+        entry: Optional[CacheEntry],
+        fallback_ttl: float,
+        stale_if_error: Optional[float],
+    ) -> Any:
+        """What request() yields for response: a CachedResponse or the live response."""
+        now = time.time()
+        response_headers = {k.lower(): v for k, v in response.headers.items()}
+
+        if response.status == 304 and entry is not None:
+            self.stats.not_modified += 1
+            self.stats.bytes_saved += entry.size
+            merged = {**entry.headers, **response_headers}
+            refreshed = self._entry_from_response(
+                key, url, entry.status, merged, entry.body, fallback_ttl, stale_if_error, now
+            )
+            if refreshed is not None:
+                await self.store(refreshed)
+                entry = refreshed
+            return CachedResponse(entry, from_cache=True, revalidated=True)
+
+        if response.status >= 500 and entry is not None and entry.usable_on_error(now):
+            self.stats.stale_served += 1
+            return CachedResponse(entry, from_cache=True, stale=True)
+
+        if response.status != 200:
+            return response
+
+        body = await response.read()
+        self.stats.bytes_fetched += len(body)
+        fetched = self._entry_from_response(
+            key, url, 200, response_headers, body, fallback_ttl, stale_if_error, now
+        )
+        if fetched is None:
+            return response
+        await self.store(fetched)
+        return CachedResponse(fetched, from_cache=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit rate, bytes saved and occupancy."""
+        s = self.stats
+        served = s.hits + s.not_modified + s.stale_served
+        return {
+            "lookups": s.lookups,
+            "hits": s.hits,
+            "disk_hits": s.disk_hits,
+            "misses": s.misses,
+            "revalidations": s.revalidations,
+            "not_modified": s.not_modified,
+            "stale_served": s.stale_served,
+            "stores": s.stores,
+            "evictions": s.evictions,
+            "hit_rate": (served / s.lookups) if s.lookups else 0.0,
+            "bytes_saved": s.bytes_saved,
+            "bytes_fetched": s.bytes_fetched,
+            "entries": len(self._entries),
+            "memory_bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "disk_entries": len(self._disk.sizes),
+            "disk_bytes": self._disk.total,
+        }
+
+
+# Endpoints that send no caching headers; responses are identical for a few seconds
+DEFAULT_TTL_RULES = {
+    "https://quote-api.jup.ag/v6/quote": 2.0,
+    "https://pumpportal.fun/api/coin-data/": 10.0,
+    "https://pumpportal.fun/api/trades": 5.0,
+    "https://api.search.brave.com/": 300.0,
+}
+
+# Global cache instance
+_global_http_cache: Optional[HTTPResponseCache] = None
+_cache_enabled = True
+
+
+def configure_http_cache(
+    enabled: bool = True,
+    max_bytes: int = 16 * 1024 * 1024,
+    disk_dir: Optional[str] = None,
+):
+    """Configure the global cache; call before first use."""
+    global _global_http_cache, _cache_enabled
+    _cache_enabled = enabled
+    _global_http_cache = None
+    if enabled:
+        _global_http_cache = HTTPResponseCache(max_bytes=max_bytes, disk_dir=disk_dir or None)
+        for prefix, ttl in DEFAULT_TTL_RULES.items():
+            _global_http_cache.set_ttl(prefix, ttl)
+
+
+def get_http_cache() -> Optional[HTTPResponseCache]:
+    """Get the global response cache (None when caching is disabled)."""
+    if _cache_enabled and _global_http_cache is None:
+        configure_http_cache()
+    return _global_http_cache
+
+
+def get_http_cache_stats() -> Dict[str, Any]:
+    """Stats of the global cache ({} before first use or when disabled)."""
+    return _global_http_cache.get_stats() if _global_http_cache is not None else {}
+
+
+async def cleanup_http_cache():
+    """Drop the in-memory tier of the global cache."""
+    global _global_http_cache
+    if _global_http_cache is not None:
+        _global_http_cache._entries.clear()
+        _global_http_cache._bytes = 0
+        _global_http_cache = None
+
+
+@asynccontextmanager
+async def cached_get(
+    session: aiohttp.ClientSession,
+    url: str,
+    params: Optional[Mapping[str, Any]] = None,
+    headers: Optional[Mapping[str, str]] = None,
+    ttl: Optional[float] = None,
+    stale_if_error: Optional[float] = None,
+    **kwargs: Any,
+) -> AsyncIterator[Any]:
+    """GET through the global cache, or straight through when it is disabled.
+
+    ttl=0 bypasses the cache for this call.
+    """
+    cache = get_http_cache()
+    if cache is None or ttl == 0:
+        async with session.get(url, params=params, headers=headers, **kwargs) as response:
+            yield response
+        return
+    async with cache.request(
+        session, url, params=params, headers=headers, ttl=ttl,
+        stale_if_error=stale_if_error, **kwargs,
+    ) as response:  # fmt: skip
+        yield response
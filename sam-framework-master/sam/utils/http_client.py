@@ -3,11 +3,80 @@
 import logging
 import aiohttp
 import asyncio
-from typing import Optional
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional
 from contextlib import asynccontextmanager
 
+from .http_tracing import get_trace_configs
+
 logger = logging.getLogger(__name__)
 
+USER_AGENT = "SAM-Framework/0.1.0"
+
+
+@dataclass(frozen=True)
+class HTTPClientProfile:
+    """Connection pool and timeout policy for one class of upstream."""
+
+    name: str
+    limit: int = 100  # Total connection limit
+    limit_per_host: int = 20  # Per-host connection limit
+    total_timeout: float = 60  # Total timeout
+    connect_timeout: float = 10  # Connection timeout
+    sock_read_timeout: float = 30  # Socket read timeout
+    keepalive_timeout: float = 30
+    ttl_dns_cache: int = 300  # DNS cache TTL
+    dedicated: bool = False  # Own connection pool instead of the default one
+
+
+# Latency sensitive upstreams get dedicated pools so they never queue behind
+# long LLM requests; search shares the default pool with a tighter timeout.
+DEFAULT_PROFILES: Dict[str, HTTPClientProfile] = {
+    "default": HTTPClientProfile("default"),
+    "llm": HTTPClientProfile(
+        "llm",
+        limit=20,
+        limit_per_host=10,
+        total_timeout=120,
+        sock_read_timeout=90,
+        keepalive_timeout=60,
+        dedicated=True,
+    ),
+    "rpc": HTTPClientProfile(
+        "rpc",
+        limit=50,
+        limit_per_host=25,
+        total_timeout=15,
+        connect_timeout=5,
+        sock_read_timeout=10,
+        keepalive_timeout=60,
+        dedicated=True,
+    ),
+    "trading": HTTPClientProfile(
+        "trading",
+        limit=30,
+        limit_per_host=10,
+        total_timeout=20,
+        connect_timeout=5,
+        sock_read_timeout=15,
+        keepalive_timeout=60,
+        dedicated=True,
+    ),
+    "market_data": HTTPClientProfile(
+        "market_data",
+        limit=50,
+        limit_per_host=15,
+        total_timeout=10,
+        connect_timeout=5,
+        sock_read_timeout=8,
+        keepalive_timeout=60,
+        dedicated=True,
+    ),
+    "search": HTTPClientProfile(
+        "search", total_timeout=20, connect_timeout=5, sock_read_timeout=15
+    ),
+}
+
 
 class SharedHTTPClient:
     """Shared HTTP client with connection pooling and resource management."""
@@ -16,8 +85,12 @@ class SharedHTTPClient:
     _session: Optional[aiohttp.ClientSession] = None
     _lock = asyncio.Lock()
 
-    def __init__(self):
+    def __init__(self, profiles: Optional[Dict[str, HTTPClientProfile]] = None):
         self._closed = False
+        self.profiles: Dict[str, HTTPClientProfile] = dict(profiles or DEFAULT_PROFILES)
+        # Sessions of non-default profiles (the default one lives in _session)
+        self._profile_sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._connectors: Dict[str, aiohttp.TCPConnector] = {}
 
     @classmethod
     async def get_instance(cls) -> "SharedHTTPClient":
@@ -28,42 +101,107 @@ class SharedHTTPClient:
                     cls._instance = cls()
         return cls._instance
 
-    async def get_session(self) -> aiohttp.ClientSession:
-        """Get or create HTTP session with optimized settings."""
+    def register_profile(self, profile: HTTPClientProfile, **overrides: Any) -> HTTPClientProfile:
+        """Add or replace a profile; sessions pick it up when next created."""
+        profile = replace(profile, **overrides) if overrides else profile
+        self.profiles[profile.name] = profile
+        return profile
+
+    def get_profile(self, name: str) -> HTTPClientProfile:
+        """Look up a profile by name."""
+        try:
+            return self.profiles[name]
+        except KeyError:
+            raise ValueError(f"Unknown HTTP client profile: {name}") from None
+
+    async def get_session(self, profile: str = "default") -> aiohttp.ClientSession:
+        """Get or create the HTTP session for a profile."""
         if self._session is None or self._session.closed or self._closed:
             await self._create_session()
         assert self._session is not None, "Session should be created by _create_session"
-        return self._session
+        if profile == "default":
+            return self._session
 
-    async def _create_session(self):
-        """Create new HTTP session with optimized settings."""
-        # Connection pooling and timeout configuration
-        connector = aiohttp.TCPConnector(
-            limit=100,  # Total connection limit
-            limit_per_host=20,  # Per-host connection limit
-            ttl_dns_cache=300,  # DNS cache TTL
+        session = self._profile_sessions.get(profile)
+        if session is None or session.closed:
+            session = self._build_session(self.get_profile(profile))
+            self._profile_sessions[profile] = session
+        return session
+
+    def _build_connector(self, profile: HTTPClientProfile) -> aiohttp.TCPConnector:
+        return aiohttp.TCPConnector(
+            limit=profile.limit,
+            limit_per_host=profile.limit_per_host,
+            ttl_dns_cache=profile.ttl_dns_cache,
             use_dns_cache=True,
-            keepalive_timeout=30,
+            keepalive_timeout=profile.keepalive_timeout,
             enable_cleanup_closed=True,
         )
 
+    def _build_session(self, profile: HTTPClientProfile) -> aiohttp.ClientSession:
+        """Create a session for a profile, on its own pool or the default one."""
         timeout = aiohttp.ClientTimeout(
-            total=60,  # Total timeout
-            connect=10,  # Connection timeout
-            sock_read=30,  # Socket read timeout
+            total=profile.total_timeout,
+            connect=profile.connect_timeout,
+            sock_read=profile.sock_read_timeout,
         )
 
-        self._session = aiohttp.ClientSession(
-            connector=connector, timeout=timeout, headers={"User-Agent": "SAM-Framework/0.1.0"}
+        if profile.dedicated or profile.name == "default":
+            connector = self._build_connector(profile)
+            self._connectors[profile.name] = connector
+            owner = True
+        else:
+            # Share the default pool, keep this profile's timeouts
+            default = self._session
+            assert default is not None, "Default session must exist before shared profiles"
+            connector = default.connector
+            owner = False
+
+        kwargs: Dict[str, Any] = {}
+        trace_configs = get_trace_configs()
+        if trace_configs:
+            kwargs["trace_configs"] = trace_configs
+
+        session = aiohttp.ClientSession(
+            connector=connector,
+            connector_owner=owner,
+            timeout=timeout,
+            headers={"User-Agent": USER_AGENT},
+            **kwargs,
         )
+        logger.info(
+            f"Created HTTP session for profile '{profile.name}' "
+            f"({'dedicated' if owner else 'shared'} pool, timeout {profile.total_timeout}s)"
+        )
+        return session
 
-        logger.info("Created shared HTTP session with connection pooling")
+    async def _create_session(self):
+        """Create new HTTP session with optimized settings."""
+        self._session = self._build_session(self.get_profile("default"))
         self._closed = False
 
+    def get_pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-profile connection pool usage."""
+        stats: Dict[str, Dict[str, Any]] = {}
+        sessions = dict(self._profile_sessions)
+        if self._session is not None:
+            sessions["default"] = self._session
+        for name, session in sessions.items():
+            profile = self.profiles.get(name)
+            connector = session.connector
+            stats[name] = {
+                "dedicated": bool(profile and (profile.dedicated or name == "default")),
+                "limit": getattr(connector, "limit", None),
+                "limit_per_host": getattr(connector, "limit_per_host", None),
+                "in_use": len(getattr(connector, "_acquired", ())),
+                "closed": session.closed,
+            }
+        return stats
+
     @asynccontextmanager
-    async def request(self, method: str, url: str, **kwargs):
+    async def request(self, method: str, url: str, profile: str = "default", **kwargs):
         """Context manager for making HTTP requests with automatic cleanup."""
-        session = await self.get_session()
+        session = await self.get_session(profile)
         try:
             async with session.request(method, url, **kwargs) as response:
                 yield response
@@ -72,10 +210,17 @@ class SharedHTTPClient:
             raise
 
     async def close(self):
-        """Close HTTP session and cleanup resources."""
+        """Close HTTP sessions and cleanup resources."""
+        # Profile sessions first: shared ones do not own the default pool
+        sessions, self._profile_sessions = self._profile_sessions, {}
+        for name, session in sessions.items():
+            if not session.closed:
+                await session.close()
+                logger.info(f"Closed HTTP session for profile '{name}'")
         if self._session and not self._session.closed:
             await self._session.close()
             logger.info("Closed shared HTTP session")
+        self._connectors.clear()
         self._closed = True
 
     async def __aenter__(self):
@@ -106,15 +251,15 @@ async def cleanup_http_client():
 
 
 # Convenience functions
-async def get_session() -> aiohttp.ClientSession:
-    """Get HTTP session from global client."""
+async def get_session(profile: str = "default") -> aiohttp.ClientSession:
+    """Get HTTP session for a client profile from the global client."""
     client = await get_http_client()
-    return await client.get_session()
+    return await client.get_session(profile)
 
 
 @asynccontextmanager
-async def http_request(method: str, url: str, **kwargs):
+async def http_request(method: str, url: str, profile: str = "default", **kwargs):
     """Make HTTP request using global shared client."""
     client = await get_http_client()
-    async with client.request(method, url, **kwargs) as response:
+    async with client.request(method, url, profile=profile, **kwargs) as response:
         yield response
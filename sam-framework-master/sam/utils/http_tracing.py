@@ -0,0 +1,226 @@
+"""Per-host HTTP phase timing via aiohttp TraceConfig.
+
+Tracing is opt-in: when disabled no TraceConfig is attached to sessions, so
+aiohttp skips its tracing hooks entirely and requests pay nothing.
+"""
+
+import bisect
+import logging
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Histogram upper bounds
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)  # fmt: skip
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Phase name -> buckets
+PHASES = {
+    "pool_wait": LATENCY_BUCKETS,
+    "dns": LATENCY_BUCKETS,
+    "connect": LATENCY_BUCKETS,
+    "ttfb": LATENCY_BUCKETS,
+    "total": LATENCY_BUCKETS,
+    "response_bytes": SIZE_BUCKETS,
+}
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and two adds."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        """Running totals per bucket, Prometheus style (last entry is +Inf)."""
+        total = 0
+        out = []
+        for c in self.counts:
+            total += c
+            out.append(total)
+        return out
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket containing it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, cum in zip(self.bounds, self.cumulative()):
+            if cum >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "avg": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class HTTPTraceMetrics:
+    """Per-host histograms of HTTP request phases plus request/error counters."""
+
+    def __init__(self):
+        self.hosts: Dict[str, Dict[str, Histogram]] = {}
+        self.requests: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.dns_cache_hits: Dict[str, int] = {}
+
+    def _host(self, host: str) -> Dict[str, Histogram]:
+        phases = self.hosts.get(host)
+        if phases is None:
+            phases = {name: Histogram(bounds) for name, bounds in PHASES.items()}
+            self.hosts[host] = phases
+        return phases
+
+    def observe(self, host: str, phase: str, value: float):
+        self._host(host)[phase].observe(value)
+
+    def count(self, counter: Dict[str, int], host: str):
+        counter[host] = counter.get(host, 0) + 1
+
+    def reset(self):
+        self.hosts.clear()
+        self.requests.clear()
+        self.errors.clear()
+        self.dns_cache_hits.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summaries per host and phase."""
+        return {
+            host: {
+                "requests": self.requests.get(host, 0),
+                "errors": self.errors.get(host, 0),
+                "dns_cache_hits": self.dns_cache_hits.get(host, 0),
+                **{phase: hist.snapshot() for phase, hist in phases.items()},
+            }
+            for host, phases in self.hosts.items()
+        }
+
+
+def create_trace_config(metrics: HTTPTraceMetrics) -> aiohttp.TraceConfig:
+    """Build a TraceConfig that feeds phase timings into metrics."""
+    now = time.perf_counter
+
+    def _ctx_factory(trace_request_ctx: Optional[Any] = None) -> SimpleNamespace:
+        return SimpleNamespace(
+            host="unknown",
+            start=now(),
+            sent=None,
+            queued=None,
+            created=None,
+            dns=None,
+            dns_time=0.0,
+            trace_request_ctx=trace_request_ctx,
+        )
+
+    trace_config = aiohttp.TraceConfig(trace_config_ctx_factory=_ctx_factory)
+
+    async def on_request_start(session, ctx, params):
+        ctx.host = params.url.host or "unknown"
+        ctx.start = now()
+        metrics.count(metrics.requests, ctx.host)
+
+    async def on_connection_queued_start(session, ctx, params):
+        ctx.queued = now()
+
+    async def on_connection_queued_end(session, ctx, params):
+        if ctx.queued is not None:
+            metrics.observe(ctx.host, "pool_wait", now() - ctx.queued)
+
+    async def on_connection_create_start(session, ctx, params):
+        ctx.created = now()
+
+    async def on_connection_create_end(session, ctx, params):
+        if ctx.created is not None:
+            # DNS resolution happens inside connection creation; report it separately
+            metrics.observe(ctx.host, "connect", max(0.0, now() - ctx.created - ctx.dns_time))
+
+    async def on_dns_resolvehost_start(session, ctx, params):
+        ctx.dns = now()
+
+    async def on_dns_resolvehost_end(session, ctx, params):
+        if ctx.dns is not None:
+            ctx.dns_time = now() - ctx.dns
+            metrics.observe(ctx.host, "dns", ctx.dns_time)
+
+    async def on_dns_cache_hit(session, ctx, params):
+        metrics.count(metrics.dns_cache_hits, ctx.host)
+
+    async def on_request_headers_sent(session, ctx, params):
+        ctx.sent = now()
+
+    async def on_request_end(session, ctx, params):
+        # Response headers received
+        metrics.observe(ctx.host, "ttfb", now() - (ctx.sent or ctx.start))
+
+    async def on_response_chunk_received(session, ctx, params):
+        # aiohttp sends the whole body once from ClientResponse.read()
+        metrics.observe(ctx.host, "total", now() - ctx.start)
+        metrics.observe(ctx.host, "response_bytes", len(params.chunk))
+
+    async def on_request_exception(session, ctx, params):
+        metrics.count(metrics.errors, ctx.host)
+        metrics.observe(ctx.host, "total", now() - ctx.start)
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_queued_start.append(on_connection_queued_start)
+    trace_config.on_connection_queued_end.append(on_connection_queued_end)
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+    trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+    trace_config.on_request_headers_sent.append(on_request_headers_sent)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_response_chunk_received.append(on_response_chunk_received)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
+
+
+# Global trace metrics
+_http_trace_metrics = HTTPTraceMetrics()
+_tracing_enabled = False
+
+
+def get_http_trace_metrics() -> HTTPTraceMetrics:
+    """Get the global HTTP trace metrics."""
+    return _http_trace_metrics
+
+
+def enable_http_tracing(enabled: bool = True):
+    """Turn tracing on or off for sessions created from now on."""
+    global _tracing_enabled
+    _tracing_enabled = enabled
+    logger.info(f"HTTP tracing {'enabled' if enabled else 'disabled'}")
+
+
+def is_http_tracing_enabled() -> bool:
+    return _tracing_enabled
+
+
+def get_trace_configs() -> List[aiohttp.TraceConfig]:
+    """Trace configs to attach to a new session (empty when tracing is off)."""
+    if not _tracing_enabled:
+        return []
+    return [create_trace_config(_http_trace_metrics)]
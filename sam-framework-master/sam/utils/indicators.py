@@ -0,0 +1,353 @@
+"""Vectorized technical indicators over OHLCV candle arrays.
+
+Every batch function works on the last axis, so a 2-D ``(symbols, candles)``
+array computes one indicator for every symbol in a single pass; recursive
+indicators (EMA, Wilder smoothing) loop over candles only, never over
+symbols. IndicatorState carries the same indicators forward one candle at a
+time in O(1) for streaming consumers and matches the batch results.
+"""
+
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+SECONDS_PER_YEAR = 365 * 86400
+
+
+@dataclass(frozen=True)
+class IndicatorParams:
+    """Window lengths shared by the batch and incremental engines."""
+
+    sma: int = 20
+    ema_fast: int = 12
+    ema_slow: int = 26
+    signal: int = 9
+    rsi: int = 14
+    bollinger: int = 20
+    bollinger_k: float = 2.0
+    atr: int = 14
+    volatility: int = 20
+
+
+DEFAULT_PARAMS = IndicatorParams()
+
+
+def _ewm(x: np.ndarray, alpha: float) -> np.ndarray:
+    """Exponentially weighted mean along the last axis, seeded with the first value."""
+    out = np.empty(x.shape, dtype=float)
+    out[..., 0] = x[..., 0]
+    keep = 1.0 - alpha
+    for t in range(1, x.shape[-1]):
+        out[..., t] = keep * out[..., t - 1] + alpha * x[..., t]
+    return out
+
+
+def _rolling_sums(x: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Rolling sum and sum of squares over n values; NaN until n values exist."""
+    pad = np.zeros(x.shape[:-1] + (1,))
+    s = np.concatenate((pad, np.cumsum(x, axis=-1)), axis=-1)
+    sq = np.concatenate((pad, np.cumsum(x * x, axis=-1)), axis=-1)
+    total = np.full(x.shape, np.nan)
+    total_sq = np.full(x.shape, np.nan)
+    if x.shape[-1] >= n:
+        total[..., n - 1 :] = s[..., n:] - s[..., :-n]
+        total_sq[..., n - 1 :] = sq[..., n:] - sq[..., :-n]
+    return total, total_sq
+
+
+def ema(x: np.ndarray, n: int) -> np.ndarray:
+    return _ewm(x, 2.0 / (n + 1))
+
+
+def sma(x: np.ndarray, n: int) -> np.ndarray:
+    total, _ = _rolling_sums(x, n)
+    return total / n
+
+
+def rsi(close: np.ndarray, n: int = 14) -> np.ndarray:
+    """Wilder RSI; the first candle has no change and is NaN."""
+    diff = np.diff(close, axis=-1)
+    avg_gain = _ewm(np.clip(diff, 0, None), 1.0 / n)
+    avg_loss = _ewm(np.clip(-diff, 0, None), 1.0 / n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+    pad = np.full(close.shape[:-1] + (1,), np.nan)
+    return np.concatenate((pad, values), axis=-1)
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9):
+    """MACD line, signal line and histogram."""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger(close: np.ndarray, n: int = 20, k: float = 2.0):
+    """Middle, upper and lower bands (population standard deviation)."""
+    total, total_sq = _rolling_sums(close, n)
+    mid = total / n
+    std = np.sqrt(np.maximum(total_sq / n - mid * mid, 0.0))
+    return mid, mid + k * std, mid - k * std
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    prev = np.concatenate((close[..., :1], close[..., :-1]), axis=-1)
+    return np.maximum(high, prev) - np.minimum(low, prev)
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, n: int = 14) -> np.ndarray:
+    """Wilder-smoothed average true range."""
+    return _ewm(true_range(high, low, close), 1.0 / n)
+
+
+def vwap(high, low, close, volume) -> np.ndarray:
+    """Cumulative volume-weighted average of the typical price."""
+    typical = (high + low + close) / 3.0
+    cum_volume = np.cumsum(volume, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(cum_volume > 0, np.cumsum(typical * volume, axis=-1) / cum_volume, np.nan)
+
+
+def realized_volatility(close: np.ndarray, n: int = 20, interval: float = 60.0) -> np.ndarray:
+    """Annualized sample std of log returns over the last n returns.
+
+    Uses whatever returns exist (at least two) before the window fills.
+    """
+    returns = np.diff(np.log(close), axis=-1)
+    pad = np.zeros(returns.shape[:-1] + (1,))
+    s = np.concatenate((pad, np.cumsum(returns, axis=-1)), axis=-1)
+    sq = np.concatenate((pad, np.cumsum(returns * returns, axis=-1)), axis=-1)
+    idx = np.arange(1, returns.shape[-1] + 1)
+    start = np.maximum(idx - n, 0)
+    count = idx - start
+    total = s[..., idx] - s[..., start]
+    total_sq = sq[..., idx] - sq[..., start]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = (total_sq - total * total / count) / (count - 1)
+    vol = np.where(count >= 2, np.sqrt(np.maximum(var, 0.0)), np.nan)
+    vol = vol * math.sqrt(SECONDS_PER_YEAR / interval)
+    return np.concatenate((np.full(close.shape[:-1] + (1,), np.nan), vol), axis=-1)
+
+
+def compute_indicators(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    volume: np.ndarray,
+    interval: float = 60.0,
+    params: IndicatorParams = DEFAULT_PARAMS,
+) -> Dict[str, np.ndarray]:
+    """Every indicator as full series along the last axis."""
+    macd_line, signal_line, hist = macd(close, params.ema_fast, params.ema_slow, params.signal)
+    mid, upper, lower = bollinger(close, params.bollinger, params.bollinger_k)
+    return {
+        "close": close,
+        "sma": sma(close, params.sma),
+        "ema_fast": ema(close, params.ema_fast),
+        "ema_slow": ema(close, params.ema_slow),
+        "rsi": rsi(close, params.rsi),
+        "macd": macd_line,
+        "macd_signal": signal_line,
+        "macd_hist": hist,
+        "bb_mid": mid,
+        "bb_upper": upper,
+        "bb_lower": lower,
+        "atr": atr(high, low, close, params.atr),
+        "vwap": vwap(high, low, close, volume),
+        "volatility": realized_volatility(close, params.volatility, interval),
+    }
+
+
+def _compact(value: float) -> Optional[float]:
+    """Round to 6 significant digits; NaN/inf become None."""
+    if value is None or not math.isfinite(value):
+        return None
+    return float(f"{value:.6g}")
+
+
+def summarize(values: Mapping[str, float], first_close: float, candles: int) -> Dict[str, Any]:
+    """Compact numeric summary from the latest value of each indicator."""
+    close = values["close"]
+    band = values["bb_upper"] - values["bb_lower"]
+    pct_b = (close - values["bb_lower"]) / band if band and math.isfinite(band) else None
+    return {
+        "close": _compact(close),
+        "change_pct": _compact((close / first_close - 1) * 100) if first_close else None,
+        "sma": _compact(values["sma"]),
+        "ema_fast": _compact(values["ema_fast"]),
+        "ema_slow": _compact(values["ema_slow"]),
+        "rsi": _compact(values["rsi"]),
+        "macd": _compact(values["macd"]),
+        "macd_signal": _compact(values["macd_signal"]),
+        "macd_hist": _compact(values["macd_hist"]),
+        "bb_upper": _compact(values["bb_upper"]),
+        "bb_lower": _compact(values["bb_lower"]),
+        "bb_pct_b": _compact(pct_b) if pct_b is not None else None,
+        "atr": _compact(values["atr"]),
+        "vwap": _compact(values["vwap"]),
+        "volatility": _compact(values["volatility"]),
+        "candles": candles,
+    }
+
+
+def analyze_many(
+    candles_by_symbol: Mapping[str, np.ndarray],
+    interval: float = 60.0,
+    params: IndicatorParams = DEFAULT_PARAMS,
+) -> Dict[str, Dict[str, Any]]:
+    """Summaries for many symbols' CANDLE_DTYPE arrays.
+
+    Symbols with the same candle count are stacked into one 2-D batch, so
+    hundreds of symbols cost a handful of vectorized passes.
+    """
+    groups: Dict[int, List[str]] = {}
+    for symbol, candles in candles_by_symbol.items():
+        if len(candles) >= 2:
+            groups.setdefault(len(candles), []).append(symbol)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for count, symbols in groups.items():
+        stacked = np.stack([candles_by_symbol[s] for s in symbols])
+        series = compute_indicators(
+            stacked["high"], stacked["low"], stacked["close"], stacked["volume"], interval, params
+        )
+        last = {name: values[:, -1] for name, values in series.items()}
+        for row, symbol in enumerate(symbols):
+            results[symbol] = summarize(
+                {name: float(values[row]) for name, values in last.items()},
+                float(stacked["close"][row, 0]),
+                count,
+            )
+    return results
+
+
+class IndicatorState:
+    """Indicators for one symbol, advanced one candle at a time in O(1)."""
+
+    def __init__(self, interval: float = 60.0, params: IndicatorParams = DEFAULT_PARAMS):
+        self.interval = interval
+        self.params = params
+        self.count = 0
+        self.last_ts: Optional[float] = None
+        self.first_close = 0.0
+        self.prev_close = 0.0
+        self.ema_fast = self.ema_slow = self.signal = 0.0
+        self.avg_gain = self.avg_loss = 0.0
+        self.atr = 0.0
+        self.cum_pv = self.cum_volume = 0.0
+        self.closes: deque = deque(maxlen=params.bollinger)
+        self.close_sum = self.close_sq = 0.0
+        self.sma_window: deque = deque(maxlen=params.sma)
+        self.sma_sum = 0.0
+        self.returns: deque = deque(maxlen=params.volatility)
+        self.ret_sum = self.ret_sq = 0.0
+
+    @staticmethod
+    def _smooth(prev: float, value: float, alpha: float) -> float:
+        return (1.0 - alpha) * prev + alpha * value
+
+    @staticmethod
+    def _push(window: deque, value: float) -> float:
+        """Append to a bounded window, returning the value that fell out (or 0)."""
+        dropped = window[0] if len(window) == window.maxlen else 0.0
+        window.append(value)
+        return dropped
+
+    def update(self, ts: float, high: float, low: float, close: float, volume: float = 0.0):
+        """Advance every indicator by one closed candle."""
+        p = self.params
+        if self.count == 0:
+            self.first_close = self.prev_close = close
+            self.ema_fast = self.ema_slow = close
+            self.signal = 0.0
+            self.atr = max(high, close) - min(low, close)
+        else:
+            diff = close - self.prev_close
+            if self.count == 1:
+                self.avg_gain, self.avg_loss = max(diff, 0.0), max(-diff, 0.0)
+            else:
+                self.avg_gain = self._smooth(self.avg_gain, max(diff, 0.0), 1.0 / p.rsi)
+                self.avg_loss = self._smooth(self.avg_loss, max(-diff, 0.0), 1.0 / p.rsi)
+            self.ema_fast = self._smooth(self.ema_fast, close, 2.0 / (p.ema_fast + 1))
+            self.ema_slow = self._smooth(self.ema_slow, close, 2.0 / (p.ema_slow + 1))
+            self.signal = self._smooth(
+                self.signal, self.ema_fast - self.ema_slow, 2.0 / (p.signal + 1)
+            )
+            tr = max(high, self.prev_close) - min(low, self.prev_close)
+            self.atr = self._smooth(self.atr, tr, 1.0 / p.atr)
+            ret = math.log(close / self.prev_close)
+            dropped = self._push(self.returns, ret)
+            self.ret_sum += ret - dropped
+            self.ret_sq += ret * ret - dropped * dropped
+
+        typical = (high + low + close) / 3.0
+        self.cum_pv += typical * volume
+        self.cum_volume += volume
+        dropped = self._push(self.closes, close)
+        self.close_sum += close - dropped
+        self.close_sq += close * close - dropped * dropped
+        self.sma_sum += close - self._push(self.sma_window, close)
+
+        self.prev_close = close
+        self.last_ts = ts
+        self.count += 1
+
+    def values(self) -> Dict[str, float]:
+        p = self.params
+        nan = float("nan")
+        macd_line = self.ema_fast - self.ema_slow
+        if len(self.closes) == p.bollinger:
+            mid = self.close_sum / p.bollinger
+            std = math.sqrt(max(self.close_sq / p.bollinger - mid * mid, 0.0))
+        else:
+            mid = std = nan
+        n = len(self.returns)
+        if n >= 2:
+            var = (self.ret_sq - self.ret_sum * self.ret_sum / n) / (n - 1)
+            vol = math.sqrt(max(var, 0.0)) * math.sqrt(SECONDS_PER_YEAR / self.interval)
+        else:
+            vol = nan
+        if self.count < 2:
+            rsi_value = nan
+        elif self.avg_loss == 0:
+            rsi_value = 100.0
+        else:
+            rsi_value = 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+        return {
+            "close": self.prev_close,
+            "sma": self.sma_sum / p.sma if len(self.sma_window) == p.sma else nan,
+            "ema_fast": self.ema_fast,
+            "ema_slow": self.ema_slow,
+            "rsi": rsi_value,
+            "macd": macd_line,
+            "macd_signal": self.signal,
+            "macd_hist": macd_line - self.signal,
+            "bb_mid": mid,
+            "bb_upper": mid + p.bollinger_k * std,
+            "bb_lower": mid - p.bollinger_k * std,
+            "atr": self.atr,
+            "vwap": self.cum_pv / self.cum_volume if self.cum_volume > 0 else nan,
+            "volatility": vol,
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return summarize(self.values(), self.first_close, self.count)
+
+    @classmethod
+    def from_candles(
+        cls, candles: np.ndarray, interval: float = 60.0, params: IndicatorParams = DEFAULT_PARAMS
+    ) -> "IndicatorState":
+        """Seed a state from historical candles so later updates continue the series."""
+        state = cls(interval, params)
+        for candle in candles:
+            state.update(
+                float(candle["ts"]),
+                float(candle["high"]),
+                float(candle["low"]),
+                float(candle["close"]),
+                float(candle["volume"]),
+            )
+        return state
@@ -0,0 +1,94 @@
+"""Minimal HTTP endpoint exposing collected metrics.
+
+``GET /metrics`` returns Prometheus text format; ``GET /metrics.json`` returns
+the same data as JSON for ad-hoc inspection.
+"""
+
+import logging
+from typing import Optional
+
+from aiohttp import web
+
+from .monitoring import get_metrics_collector
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsServer:
+    """Serve MetricsCollector data over HTTP."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9464):
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        app.router.add_get("/metrics.json", self.handle_metrics_json)
+        return app
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        collector = await get_metrics_collector()
+        return web.Response(
+            text=collector.render_prometheus(), content_type="text/plain", charset="utf-8"
+        )
+
+    async def handle_metrics_json(self, request: web.Request) -> web.Response:
+        collector = await get_metrics_collector()
+        return web.json_response(
+            {
+                "operations": collector.operation_counts,
+                "errors": collector.error_counts,
+                "http": collector.get_http_stats(),
+                "http_cache": collector.get_cache_stats(),
+                "throttles": collector.get_throttle_stats(),
+                "confirmations": collector.get_confirmation_stats(),
+            }
+        )
+
+    @property
+    def bound_port(self) -> Optional[int]:
+        """Actual listening port (useful with port=0)."""
+        if self._runner is None:
+            return None
+        for site in self._runner.sites:
+            server = getattr(site, "_server", None)
+            if server is not None and server.sockets:
+                return server.sockets[0].getsockname()[1]
+        return None
+
+    async def start(self):
+        if self._runner is not None:
+            return
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Metrics endpoint listening on http://{self.host}:{self.bound_port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+            logger.info("Metrics endpoint stopped")
+
+
+# Global metrics server
+_global_metrics_server: Optional[MetricsServer] = None
+
+
+async def start_metrics_server(host: str = "127.0.0.1", port: int = 9464) -> MetricsServer:
+    """Start the global metrics endpoint."""
+    global _global_metrics_server
+    if _global_metrics_server is None:
+        _global_metrics_server = MetricsServer(host, port)
+    await _global_metrics_server.start()
+    return _global_metrics_server
+
+
+async def cleanup_metrics_server():
+    """Stop the global metrics endpoint."""
+    global _global_metrics_server
+    if _global_metrics_server:
+        await _global_metrics_server.stop()
+        _global_metrics_server = None
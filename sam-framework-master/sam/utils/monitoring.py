@@ -9,9 +9,19 @@ import os
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 
+from .http_tracing import get_http_trace_metrics
+from .confirmation_tracker import get_confirmation_stats, get_confirmation_tracker
+from .http_cache import get_http_cache_stats
+from .rate_limiter import get_throttle_stats
+
 logger = logging.getLogger(__name__)
 
 
+def _escape(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
 @dataclass
 class SystemMetrics:
     """System performance metrics."""
@@ -250,6 +260,150 @@ class MetricsCollector:
             for op in recent_slow
         ]
 
+    def get_http_stats(self) -> Dict[str, Any]:
+        """Get per-host HTTP phase histograms (empty unless HTTP tracing is enabled)."""
+        return get_http_trace_metrics().snapshot()
+
+    def get_throttle_stats(self) -> Dict[str, Any]:
+        """Get outbound throttle queue depths and wait times per upstream."""
+        return get_throttle_stats()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get HTTP response cache hit rate and bytes saved."""
+        return get_http_cache_stats()
+
+    def get_confirmation_stats(self) -> Dict[str, Any]:
+        """Get batched confirmation tracker counters and time-to-confirm."""
+        return get_confirmation_stats()
+
+    def render_prometheus(self) -> str:
+        """Render operation counters and HTTP histograms in Prometheus text format."""
+        lines = [
+            "# HELP sam_operations_total Operations recorded by the metrics collector",
+            "# TYPE sam_operations_total counter",
+        ]
+        for key, count in sorted(self.operation_counts.items()):
+            component, _, operation = key.partition(".")
+            lines.append(
+                f'sam_operations_total{{component="{_escape(component)}",'
+                f'operation="{_escape(operation)}"}} {count}'
+            )
+
+        lines += [
+            "# HELP sam_operation_errors_total Failed operations by error type",
+            "# TYPE sam_operation_errors_total counter",
+        ]
+        for key, count in sorted(self.error_counts.items()):
+            component, _, error_type = key.partition(".")
+            lines.append(
+                f'sam_operation_errors_total{{component="{_escape(component)}",'
+                f'error_type="{_escape(error_type)}"}} {count}'
+            )
+
+        http = get_http_trace_metrics()
+        lines += [
+            "# HELP sam_http_requests_total Outgoing HTTP requests per host",
+            "# TYPE sam_http_requests_total counter",
+        ]
+        for host, count in sorted(http.requests.items()):
+            lines.append(f'sam_http_requests_total{{host="{_escape(host)}"}} {count}')
+        lines += [
+            "# HELP sam_http_request_errors_total Outgoing HTTP requests that raised",
+            "# TYPE sam_http_request_errors_total counter",
+        ]
+        for host, count in sorted(http.errors.items()):
+            lines.append(f'sam_http_request_errors_total{{host="{_escape(host)}"}} {count}')
+
+        for metric, phases, help_text in (
+            (
+                "sam_http_phase_seconds",
+                ("pool_wait", "dns", "connect", "ttfb", "total"),
+                "Outgoing HTTP request phase durations",
+            ),
+            ("sam_http_response_bytes", ("response_bytes",), "Outgoing HTTP response sizes"),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+            for host, hists in sorted(http.hosts.items()):
+                for phase in phases:
+                    hist = hists[phase]
+                    if not hist.count:
+                        continue
+                    labels = f'host="{_escape(host)}"'
+                    if len(phases) > 1:
+                        labels += f',phase="{phase}"'
+                    cumulative = hist.cumulative()
+                    for bound, cum in zip(hist.bounds, cumulative):
+                        lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cum}')
+                    lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {cumulative[-1]}')
+                    lines.append(f"{metric}_sum{{{labels}}} {hist.sum}")
+                    lines.append(f"{metric}_count{{{labels}}} {hist.count}")
+
+        throttles = get_throttle_stats()
+        for name, field, kind, help_text in (
+            ("sam_throttle_queue_depth", "waiting", "gauge", "Calls waiting for upstream quota"),
+            ("sam_throttle_max_queue_depth", "max_waiting", "gauge", "Deepest throttle queue seen"),
+            ("sam_throttle_acquired_total", "acquired", "counter", "Throttled calls admitted"),
+            ("sam_throttle_delayed_total", "delayed", "counter", "Admitted calls that had to wait"),
+            ("sam_throttle_wait_seconds_total", "wait_seconds", "counter", "Time spent waiting"),
+            ("sam_throttle_timeouts_total", "timeouts", "counter", "Calls that hit the deadline"),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for key, stats in sorted(throttles.items()):
+                upstream = key.removeprefix("upstream:")
+                lines.append(f'{name}{{upstream="{_escape(upstream)}"}} {stats[field]}')
+
+        cache = get_http_cache_stats()
+        for name, kind, help_text in (
+            ("lookups", "counter", "HTTP cache lookups"),
+            ("hits", "counter", "Responses served fresh from the HTTP cache"),
+            ("not_modified", "counter", "Cached responses revalidated with 304"),
+            ("stale_served", "counter", "Stale responses served on upstream errors"),
+            ("evictions", "counter", "HTTP cache LRU evictions"),
+            ("bytes_saved", "counter", "Response bytes not downloaded thanks to the cache"),
+            ("hit_rate", "gauge", "Fraction of lookups served from the cache"),
+            ("memory_bytes", "gauge", "Bytes held by the in-memory cache tier"),
+        ):
+            if name not in cache:
+                continue
+            metric = f"sam_http_cache_{name}" + ("_total" if kind == "counter" else "")
+            lines += [
+                f"# HELP {metric} {help_text}",
+                f"# TYPE {metric} {kind}",
+                f"{metric} {cache[name]}",
+            ]
+
+        tracker = get_confirmation_tracker()
+        if tracker is not None:
+            stats = tracker.get_stats()
+            for name, kind, help_text in (
+                ("pending", "gauge", "Signatures awaiting confirmation"),
+                ("rpc_calls", "counter", "Batched signature status requests"),
+                ("signatures_polled", "counter", "Signature lookups made by those requests"),
+                ("confirmed", "counter", "Transactions confirmed"),
+                ("failed", "counter", "Transactions that landed with an error"),
+                ("expired", "counter", "Transactions whose blockhash expired unconfirmed"),
+            ):
+                metric = f"sam_tx_{name}" + ("_total" if kind == "counter" else "")
+                lines += [
+                    f"# HELP {metric} {help_text}",
+                    f"# TYPE {metric} {kind}",
+                    f"{metric} {stats[name]}",
+                ]
+            hist = tracker.confirm_seconds
+            metric = "sam_tx_confirm_seconds"
+            lines += [
+                f"# HELP {metric} Time from submission to confirmation",
+                f"# TYPE {metric} histogram",
+            ]
+            cumulative = hist.cumulative()
+            for bound, cum in zip(hist.bounds, cumulative):
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cum}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {cumulative[-1]}')
+            lines.append(f"{metric}_sum {hist.sum}")
+            lines.append(f"{metric}_count {hist.count}")
+
+        return "\n".join(lines) + "\n"
+
     async def shutdown(self):
         """Shutdown metrics collection."""
         self._shutdown = True
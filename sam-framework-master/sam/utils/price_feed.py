@@ -0,0 +1,462 @@
+"""Streaming price feed with in-process pub/sub.
+
+A PriceFeed pulls ticks from one pluggable source (Jupiter poller,
+websocket, or a JSONL replay file), keeps the latest tick per mint for O(1)
+lookups, and fans ticks out to subscribers. Each subscriber holds at most
+one pending tick per mint, so a slow consumer sees the newest price instead
+of an ever-growing backlog.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Mapping, Optional, Set
+
+import aiohttp
+
+from .http_client import get_session
+
+logger = logging.getLogger(__name__)
+
+JUPITER_PRICE_URL = "https://price.jup.ag/v4/price"
+
+
+@dataclass(slots=True)
+class PriceTick:
+    """One price observation for a mint."""
+
+    mint: str
+    price_usd: float
+    timestamp: float
+    source: str = "feed"
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.timestamp
+
+
+def parse_price_message(message: Any, source: str = "ws") -> List[PriceTick]:
+    """Turn a decoded feed message into ticks.
+
+    Accepts a single ``{"mint", "price"[, "timestamp"]}`` object, a list of
+    them, or a Jupiter-style ``{"data": {mint: {"price": ...}}}`` payload.
+    Anything else yields no ticks.
+    """
+    now = time.time()
+    if isinstance(message, list):
+        return [tick for item in message for tick in parse_price_message(item, source)]
+    if not isinstance(message, dict):
+        return []
+    if isinstance(message.get("data"), dict):
+        return [
+            PriceTick(mint, float(entry["price"]), now, source)
+            for mint, entry in message["data"].items()
+            if isinstance(entry, dict) and entry.get("price") is not None
+        ]
+    if "mint" in message and message.get("price") is not None:
+        return [
+            PriceTick(
+                message["mint"],
+                float(message["price"]),
+                float(message.get("timestamp") or now),
+                source,
+            )
+        ]
+    return []
+
+
+class PriceSource(ABC):
+    """Base class for tick producers.
+
+    ``ticks()`` yields until the source is exhausted (replay) or forever
+    (live sources). ``track()`` adds mints a live source should cover and
+    ``untrack()`` stops covering them.
+    """
+
+    name = "source"
+    finite = False
+
+    def __init__(self, mints: Iterable[str] = ()):
+        self.mints: Set[str] = set(mints)
+
+    def track(self, mints: Iterable[str]):
+        self.mints.update(mints)
+
+    def untrack(self, mints: Iterable[str]):
+        self.mints.difference_update(mints)
+
+    @abstractmethod
+    def ticks(self) -> AsyncIterator[PriceTick]:
+        """Yield ticks until the source is exhausted or fails."""
+
+
+class PollingPriceSource(PriceSource):
+    """Poll the Jupiter price API for tracked mints every interval seconds."""
+
+    name = "poll"
+
+    def __init__(self, mints: Iterable[str] = (), interval: float = 5.0, chunk_size: int = 100):
+        super().__init__(mints)
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.url = JUPITER_PRICE_URL
+
+    async def _poll(self, mints: List[str]) -> List[PriceTick]:
+        session = await get_session("market_data")
+        ticks: List[PriceTick] = []
+        for i in range(0, len(mints), self.chunk_size):
+            chunk = mints[i : i + self.chunk_size]
+            async with session.get(self.url, params={"ids": ",".join(chunk)}) as response:
+                if response.status != 200:
+                    logger.warning(f"Price poll failed: HTTP {response.status}")
+                    continue
+                ticks.extend(parse_price_message(await response.json(), self.name))
+        return ticks
+
+    async def ticks(self) -> AsyncIterator[PriceTick]:
+        while True:
+            if self.mints:
+                for tick in await self._poll(sorted(self.mints)):
+                    yield tick
+            await asyncio.sleep(self.interval)
+
+
+class WebSocketPriceSource(PriceSource):
+    """Stream ticks from a websocket endpoint.
+
+    ``subscribe(mints)`` builds the JSON message sent on connect and whenever
+    new mints are tracked, ``unsubscribe(mints)`` the one sent when mints are
+    untracked; ``parse`` turns each decoded message into ticks.
+    """
+
+    name = "ws"
+
+    def __init__(
+        self,
+        url: str,
+        mints: Iterable[str] = (),
+        subscribe: Optional[Callable[[List[str]], Any]] = None,
+        unsubscribe: Optional[Callable[[List[str]], Any]] = None,
+        parse: Callable[[Any, str], List[PriceTick]] = parse_price_message,
+        heartbeat: float = 30.0,
+    ):
+        super().__init__(mints)
+        self.url = url
+        self.subscribe = subscribe or (lambda mints: {"method": "subscribe", "mints": mints})
+        self.unsubscribe = unsubscribe or (
+            lambda mints: {"method": "unsubscribe", "mints": mints}
+        )
+        self.parse = parse
+        self.heartbeat = heartbeat
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._sends: Set[asyncio.Task] = set()  # Strong refs until each send finishes
+
+    def track(self, mints: Iterable[str]):
+        new = set(mints) - self.mints
+        super().track(new)
+        if new:
+            self._send(self.subscribe(sorted(new)))
+
+    def untrack(self, mints: Iterable[str]):
+        gone = self.mints.intersection(mints)
+        super().untrack(gone)
+        if gone:
+            self._send(self.unsubscribe(sorted(gone)))
+
+    def _send(self, message: Any):
+        if self._ws is None or self._ws.closed:
+            return  # The next connect subscribes to whatever is tracked then
+        task = asyncio.create_task(self._ws.send_json(message))
+        self._sends.add(task)
+        task.add_done_callback(self._send_done)
+
+    def _send_done(self, task: asyncio.Task):
+        self._sends.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # Tracked mints are resubscribed on the next connect
+            logger.warning(f"Websocket subscribe failed: {task.exception()}")
+
+    async def ticks(self) -> AsyncIterator[PriceTick]:
+        session = await get_session("market_data")
+        async with session.ws_connect(self.url, heartbeat=self.heartbeat) as ws:
+            self._ws = ws
+            try:
+                if self.mints:
+                    await ws.send_json(self.subscribe(sorted(self.mints)))
+                async for msg in ws:
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        try:
+                            data = json.loads(msg.data)
+                        except ValueError:
+                            logger.debug(f"Ignoring non-JSON feed message: {msg.data[:80]}")
+                            continue
+                        for tick in self.parse(data, self.name):
+                            yield tick
+                    elif msg.type == aiohttp.WSMsgType.ERROR:
+                        raise ConnectionError(f"Price websocket error: {ws.exception()}")
+            finally:
+                self._ws = None
+        raise ConnectionError("Price websocket closed")
+
+
+class ReplayPriceSource(PriceSource):
+    """Replay ticks from a JSONL file, one ``{"mint", "price", "timestamp"}`` per line.
+
+    speed=0 replays as fast as possible; otherwise gaps between recorded
+    timestamps are divided by speed. Replayed ticks keep their timestamps.
+    """
+
+    name = "replay"
+    finite = True
+
+    def __init__(
+        self,
+        path: str,
+        speed: float = 0.0,
+        parse: Callable[[Any, str], List[PriceTick]] = parse_price_message,
+    ):
+        super().__init__()
+        self.path = path
+        self.speed = speed
+        self.parse = parse
+
+    async def ticks(self) -> AsyncIterator[PriceTick]:
+        previous: Optional[float] = None
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                for tick in self.parse(json.loads(line), self.name):
+                    if self.speed > 0 and previous is not None:
+                        await asyncio.sleep(max(0.0, tick.timestamp - previous) / self.speed)
+                    previous = tick.timestamp
+                    yield tick
+                # Let subscribers run between lines even when not pacing
+                await asyncio.sleep(0)
+
+
+class Subscription:
+    """Coalescing per-subscriber queue: at most one pending tick per mint."""
+
+    def __init__(self, feed: "PriceFeed", mints: Optional[Iterable[str]] = None):
+        self._feed = feed
+        self.mints: Optional[Set[str]] = set(mints) if mints is not None else None
+        self._pending: "OrderedDict[str, PriceTick]" = OrderedDict()
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.delivered = 0
+        self.coalesced = 0
+
+    def wants(self, mint: str) -> bool:
+        return self.mints is None or mint in self.mints
+
+    def put(self, tick: PriceTick):
+        if tick.mint in self._pending:
+            # Replace in place so a busy mint cannot starve the others
+            self.coalesced += 1
+        self._pending[tick.mint] = tick
+        self._ready.set()
+
+    async def get(self) -> Optional[PriceTick]:
+        """Wait for the next tick (the newest one for its mint); None once closed."""
+        while not self._pending:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        _, tick = self._pending.popitem(last=False)
+        self.delivered += 1
+        return tick
+
+    async def get_batch(self) -> List[PriceTick]:
+        """Wait for at least one tick, then drain everything pending."""
+        first = await self.get()
+        if first is None:
+            return []
+        batch = [first]
+        while self._pending:
+            batch.append(self._pending.popitem(last=False)[1])
+        self.delivered += len(batch) - 1
+        return batch
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def close(self):
+        self._feed.unsubscribe(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> PriceTick:
+        tick = await self.get()
+        if tick is None:
+            raise StopAsyncIteration
+        return tick
+
+
+class PriceFeed:
+    """Live prices from one source, published to subscribers."""
+
+    label = "Price feed"
+
+    def __init__(self, source: Optional[PriceSource] = None, reconnect_delay: float = 1.0):
+        self.source = source
+        self.reconnect_delay = reconnect_delay
+        self._latest: Dict[str, PriceTick] = {}
+        self._subscribers: List[Subscription] = []
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"ticks": 0, "errors": 0, "reconnects": 0}
+
+    # Latest values
+
+    def latest(self, mint: str) -> Optional[PriceTick]:
+        """Most recent tick for mint, O(1)."""
+        return self._latest.get(mint)
+
+    def snapshot(self) -> Mapping[str, PriceTick]:
+        """Read-only live view of the latest tick per mint, O(1) to take."""
+        return MappingProxyType(self._latest)
+
+    def track(self, mints: Iterable[str]):
+        """Ask the source to start covering mints."""
+        if self.source is not None:
+            self.source.track(mints)
+
+    def untrack(self, mints: Iterable[str]):
+        """Stop covering mints and forget their latest ticks.
+
+        Mints a subscriber asked for by name stay tracked.
+        """
+        wanted = set().union(*(s.mints for s in self._subscribers if s.mints is not None))
+        gone = set(mints) - wanted
+        if self.source is not None:
+            self.source.untrack(gone)
+        for mint in gone:
+            self._latest.pop(mint, None)
+
+    # Pub/sub
+
+    def subscribe(self, mints: Optional[Iterable[str]] = None) -> Subscription:
+        """Subscribe to ticks for mints (all mints when None)."""
+        subscription = Subscription(self, mints)
+        self._subscribers.append(subscription)
+        if mints is not None:
+            self.track(mints)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.closed = True
+        subscription._ready.set()
+        if subscription in self._subscribers:
+            self._subscribers.remove(subscription)
+
+    def publish(self, tick: PriceTick):
+        """Record tick as the latest price and fan it out; never blocks."""
+        current = self._latest.get(tick.mint)
+        if current is not None and current.timestamp > tick.timestamp:
+            return  # Out-of-order tick
+        self._latest[tick.mint] = tick
+        self._stats["ticks"] += 1
+        for subscription in self._subscribers:
+            if subscription.wants(tick.mint):
+                subscription.put(tick)
+
+    # Lifecycle
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _run(self):
+        while True:
+            try:
+                async for tick in self.source.ticks():
+                    self.publish(tick)
+                if self.source.finite:
+                    logger.info(f"{self.label} source '{self.source.name}' finished")
+                    return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.warning(f"{self.label} source '{self.source.name}' failed: {e}")
+            self._stats["reconnects"] += 1
+            await asyncio.sleep(self.reconnect_delay)
+
+    def start(self):
+        if self.source is None or self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Started {self.label.lower()} ({self.source.name})")
+
+    async def wait_closed(self):
+        """Wait for a finite source to be fully published."""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for subscription in list(self._subscribers):
+            self.unsubscribe(subscription)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "source": self.source.name if self.source else None,
+            "running": self.running,
+            "mints": len(self._latest),
+            "subscribers": len(self._subscribers),
+            "pending": sum(s.pending() for s in self._subscribers),
+            "coalesced": sum(s.coalesced for s in self._subscribers),
+            **self._stats,
+        }
+
+
+def create_price_source(url: Optional[str], interval: float = 5.0) -> Optional[PriceSource]:
+    """Create the source selected by url: poll://, ws(s)://... or replay:///path.jsonl."""
+    if not url:
+        return None
+    if url.startswith("poll://"):
+        return PollingPriceSource(interval=interval)
+    if url.startswith(("ws://", "wss://")):
+        return WebSocketPriceSource(url)
+    if url.startswith("replay:///"):
+        return ReplayPriceSource(url[len("replay://") :])
+    raise ValueError(f"Unsupported PRICE_FEED_URL scheme: {url.split('://', 1)[0]}")
+
+
+# Global price feed
+_global_price_feed: Optional[PriceFeed] = None
+
+
+def get_price_feed() -> Optional[PriceFeed]:
+    """Global price feed, or None when streaming prices are not configured."""
+    return _global_price_feed
+
+
+async def start_price_feed(source: PriceSource, mints: Iterable[str] = ()) -> PriceFeed:
+    """Start the global price feed on source, replacing any previous one."""
+    global _global_price_feed
+    if _global_price_feed is not None:
+        await _global_price_feed.stop()
+    _global_price_feed = PriceFeed(source)
+    _global_price_feed.track(mints)
+    _global_price_feed.start()
+    return _global_price_feed
+
+
+async def cleanup_price_feed():
+    """Stop the global price feed."""
+    global _global_price_feed
+    if _global_price_feed:
+        await _global_price_feed.stop()
+        _global_price_feed = None
@@ -3,12 +3,22 @@
 import asyncio
 import logging
 import time
-from typing import Dict, Optional, Any, List
+from collections import OrderedDict
+from typing import Dict, Optional, Any, List, Iterable
 from dataclasses import dataclass
 from .http_client import get_session
+from .price_feed import get_price_feed
+from .tick_store import get_tick_store
 
 logger = logging.getLogger(__name__)
 
+JUPITER_PRICE_URL = "https://price.jup.ag/v4/price"
+SOL_MINT = "So11111111111111111111111111111111111111112"
+# Most mints remembered as recently requested; the least recently requested go first
+MAX_REQUESTED_MINTS = 10_000
+# Most cached prices; the least recently written go first
+MAX_CACHED_PRICES = 10_000
+
 
 @dataclass
 class PriceData:
@@ -31,14 +41,55 @@ class PriceData:
 class PriceService:
     """Service for fetching and caching cryptocurrency prices."""
 
-    def __init__(self, cache_ttl: int = 30):
+    def __init__(
+        self,
+        cache_ttl: int = 30,
+        chunk_size: int = 100,
+        max_concurrency: int = 4,
+        hard_ttl: int = 300,
+        hot_window: float = 300.0,
+    ):
+        """
+        Initialize the price service.
+
+        Args:
+            cache_ttl: Seconds a price is fresh; older prices are served while a refresh runs
+            chunk_size: Mints per Jupiter price request
+            max_concurrency: Maximum concurrent price requests
+            hard_ttl: Seconds after which a cached price is no longer served on the fast path
+            hot_window: Mints requested within this many seconds are kept warm by the refresher
+        """
         self.cache_ttl = cache_ttl  # Cache for 30 seconds
-        self._price_cache: Dict[str, PriceData] = {}
+        self.hard_ttl = max(hard_ttl, cache_ttl)
+        self.chunk_size = chunk_size
+        self.hot_window = hot_window
+        # Cached price per key, least recently written first
+        self._price_cache: "OrderedDict[str, PriceData]" = OrderedDict()
+        # Last SOL price, kept for _get_fallback_sol_price after it leaves the cache
+        self._sol_fallback: Optional[PriceData] = None
         self._lock = asyncio.Lock()
+        self._fetch_semaphore = asyncio.Semaphore(max_concurrency)
+
+        # In-flight refresh per cache key (single flight)
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        # Last request time per mint (oldest first), for the proactive refresher
+        self._last_requested: "OrderedDict[str, float]" = OrderedDict()
+        self._pinned: set[str] = {SOL_MINT}
+        # Mints this service asked the price feed to cover, untracked once they go cold
+        self._feed_tracked: set[str] = set()
+        self._refresher_task: Optional[asyncio.Task] = None
+        self._stats = {
+            "feed_hits": 0,
+            "fresh_hits": 0,
+            "stale_served": 0,
+            "blocking_fetches": 0,
+            "background_refreshes": 0,
+            "refresh_failures": 0,
+        }
 
         # Common token mint addresses for quick reference
         self.COMMON_TOKENS = {
-            "SOL": "So11111111111111111111111111111111111111112",
+            "SOL": SOL_MINT,
             "USDC": "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",
             "USDT": "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB",
             "BONK": "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263",
@@ -46,53 +97,245 @@ class PriceService:
         }
 
     async def get_sol_price_usd(self) -> float:
-        """Get current SOL price in USD from Jupiter."""
+        """Get current SOL price in USD from Jupiter.
+
+        Served from cache while warm (refreshing in the background once stale);
+        past hard expiry a failed refresh falls back to _get_fallback_sol_price.
+        """
         try:
-            async with self._lock:
-                # Check cache first
-                cached_sol = self._price_cache.get("SOL")
-                if cached_sol and not cached_sol.is_stale(self.cache_ttl):
-                    logger.debug(
-                        f"Using cached SOL price: ${cached_sol.price_usd} (age: {cached_sol.age_seconds:.1f}s)"
-                    )
-                    return cached_sol.price_usd
-
-                # Fetch fresh price from Jupiter
-                session = await get_session()
-
-                # Jupiter price API endpoint
-                url = "https://price.jup.ag/v4/price"
-                params = {"ids": "SOL"}
-
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-
-                        if "data" in data and "SOL" in data["data"]:
-                            price_usd = float(data["data"]["SOL"]["price"])
-
-                            # Cache the result
-                            self._price_cache["SOL"] = PriceData(
-                                price_usd=price_usd, timestamp=time.time(), source="jupiter"
-                            )
-
-                            logger.debug(f"Fetched fresh SOL price: ${price_usd}")
-                            return price_usd
-                        else:
-                            logger.warning("SOL price not found in Jupiter response")
-                            return await self._get_fallback_sol_price()
-                    else:
-                        logger.warning(f"Jupiter price API error: {response.status}")
-                        return await self._get_fallback_sol_price()
+            price = (await self.get_prices([SOL_MINT])).get(SOL_MINT)
+            cached_sol = self._price_cache.get("SOL")
+            if price is not None and cached_sol and cached_sol.age_seconds <= self.hard_ttl:
+                return price
+            logger.warning("SOL price not available from Jupiter")
+            return await self._get_fallback_sol_price()
 
         except Exception as e:
             logger.error(f"Error fetching SOL price: {e}")
             return await self._get_fallback_sol_price()
 
+    def get_cached_price(self, mint: str) -> Optional[Dict[str, Any]]:
+        """Cached price for a mint with its age, without any network access."""
+        cached = self._price_cache.get(self._cache_key(mint))
+        if cached is None:
+            return None
+        return {
+            "price_usd": cached.price_usd,
+            "age_seconds": cached.age_seconds,
+            "stale": cached.is_stale(self.cache_ttl),
+            "source": cached.source,
+        }
+
+    @staticmethod
+    def _cache_key(mint: str) -> str:
+        # SOL shares its entry with get_sol_price_usd
+        return "SOL" if mint == SOL_MINT else mint
+
+    async def _fetch_price_chunk(self, mints: List[str]) -> Dict[str, float]:
+        """Fetch one chunk of mints from Jupiter and cache each price."""
+        async with self._fetch_semaphore:
+            session = await get_session("market_data")
+            async with session.get(JUPITER_PRICE_URL, params={"ids": ",".join(mints)}) as response:
+                if response.status != 200:
+                    logger.warning(f"Jupiter price API error: {response.status}")
+                    return {}
+                data = (await response.json()).get("data") or {}
+
+        now = time.time()
+        prices: Dict[str, float] = {}
+        tick_store = get_tick_store()
+        for mint in mints:
+            entry = data.get(mint)
+            if not entry or entry.get("price") is None:
+                continue
+            price = float(entry["price"])
+            prices[mint] = price
+            self._store(mint, PriceData(price_usd=price, timestamp=now, source="jupiter"))
+            if tick_store is not None:
+                tick_store.add(mint, price, ts=now)
+        return prices
+
+    def _store(self, mint: str, data: PriceData):
+        key = self._cache_key(mint)
+        self._price_cache[key] = data
+        self._price_cache.move_to_end(key)
+
+    def _prune_cache(self, now: float):
+        """Drop prices past hard_ttl (treated as missing anyway) and any beyond the size cap."""
+        cutoff = now - self.hard_ttl
+        cache = self._price_cache
+        while cache and (
+            len(cache) > MAX_CACHED_PRICES or next(iter(cache.values())).timestamp < cutoff
+        ):
+            key, data = cache.popitem(last=False)
+            if key == "SOL":
+                self._sol_fallback = data
+
+    async def _fetch_prices(self, mints: List[str]) -> Dict[str, float]:
+        """Fetch mints in concurrent chunks; failed chunks are logged, not raised."""
+        chunks = [
+            mints[i : i + self.chunk_size] for i in range(0, len(mints), self.chunk_size)
+        ]
+        results = await asyncio.gather(
+            *(self._fetch_price_chunk(chunk) for chunk in chunks), return_exceptions=True
+        )
+        prices: Dict[str, float] = {}
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, BaseException):
+                self._stats["refresh_failures"] += 1
+                logger.error(f"Error fetching prices for {len(chunk)} mints: {result}")
+            else:
+                prices.update(result)
+        logger.debug(f"Fetched {len(prices)}/{len(mints)} prices in {len(chunks)} chunks")
+        return prices
+
+    def _start_refresh(self, mints: List[str]) -> List[asyncio.Task]:
+        """Start or join refreshes for mints; at most one is in flight per key."""
+        tasks: List[asyncio.Task] = []
+        new: List[str] = []
+        for mint in mints:
+            task = self._refreshing.get(self._cache_key(mint))
+            if task is not None and not task.done():
+                if task not in tasks:
+                    tasks.append(task)
+            else:
+                new.append(mint)
+
+        if new:
+            task = asyncio.create_task(self._fetch_prices(new))
+            keys = [self._cache_key(mint) for mint in new]
+            for key in keys:
+                self._refreshing[key] = task
+
+            def _done(t: asyncio.Task, keys=keys):
+                for key in keys:
+                    if self._refreshing.get(key) is t:
+                        del self._refreshing[key]
+
+            task.add_done_callback(_done)
+            tasks.append(task)
+        return tasks
+
+    async def get_prices(self, mints: Iterable[str]) -> Dict[str, float]:
+        """Get USD prices for many mints.
+
+        Live ticks from the streaming price feed (when one is running) win
+        while younger than cache_ttl. Otherwise fresh prices are returned from
+        cache. Stale prices (up to hard_ttl)
+        are also returned immediately while one background refresh per key
+        updates them. Only missing or hard-expired mints are fetched inline,
+        in chunks of chunk_size ids with at most max_concurrency requests in
+        flight. Mints Jupiter cannot price are omitted; on fetch errors any
+        cached price is used.
+        """
+        prices: Dict[str, float] = {}
+        stale: List[str] = []
+        missing: List[str] = []
+        now = time.time()
+        feed = get_price_feed()
+        for mint in dict.fromkeys(mints):  # Dedupe, keep order
+            self._last_requested[mint] = now
+            self._last_requested.move_to_end(mint)
+            tick = feed.latest(mint) if feed else None
+            if tick is not None and now - tick.timestamp <= self.cache_ttl:
+                prices[mint] = tick.price_usd
+                self._store(mint, PriceData(tick.price_usd, tick.timestamp, tick.source))
+                self._stats["feed_hits"] += 1
+                continue
+            cached = self._price_cache.get(self._cache_key(mint))
+            if cached is None or cached.age_seconds > self.hard_ttl:
+                missing.append(mint)
+                continue
+            prices[mint] = cached.price_usd
+            if cached.is_stale(self.cache_ttl):
+                stale.append(mint)
+            else:
+                self._stats["fresh_hits"] += 1
+
+        self._prune_requested(now)
+        self._prune_cache(now)
+
+        if stale:
+            self._stats["stale_served"] += len(stale)
+            self._stats["background_refreshes"] += len(self._start_refresh(stale))
+
+        if feed and (stale or missing):
+            feed.track(stale + missing)
+            self._feed_tracked.update(stale + missing)
+
+        if missing:
+            self._stats["blocking_fetches"] += 1
+            # Shield so a cancelled caller does not cancel a refresh others share
+            await asyncio.gather(*(asyncio.shield(t) for t in self._start_refresh(missing)))
+            for mint in missing:
+                cached = self._price_cache.get(self._cache_key(mint))
+                if cached:
+                    prices[mint] = cached.price_usd
+
+        return prices
+
+    def _prune_requested(self, now: float):
+        """Forget mints not requested within hot_window, and any beyond the size cap.
+
+        Forgotten mints are also untracked on the price feed, so the feed only
+        covers what is hot.
+        """
+        cutoff = now - self.hot_window
+        requested = self._last_requested
+        cold: List[str] = []
+        while requested and (
+            len(requested) > MAX_REQUESTED_MINTS or next(iter(requested.values())) < cutoff
+        ):
+            mint, _ = requested.popitem(last=False)
+            if mint in self._feed_tracked and mint not in self._pinned:
+                cold.append(mint)
+        if cold:
+            self._feed_tracked.difference_update(cold)
+            feed = get_price_feed()
+            if feed:
+                feed.untrack(cold)
+
+    async def _refresh_hot(self):
+        """Refresh pinned mints and mints requested within hot_window."""
+        self._prune_requested(time.time())
+        self._prune_cache(time.time())
+        hot = list(dict.fromkeys([*self._pinned, *self._last_requested]))
+        if hot:
+            await asyncio.gather(*(asyncio.shield(t) for t in self._start_refresh(hot)))
+
+    def start_refresher(self, interval: Optional[float] = None, mints: Iterable[str] = ()):
+        """Keep hot prices warm in the background so lookups never wait on the network."""
+        self._pinned.update(mints)
+        if self._refresher_task is not None and not self._refresher_task.done():
+            return
+        interval = interval or self.cache_ttl * 0.8
+
+        async def _loop():
+            while True:
+                try:
+                    await self._refresh_hot()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Price refresher error: {e}")
+                await asyncio.sleep(interval)
+
+        self._refresher_task = asyncio.create_task(_loop())
+        logger.info(f"Started price refresher (every {interval:.1f}s)")
+
+    async def stop_refresher(self):
+        """Stop the proactive refresher and any in-flight refreshes."""
+        tasks = [t for t in [self._refresher_task, *self._refreshing.values()] if t]
+        self._refresher_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refreshing.clear()
+
     async def _get_fallback_sol_price(self) -> float:
         """Fallback to cached price or estimated price."""
         # Try to use stale cached price
-        cached_sol = self._price_cache.get("SOL")
+        cached_sol = self._price_cache.get("SOL") or self._sol_fallback
         if cached_sol:
             logger.info(
                 f"Using stale cached SOL price: ${cached_sol.price_usd} (age: {cached_sol.age_seconds:.1f}s)"
@@ -109,30 +352,38 @@ class PriceService:
         sol_price = await self.get_sol_price_usd()
         return sol_amount * sol_price
 
-    async def format_sol_with_usd(self, sol_amount: float) -> str:
-        """Format SOL amount with USD equivalent."""
+    @staticmethod
+    def _format_sol(sol_amount: float, sol_price: float) -> str:
+        """Format SOL amount with its USD equivalent at sol_price."""
         if sol_amount == 0:
             return "0 SOL ($0.00)"
 
-        try:
-            usd_value = await self.sol_to_usd(sol_amount)
+        usd_value = sol_amount * sol_price
 
-            # Smart formatting based on amounts
-            if sol_amount >= 1:
-                sol_str = f"{sol_amount:.3f}"
-            elif sol_amount >= 0.001:
-                sol_str = f"{sol_amount:.4f}"
-            else:
-                sol_str = f"{sol_amount:.6f}"
+        # Smart formatting based on amounts
+        if sol_amount >= 1:
+            sol_str = f"{sol_amount:.3f}"
+        elif sol_amount >= 0.001:
+            sol_str = f"{sol_amount:.4f}"
+        else:
+            sol_str = f"{sol_amount:.6f}"
 
-            if usd_value >= 1:
-                usd_str = f"${usd_value:.2f}"
-            elif usd_value >= 0.01:
-                usd_str = f"${usd_value:.3f}"
-            else:
-                usd_str = f"${usd_value:.4f}"
+        if usd_value >= 1:
+            usd_str = f"${usd_value:.2f}"
+        elif usd_value >= 0.01:
+            usd_str = f"${usd_value:.3f}"
+        else:
+            usd_str = f"${usd_value:.4f}"
 
-            return f"{sol_str} SOL ({usd_str})"
+        return f"{sol_str} SOL ({usd_str})"
+
+    async def format_sol_with_usd(self, sol_amount: float) -> str:
+        """Format SOL amount with USD equivalent."""
+        if sol_amount == 0:
+            return "0 SOL ($0.00)"
+
+        try:
+            return self._format_sol(sol_amount, await self.get_sol_price_usd())
 
         except Exception as e:
             logger.error(f"Error formatting SOL with USD: {e}")
@@ -141,21 +392,38 @@ class PriceService:
     async def format_portfolio_value(
         self, sol_balance: float, tokens: Optional[List] = None
     ) -> Dict[str, Any]:
-        """Format complete portfolio with USD values."""
+        """Format complete portfolio with USD values.
+
+        SOL and every token mint are priced with a single get_prices() call.
+        Tokens are dicts with "mint" and "uiAmount" (as returned by get_balance).
+        """
+        tokens = tokens or []
         try:
-            sol_usd = await self.sol_to_usd(sol_balance)
+            prices = await self.get_prices([SOL_MINT] + [t["mint"] for t in tokens])
+            sol_price = prices.get(SOL_MINT) or await self._get_fallback_sol_price()
+            sol_usd = sol_balance * sol_price
+
+            valued_tokens = []
+            tokens_usd = 0.0
+            for token in tokens:
+                price = prices.get(token["mint"])
+                value = float(token.get("uiAmount") or 0) * price if price is not None else None
+                if value is not None:
+                    tokens_usd += value
+                valued_tokens.append({**token, "price_usd": price, "value_usd": value})
 
-            # For now, we'll just show SOL value
-            # In the future, we could add token USD values too
-            total_usd = sol_usd
+            total_usd = sol_usd + tokens_usd
 
             return {
                 "sol_balance": sol_balance,
                 "sol_usd": sol_usd,
+                "tokens": valued_tokens,
+                "tokens_usd": tokens_usd,
+                "unpriced_tokens": sum(1 for t in valued_tokens if t["price_usd"] is None),
                 "total_usd": total_usd,
-                "formatted_sol": await self.format_sol_with_usd(sol_balance),
+                "formatted_sol": self._format_sol(sol_balance, sol_price),
                 "formatted_total": f"${total_usd:.2f}",
-                "sol_price": await self.get_sol_price_usd(),
+                "sol_price": sol_price,
             }
 
         except Exception as e:
@@ -163,6 +431,9 @@ class PriceService:
             return {
                 "sol_balance": sol_balance,
                 "sol_usd": 0.0,
+                "tokens": tokens,
+                "tokens_usd": 0.0,
+                "unpriced_tokens": len(tokens),
                 "total_usd": 0.0,
                 "formatted_sol": f"{sol_balance:.4f} SOL",
                 "formatted_total": "$0.00",
@@ -174,6 +445,10 @@ class PriceService:
         stats: Dict[str, Any] = {
             "cached_tokens": len(self._price_cache),
             "cache_ttl": self.cache_ttl,
+            "hard_ttl": self.hard_ttl,
+            "refreshes_in_flight": len(set(self._refreshing.values())),
+            "refresher_running": self._refresher_task is not None,
+            **self._stats,
             "tokens": {},
         }
 
@@ -191,6 +466,7 @@ class PriceService:
         """Clear all cached prices."""
         async with self._lock:
             self._price_cache.clear()
+            self._sol_fallback = None
             logger.info("Price cache cleared")
 
 
@@ -215,6 +491,7 @@ async def cleanup_price_service():
     """Cleanup global price service."""
     global _global_price_service
     if _global_price_service:
+        await _global_price_service.stop_refresher()
         await _global_price_service.clear_cache()
         _global_price_service = None
 
@@ -236,3 +513,9 @@ async def sol_to_usd(sol_amount: float) -> float:
     """Convert SOL to USD."""
     service = await get_price_service()
     return await service.sol_to_usd(sol_amount)
+
+
+async def get_prices(mints: Iterable[str]) -> Dict[str, float]:
+    """Get USD prices for many mints in batched requests."""
+    service = await get_price_service()
+    return await service.get_prices(mints)
@@ -0,0 +1,210 @@
+"""Priority-fee estimation from recent prioritization fees.
+
+A background task samples ``getRecentPrioritizationFees`` (the last ~150
+slots) for each scope, either the whole cluster or the transactions that
+write-lock a set of accounts, all scopes in one JSON-RPC batch. Per-slot fees
+go into a NumPy ring buffer per scope and the percentiles for every level
+are recomputed once per sample, so ``estimate()`` is a dict lookup and
+transaction builders never wait on an RPC call for their fee.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .rpc_pool import RPCPool
+
+logger = logging.getLogger(__name__)
+
+# Percentile of recent per-slot fees used for each level
+LEVELS = {"low": 25.0, "medium": 50.0, "high": 75.0, "very_high": 95.0}
+# pump.fun fee recipient: write-locked by every bonding-curve trade
+PUMP_FUN_FEE_RECIPIENT = "CebN5WGQ4jvEPvsVU4EoHEpgzq1VV7AbicfhtW4xC9iM"
+DEFAULT_SCOPES: Dict[str, List[str]] = {"global": [], "pump_fun": [PUMP_FUN_FEE_RECIPIENT]}
+MICRO_LAMPORTS_PER_LAMPORT = 1_000_000
+
+
+class FeeWindow:
+    """Rolling window of per-slot fees (micro-lamports per compute unit)."""
+
+    __slots__ = ("fees", "head", "count", "last_slot", "percentiles")
+
+    def __init__(self, capacity: int):
+        self.fees = np.zeros(capacity, dtype=np.float64)
+        self.head = 0  # Next write position
+        self.count = 0
+        self.last_slot = -1
+        self.percentiles: Dict[str, float] = {}
+
+    @property
+    def capacity(self) -> int:
+        return len(self.fees)
+
+    def add(self, samples: Iterable[Dict[str, Any]]) -> int:
+        """Append slots newer than any seen before and refresh the percentiles."""
+        rows = sorted(
+            (int(s["slot"]), float(s["prioritizationFee"]))
+            for s in samples
+            if int(s["slot"]) > self.last_slot
+        )
+        if not rows:
+            return 0
+        self.last_slot = rows[-1][0]
+        fees = np.fromiter((fee for _, fee in rows), dtype=np.float64)[-self.capacity :]
+        n = len(fees)
+        first = min(n, self.capacity - self.head)
+        self.fees[self.head : self.head + first] = fees[:first]
+        self.fees[: n - first] = fees[first:]
+        self.head = (self.head + n) % self.capacity
+        self.count = min(self.count + n, self.capacity)
+
+        values = np.percentile(self.fees[: self.count], list(LEVELS.values()))
+        self.percentiles = dict(zip(LEVELS, values.tolist()))
+        return len(rows)
+
+
+class PriorityFeeEstimator:
+    """Cached priority-fee percentiles per scope, refreshed in the background."""
+
+    def __init__(
+        self,
+        rpc_pool: RPCPool,
+        scopes: Optional[Dict[str, Sequence[str]]] = None,
+        window: int = 1500,
+        refresh_interval: float = 10.0,
+        level: str = "medium",
+        max_lamports: int = 5_000_000,
+    ):
+        """
+        Args:
+            rpc_pool: Pool used for getRecentPrioritizationFees
+            scopes: Scope name -> accounts whose write-lock fees it tracks ([] = cluster-wide)
+            window: Slots kept per scope (~400ms each)
+            refresh_interval: Seconds between samples
+            level: Level used when callers do not ask for one
+            max_lamports: Upper bound for any fee returned by estimate_lamports()
+        """
+        if level not in LEVELS:
+            raise ValueError(f"Unknown priority fee level: {level}")
+        self.rpc_pool = rpc_pool
+        scopes = scopes or DEFAULT_SCOPES
+        self.scopes = {name: list(accounts) for name, accounts in scopes.items()}
+        self.refresh_interval = refresh_interval
+        self.level = level
+        self.max_lamports = max_lamports
+        self._windows = {name: FeeWindow(window) for name in self.scopes}
+        self._refresher: Optional[asyncio.Task] = None
+        self._stats = {"samples": 0, "slots": 0, "errors": 0}
+
+    def estimate(self, level: Optional[str] = None, scope: str = "global") -> Optional[float]:
+        """Fee in micro-lamports per compute unit, or None before the first sample.
+
+        Unknown or still empty scopes fall back to the cluster-wide window.
+        """
+        level = level or self.level
+        if level not in LEVELS:
+            raise ValueError(f"Unknown priority fee level: {level}")
+        window = self._windows.get(scope)
+        if window is None or not window.percentiles:
+            window = self._windows.get("global")
+        if window is None or not window.percentiles:
+            return None
+        return window.percentiles[level]
+
+    def estimate_lamports(
+        self,
+        compute_units: int,
+        level: Optional[str] = None,
+        scope: str = "global",
+        minimum: int = 0,
+    ) -> int:
+        """Total priority fee in lamports for compute_units, between minimum and max_lamports."""
+        per_unit = self.estimate(level, scope) or 0.0
+        lamports = int(per_unit * compute_units) // MICRO_LAMPORTS_PER_LAMPORT
+        return min(max(lamports, minimum), max(self.max_lamports, minimum))
+
+    async def refresh(self) -> int:
+        """Sample every scope in one batched request; returns new slots recorded."""
+        names = list(self.scopes)
+        calls = [
+            ("getRecentPrioritizationFees", [self.scopes[n]] if self.scopes[n] else [])
+            for n in names
+        ]
+        try:
+            results = await self.rpc_pool.batch(calls)
+        except Exception:
+            self._stats["errors"] += 1
+            raise
+        added = sum(self._windows[n].add(r or ()) for n, r in zip(names, results))
+        self._stats["samples"] += 1
+        self._stats["slots"] += added
+        return added
+
+    def start(self):
+        """Sample in the background every refresh_interval seconds."""
+        if self.refresh_interval > 0 and (self._refresher is None or self._refresher.done()):
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Priority fee sample failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def stop(self):
+        if self._refresher is not None and not self._refresher.done():
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "level": self.level,
+            "scopes": {
+                name: {"slots": w.count, "last_slot": w.last_slot, **w.percentiles}
+                for name, w in self._windows.items()
+            },
+        }
+
+
+# Global priority fee estimator
+_global_estimator: Optional[PriorityFeeEstimator] = None
+
+
+def configure_priority_fee_estimator(
+    rpc_pool: RPCPool,
+    level: str = "medium",
+    refresh_interval: float = 10.0,
+    max_lamports: int = 5_000_000,
+    start: bool = True,
+) -> PriorityFeeEstimator:
+    """Create the global estimator; start=True begins background sampling."""
+    global _global_estimator
+    _global_estimator = PriorityFeeEstimator(
+        rpc_pool, refresh_interval=refresh_interval, level=level, max_lamports=max_lamports
+    )
+    if start:
+        _global_estimator.start()
+    return _global_estimator
+
+
+def get_priority_fee_estimator() -> Optional[PriorityFeeEstimator]:
+    """Global estimator, or None before configure_priority_fee_estimator()."""
+    return _global_estimator
+
+
+async def cleanup_priority_fee_estimator():
+    """Stop background sampling."""
+    global _global_estimator
+    if _global_estimator is not None:
+        await _global_estimator.stop()
+        _global_estimator = None
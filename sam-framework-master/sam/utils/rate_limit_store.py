@@ -0,0 +1,98 @@
+"""Shared rate-limit state for multi-process deployments on one host.
+
+Each key's GCRA theoretical arrival time lives in a SQLite WAL table. Every
+decision is a read-modify-write inside one ``BEGIN IMMEDIATE`` transaction,
+so workers sharing the file enforce a single combined limit instead of one
+limit each.
+"""
+
+import logging
+import sqlite3
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .db_executor import get_sqlite_executor
+
+logger = logging.getLogger(__name__)
+
+# decide(tat, now) -> (allowed, new_tat, info); tat is None for unseen keys
+Decision = Callable[[Optional[float], float], Tuple[bool, float, Dict[str, Any]]]
+
+
+class SQLiteRateLimitStore:
+    """GCRA state in a SQLite table shared by every process on the host."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._executor = get_sqlite_executor(db_path)
+        self._initialized = False
+
+    async def initialize(self):
+        if self._initialized:
+            return
+        await self._executor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                tat REAL NOT NULL,
+                last_seen REAL NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        self._initialized = True
+        logger.info(f"Initialized shared rate limit store: {self.db_path}")
+
+    async def check(self, key: str, decide: Decision, now: float) -> Tuple[bool, Dict[str, Any]]:
+        """Atomically apply one GCRA decision to key's stored state."""
+        await self.initialize()
+
+        def _run(conn: sqlite3.Connection):
+            row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            allowed, tat, info = decide(row[0] if row else None, now)
+            if allowed:
+                conn.execute(
+                    """
+                    INSERT INTO rate_limits (key, tat, last_seen) VALUES (?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET tat = excluded.tat,
+                                                   last_seen = excluded.last_seen
+                    """,
+                    (key, tat, now),
+                )
+            return allowed, info
+
+        return await self._executor.run_in_transaction(_run)
+
+    async def peek(self, key: str) -> Optional[float]:
+        """Stored theoretical arrival time for key, if any."""
+        await self.initialize()
+        row = await self._executor.fetchone("SELECT tat FROM rate_limits WHERE key = ?", (key,))
+        return row[0] if row else None
+
+    async def reset(self, key: str) -> bool:
+        await self.initialize()
+        return await self._executor.execute("DELETE FROM rate_limits WHERE key = ?", (key,)) > 0
+
+    async def purge_idle(self, now: float, chunk_size: int = 500) -> int:
+        """Delete up to chunk_size keys whose bucket has fully refilled."""
+        await self.initialize()
+        return await self._executor.execute(
+            """
+            DELETE FROM rate_limits WHERE key IN (
+                SELECT key FROM rate_limits WHERE tat <= ? LIMIT ?
+            )
+            """,
+            (now, chunk_size),
+        )
+
+    async def count(self) -> int:
+        await self.initialize()
+        row = await self._executor.fetchone("SELECT COUNT(*) FROM rate_limits")
+        return row[0] if row else 0
+
+
+def create_rate_limit_store(url: Optional[str]) -> Optional[SQLiteRateLimitStore]:
+    """Create the store selected by url; memory:// (or nothing) keeps state per process."""
+    if not url or url.startswith("memory://"):
+        return None
+    if url.startswith("sqlite:///"):
+        return SQLiteRateLimitStore(url[len("sqlite:///") :])
+    raise ValueError(f"Unsupported RATE_LIMIT_STORAGE_URL scheme: {url.split('://', 1)[0]}")
@@ -1,10 +1,13 @@
 import asyncio
 import logging
 import time
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, Optional
 from dataclasses import dataclass
 from collections import OrderedDict
 
+from .rate_limit_store import SQLiteRateLimitStore, create_rate_limit_store
+from ..config.settings import Settings
+
 logger = logging.getLogger(__name__)
 
 
@@ -12,30 +15,167 @@ logger = logging.getLogger(__name__)
 class RateLimit:
     """Rate limit configuration."""
 
-    requests: int  # Number of requests allowed
+    requests: int  # Sustained requests allowed per window
     window: int  # Time window in seconds
-    burst: int  # Burst limit (immediate requests allowed)
+    burst: int  # Burst limit (immediate requests allowed from a full bucket)
 
 
-@dataclass
-class RequestRecord:
-    """Individual request record."""
+class BucketState:
+    """Per-key GCRA state: theoretical arrival time and last access time."""
 
-    timestamp: float
-    key: str
+    __slots__ = ("tat", "last_seen")
 
+    def __init__(self, tat: float, last_seen: float):
+        self.tat = tat
+        self.last_seen = last_seen
 
-class RateLimiter:
-    """Optimized in-memory rate limiter with LRU eviction and memory management."""
 
-    def __init__(self, max_keys: int = 10000, cleanup_interval: int = 60):
-        # In-memory storage for request history with LRU ordering
-        self.request_history: OrderedDict[str, List[RequestRecord]] = OrderedDict()
+def _gcra_params(limit: RateLimit) -> tuple[float, float]:
+    """Emission interval and burst tolerance for a limit."""
+    interval = limit.window / max(1, limit.requests)
+    return interval, interval * (max(1, limit.burst) - 1)
+
+
+def _whole_requests(slack: float, interval: float) -> int:
+    """Number of whole emission intervals in slack (tolerant of float rounding)."""
+    return int(slack / interval + 1e-9)
+
+
+def gcra_update(
+    tat: Optional[float], limit: RateLimit, now: float
+) -> tuple[bool, float, Dict[str, Any]]:
+    """Decide one request against a stored TAT; returns (allowed, new_tat, info)."""
+    interval, tolerance = _gcra_params(limit)
+    tat = tat if tat is not None and tat > now else now
+    allow_at = tat - tolerance
+
+    if allow_at > now:
+        return False, tat, {
+            "allowed": False,
+            "limit": limit.requests,
+            "remaining": 0,
+            "reset_time": tat,
+            "retry_after": allow_at - now,
+        }
+
+    new_tat = tat + interval
+    return True, new_tat, {
+        "allowed": True,
+        "limit": limit.requests,
+        "remaining": _whole_requests(now + tolerance - tat, interval),
+        "reset_time": new_tat,
+        "retry_after": 0,
+    }
+
+
+# Provider quotas for outbound calls, declared by the integrations that use them
+UPSTREAM_QUOTAS: Dict[str, RateLimit] = {}
+
+
+def declare_upstream_quota(name: str, requests: int, window: int = 60, burst: int = 1) -> str:
+    """Declare an upstream's request quota; returns the name for use with throttle()."""
+    UPSTREAM_QUOTAS[name] = RateLimit(requests=requests, window=window, burst=burst)
+    return name
+
+
+class ThrottleQueue:
+    """FIFO wait queue for one throttled key, with queue-depth metrics."""
+
+    __slots__ = (
+        "lock", "waiting", "max_waiting", "acquired", "delayed", "wait_seconds", "timeouts",
+    )  # fmt: skip
+
+    def __init__(self):
+        # asyncio.Lock wakes waiters in arrival order, which gives FIFO fairness
         self.lock = asyncio.Lock()
+        self.waiting = 0
+        self.max_waiting = 0
+        self.acquired = 0
+        self.delayed = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "wait_seconds": self.wait_seconds,
+            "timeouts": self.timeouts,
+        }
+
+
+class RateLimitShard:
+    """One slice of the key space with its own lock and cleanup cursor."""
+
+    __slots__ = ("states", "lock", "max_keys", "cursor")
+
+    def __init__(self, max_keys: int):
+        # Per-key GCRA state with LRU ordering
+        self.states: OrderedDict[str, BucketState] = OrderedDict()
+        self.lock = asyncio.Lock()
+        self.max_keys = max_keys
+        # Remaining keys of the current cleanup sweep (None: no sweep in progress)
+        self.cursor: Optional[Iterator[str]] = None
+
+
+class RateLimiter:
+    """GCRA rate limiter with O(1) checks, sharded by key hash.
+
+    Each limit allows ``burst`` immediate requests and then refills at
+    ``requests / window`` per second. Per key only the theoretical arrival
+    time (TAT) of the next request is stored; a key whose TAT is in the past
+    has a full bucket and carries no information, so cleanup drops it.
+
+    Keys are spread over ``shards`` independent shards, each with its own
+    lock, LRU order and cleanup cursor. Cleanup walks a shard in small
+    time-sliced chunks and yields between them, so checks never wait behind
+    a full pass over all keys.
+
+    With a ``store`` the per-key state lives in a SQLite table shared by all
+    worker processes on the host instead of in the shards.
+    """
+
+    def __init__(
+        self,
+        max_keys: int = 10000,
+        cleanup_interval: int = 60,
+        shards: int = 16,
+        cleanup_chunk: int = 256,
+        cleanup_slice: float = 0.002,
+        store: Optional[SQLiteRateLimitStore] = None,
+    ):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            max_keys: Total key budget, split evenly over shards
+            cleanup_interval: Seconds between cleanup sweeps
+            shards: Number of independently locked shards (fewer for small max_keys)
+            cleanup_chunk: Keys examined per cleanup step at most
+            cleanup_slice: Seconds a cleanup step may hold a shard lock
+            store: Shared cross-process state; None keeps state in this process
+        """
         self.max_keys = max_keys
         self.cleanup_interval = cleanup_interval
+        self.cleanup_chunk = cleanup_chunk
+        self.cleanup_slice = cleanup_slice
+        self.store = store
+        # Small budgets are not worth splitting: keep at least 64 keys per shard
+        shards = max(1, min(shards, max_keys // 64))
+        self._shards = [RateLimitShard(max(1, max_keys // shards)) for _ in range(shards)]
         self._cleanup_task: Optional[asyncio.Task] = None
         self._shutdown = False
+        self._cleanup_stats = {
+            "sweeps": 0,
+            "steps": 0,
+            "keys_scanned": 0,
+            "keys_removed": 0,
+            "throttles_removed": 0,
+        }
+        self._throttles: Dict[str, ThrottleQueue] = {}
+        self._max_step_seconds = 0.0
 
         # Default rate limits per endpoint/tool
         self.limits = {
@@ -53,7 +193,9 @@ class RateLimiter:
             "default": RateLimit(requests=60, window=60, burst=10),
         }
 
-        logger.info(f"Initialized optimized rate limiter (max_keys: {max_keys})")
+        logger.info(
+            f"Initialized GCRA rate limiter (max_keys: {max_keys}, shards: {len(self._shards)})"
+        )
 
         # Start cleanup task
         self._start_cleanup_task()
@@ -63,29 +205,92 @@ class RateLimiter:
         if self._cleanup_task is None or self._cleanup_task.done():
             self._cleanup_task = asyncio.create_task(self._cleanup_old_records())
 
-    async def _evict_lru_keys(self, target_count: int):
-        """Evict least recently used keys to make room."""
-        evicted = 0
-        while len(self.request_history) > target_count and evicted < 1000:  # Prevent infinite loop
-            try:
-                # Remove oldest (least recently used) key
-                oldest_key, _ = self.request_history.popitem(last=False)
-                evicted += 1
-            except KeyError:
-                break
+    def _shard(self, key: str) -> RateLimitShard:
+        return self._shards[hash(key) % len(self._shards)]
 
-        if evicted > 0:
-            logger.debug(f"Evicted {evicted} LRU rate limit keys")
+    @property
+    def key_count(self) -> int:
+        """Number of keys currently tracked across all shards."""
+        return sum(len(shard.states) for shard in self._shards)
 
-    def _touch_key(self, key: str):
-        """Mark key as recently used by moving it to end of OrderedDict."""
-        if key in self.request_history:
-            # Move to end (most recently used)
-            records = self.request_history.pop(key)
-            self.request_history[key] = records
+    def _cleanup_step(self, shard: RateLimitShard, now: float) -> bool:
+        """Examine the next chunk of a shard's sweep; returns True when the sweep is done.
+
+        Caller holds the shard lock. The step stops after cleanup_chunk keys
+        or cleanup_slice seconds, whichever comes first.
+        """
+        if shard.cursor is None:
+            # Snapshot the key order; keys added later are picked up next sweep
+            shard.cursor = iter(list(shard.states))
+
+        started = time.perf_counter()
+        states = shard.states
+        scanned = removed = 0
+        done = False
+        while scanned < self.cleanup_chunk:
+            key = next(shard.cursor, None)
+            if key is None:
+                done = True
+                break
+            scanned += 1
+            state = states.get(key)
+            if state is not None and state.tat <= now:
+                del states[key]
+                removed += 1
+            if not scanned % 32 and time.perf_counter() - started > self.cleanup_slice:
+                break
+
+        if done:
+            shard.cursor = None
+        self._cleanup_stats["steps"] += 1
+        self._cleanup_stats["keys_scanned"] += scanned
+        self._cleanup_stats["keys_removed"] += removed
+        self._max_step_seconds = max(self._max_step_seconds, time.perf_counter() - started)
+        return done
+
+    def _remove_idle_keys(self, now: float) -> int:
+        """Drop keys whose bucket has fully refilled, in one synchronous pass."""
+        before = self._cleanup_stats["keys_removed"]
+        for shard in self._shards:
+            shard.cursor = None
+            while not self._cleanup_step(shard, now):
+                pass
+        return self._cleanup_stats["keys_removed"] - before
+
+    async def sweep(self) -> int:
+        """Run one incremental cleanup sweep over every shard; returns keys removed."""
+        before = self._cleanup_stats["keys_removed"]
+        for shard in self._shards:
+            done = False
+            while not done:
+                async with shard.lock:
+                    done = self._cleanup_step(shard, time.time())
+                # Let waiting checks in between chunks
+                await asyncio.sleep(0)
+        if self.store is not None:
+            while True:
+                removed = await self.store.purge_idle(time.time(), self.cleanup_chunk)
+                self._cleanup_stats["steps"] += 1
+                self._cleanup_stats["keys_removed"] += removed
+                if removed < self.cleanup_chunk:
+                    break
+        self._drop_idle_throttles()
+        self._cleanup_stats["sweeps"] += 1
+        return self._cleanup_stats["keys_removed"] - before
+
+    def _drop_idle_throttles(self):
+        """Forget throttle queues nobody is waiting in, so throttled keys stay bounded."""
+        idle = [
+            key
+            for key, queue in self._throttles.items()
+            if not queue.waiting and not queue.lock.locked()
+        ]
+        for key in idle:
+            del self._throttles[key]
+        self._cleanup_stats["throttles_removed"] += len(idle)
 
     async def _cleanup_old_records(self):
-        """Optimized periodic cleanup with LRU eviction."""
+        """Periodic incremental cleanup of idle keys."""
         while not self._shutdown:
             try:
                 await asyncio.sleep(self.cleanup_interval)
@@ -93,46 +298,12 @@ class RateLimiter:
                 if self._shutdown:
                     break
 
-                current_time = time.time()
-
-                async with self.lock:
-                    initial_size = len(self.request_history)
-
-                    # Clean up expired records first
-                    keys_to_remove = []
-                    cleaned_records = 0
-
-                    for key, records in list(self.request_history.items()):
-                        # Remove records older than 1 hour
-                        cutoff_time = current_time - 3600
-                        old_count = len(records)
-
-                        self.request_history[key] = [
-                            record for record in records if record.timestamp > cutoff_time
-                        ]
-
-                        cleaned_records += old_count - len(self.request_history[key])
-
-                        # Remove empty keys
-                        if not self.request_history[key]:
-                            keys_to_remove.append(key)
-
-                    for key in keys_to_remove:
-                        del self.request_history[key]
-
-                    # LRU eviction if still over limit
-                    if len(self.request_history) > self.max_keys:
-                        target_size = int(self.max_keys * 0.8)  # Reduce to 80% of max
-                        await self._evict_lru_keys(target_size)
-
-                    final_size = len(self.request_history)
-
-                    if keys_to_remove or cleaned_records > 0:
-                        logger.debug(
-                            f"Rate limiter cleanup: removed {len(keys_to_remove)} keys, "
-                            f"cleaned {cleaned_records} records, "
-                            f"size: {initial_size} → {final_size}"
-                        )
+                removed = await self.sweep()
+                if removed:
+                    logger.debug(
+                        f"Rate limiter cleanup: removed {removed} idle keys, "
+                        f"{self.key_count} remaining"
+                    )
 
             except asyncio.CancelledError:
                 logger.info("Rate limiter cleanup task cancelled")
@@ -141,6 +312,34 @@ class RateLimiter:
                 logger.error(f"Error in rate limiter cleanup: {e}")
                 await asyncio.sleep(60)  # Wait before retrying
 
+    def _check(self, key: str, limit: RateLimit, now: float) -> tuple[bool, Dict[str, Any]]:
+        """GCRA decision for one request; caller holds the key's shard lock."""
+        shard = self._shard(key)
+        history = shard.states
+
+        state = history.get(key)
+        if state is None:
+            if len(history) >= shard.max_keys:
+                # Evict the shard's least recently used key
+                history.popitem(last=False)
+            state = BucketState(now, now)
+            history[key] = state
+        else:
+            history.move_to_end(key)
+            state.last_seen = now
+
+        allowed, state.tat, info = gcra_update(state.tat, limit, now)
+        return allowed, info
+
+    async def _decide(self, key: str, limit: RateLimit) -> tuple[bool, Dict[str, Any]]:
+        """Apply one GCRA decision in the shared store or the local shard."""
+        if self.store is not None:
+            return await self.store.check(
+                key, lambda tat, now: gcra_update(tat, limit, now), time.time()
+            )
+        async with self._shard(key).lock:
+            return self._check(key, limit, time.time())
+
     async def check_rate_limit(
         self, key: str, limit_type: str = "default"
     ) -> tuple[bool, Dict[str, Any]]:
@@ -150,95 +349,106 @@ class RateLimiter:
         Returns:
             tuple: (is_allowed: bool, info: Dict[str, Any])
         """
-        async with self.lock:
-            current_time = time.time()
-            limit = self.limits.get(limit_type, self.limits["default"])
-
-            # Check for LRU eviction before processing
-            if len(self.request_history) >= self.max_keys and key not in self.request_history:
-                await self._evict_lru_keys(self.max_keys - 1)
-
-            # Get or create request history for this key
-            if key not in self.request_history:
-                self.request_history[key] = []
-            else:
-                # Touch key to mark as recently used
-                self._touch_key(key)
-
-            records = self.request_history[key]
-
-            # Remove old records outside the time window
-            window_start = current_time - limit.window
-            recent_records = [r for r in records if r.timestamp > window_start]
-            self.request_history[key] = recent_records
-
-            # Count recent requests
-            recent_count = len(recent_records)
-
-            # Check if within limits
-            if recent_count < limit.requests:
-                # Allow the request
-                new_record = RequestRecord(timestamp=current_time, key=key)
-                self.request_history[key].append(new_record)
-
-                return True, {
-                    "allowed": True,
-                    "limit": limit.requests,
-                    "remaining": limit.requests - recent_count - 1,
-                    "reset_time": window_start + limit.window,
-                    "retry_after": 0,
-                }
-            else:
-                # Rate limit exceeded
-                # Calculate when the oldest request will expire
-                oldest_record = min(recent_records, key=lambda r: r.timestamp)
-                retry_after = oldest_record.timestamp + limit.window - current_time
-
-                return False, {
-                    "allowed": False,
-                    "limit": limit.requests,
-                    "remaining": 0,
-                    "reset_time": oldest_record.timestamp + limit.window,
-                    "retry_after": max(0, retry_after),
-                }
+        return await self._decide(key, self._limit_for(limit_type))
+
+    def _limit_for(self, limit_type: str) -> RateLimit:
+        limit = self.limits.get(limit_type) or UPSTREAM_QUOTAS.get(limit_type)
+        return limit or self.limits["default"]
+
+    async def acquire(
+        self, key: str, limit_type: str = "default", timeout: float = 30.0
+    ) -> tuple[bool, Dict[str, Any]]:
+        """
+        Wait until a request for key is allowed, up to timeout seconds.
+
+        Callers are served in arrival order: only the head of the queue waits
+        on the bucket, everyone else waits behind it. A caller gives up as
+        soon as the bucket cannot admit it before its deadline.
+
+        Returns:
+            tuple: (is_allowed: bool, info: Dict[str, Any]) where info includes "waited"
+        """
+        limit = self._limit_for(limit_type)
+        queue = self._throttles.get(key)
+        if queue is None:
+            queue = self._throttles[key] = ThrottleQueue()
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + timeout
+        queue.waiting += 1
+        queue.max_waiting = max(queue.max_waiting, queue.waiting)
+        info: Dict[str, Any] = {"allowed": False, "limit": limit.requests, "retry_after": timeout}
+        # Delayed: queued behind another waiter or had to sleep for quota
+        delayed = queue.lock.locked()
+        try:
+            try:
+                await asyncio.wait_for(queue.lock.acquire(), timeout)
+            except asyncio.TimeoutError:
+                queue.timeouts += 1
+                return False, {**info, "waited": loop.time() - started}
+
+            try:
+                while True:
+                    allowed, info = await self._decide(key, limit)
+                    if allowed:
+                        break
+                    if loop.time() + info["retry_after"] > deadline:
+                        queue.timeouts += 1
+                        return False, {**info, "waited": loop.time() - started}
+                    delayed = True
+                    await asyncio.sleep(info["retry_after"])
+            finally:
+                queue.lock.release()
+        finally:
+            queue.waiting -= 1
+
+        waited = loop.time() - started
+        queue.acquired += 1
+        queue.wait_seconds += waited
+        if delayed:
+            queue.delayed += 1
+        return True, {**info, "waited": waited}
+
+    def get_throttle_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Queue depth and wait metrics per throttled key."""
+        return {key: queue.snapshot() for key, queue in self._throttles.items()}
 
     async def reset_rate_limit(self, key: str, limit_type: str = "default"):
         """Reset rate limit for a specific key."""
-        async with self.lock:
-            if key in self.request_history:
-                del self.request_history[key]
-                logger.info(f"Reset rate limit for key: {key}")
+        if self.store is not None:
+            removed = await self.store.reset(key)
+        else:
+            async with self._shard(key).lock:
+                removed = self._shard(key).states.pop(key, None) is not None
+        if removed:
+            logger.info(f"Reset rate limit for key: {key}")
 
     async def get_rate_limit_info(self, key: str, limit_type: str = "default") -> Dict[str, Any]:
         """Get current rate limit status for a key without making a request."""
-        async with self.lock:
-            current_time = time.time()
-            limit = self.limits.get(limit_type, self.limits["default"])
-
-            if key not in self.request_history:
-                return {
-                    "limit": limit.requests,
-                    "remaining": limit.requests,
-                    "used": 0,
-                    "reset_time": current_time + limit.window,
-                }
-
-            # Count recent requests within the window
-            window_start = current_time - limit.window
-            recent_records = [r for r in self.request_history[key] if r.timestamp > window_start]
-            used_count = len(recent_records)
-
-            reset_time = current_time + limit.window
-            if recent_records:
-                oldest_record = min(recent_records, key=lambda r: r.timestamp)
-                reset_time = oldest_record.timestamp + limit.window
-
-            return {
-                "limit": limit.requests,
-                "remaining": max(0, limit.requests - used_count),
-                "used": used_count,
-                "reset_time": reset_time,
-            }
+        if self.store is not None:
+            stored_tat = await self.store.peek(key)
+        else:
+            shard = self._shard(key)
+            async with shard.lock:
+                state = shard.states.get(key)
+                stored_tat = state.tat if state else None
+
+        current_time = time.time()
+        limit = self._limit_for(limit_type)
+        interval, tolerance = _gcra_params(limit)
+        capacity = max(1, limit.burst)
+
+        tat = max(stored_tat, current_time) if stored_tat is not None else current_time
+        slack = current_time + tolerance + interval - tat
+        remaining = max(0, min(capacity, _whole_requests(slack, interval)))
+
+        return {
+            "limit": limit.requests,
+            "remaining": remaining,
+            "used": capacity - remaining,
+            "reset_time": tat if stored_tat is not None else current_time + limit.window,
+        }
 
     async def shutdown(self):
         """Shutdown the rate limiter and cleanup resources."""
@@ -250,24 +460,32 @@ class RateLimiter:
             except asyncio.CancelledError:
                 pass
 
-        async with self.lock:
-            self.request_history.clear()
+        for shard in self._shards:
+            async with shard.lock:
+                shard.states.clear()
+                shard.cursor = None
 
         logger.info("Rate limiter shutdown completed")
 
     async def get_stats(self) -> Dict[str, Any]:
         """Get rate limiter statistics."""
-        async with self.lock:
-            total_records = sum(len(records) for records in self.request_history.values())
-
-            return {
-                "total_keys": len(self.request_history),
-                "max_keys": self.max_keys,
-                "total_records": total_records,
-                "cleanup_interval": self.cleanup_interval,
-                "is_shutdown": self._shutdown,
-                "memory_usage_pct": (len(self.request_history) / self.max_keys) * 100,
-            }
+        sizes = [len(shard.states) for shard in self._shards]
+        total = sum(sizes)
+        return {
+            "backend": "sqlite" if self.store is not None else "memory",
+            "total_keys": total if self.store is None else await self.store.count(),
+            "max_keys": self.max_keys,
+            "shards": len(self._shards),
+            "largest_shard": max(sizes),
+            "cleanup_interval": self.cleanup_interval,
+            "cleanup": {
+                **self._cleanup_stats,
+                "max_step_ms": round(self._max_step_seconds * 1000, 3),
+            },
+            "throttles": self.get_throttle_stats(),
+            "is_shutdown": self._shutdown,
+            "memory_usage_pct": (total / self.max_keys) * 100,
+        }
 
 
 # Global rate limiter instance
@@ -279,7 +497,9 @@ async def get_rate_limiter() -> RateLimiter:
     global _global_rate_limiter
 
     if _global_rate_limiter is None:
-        _global_rate_limiter = RateLimiter()
+        _global_rate_limiter = RateLimiter(
+            store=create_rate_limit_store(Settings.RATE_LIMIT_STORAGE_URL)
+        )
 
     return _global_rate_limiter
 
@@ -304,3 +524,16 @@ async def rate_limited(identifier: str, limit_type: str = "default"):
     """Check if an identifier is currently rate limited."""
     allowed, info = await check_rate_limit(identifier, limit_type)
     return not allowed
+
+
+async def wait_for_rate_limit(
+    identifier: str, limit_type: str = "default", timeout: float = 30.0
+) -> tuple[bool, Dict[str, Any]]:
+    """Global function to wait (up to timeout) until a request is allowed."""
+    limiter = await get_rate_limiter()
+    return await limiter.acquire(identifier, limit_type, timeout)
+
+
+def get_throttle_stats() -> Dict[str, Dict[str, Any]]:
+    """Throttle queue metrics of the global limiter ({} before first use)."""
+    return _global_rate_limiter.get_throttle_stats() if _global_rate_limiter else {}
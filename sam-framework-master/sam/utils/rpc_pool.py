@@ -0,0 +1,398 @@
+"""Solana JSON-RPC endpoint pool with latency scoring and failover.
+
+Each endpoint tracks an EWMA of its latency and error rate. Requests go to
+the best-scoring healthy endpoint, limited by a per-endpoint concurrency
+cap. Reads fail over to the next endpoint on transport errors, HTTP 429/5xx
+and "node is behind" style RPC errors; endpoints that keep failing are
+benched for an exponentially growing cooldown.
+
+``sendTransaction`` is sticky: the endpoint that accepted a transaction is
+remembered by signature, so confirmation calls made with the same
+``sticky_key`` ask the node that actually has the transaction.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import aiohttp
+
+from .http_client import get_session
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_HTTP_STATUS = {408, 429, 500, 502, 503, 504}
+# Statuses some providers answer batch requests with when they do not support them
+BATCH_REJECTED_STATUS = {400, 405, 413}
+# Node behind / slot skipped / block not available / provider rate limits
+RETRYABLE_RPC_CODES = {-32004, -32005, -32007, -32014, -32016, 429}
+
+
+class RPCError(RuntimeError):
+    """JSON-RPC or transport failure; retryable errors are worth another endpoint."""
+
+    def __init__(
+        self,
+        message: str,
+        code: Optional[int] = None,
+        endpoint: Optional[str] = None,
+        retryable: bool = False,
+        sent: bool = True,
+    ):
+        super().__init__(message)
+        self.code = code
+        self.endpoint = endpoint
+        self.retryable = retryable
+        # False when the request provably never reached the endpoint
+        self.sent = sent
+
+
+class RPCEndpoint:
+    """One RPC URL with its health and latency statistics."""
+
+    def __init__(self, url: str, max_concurrency: int = 8):
+        self.url = url
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.latency: Optional[float] = None  # EWMA seconds; None until first success
+        self.error_rate = 0.0  # EWMA of failures, 0..1
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.supports_batch = True
+
+    def healthy(self, now: Optional[float] = None) -> bool:
+        return self.cooldown_until <= (time.monotonic() if now is None else now)
+
+    def score(self) -> float:
+        """Lower is better. Untried endpoints score 0 so they get probed once."""
+        latency = self.latency if self.latency is not None else 0.0
+        load = self.in_flight / self.max_concurrency
+        return latency * (1.0 + 4.0 * self.error_rate) * (1.0 + load)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy(),
+            "latency_ms": round(self.latency * 1000, 2) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 4),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "cooldown_remaining": max(0.0, round(self.cooldown_until - time.monotonic(), 2)),
+        }
+
+
+class RPCPool:
+    """Route JSON-RPC calls across several endpoints."""
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        max_concurrency: int = 8,
+        timeout: float = 10.0,
+        alpha: float = 0.3,
+        failure_threshold: int = 3,
+        cooldown: float = 5.0,
+        max_cooldown: float = 60.0,
+        sticky_ttl: float = 120.0,
+        max_sticky: int = 10_000,
+    ):
+        """
+        Args:
+            urls: Endpoint URLs; duplicates are ignored
+            max_concurrency: Requests in flight per endpoint
+            timeout: Total seconds per HTTP request
+            alpha: EWMA weight of the newest latency/error sample
+            failure_threshold: Consecutive failures before an endpoint is benched
+            cooldown: First bench duration in seconds, doubled per further failure
+            max_cooldown: Longest bench duration
+            sticky_ttl: Seconds a sticky key keeps routing to its endpoint
+            max_sticky: Sticky keys remembered at most
+        """
+        self.endpoints = [RPCEndpoint(url, max_concurrency) for url in dict.fromkeys(urls)]
+        if not self.endpoints:
+            raise ValueError("RPCPool needs at least one endpoint")
+        self.timeout = timeout
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.sticky_ttl = sticky_ttl
+        self.max_sticky = max_sticky
+        self._sticky: "OrderedDict[str, Tuple[RPCEndpoint, float]]" = OrderedDict()
+        self._next_id = 0
+        self._stats = {"failovers": 0, "sticky_hits": 0}
+
+    @property
+    def primary_url(self) -> str:
+        return self.endpoints[0].url
+
+    # Routing
+
+    def ranked(self) -> List[RPCEndpoint]:
+        """Healthy endpoints by score, then benched ones by soonest recovery."""
+        now = time.monotonic()
+        healthy = sorted((e for e in self.endpoints if e.healthy(now)), key=RPCEndpoint.score)
+        benched = sorted(
+            (e for e in self.endpoints if not e.healthy(now)), key=lambda e: e.cooldown_until
+        )
+        return healthy + benched
+
+    def stick(self, key: str, endpoint: RPCEndpoint):
+        self._sticky[key] = (endpoint, time.monotonic() + self.sticky_ttl)
+        self._sticky.move_to_end(key)
+        while len(self._sticky) > self.max_sticky:
+            self._sticky.popitem(last=False)
+
+    def sticky_endpoint(self, key: str) -> Optional[RPCEndpoint]:
+        entry = self._sticky.get(key)
+        if entry is None:
+            return None
+        endpoint, expires = entry
+        if expires < time.monotonic():
+            del self._sticky[key]
+            return None
+        return endpoint
+
+    def _candidates(self, sticky_key: Optional[str]) -> List[RPCEndpoint]:
+        ranked = self.ranked()
+        if sticky_key is not None:
+            endpoint = self.sticky_endpoint(sticky_key)
+            if endpoint is not None and endpoint.healthy():
+                self._stats["sticky_hits"] += 1
+                ranked.remove(endpoint)
+                ranked.insert(0, endpoint)
+        return ranked
+
+    # Health bookkeeping
+
+    def _record_success(self, endpoint: RPCEndpoint, latency: float):
+        a = self.alpha
+        if endpoint.latency is None:
+            endpoint.latency = latency
+        else:
+            endpoint.latency = (1 - a) * endpoint.latency + a * latency
+        endpoint.error_rate *= 1 - a
+        endpoint.consecutive_failures = 0
+
+    def _record_failure(self, endpoint: RPCEndpoint, retry_after: Optional[float] = None):
+        endpoint.failures += 1
+        endpoint.error_rate = (1 - self.alpha) * endpoint.error_rate + self.alpha
+        endpoint.consecutive_failures += 1
+        extra = endpoint.consecutive_failures - self.failure_threshold
+        if retry_after is not None or extra >= 0:
+            bench = retry_after or min(self.cooldown * 2 ** max(extra, 0), self.max_cooldown)
+            endpoint.cooldown_until = time.monotonic() + bench
+            logger.warning(f"RPC endpoint {endpoint.url} benched for {bench:.1f}s")
+
+    # Transport
+
+    async def _post(self, endpoint: RPCEndpoint, payload: Any) -> Any:
+        """POST payload to one endpoint, recording latency or failure."""
+        async with endpoint.semaphore:
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+            started = time.monotonic()
+            try:
+                session = await get_session("rpc")
+                async with session.post(
+                    endpoint.url,
+                    json=payload,
+                    headers={"Content-Type": "application/json"},
+                    timeout=aiohttp.ClientTimeout(total=self.timeout),
+                ) as response:
+                    if response.status != 200:
+                        retry_after = None
+                        if response.status == 429:
+                            try:
+                                retry_after = float(response.headers.get("Retry-After", ""))
+                            except ValueError:
+                                retry_after = self.cooldown
+                        self._record_failure(endpoint, retry_after)
+                        raise RPCError(
+                            f"HTTP {response.status} from {endpoint.url}",
+                            code=response.status,
+                            endpoint=endpoint.url,
+                            retryable=response.status in RETRYABLE_HTTP_STATUS,
+                        )
+                    data = await response.json(content_type=None)
+            except aiohttp.ClientConnectorError as e:
+                self._record_failure(endpoint)
+                raise RPCError(str(e), endpoint=endpoint.url, retryable=True, sent=False) from e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._record_failure(endpoint)
+                raise RPCError(
+                    f"{type(e).__name__} from {endpoint.url}: {e}",
+                    endpoint=endpoint.url,
+                    retryable=True,
+                ) from e
+            except ValueError as e:
+                # A 200 with a non-JSON body, e.g. a gateway's HTML error page
+                self._record_failure(endpoint)
+                raise RPCError(
+                    f"Non-JSON response from {endpoint.url}: {e}",
+                    endpoint=endpoint.url,
+                    retryable=True,
+                ) from e
+            finally:
+                endpoint.in_flight -= 1
+            self._record_success(endpoint, time.monotonic() - started)
+            return data
+
+    def _result(self, endpoint: RPCEndpoint, method: str, item: Any) -> Any:
+        """Unwrap one JSON-RPC response object."""
+        if not isinstance(item, dict):
+            raise RPCError(f"RPC {method}: malformed response", endpoint=endpoint.url)
+        error = item.get("error")
+        if error:
+            code = error.get("code") if isinstance(error, dict) else None
+            message = error.get("message") if isinstance(error, dict) else str(error)
+            retryable = code in RETRYABLE_RPC_CODES
+            if retryable:
+                self._record_failure(endpoint)
+            raise RPCError(
+                f"RPC {method} failed: {message}",
+                code=code,
+                endpoint=endpoint.url,
+                retryable=retryable,
+            )
+        return item.get("result")
+
+    def _payload(self, method: str, params: Any) -> Dict[str, Any]:
+        self._next_id += 1
+        payload = {"jsonrpc": "2.0", "id": self._next_id, "method": method}
+        if params is not None:
+            payload["params"] = params
+        return payload
+
+    # Public API
+
+    async def request(
+        self,
+        method: str,
+        params: Any = None,
+        sticky_key: Optional[str] = None,
+        failover: bool = True,
+    ) -> Any:
+        """Call method on the best endpoint, failing over on retryable errors."""
+        last_error: Optional[RPCError] = None
+        for attempt, endpoint in enumerate(self._candidates(sticky_key)):
+            if attempt:
+                self._stats["failovers"] += 1
+            try:
+                result = self._result(
+                    endpoint, method, await self._post(endpoint, self._payload(method, params))
+                )
+            except RPCError as e:
+                last_error = e
+                if e.retryable and (failover or not e.sent):
+                    logger.debug(f"RPC {method} failed on {endpoint.url}, trying next: {e}")
+                    continue
+                raise
+            if sticky_key is not None:
+                self.stick(sticky_key, endpoint)
+            return result
+        raise last_error or RPCError(f"RPC {method}: no endpoints available")
+
+    async def batch(
+        self, calls: Sequence[Tuple[str, Any]], sticky_key: Optional[str] = None
+    ) -> List[Any]:
+        """Send calls as one JSON-RPC batch (one round trip); results in call order.
+
+        Endpoints that reject batches get the same calls concurrently instead.
+        """
+        payload = [self._payload(method, params) for method, params in calls]
+        last_error: Optional[RPCError] = None
+        for attempt, endpoint in enumerate(self._candidates(sticky_key)):
+            if attempt:
+                self._stats["failovers"] += 1
+            try:
+                data = None
+                if endpoint.supports_batch:
+                    try:
+                        data = await self._post(endpoint, payload)
+                    except RPCError as e:
+                        if e.code not in BATCH_REJECTED_STATUS:
+                            raise
+                if not isinstance(data, list):
+                    if endpoint.supports_batch:
+                        logger.info(f"{endpoint.url} does not support batch requests")
+                        endpoint.supports_batch = False
+                    return list(
+                        await asyncio.gather(
+                            *(self.request(m, p, sticky_key=sticky_key) for m, p in calls)
+                        )
+                    )
+                by_id = {item.get("id"): item for item in data if isinstance(item, dict)}
+                results = [
+                    self._result(endpoint, method, by_id.get(call["id"]))
+                    for (method, _), call in zip(calls, payload)
+                ]
+            except RPCError as e:
+                last_error = e
+                if e.retryable:
+                    continue
+                raise
+            if sticky_key is not None:
+                self.stick(sticky_key, endpoint)
+            return results
+        raise last_error or RPCError("RPC batch: no endpoints available")
+
+    async def send_transaction(
+        self,
+        transaction_b64: str,
+        signature: str,
+        skip_preflight: bool = False,
+        max_retries: Optional[int] = None,
+        preflight_commitment: str = "confirmed",
+    ) -> str:
+        """Submit a signed, base64-encoded transaction and pin signature to that endpoint.
+
+        Fails over only when the request never reached an endpoint, so a
+        transaction is not broadcast through several nodes behind our back.
+        """
+        opts: Dict[str, Any] = {
+            "encoding": "base64",
+            "skipPreflight": skip_preflight,
+            "preflightCommitment": preflight_commitment,
+        }
+        if max_retries is not None:
+            opts["maxRetries"] = max_retries
+        result = await self.request(
+            "sendTransaction", [transaction_b64, opts], sticky_key=signature, failover=False
+        )
+        return result or signature
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "endpoints": {e.url: e.snapshot() for e in self.endpoints},
+            "sticky_keys": len(self._sticky),
+            **self._stats,
+        }
+
+
+# Global RPC pool
+_global_rpc_pool: Optional[RPCPool] = None
+
+
+def configure_rpc_pool(urls: Iterable[str], max_concurrency: int = 8) -> RPCPool:
+    """Create the global RPC pool."""
+    global _global_rpc_pool
+    _global_rpc_pool = RPCPool(urls, max_concurrency=max_concurrency)
+    logger.info(f"RPC pool configured with {len(_global_rpc_pool.endpoints)} endpoint(s)")
+    return _global_rpc_pool
+
+
+def get_rpc_pool() -> Optional[RPCPool]:
+    """Global RPC pool, or None before configure_rpc_pool()."""
+    return _global_rpc_pool
+
+
+async def cleanup_rpc_pool():
+    """Forget the global RPC pool (sessions belong to the shared HTTP client)."""
+    global _global_rpc_pool
+    _global_rpc_pool = None
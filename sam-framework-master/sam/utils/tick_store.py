@@ -0,0 +1,323 @@
+"""In-memory tick history with OHLCV candles built on demand.
+
+Each symbol gets a preallocated NumPy ring buffer of (timestamp, price,
+volume) rows, so memory per symbol is fixed at ``capacity * 24`` bytes and
+appends never allocate. Candles are resampled from the raw ticks with
+vectorized reductions. The whole store can be snapshotted to a ``.npy`` file
+and memory-mapped back in after a restart, so history survives without
+refetching it from APIs.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TICK_DTYPE = np.dtype([("ts", "f8"), ("price", "f8"), ("volume", "f8")])
+CANDLE_DTYPE = np.dtype(
+    [
+        ("ts", "f8"),
+        ("open", "f8"),
+        ("high", "f8"),
+        ("low", "f8"),
+        ("close", "f8"),
+        ("volume", "f8"),
+        ("ticks", "i8"),
+    ]
+)
+INTERVALS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600, "4h": 14400, "1d": 86400}
+
+
+def interval_seconds(interval: Union[str, int, float]) -> float:
+    """Resolve "1m"/"5m"/"1h"/... or a number of seconds."""
+    if isinstance(interval, str):
+        if interval not in INTERVALS:
+            raise ValueError(f"Unknown candle interval: {interval}")
+        return float(INTERVALS[interval])
+    if interval <= 0:
+        raise ValueError("Candle interval must be positive")
+    return float(interval)
+
+
+def resample_ohlcv(ticks: np.ndarray, interval: Union[str, int, float]) -> np.ndarray:
+    """Aggregate chronologically ordered ticks into OHLCV candles.
+
+    Candles are aligned to multiples of the interval (UTC) and only buckets
+    containing ticks are emitted.
+    """
+    seconds = interval_seconds(interval)
+    candles = np.zeros(0, dtype=CANDLE_DTYPE)
+    if len(ticks) == 0:
+        return candles
+
+    buckets = np.floor(ticks["ts"] / seconds) * seconds
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.concatenate((starts[1:], [len(ticks)])) - 1
+    prices = ticks["price"]
+
+    candles = np.empty(len(starts), dtype=CANDLE_DTYPE)
+    candles["ts"] = buckets[starts]
+    candles["open"] = prices[starts]
+    candles["high"] = np.maximum.reduceat(prices, starts)
+    candles["low"] = np.minimum.reduceat(prices, starts)
+    candles["close"] = prices[ends]
+    candles["volume"] = np.add.reduceat(ticks["volume"], starts)
+    candles["ticks"] = ends - starts + 1
+    return candles
+
+
+class TickBuffer:
+    """Fixed-capacity ring buffer of ticks for one symbol."""
+
+    __slots__ = ("data", "head", "count")
+
+    def __init__(self, capacity: int):
+        self.data = np.zeros(capacity, dtype=TICK_DTYPE)
+        self.head = 0  # Next write position
+        self.count = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self.data)
+
+    def append(self, ts: float, price: float, volume: float = 0.0):
+        self.data[self.head] = (ts, price, volume)
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def extend(self, rows: np.ndarray):
+        """Append many ticks at once; only the newest capacity rows are kept."""
+        rows = rows[-self.capacity :]
+        n = len(rows)
+        first = min(n, self.capacity - self.head)
+        self.data[self.head : self.head + first] = rows[:first]
+        self.data[: n - first] = rows[first:]
+        self.head = (self.head + n) % self.capacity
+        self.count = min(self.count + n, self.capacity)
+
+    def ordered(self) -> np.ndarray:
+        """All stored ticks, oldest first (a copy)."""
+        if self.count < self.capacity:
+            ticks = self.data[: self.count].copy()
+        else:
+            ticks = np.concatenate((self.data[self.head :], self.data[: self.head]))
+        if len(ticks) > 1 and np.any(np.diff(ticks["ts"]) < 0):
+            ticks = ticks[np.argsort(ticks["ts"], kind="stable")]
+        return ticks
+
+    def last(self) -> Optional[np.void]:
+        if self.count == 0:
+            return None
+        return self.data[self.head - 1]
+
+
+class TickStore:
+    """Per-symbol tick history with bounded memory."""
+
+    def __init__(self, capacity: int = 10_000, max_symbols: int = 100):
+        """
+        Args:
+            capacity: Ticks kept per symbol (24 bytes each)
+            max_symbols: Symbols kept; the least recently updated is dropped beyond this
+
+        Memory is bounded by capacity * 24 * max_symbols bytes (about 24 MB
+        with the defaults).
+        """
+        self.capacity = capacity
+        self.max_symbols = max_symbols
+        self._buffers: "OrderedDict[str, TickBuffer]" = OrderedDict()
+        self._recorder: Optional[asyncio.Task] = None
+        self._stats = {"ticks": 0, "evicted_symbols": 0}
+
+    def _buffer(self, symbol: str) -> TickBuffer:
+        buffer = self._buffers.get(symbol)
+        if buffer is None:
+            if len(self._buffers) >= self.max_symbols:
+                evicted, _ = self._buffers.popitem(last=False)
+                self._stats["evicted_symbols"] += 1
+                logger.debug(f"Tick store full, dropped history for {evicted}")
+            buffer = self._buffers[symbol] = TickBuffer(self.capacity)
+        else:
+            self._buffers.move_to_end(symbol)
+        return buffer
+
+    def add(self, symbol: str, price: float, volume: float = 0.0, ts: Optional[float] = None):
+        """Record one tick (timestamp defaults to now)."""
+        self._buffer(symbol).append(time.time() if ts is None else ts, price, volume)
+        self._stats["ticks"] += 1
+
+    def add_many(self, symbol: str, ts, prices, volumes=None):
+        """Record arrays of ticks for one symbol in a single vectorized write."""
+        rows = np.zeros(len(ts), dtype=TICK_DTYPE)
+        rows["ts"] = ts
+        rows["price"] = prices
+        if volumes is not None:
+            rows["volume"] = volumes
+        self._buffer(symbol).extend(rows)
+        self._stats["ticks"] += len(rows)
+
+    def symbols(self) -> List[str]:
+        return list(self._buffers)
+
+    def ticks(self, symbol: str, since: Optional[float] = None) -> np.ndarray:
+        """Stored ticks for symbol, oldest first, optionally only those at or after since."""
+        buffer = self._buffers.get(symbol)
+        if buffer is None:
+            return np.zeros(0, dtype=TICK_DTYPE)
+        ticks = buffer.ordered()
+        if since is not None:
+            ticks = ticks[np.searchsorted(ticks["ts"], since, side="left") :]
+        return ticks
+
+    def latest(self, symbol: str) -> Optional[Dict[str, float]]:
+        buffer = self._buffers.get(symbol)
+        row = buffer.last() if buffer else None
+        if row is None:
+            return None
+        return {name: float(row[name]) for name in TICK_DTYPE.names}
+
+    def candles(
+        self,
+        symbol: str,
+        interval: Union[str, int, float] = "1m",
+        since: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> np.ndarray:
+        """OHLCV candles for symbol as a CANDLE_DTYPE array, oldest first."""
+        candles = resample_ohlcv(self.ticks(symbol, since), interval)
+        return candles[-limit:] if limit else candles
+
+    def candles_as_dicts(self, symbol: str, interval="1m", since=None, limit=None) -> List[Dict]:
+        """Candles as plain dicts, for tool responses."""
+        candles = self.candles(symbol, interval, since, limit)
+        return [
+            {name: candle[name].item() for name in CANDLE_DTYPE.names} for candle in candles
+        ]
+
+    # Persistence
+
+    def snapshot(self, path: str) -> int:
+        """Write every symbol's ticks to a memory-mapped .npy file plus a JSON index.
+
+        Returns the number of ticks written.
+        """
+        symbols = list(self._buffers)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.tmp"
+        data = np.lib.format.open_memmap(
+            tmp, mode="w+", dtype=TICK_DTYPE, shape=(len(symbols), self.capacity)
+        )
+        counts = []
+        for row, symbol in enumerate(symbols):
+            ticks = self._buffers[symbol].ordered()
+            data[row, : len(ticks)] = ticks
+            counts.append(len(ticks))
+        data.flush()
+        del data
+        with open(f"{tmp}.json", "w", encoding="utf-8") as f:
+            json.dump({"capacity": self.capacity, "symbols": symbols, "counts": counts}, f)
+        os.replace(tmp, path)
+        os.replace(f"{tmp}.json", f"{path}.json")
+        logger.info(f"Snapshotted {sum(counts)} ticks for {len(symbols)} symbols to {path}")
+        return sum(counts)
+
+    def restore(self, path: str) -> int:
+        """Load a snapshot written by snapshot(); returns the number of ticks restored.
+
+        The snapshot is memory-mapped, so only the rows being copied are read.
+        A missing snapshot restores nothing.
+        """
+        if not os.path.exists(path) or not os.path.exists(f"{path}.json"):
+            return 0
+        with open(f"{path}.json", encoding="utf-8") as f:
+            index = json.load(f)
+        data = np.load(path, mmap_mode="r")
+        restored = 0
+        for row, (symbol, count) in enumerate(zip(index["symbols"], index["counts"])):
+            if count:
+                self.add_many(symbol, *(data[row, :count][field] for field in TICK_DTYPE.names))
+                restored += min(count, self.capacity)
+        logger.info(f"Restored {restored} ticks for {len(index['symbols'])} symbols from {path}")
+        return restored
+
+    # Live recording
+
+    def record_from(self, feed):
+        """Record every tick published by a PriceFeed in the background."""
+        if self._recorder is not None and not self._recorder.done():
+            return
+        subscription = feed.subscribe()
+
+        async def _record():
+            while True:
+                batch = await subscription.get_batch()
+                if not batch:
+                    return
+                for tick in batch:
+                    self.add(tick.mint, tick.price_usd, ts=tick.timestamp)
+
+        self._recorder = asyncio.create_task(_record())
+
+    async def stop_recording(self):
+        if self._recorder is not None:
+            self._recorder.cancel()
+            await asyncio.gather(self._recorder, return_exceptions=True)
+            self._recorder = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "symbols": len(self._buffers),
+            "capacity": self.capacity,
+            "stored_ticks": sum(b.count for b in self._buffers.values()),
+            "memory_bytes": sum(b.data.nbytes for b in self._buffers.values()),
+            "recording": self._recorder is not None and not self._recorder.done(),
+            **self._stats,
+        }
+
+
+# Global tick store
+_global_tick_store: Optional[TickStore] = None
+_snapshot_path: Optional[str] = None
+
+
+def get_tick_store() -> Optional[TickStore]:
+    """Global tick store, or None when tick history is not enabled."""
+    return _global_tick_store
+
+
+def configure_tick_store(
+    capacity: int = 10_000, max_symbols: int = 100, snapshot_path: Optional[str] = None
+) -> TickStore:
+    """Create the global tick store, restoring snapshot_path if it exists."""
+    global _global_tick_store, _snapshot_path
+    _global_tick_store = TickStore(capacity, max_symbols)
+    _snapshot_path = snapshot_path
+    if snapshot_path:
+        try:
+            _global_tick_store.restore(snapshot_path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not restore tick snapshot {snapshot_path}: {e}")
+    return _global_tick_store
+
+
+async def cleanup_tick_store():
+    """Stop recording and snapshot the global store if a path was configured."""
+    global _global_tick_store, _snapshot_path
+    if _global_tick_store:
+        await _global_tick_store.stop_recording()
+        if _snapshot_path:
+            try:
+                _global_tick_store.snapshot(_snapshot_path)
+            except OSError as e:
+                logger.warning(f"Could not snapshot ticks to {_snapshot_path}: {e}")
+        _global_tick_store = None
+        _snapshot_path = None
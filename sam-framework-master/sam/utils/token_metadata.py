@@ -0,0 +1,342 @@
+"""Token metadata cache shared across sessions and processes.
+
+Name, symbol, decimals and image never change for a mint, so metadata is kept
+in an in-memory LRU in front of a SQLite table. Misses are fetched with one
+Helius ``getAssetBatch`` call per 1000 mints, concurrent lookups of the same
+mint share one fetch, and mints the RPC does not know are negatively cached
+for a short while. Mutable fields (supply, ownership, ...) are refreshed by
+refetching entries older than ``refresh_interval``; the stale entry is served
+if that refresh fails.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .db_executor import get_sqlite_executor
+from .rpc_pool import RPCError, RPCPool, get_rpc_pool
+
+logger = logging.getLogger(__name__)
+
+# Helius getAssetBatch accepts at most 1000 ids per call
+ASSET_BATCH_SIZE = 1000
+# Keeps SQLite "IN (...)" lookups well under the bound-parameter limit
+SQLITE_CHUNK_SIZE = 500
+METHOD_NOT_FOUND = -32601
+
+# (metadata or None for an unknown mint, fetched_at wall-clock time)
+Entry = Tuple[Optional[Dict[str, Any]], float]
+
+
+def parse_asset(asset: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a DAS asset into the fields SAM reports."""
+    content = asset.get("content") or {}
+    metadata = content.get("metadata") or {}
+    files = content.get("files") or [{}]
+    token_info = asset.get("token_info") or {}
+    return {
+        "name": metadata.get("name", "Unknown"),
+        "symbol": metadata.get("symbol") or token_info.get("symbol") or "Unknown",
+        "description": metadata.get("description", ""),
+        "image": files[0].get("uri", "") or (content.get("links") or {}).get("image", ""),
+        "decimals": token_info.get("decimals"),
+        "supply": asset.get("supply", {}),
+        "creators": asset.get("creators", []),
+        "ownership": asset.get("ownership", {}),
+        "token_info": token_info,
+        "mutable": asset.get("mutable", False),
+        "burnt": asset.get("burnt", False),
+    }
+
+
+class TokenMetadataStore:
+    """LRU + SQLite cache of token metadata keyed by mint."""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_entries: int = 10_000,
+        refresh_interval: float = 3600.0,
+        negative_ttl: float = 600.0,
+        rpc_pool: Optional[RPCPool] = None,
+    ):
+        """
+        Args:
+            db_path: SQLite file shared by every process; None keeps metadata in memory only
+            max_entries: Mints kept in the in-memory LRU
+            refresh_interval: Seconds before mutable fields are refetched (0 = never)
+            negative_ttl: Seconds an unknown mint is remembered as unknown
+            rpc_pool: Pool used for getAssetBatch; defaults to the global pool
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.refresh_interval = refresh_interval
+        self.negative_ttl = negative_ttl
+        self.rpc_pool = rpc_pool
+        self._executor = get_sqlite_executor(db_path) if db_path else None
+        self._initialized = False
+        self._entries: "OrderedDict[str, Entry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._unsupported = False
+        self._stats = {
+            "memory_hits": 0,
+            "db_hits": 0,
+            "negative_hits": 0,
+            "fetched": 0,
+            "fetch_calls": 0,
+            "refreshes": 0,
+            "fetch_errors": 0,
+        }
+
+    async def initialize(self):
+        if self._initialized or self._executor is None:
+            return
+        await self._executor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS token_metadata (
+                mint TEXT PRIMARY KEY,
+                data TEXT,
+                fetched_at REAL NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        self._initialized = True
+
+    # Freshness
+
+    def _expired(self, entry: Entry, now: float) -> bool:
+        """Unknown mints expire after negative_ttl, known ones after refresh_interval."""
+        data, fetched_at = entry
+        if data is None:
+            return now - fetched_at >= self.negative_ttl
+        return self.refresh_interval > 0 and now - fetched_at >= self.refresh_interval
+
+    def _remember(self, mint: str, entry: Entry):
+        self._entries[mint] = entry
+        self._entries.move_to_end(mint)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # Lookups
+
+    def peek(self, mint: str) -> Optional[Dict[str, Any]]:
+        """In-memory metadata for mint, however old; never touches SQLite or the network."""
+        entry = self._entries.get(mint)
+        return entry[0] if entry else None
+
+    async def get(self, mint: str, rpc_pool: Optional[RPCPool] = None) -> Optional[Dict[str, Any]]:
+        """Metadata for one mint, or None if the RPC does not know it."""
+        return (await self.get_many([mint], rpc_pool=rpc_pool)).get(mint)
+
+    async def get_many(
+        self, mints: Iterable[str], rpc_pool: Optional[RPCPool] = None
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Metadata for each mint; unknown mints map to None.
+
+        Raises the RPC error if misses could not be fetched and nothing
+        (not even a stale entry) is cached for them.
+        """
+        mints = list(dict.fromkeys(mints))
+        now = time.time()
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        stale: Dict[str, Entry] = {}
+
+        missing = []
+        for mint in mints:
+            entry = self._entries.get(mint)
+            if entry is None:
+                missing.append(mint)
+            elif self._expired(entry, now):
+                stale[mint] = entry
+            else:
+                self._entries.move_to_end(mint)
+                self._stats["negative_hits" if entry[0] is None else "memory_hits"] += 1
+                results[mint] = entry[0]
+
+        for mint, entry in (await self._load(missing)).items():
+            self._remember(mint, entry)
+            if self._expired(entry, now):
+                stale[mint] = entry
+            else:
+                self._stats["negative_hits" if entry[0] is None else "db_hits"] += 1
+                results[mint] = entry[0]
+
+        pending = [m for m in mints if m not in results]
+        if not pending:
+            return results
+        self._stats["refreshes"] += sum(1 for m in pending if m in stale and stale[m][0])
+
+        try:
+            fetched = await self._fetch(pending, rpc_pool)
+        except Exception as e:
+            self._stats["fetch_errors"] += 1
+            if not all(m in stale for m in pending):
+                raise
+            logger.warning(f"Token metadata refresh failed, serving cached values: {e}")
+            fetched = {}
+        for mint in pending:
+            if mint in fetched:
+                results[mint] = fetched[mint]
+            else:
+                results[mint] = stale[mint][0]
+        return results
+
+    async def _load(self, mints: List[str]) -> Dict[str, Entry]:
+        """Entries other processes (or earlier sessions) stored in SQLite."""
+        if not mints or self._executor is None:
+            return {}
+        await self.initialize()
+        loaded: Dict[str, Entry] = {}
+        for i in range(0, len(mints), SQLITE_CHUNK_SIZE):
+            chunk = mints[i : i + SQLITE_CHUNK_SIZE]
+            rows = await self._executor.fetchall(
+                "SELECT mint, data, fetched_at FROM token_metadata "
+                f"WHERE mint IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for mint, data, fetched_at in rows:
+                loaded[mint] = (json.loads(data) if data else None, fetched_at)
+        return loaded
+
+    async def _fetch(
+        self, mints: List[str], rpc_pool: Optional[RPCPool]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Fetch mints from the RPC, joining fetches already in flight."""
+        loop = asyncio.get_running_loop()
+        waiting = {m: self._inflight[m] for m in mints if m in self._inflight}
+        owned = {m: loop.create_future() for m in mints if m not in waiting}
+        self._inflight.update(owned)
+
+        try:
+            if owned:
+                fetched = await self._fetch_batches(list(owned), rpc_pool)
+                for mint, future in owned.items():
+                    future.set_result(fetched.get(mint))
+        except Exception as e:
+            for future in owned.values():
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()  # Waiters re-raise; silence "never retrieved"
+            raise
+        finally:
+            for mint in owned:
+                self._inflight.pop(mint, None)
+
+        return {mint: await future for mint, future in {**waiting, **owned}.items()}
+
+    async def _fetch_batches(
+        self, mints: List[str], rpc_pool: Optional[RPCPool]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        pool = rpc_pool or self.rpc_pool or get_rpc_pool()
+        if pool is None:
+            raise RuntimeError("No RPC pool configured for token metadata")
+        if self._unsupported:
+            raise RuntimeError("RPC endpoint does not support the DAS getAssetBatch method")
+
+        chunks = [mints[i : i + ASSET_BATCH_SIZE] for i in range(0, len(mints), ASSET_BATCH_SIZE)]
+        self._stats["fetch_calls"] += len(chunks)
+        try:
+            responses = await asyncio.gather(
+                *(pool.request("getAssetBatch", {"ids": chunk}) for chunk in chunks)
+            )
+        except RPCError as e:
+            if e.code == METHOD_NOT_FOUND:
+                # Plain (non-DAS) RPC: stop asking on every lookup
+                self._unsupported = True
+            raise
+
+        found: Dict[str, Dict[str, Any]] = {}
+        for assets in responses:
+            for asset in assets or ():
+                if asset and asset.get("id"):
+                    found[asset["id"]] = parse_asset(asset)
+
+        now = time.time()
+        fetched: Dict[str, Optional[Dict[str, Any]]] = {}
+        kept: Dict[str, Dict[str, Any]] = {}
+        for mint in mints:
+            previous = self._entries.get(mint)
+            if mint not in found and previous is not None and previous[0] is not None:
+                # Omitted from the batch: keep the known metadata, retry after negative_ttl
+                kept[mint] = previous[0]
+                retry_at = now - max(self.refresh_interval - self.negative_ttl, 0.0)
+                self._remember(mint, (previous[0], retry_at))
+            else:
+                fetched[mint] = found.get(mint)
+                self._remember(mint, (fetched[mint], now))
+        self._stats["fetched"] += len(found)
+        await self._store(fetched, now)
+        return {**fetched, **kept}
+
+    async def _store(self, fetched: Dict[str, Optional[Dict[str, Any]]], now: float):
+        if self._executor is None or not fetched:
+            return
+        await self.initialize()
+        try:
+            await self._executor.executemany(
+                """
+                INSERT INTO token_metadata (mint, data, fetched_at) VALUES (?, ?, ?)
+                ON CONFLICT(mint) DO UPDATE SET data = excluded.data,
+                                                fetched_at = excluded.fetched_at
+                """,
+                [
+                    (mint, json.dumps(data) if data is not None else None, now)
+                    for mint, data in fetched.items()
+                ],
+            )
+        except Exception as e:
+            logger.warning(f"Failed to persist token metadata: {e}")
+
+    async def invalidate(self, mint: str):
+        """Forget mint in memory and in SQLite."""
+        self._entries.pop(mint, None)
+        if self._executor is not None:
+            await self.initialize()
+            await self._executor.execute("DELETE FROM token_metadata WHERE mint = ?", (mint,))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "persistent": self._executor is not None,
+            "das_supported": not self._unsupported,
+            "in_flight": len(self._inflight),
+            **self._stats,
+        }
+
+
+# Global token metadata store
+_global_metadata_store: Optional[TokenMetadataStore] = None
+
+
+def configure_token_metadata_store(
+    db_path: Optional[str] = None,
+    max_entries: int = 10_000,
+    refresh_interval: float = 3600.0,
+    negative_ttl: float = 600.0,
+    rpc_pool: Optional[RPCPool] = None,
+) -> TokenMetadataStore:
+    """Create the global token metadata store."""
+    global _global_metadata_store
+    _global_metadata_store = TokenMetadataStore(
+        db_path,
+        max_entries=max_entries,
+        refresh_interval=refresh_interval,
+        negative_ttl=negative_ttl,
+        rpc_pool=rpc_pool,
+    )
+    return _global_metadata_store
+
+
+def get_token_metadata_store() -> Optional[TokenMetadataStore]:
+    """Global token metadata store, or None before configure_token_metadata_store()."""
+    return _global_metadata_store
+
+
+async def cleanup_token_metadata_store():
+    """Forget the global store (its SQLite executor is closed with the others)."""
+    global _global_metadata_store
+    _global_metadata_store = None
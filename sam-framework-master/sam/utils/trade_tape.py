@@ -0,0 +1,359 @@
+"""Live pump.fun trade tape kept in memory.
+
+Trades stream in from PumpPortal's websocket (``subscribeTokenTrade``) or a
+JSONL replay file and land in a fixed-size NumPy ring buffer per mint.
+Traders are interned to small integer ids, and running totals (trade counts,
+buy/sell volume, unique traders) are updated as rows are written and
+evicted. Recent trades and flow over the whole tape are then O(1)/O(limit)
+reads; flow over a time window is one vectorized pass over at most
+``capacity`` rows, so tools never wait on a REST round trip.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .price_feed import PriceFeed, PriceSource, ReplayPriceSource, WebSocketPriceSource
+
+logger = logging.getLogger(__name__)
+
+PUMPPORTAL_WS_URL = "wss://pumpportal.fun/api/data"
+
+TRADE_DTYPE = np.dtype(
+    [
+        ("timestamp", "f8"),
+        ("sol_amount", "f8"),
+        ("token_amount", "f8"),
+        ("trader", "u4"),  # Index into TradeTape's interned trader table
+        ("is_buy", "?"),
+        ("signature", "S88"),  # Base58 signatures are at most 88 characters
+    ]
+)
+
+
+@dataclass(slots=True)
+class Trade:
+    """One pump.fun trade."""
+
+    mint: str
+    signature: str
+    trader: str
+    is_buy: bool
+    sol_amount: float
+    token_amount: float
+    timestamp: float
+
+
+def parse_trade_message(message: Any, source: str = "ws") -> List[Trade]:
+    """Turn a decoded PumpPortal trade event (or a list of them) into trades.
+
+    Subscription acknowledgements and other non-trade messages yield nothing.
+    Live events carry no timestamp, so arrival time is used.
+    """
+    if isinstance(message, list):
+        return [trade for item in message for trade in parse_trade_message(item, source)]
+    if not isinstance(message, dict) or message.get("txType") not in ("buy", "sell"):
+        return []
+    try:
+        return [
+            Trade(
+                mint=message["mint"],
+                signature=message.get("signature", ""),
+                trader=message.get("traderPublicKey", ""),
+                is_buy=message["txType"] == "buy",
+                sol_amount=float(message.get("solAmount") or 0.0),
+                token_amount=float(message.get("tokenAmount") or 0.0),
+                timestamp=float(message.get("timestamp") or time.time()),
+            )
+        ]
+    except (KeyError, TypeError, ValueError) as e:
+        logger.debug(f"Ignoring malformed trade message: {e}")
+        return []
+
+
+def _flow(
+    trades: int, buys: int, buy_sol: float, sell_sol: float, unique_traders: int
+) -> Dict[str, Any]:
+    return {
+        "trades": trades,
+        "buys": buys,
+        "sells": trades - buys,
+        "volume_sol": round(buy_sol + sell_sol, 9),
+        "buy_volume_sol": round(buy_sol, 9),
+        "sell_volume_sol": round(sell_sol, 9),
+        "net_flow_sol": round(buy_sol - sell_sol, 9),
+        "buy_sell_ratio": round(buy_sol / sell_sol, 4) if sell_sol > 0 else None,
+        "unique_traders": unique_traders,
+    }
+
+
+class TradeTape:
+    """Ring buffer of one mint's trades with running totals over its contents."""
+
+    __slots__ = (
+        "data",
+        "head",
+        "count",
+        "buys",
+        "buy_sol",
+        "sell_sol",
+        "_ids",
+        "_traders",
+        "_refs",
+        "_free",
+    )
+
+    def __init__(self, capacity: int):
+        self.data = np.zeros(capacity, dtype=TRADE_DTYPE)
+        self.head = 0  # Next write position
+        self.count = 0
+        self.buys = 0
+        self.buy_sol = 0.0
+        self.sell_sol = 0.0
+        self._ids: Dict[str, int] = {}  # Trader -> id, only for traders still on the tape
+        self._traders: List[str] = []  # Id -> trader
+        self._refs: List[int] = []  # Id -> rows on the tape
+        self._free: List[int] = []  # Ids whose trader has left the tape
+
+    @property
+    def capacity(self) -> int:
+        return len(self.data)
+
+    @property
+    def unique_traders(self) -> int:
+        return len(self._ids)
+
+    def _intern(self, trader: str) -> int:
+        trader_id = self._ids.get(trader)
+        if trader_id is None:
+            if self._free:
+                trader_id = self._free.pop()
+                self._traders[trader_id] = trader
+            else:
+                trader_id = len(self._traders)
+                self._traders.append(trader)
+                self._refs.append(0)
+            self._ids[trader] = trader_id
+        self._refs[trader_id] += 1
+        return trader_id
+
+    def _tally(self, is_buy: bool, sol_amount: float, sign: int):
+        if is_buy:
+            self.buys += sign
+            self.buy_sol += sign * sol_amount
+        else:
+            self.sell_sol += sign * sol_amount
+
+    def append(self, trade: Trade):
+        if self.count == self.capacity:
+            _, sol_amount, _, trader_id, is_buy, _ = self.data[self.head].tolist()
+            self._tally(is_buy, sol_amount, -1)
+            self._refs[trader_id] -= 1
+            if self._refs[trader_id] == 0:
+                del self._ids[self._traders[trader_id]]
+                self._free.append(trader_id)
+        self.data[self.head] = (
+            trade.timestamp,
+            trade.sol_amount,
+            trade.token_amount,
+            self._intern(trade.trader),
+            trade.is_buy,
+            trade.signature.encode(),
+        )
+        self._tally(trade.is_buy, trade.sol_amount, 1)
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def recent(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Up to limit trades, newest first."""
+        n = min(limit, self.count)
+        rows = self.data[(self.head - 1 - np.arange(n)) % self.capacity].tolist()
+        return [
+            {
+                "signature": signature.decode(),
+                "trader": self._traders[trader_id],
+                "side": "buy" if is_buy else "sell",
+                "sol_amount": sol_amount,
+                "token_amount": token_amount,
+                "timestamp": timestamp,
+            }
+            for timestamp, sol_amount, token_amount, trader_id, is_buy, signature in rows
+        ]
+
+    def flow(self, window: Optional[float] = None, now: Optional[float] = None) -> Dict[str, Any]:
+        """Volume, buy/sell split and unique traders over the last window seconds.
+
+        window=None covers the whole tape and only reads the running totals.
+        ``truncated`` is set when the window reaches back past the oldest trade
+        the full tape still holds.
+        """
+        if window is None:
+            return _flow(self.count, self.buys, self.buy_sol, self.sell_sol, len(self._ids))
+        cutoff = (now or time.time()) - window
+        rows = self.data[: self.count]
+        mask = rows["timestamp"] >= cutoff
+        is_buy = rows["is_buy"][mask]
+        sol_amount = rows["sol_amount"][mask]
+        result = _flow(
+            int(is_buy.size),
+            int(is_buy.sum()),
+            float(sol_amount[is_buy].sum()),
+            float(sol_amount[~is_buy].sum()),
+            int(np.unique(rows["trader"][mask]).size),
+        )
+        result["window_seconds"] = window
+        result["truncated"] = self.count == self.capacity and bool(mask.all())
+        return result
+
+
+class TradeTapeStore(PriceFeed):
+    """Per-mint trade tapes fed from one trade source.
+
+    Reuses PriceFeed's reconnect loop and pub/sub; subscribers receive the
+    newest trade per mint. At most max_mints tapes are kept, the least
+    recently traded mint is dropped first, and at most max_mints mints are
+    subscribed, the least recently tracked first. Dropped mints are
+    unsubscribed so their trades stop arriving.
+    """
+
+    label = "Trade tape"
+
+    def __init__(
+        self,
+        source: Optional[PriceSource] = None,
+        capacity: int = 1000,
+        max_mints: int = 200,
+        reconnect_delay: float = 1.0,
+    ):
+        """
+        Args:
+            source: Trade source (websocket or replay)
+            capacity: Trades kept per mint
+            max_mints: Mints with a tape at any time
+            reconnect_delay: Seconds before reconnecting a failed source
+        """
+        super().__init__(source, reconnect_delay)
+        self.capacity = capacity
+        self.max_mints = max_mints
+        self._tapes: "OrderedDict[str, TradeTape]" = OrderedDict()
+        # Mints subscribed through track(), least recently tracked first
+        self._tracked: "OrderedDict[str, None]" = OrderedDict()
+        self._stats = {"trades": 0, "errors": 0, "reconnects": 0, "evicted_mints": 0}
+
+    def tape(self, mint: str) -> Optional[TradeTape]:
+        """Tape for mint, or None before its first trade."""
+        return self._tapes.get(mint)
+
+    def tracking(self, mint: str) -> bool:
+        """Whether the source is subscribed to mint's trades."""
+        return self.source is not None and mint in self.source.mints
+
+    def track(self, mints: Iterable[str]):
+        """Subscribe to mints' trades; past max_mints the least recently tracked are dropped."""
+        mints = list(dict.fromkeys(mints))
+        for mint in mints:
+            self._tracked[mint] = None
+            self._tracked.move_to_end(mint)
+        dropped = []
+        while len(self._tracked) > self.max_mints:
+            dropped.append(self._tracked.popitem(last=False)[0])
+        if dropped:
+            self._drop(dropped)
+        super().track(mint for mint in mints if mint in self._tracked)
+
+    def _drop(self, mints: List[str]):
+        """Unsubscribe mints and forget their tapes."""
+        self.untrack(mints)
+        for mint in mints:
+            self._tracked.pop(mint, None)
+            self._tapes.pop(mint, None)
+            self._latest.pop(mint, None)
+
+    def publish(self, trade: Trade):
+        """Append trade to its mint's tape and fan it out; never blocks."""
+        source = self.source
+        if source is not None and not source.finite and trade.mint not in source.mints:
+            return  # Still in flight when its mint was unsubscribed
+        tape = self._tapes.get(trade.mint)
+        if tape is None:
+            tape = self._tapes[trade.mint] = TradeTape(self.capacity)
+            if len(self._tapes) > self.max_mints:
+                evicted = next(iter(self._tapes))
+                self._drop([evicted])
+                self._stats["evicted_mints"] += 1
+        else:
+            self._tapes.move_to_end(trade.mint)
+        tape.append(trade)
+        self._latest[trade.mint] = trade
+        self._stats["trades"] += 1
+        for subscription in self._subscribers:
+            if subscription.wants(trade.mint):
+                subscription.put(trade)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **super().get_stats(),
+            "mints": len(self._tapes),
+            "capacity": self.capacity,
+            "rows": sum(tape.count for tape in self._tapes.values()),
+        }
+
+
+class WebSocketTradeSource(WebSocketPriceSource):
+    """PumpPortal trade stream; tracked mints are subscribed with subscribeTokenTrade."""
+
+    name = "pumpportal"
+
+    def __init__(self, url: str = PUMPPORTAL_WS_URL, mints: Iterable[str] = ()):
+        super().__init__(
+            url,
+            mints,
+            subscribe=lambda mints: {"method": "subscribeTokenTrade", "keys": mints},
+            unsubscribe=lambda mints: {"method": "unsubscribeTokenTrade", "keys": mints},
+            parse=parse_trade_message,
+        )
+
+
+def create_trade_source(url: Optional[str]) -> Optional[PriceSource]:
+    """Create the source selected by url: ws(s)://... or replay:///path.jsonl."""
+    if not url:
+        return None
+    if url.startswith(("ws://", "wss://")):
+        return WebSocketTradeSource(url)
+    if url.startswith("replay:///"):
+        return ReplayPriceSource(url[len("replay://") :], parse=parse_trade_message)
+    raise ValueError(f"Unsupported PUMP_TRADE_FEED_URL scheme: {url.split('://', 1)[0]}")
+
+
+# Global trade tape
+_global_trade_tape: Optional[TradeTapeStore] = None
+
+
+def get_trade_tape() -> Optional[TradeTapeStore]:
+    """Global trade tape, or None when the trade stream is not configured."""
+    return _global_trade_tape
+
+
+async def start_trade_tape(
+    source: PriceSource, mints: Iterable[str] = (), capacity: int = 1000, max_mints: int = 200
+) -> TradeTapeStore:
+    """Start the global trade tape on source, replacing any previous one."""
+    global _global_trade_tape
+    if _global_trade_tape is not None:
+        await _global_trade_tape.stop()
+    _global_trade_tape = TradeTapeStore(source, capacity=capacity, max_mints=max_mints)
+    _global_trade_tape.track(mints)
+    _global_trade_tape.start()
+    return _global_trade_tape
+
+
+async def cleanup_trade_tape():
+    """Stop the global trade tape."""
+    global _global_trade_tape
+    if _global_trade_tape:
+        await _global_trade_tape.stop()
+        _global_trade_tape = None
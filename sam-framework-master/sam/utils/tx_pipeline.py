@@ -0,0 +1,378 @@
+"""Transaction pipeline: warm blockhash, cached message templates, async confirmation.
+
+Building a transaction used to start with a blocking ``getLatestBlockhash``
+round trip, and nothing after ``sendTransaction`` knew whether it landed.
+The pipeline keeps a recent blockhash refreshed in the background, reuses
+compiled messages for repeated instructions, runs independent preparation
+steps concurrently and returns from ``submit()`` as soon as an RPC node has
+accepted the transaction. Confirmation is left to the shared
+``ConfirmationTracker``, which polls every pending signature in one batch.
+"""
+
+import asyncio
+import base64
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Dict, Optional, Sequence, Tuple
+
+from solders.hash import Hash
+from solders.instruction import Instruction
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.pubkey import Pubkey
+from solders.transaction import VersionedTransaction
+
+from .confirmation_tracker import ConfirmationTracker, get_confirmation_tracker
+from .rpc_pool import RPCPool
+
+logger = logging.getLogger(__name__)
+
+# A blockhash is valid for 150 blocks (~60s); stop handing it out well before that
+BLOCKHASH_MAX_AGE = 30.0
+# SPL Memo program; a memo keeps repeated identical messages distinct
+MEMO_PROGRAM_ID = Pubkey.from_string("MemoSq4gqABAXKb96qnH8TysNcWxMyWCqXgDLGmfcHr")
+
+
+async def prepare(*steps: Awaitable[Any]) -> Tuple[Any, ...]:
+    """Run independent preparation steps concurrently; cancel the rest if one fails."""
+    tasks = [asyncio.ensure_future(step) for step in steps]
+    try:
+        return tuple(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+@dataclass(slots=True)
+class RecentBlockhash:
+    blockhash: Hash
+    last_valid_block_height: int
+    fetched_at: float  # time.monotonic()
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class BlockhashCache:
+    """Recent blockhash kept warm by a background refresher."""
+
+    def __init__(
+        self,
+        rpc_pool: RPCPool,
+        refresh_interval: float = 5.0,
+        max_age: float = BLOCKHASH_MAX_AGE,
+        commitment: str = "confirmed",
+    ):
+        self.rpc_pool = rpc_pool
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.commitment = commitment
+        self._current: Optional[RecentBlockhash] = None
+        self._fetching: Optional[asyncio.Task] = None
+        self._refresher: Optional[asyncio.Task] = None
+        self._stats = {"hits": 0, "fetches": 0, "errors": 0}
+
+    @property
+    def current(self) -> Optional[RecentBlockhash]:
+        """Cached blockhash if it is still safe to use."""
+        if self._current is not None and self._current.age() < self.max_age:
+            return self._current
+        return None
+
+    async def get(self) -> RecentBlockhash:
+        """A valid recent blockhash, fetched only if the cached one is too old."""
+        current = self.current
+        if current is not None:
+            self._stats["hits"] += 1
+            return current
+        return await self.refresh()
+
+    async def refresh(self) -> RecentBlockhash:
+        """Fetch a new blockhash; concurrent callers share one request."""
+        if self._fetching is None or self._fetching.done():
+            self._fetching = asyncio.create_task(self._fetch())
+        return await asyncio.shield(self._fetching)
+
+    async def _fetch(self) -> RecentBlockhash:
+        self._stats["fetches"] += 1
+        try:
+            result = await self.rpc_pool.request(
+                "getLatestBlockhash", [{"commitment": self.commitment}]
+            )
+        except Exception:
+            self._stats["errors"] += 1
+            raise
+        value = result["value"]
+        self._current = RecentBlockhash(
+            Hash.from_string(value["blockhash"]),
+            int(value["lastValidBlockHeight"]),
+            time.monotonic(),
+        )
+        return self._current
+
+    def invalidate(self):
+        """Drop the cached blockhash, e.g. after a "blockhash not found" rejection."""
+        self._current = None
+
+    def start(self):
+        """Refresh in the background every refresh_interval seconds."""
+        if self.refresh_interval > 0 and (self._refresher is None or self._refresher.done()):
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Blockhash refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def stop(self):
+        for task in (self._refresher, self._fetching):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._refresher = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        current = self._current
+        return {
+            **self._stats,
+            "age": round(current.age(), 2) if current else None,
+            "refreshing": self._refresher is not None and not self._refresher.done(),
+        }
+
+
+class MessageTemplate:
+    """A compiled message whose blockhash is swapped in at build time.
+
+    Signatures are deterministic, so the same message built twice on one
+    blockhash would be one transaction and the second send a silent
+    duplicate. Repeat builds on the same blockhash get a numbered memo.
+    """
+
+    def __init__(self, payer: Pubkey, instructions: Sequence[Instruction]):
+        self.payer = payer
+        self.instructions = list(instructions)
+        self.message = MessageV0.try_compile(payer, self.instructions, [], Hash.default())
+        self._last_blockhash: Optional[Hash] = None
+        self._repeats = 0
+
+    def build(self, blockhash: Hash) -> MessageV0:
+        if blockhash == self._last_blockhash:
+            self._repeats += 1
+            memo = Instruction(MEMO_PROGRAM_ID, f"sam:{self._repeats}".encode(), [])
+            return MessageV0.try_compile(self.payer, [*self.instructions, memo], [], blockhash)
+        self._last_blockhash = blockhash
+        self._repeats = 0
+        m = self.message
+        return MessageV0(
+            m.header, m.account_keys, blockhash, m.instructions, m.address_table_lookups
+        )
+
+
+@dataclass
+class PendingTransaction:
+    """A submitted transaction whose confirmation is tracked in the background."""
+
+    signature: str
+    last_valid_block_height: Optional[int] = None
+    submitted_at: float = field(default_factory=time.monotonic)
+    status: str = "submitted"  # submitted | confirmed | failed | expired
+    slot: Optional[int] = None
+    error: Optional[Any] = None
+    confirmed_at: Optional[float] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def resolve(self, status: str, slot: Optional[int] = None, error: Any = None):
+        if self.done.is_set():
+            return
+        self.status, self.slot, self.error = status, slot, error
+        self.confirmed_at = time.monotonic()
+        self.done.set()
+
+    async def wait(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Wait for the final status (or timeout) and return to_dict()."""
+        try:
+            await asyncio.wait_for(self.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.to_dict()
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"signature": self.signature, "status": self.status}
+        if self.slot is not None:
+            result["slot"] = self.slot
+        if self.error is not None:
+            result["error"] = str(self.error)
+        if self.confirmed_at is not None:
+            result["seconds"] = round(self.confirmed_at - self.submitted_at, 3)
+        return result
+
+
+class TransactionPipeline:
+    """Build, sign and submit transactions without blocking on RPC round trips."""
+
+    def __init__(
+        self,
+        rpc_pool: RPCPool,
+        blockhash_refresh: float = 5.0,
+        commitment: str = "confirmed",
+        poll_interval: float = 0.5,
+        confirm_timeout: float = 90.0,
+        max_templates: int = 256,
+        max_tracked: int = 1000,
+        tracker: Optional[ConfirmationTracker] = None,
+    ):
+        """
+        Args:
+            rpc_pool: Pool used for blockhashes and sends
+            blockhash_refresh: Seconds between background blockhash refreshes (0 = on demand)
+            commitment: Commitment a transaction must reach to count as confirmed
+            poll_interval: Seconds between signature status polls (own tracker only)
+            confirm_timeout: Give up tracking after this many seconds (own tracker only)
+            max_templates: Compiled message templates kept
+            max_tracked: Transactions remembered for status lookups; the oldest go first
+            tracker: Confirmation tracker; defaults to the global one, else a private one
+        """
+        self.rpc_pool = rpc_pool
+        self.blockhash = BlockhashCache(rpc_pool, refresh_interval=blockhash_refresh)
+        self.max_templates = max_templates
+        self.max_tracked = max_tracked
+        self.tracker = tracker or get_confirmation_tracker()
+        self._owns_tracker = self.tracker is None
+        if self.tracker is None:
+            self.tracker = ConfirmationTracker(
+                rpc_pool, poll_interval, commitment=commitment, timeout=confirm_timeout
+            )
+        self._templates: "OrderedDict[Tuple, MessageTemplate]" = OrderedDict()
+        self._tracked: "OrderedDict[str, PendingTransaction]" = OrderedDict()
+        self._stats = {
+            "template_hits": 0,
+            "submitted": 0,
+            "confirmed": 0,
+            "failed": 0,
+            "expired": 0,
+        }
+
+    # Building
+
+    def template(self, payer: Pubkey, instructions: Sequence[Instruction]) -> MessageTemplate:
+        """Compiled message for these instructions, reused when they repeat."""
+        key = (bytes(payer), *(bytes(ix) for ix in instructions))
+        template = self._templates.get(key)
+        if template is not None:
+            self._stats["template_hits"] += 1
+            self._templates.move_to_end(key)
+            return template
+        template = MessageTemplate(payer, instructions)
+        self._templates[key] = template
+        if len(self._templates) > self.max_templates:
+            self._templates.popitem(last=False)
+        return template
+
+    async def build(
+        self, payer: Keypair, instructions: Sequence[Instruction]
+    ) -> Tuple[VersionedTransaction, RecentBlockhash]:
+        """Signed transaction for instructions using the warm blockhash."""
+        recent = await self.blockhash.get()
+        message = self.template(payer.pubkey(), instructions).build(recent.blockhash)
+        return VersionedTransaction(message, [payer]), recent
+
+    # Submission
+
+    async def submit(
+        self,
+        transaction: VersionedTransaction,
+        last_valid_block_height: Optional[int] = None,
+        skip_preflight: bool = False,
+        max_retries: Optional[int] = None,
+    ) -> PendingTransaction:
+        """Send transaction and return once a node accepted it; confirmation runs in the background.
+
+        Errors from the send itself (preflight failures, stale blockhash) are
+        raised here; the returned PendingTransaction reports what happens next.
+        """
+        signature = await self.rpc_pool.send_transaction(
+            base64.b64encode(bytes(transaction)).decode(),
+            str(transaction.signatures[0]),
+            skip_preflight=skip_preflight,
+            max_retries=max_retries,
+        )
+        self._stats["submitted"] += 1
+        pending = PendingTransaction(signature, last_valid_block_height)
+        self._remember(pending)
+
+        def on_result(result: Dict[str, Any]):
+            if pending.done.is_set():
+                return  # Already evicted and counted as expired
+            self._stats[result["status"]] += 1
+            pending.resolve(result["status"], result.get("slot"), result.get("error"))
+
+        self.tracker.track(
+            signature, last_valid_block_height, pending.submitted_at, callback=on_result
+        )
+        return pending
+
+    def _remember(self, pending: PendingTransaction):
+        self._tracked[pending.signature] = pending
+        while len(self._tracked) > self.max_tracked:
+            _, oldest = self._tracked.popitem(last=False)
+            if not oldest.done.is_set():
+                # Waiters must not hang on a transaction nobody reports anymore
+                self._stats["expired"] += 1
+                oldest.resolve("expired", error="No longer tracked; check the signature on-chain")
+
+    def status(self, signature: str) -> Optional[Dict[str, Any]]:
+        """Last known status of a transaction submitted through this pipeline."""
+        pending = self._tracked.get(signature)
+        return pending.to_dict() if pending else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "templates": len(self._templates),
+            "tracking": sum(1 for p in self._tracked.values() if not p.done.is_set()),
+            "blockhash": self.blockhash.get_stats(),
+        }
+
+    async def close(self):
+        await self.blockhash.stop()
+        if self._owns_tracker:
+            await self.tracker.close()
+
+
+# Global transaction pipeline
+_global_pipeline: Optional[TransactionPipeline] = None
+
+
+def configure_transaction_pipeline(
+    rpc_pool: RPCPool, blockhash_refresh: float = 5.0, start: bool = True
+) -> TransactionPipeline:
+    """Create the global pipeline; start=True begins background blockhash refreshes."""
+    global _global_pipeline
+    _global_pipeline = TransactionPipeline(rpc_pool, blockhash_refresh=blockhash_refresh)
+    if start:
+        _global_pipeline.blockhash.start()
+    return _global_pipeline
+
+
+def get_transaction_pipeline() -> Optional[TransactionPipeline]:
+    """Global transaction pipeline, or None before configure_transaction_pipeline()."""
+    return _global_pipeline
+
+
+async def cleanup_transaction_pipeline():
+    """Stop the blockhash refresher (the global tracker has its own cleanup)."""
+    global _global_pipeline
+    if _global_pipeline is not None:
+        await _global_pipeline.close()
+        _global_pipeline = None
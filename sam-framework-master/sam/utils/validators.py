@@ -26,6 +26,27 @@ class SolanaAddress(BaseModel):
         return v
 
 
+class TransactionSignature(BaseModel):
+    """Validate transaction signatures."""
+
+    signature: str
+
+    @field_validator("signature")
+    @classmethod
+    def validate_signature(cls, v: str) -> str:
+        if not isinstance(v, str):
+            raise ValueError("Signature must be a string")
+
+        # 64-byte signatures are 64-88 base58 characters
+        if not (64 <= len(v) <= 88):
+            raise ValueError("Invalid transaction signature length")
+
+        if not re.match(r"^[1-9A-HJ-NP-Za-km-z]+$", v):
+            raise ValueError("Invalid transaction signature format")
+
+        return v
+
+
 class TradeAmount(BaseModel):
     """Validate trade amounts."""
 
@@ -142,6 +163,35 @@ def validate_tool_input(tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
         validated = SolanaAddress(address=args.get("address", ""))
         return {"address": validated.address}
 
+    elif tool_name == "rebalance":
+        targets = args.get("targets") or {}
+        if not isinstance(targets, dict):
+            raise ValueError("targets must map token mints to weights")
+        validated_targets = {}
+        for mint, weight in targets.items():
+            if mint not in ("SOL", "sol"):
+                mint = SolanaAddress(address=mint).address
+            weight = float(weight)
+            if weight < 0:
+                raise ValueError("Target weights must be non-negative")
+            validated_targets[mint] = weight
+        slippage_bps = int(args.get("slippage_bps", 50))
+        if not (1 <= slippage_bps <= 1000):
+            raise ValueError("Slippage must be between 1 and 1000 basis points")
+        min_trade_usd = float(args.get("min_trade_usd", 1.0))
+        if min_trade_usd < 0:
+            raise ValueError("min_trade_usd must not be negative")
+        return {
+            "targets": validated_targets,
+            "slippage_bps": slippage_bps,
+            "min_trade_usd": min_trade_usd,
+            "dry_run": bool(args.get("dry_run", False)),
+        }
+
+    elif tool_name == "get_transaction_status":
+        validated = TransactionSignature(signature=args.get("signature", ""))
+        return {"signature": validated.signature}
+
     else:
         # For unknown tools, return args as-is but log warning
         import logging
@@ -0,0 +1,106 @@
+"""Shared stand-in for sam.utils.rpc_pool.RPCPool."""
+
+import asyncio
+from types import SimpleNamespace
+
+from solders.hash import Hash
+
+
+def asset(mint, supply=1000):
+    """Helius DAS asset for mint."""
+    return {
+        "id": mint,
+        "content": {
+            "metadata": {"name": f"{mint} token", "symbol": mint.upper()},
+            "files": [{"uri": f"https://img/{mint}.png"}],
+        },
+        "token_info": {"decimals": 6, "supply": supply},
+    }
+
+
+def samples(fees, start_slot=1):
+    """getRecentPrioritizationFees samples on consecutive slots."""
+    return [{"slot": start_slot + i, "prioritizationFee": fee} for i, fee in enumerate(fees)]
+
+
+class FakeRPCPool:
+    """Scriptable RPC pool that records what it is asked.
+
+    - getLatestBlockhash: a fresh blockhash valid until height 150
+    - getAssetBatch: assets for the mints in `known`, null for the rest
+    - getSignatureStatuses: `statuses[signature]`, else the next entry of
+      `status_script` (the last one repeats), else unknown
+    - getBlockHeight: `block_height`
+    - getRecentPrioritizationFees: `fees` keyed by the account tuple
+
+    Setting `error` makes every request and batch raise it.
+    """
+
+    def __init__(self, known=("bonk", "wif"), delay=0.0):
+        self.known = set(known)
+        self.delay = delay
+        self.error = None
+        self.calls = []  # Methods of single requests and sends, in order
+        self.batches = []
+        self.asset_requests = []  # Ids of every getAssetBatch
+        self.sent = []
+        self.send_errors = []
+        self.statuses = {}
+        self.status_script = []
+        self.block_height = 100
+        self.supply = 1000
+        self.fees = {(): samples(range(1, 101))}
+        self.endpoints = {}
+
+    def sticky_endpoint(self, key):
+        url = self.endpoints.get(key)
+        return SimpleNamespace(url=url) if url else None
+
+    def _status(self, signature):
+        if signature in self.statuses:
+            return self.statuses[signature]
+        if not self.status_script:
+            return None
+        if len(self.status_script) > 1:
+            return self.status_script.pop(0)
+        return self.status_script[0]
+
+    def _answer(self, method, params):
+        if method == "getLatestBlockhash":
+            return {
+                "context": {"slot": 1},
+                "value": {"blockhash": str(Hash.new_unique()), "lastValidBlockHeight": 150},
+            }
+        if method == "getAssetBatch":
+            # Helius returns null for ids it does not know
+            return [asset(m, self.supply) if m in self.known else None for m in params["ids"]]
+        if method == "getSignatureStatuses":
+            return {"context": {"slot": 1}, "value": [self._status(s) for s in params[0]]}
+        if method == "getBlockHeight":
+            return self.block_height
+        if method == "getRecentPrioritizationFees":
+            return self.fees.get(tuple(params[0]) if params else (), [])
+        raise AssertionError(f"Unexpected RPC method: {method}")
+
+    async def request(self, method, params=None, **kwargs):
+        self.calls.append(method)
+        if method == "getAssetBatch":
+            self.asset_requests.append(list(params["ids"]))
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self._answer(method, params)
+
+    async def batch(self, calls, sticky_key=None):
+        self.batches.append(calls)
+        if self.error:
+            raise self.error
+        return [self._answer(method, params) for method, params in calls]
+
+    async def send_transaction(self, tx_b64, signature, **kwargs):
+        self.calls.append("sendTransaction")
+        await asyncio.sleep(self.delay)
+        if self.send_errors:
+            raise self.send_errors.pop(0)
+        self.sent.append(signature)
+        return signature
@@ -0,0 +1,128 @@
+import pytest
+import asyncio
+from sam.integrations.solana.solana_tools import SolanaTools, create_solana_tools
+from sam.utils.confirmation_tracker import ConfirmationTracker
+from sam.utils.monitoring import MetricsCollector
+from sam.utils.tx_pipeline import TransactionPipeline
+import sam.utils.confirmation_tracker as confirmation_tracker
+from fake_rpc import FakeRPCPool
+
+SIGNATURE = "5" * 88
+
+
+def confirmed(slot=5):
+    return {"slot": slot, "confirmationStatus": "confirmed", "err": None}
+
+
+@pytest.mark.asyncio
+async def test_one_batched_request_per_tick_for_all_signatures():
+    pool = FakeRPCPool()
+    tracker = ConfirmationTracker(pool, poll_interval=10)
+    sigs = [f"sig{i}" for i in range(300)]
+    futures = [tracker.track(sig, last_valid_block_height=150) for sig in sigs]
+
+    await tracker.poll()
+    assert len(pool.batches) == 1
+    methods = [method for method, _ in pool.batches[0]]
+    assert methods == ["getSignatureStatuses", "getSignatureStatuses", "getBlockHeight"]
+    assert [len(params[0]) for _, params in pool.batches[0][:2]] == [256, 44]
+    assert tracker.pending == 300
+
+    for i, sig in enumerate(sigs):
+        pool.statuses[sig] = confirmed(i)
+    await tracker.poll()
+    results = await asyncio.gather(*futures)
+    assert [r["slot"] for r in results] == list(range(300))
+    assert tracker.pending == 0
+    stats = tracker.get_stats()
+    assert (stats["rpc_calls"], stats["confirmed"]) == (2, 300)
+    assert stats["confirm_seconds"]["count"] == 300
+    await tracker.close()
+
+
+@pytest.mark.asyncio
+async def test_signatures_grouped_by_accepting_endpoint():
+    pool = FakeRPCPool()
+    pool.endpoints = {"a1": "https://a", "a2": "https://a", "b1": "https://b"}
+    tracker = ConfirmationTracker(pool, poll_interval=10)
+    for sig in ("a1", "a2", "b1"):
+        tracker.track(sig)
+
+    await tracker.poll()
+    polled = sorted(sorted(batch[0][1][0]) for batch in pool.batches)
+    assert polled == [["a1", "a2"], ["b1"]]
+    assert all(len(batch) == 1 for batch in pool.batches)  # No expiry info to check
+    await tracker.close()
+
+
+@pytest.mark.asyncio
+async def test_callbacks_failures_and_expiry():
+    pool = FakeRPCPool()
+    tracker = ConfirmationTracker(pool, poll_interval=0.01, timeout=5)
+    seen = []
+
+    failed = tracker.track("bad", 150, callback=seen.append)
+    expired = tracker.track("lost", 150, callback=seen.append)
+    assert tracker.track("bad") is failed  # Deduplicated
+    pool.statuses["bad"] = {"slot": 3, "confirmationStatus": "processed", "err": "boom"}
+    assert (await asyncio.wait_for(failed, 1))["error"] == "boom"
+
+    pool.block_height = 151
+    assert (await asyncio.wait_for(expired, 1))["status"] == "expired"
+    assert [r["status"] for r in seen] == ["failed", "expired"]
+    await asyncio.sleep(0.03)
+    assert tracker._task.done()  # Loop stops while nothing is pending
+
+    tracker.timeout = 0
+    assert (await tracker.wait("other", timeout=1))["status"] == "expired"
+    await tracker.close()
+
+
+@pytest.mark.asyncio
+async def test_poll_errors_keep_signatures_pending():
+    pool = FakeRPCPool()
+    tracker = ConfirmationTracker(pool, poll_interval=10)
+    future = tracker.track(SIGNATURE)
+    pool.error = RuntimeError("node down")
+    await tracker.poll()
+    assert tracker.get_stats()["poll_errors"] == 1 and not future.done()
+
+    pool.error = None
+    pool.statuses[SIGNATURE] = confirmed()
+    await tracker.poll()
+    assert future.result()["status"] == "confirmed"
+    await tracker.close()
+
+
+@pytest.mark.asyncio
+async def test_pipelines_share_the_global_tracker_and_metrics(monkeypatch):
+    pool = FakeRPCPool()
+    tracker = ConfirmationTracker(pool, poll_interval=10)
+    monkeypatch.setattr(confirmation_tracker, "_global_tracker", tracker)
+    first, second = TransactionPipeline(pool), TransactionPipeline(pool)
+    assert first.tracker is second.tracker is tracker
+
+    tracker.track(SIGNATURE)
+    pool.statuses[SIGNATURE] = confirmed()
+    await tracker.poll()
+    text = MetricsCollector().render_prometheus()
+    assert "sam_tx_confirmed_total 1" in text
+    assert 'sam_tx_confirm_seconds_bucket{le="+Inf"} 1' in text
+    await first.close()
+    assert tracker._task is not None  # Closing a pipeline leaves the shared tracker alone
+    await tracker.close()
+
+
+@pytest.mark.asyncio
+async def test_get_transaction_status_tool():
+    pool = FakeRPCPool()
+    tools = SolanaTools("http://127.0.0.1:1", rpc_pool=pool)
+    handler = {t.spec.name: t.handler for t in create_solana_tools(tools)}[
+        "get_transaction_status"
+    ]
+
+    assert (await handler({"signature": SIGNATURE}))["status"] == "not_found"
+    pool.statuses[SIGNATURE] = {"slot": 9, "confirmationStatus": "finalized", "err": None}
+    result = await handler({"signature": SIGNATURE})
+    assert result["status"] == "finalized" and result["slot"] == 9
+    await tools.close()
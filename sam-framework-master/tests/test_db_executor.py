@@ -0,0 +1,125 @@
+import pytest
+import asyncio
+import sqlite3
+import tempfile
+import os
+from sam.utils.db_executor import SQLiteExecutor, get_sqlite_executor, cleanup_sqlite_executors
+from sam.core.memory import MemoryManager
+
+
+@pytest.fixture
+async def executor():
+    """Create an executor with a simple table."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = SQLiteExecutor(os.path.join(temp_dir, "exec.db"), read_pool_size=2)
+        await db.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT UNIQUE)")
+        yield db
+        await db.close()
+
+
+@pytest.mark.asyncio
+async def test_write_then_read(executor):
+    """Committed writes are visible to the read pool."""
+    rowcount = await executor.execute("INSERT INTO items (name) VALUES (?)", ("a",))
+    assert rowcount == 1
+
+    row = await executor.fetchone("SELECT name FROM items WHERE name = ?", ("a",))
+    assert row == ("a",)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_are_batched(executor):
+    """Writes queued while a commit is in flight share one transaction."""
+    await asyncio.gather(
+        *[executor.execute("INSERT INTO items (name) VALUES (?)", (f"n{i}",)) for i in range(50)]
+    )
+
+    rows = await executor.fetchall("SELECT COUNT(*) FROM items")
+    assert rows[0][0] == 50
+
+    stats = executor.get_stats()
+    assert stats["ops_committed"] == 51  # CREATE TABLE + 50 inserts
+    assert stats["max_batch_size"] > 1
+    assert stats["batches_committed"] < 51
+    assert stats["max_queue_depth"] >= 1
+    assert sum(stats["batch_size_histogram"].values()) == stats["batches_committed"]
+
+
+@pytest.mark.asyncio
+async def test_failed_op_does_not_poison_batch(executor):
+    """A failing statement only fails its own caller."""
+    await executor.execute("INSERT INTO items (name) VALUES (?)", ("dup",))
+
+    results = await asyncio.gather(
+        executor.execute("INSERT INTO items (name) VALUES (?)", ("ok1",)),
+        executor.execute("INSERT INTO items (name) VALUES (?)", ("dup",)),
+        executor.execute("INSERT INTO items (name) VALUES (?)", ("ok2",)),
+        return_exceptions=True,
+    )
+
+    assert results[0] == 1
+    assert isinstance(results[1], sqlite3.IntegrityError)
+    assert results[2] == 1
+
+    rows = await executor.fetchall("SELECT name FROM items ORDER BY name")
+    assert [r[0] for r in rows] == ["dup", "ok1", "ok2"]
+    assert executor.get_stats()["ops_failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_transaction_is_atomic(executor):
+    """All statements of a transaction roll back together."""
+    with pytest.raises(sqlite3.IntegrityError):
+        await executor.transaction(
+            [
+                ("INSERT INTO items (name) VALUES (?)", ("x",)),
+                ("INSERT INTO items (name) VALUES (?)", ("x",)),
+            ]
+        )
+
+    row = await executor.fetchone("SELECT COUNT(*) FROM items")
+    assert row[0] == 0
+
+
+@pytest.mark.asyncio
+async def test_read_connections_are_read_only(executor):
+    """The read pool rejects writes."""
+    with pytest.raises(sqlite3.OperationalError):
+        await executor.fetchall("INSERT INTO items (name) VALUES ('nope')")
+
+
+@pytest.mark.asyncio
+async def test_closed_executor_rejects_work():
+    """Operations after close raise."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = SQLiteExecutor(os.path.join(temp_dir, "closed.db"))
+        await db.execute("CREATE TABLE t (x INTEGER)")
+        await db.close()
+
+        with pytest.raises(RuntimeError):
+            await db.execute("INSERT INTO t VALUES (1)")
+
+
+@pytest.mark.asyncio
+async def test_memory_manager_uses_shared_executor():
+    """MemoryManager routes through the per-path executor and exposes its metrics."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "memory.db")
+        memory = MemoryManager(db_path)
+        await memory.initialize()
+
+        assert memory.db is get_sqlite_executor(db_path)
+
+        await asyncio.gather(
+            memory.save_session("s1", [{"role": "user", "content": "one"}]),
+            memory.save_trade_history("user1", "token", "buy", 1.0),
+            memory.save_user_preference("user1", "risk", "low"),
+        )
+        await memory.save_session("s1", [{"role": "user", "content": "two"}])
+
+        assert await memory.load_session("s1") == [{"role": "user", "content": "two"}]
+        stats = memory.get_writer_stats()
+        assert stats["ops_committed"] >= 5
+        assert stats["queue_depth"] == 0
+
+        await cleanup_sqlite_executors()
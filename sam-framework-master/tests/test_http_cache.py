@@ -0,0 +1,239 @@
+import pytest
+import asyncio
+import tempfile
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from sam.utils.http_cache import (
+    HTTPResponseCache,
+    freshness_lifetime,
+    parse_cache_control,
+)
+
+
+class Upstream:
+    """Local upstream with configurable caching headers; counts hits per path."""
+
+    def __init__(self):
+        self.hits = {}
+        self.failing = False
+        self.status = None  # Forced status for every path
+
+    async def handle(self, request):
+        path = request.path
+        self.hits[path] = self.hits.get(path, 0) + 1
+        if self.failing:
+            return web.Response(status=503, text="down")
+        if self.status:
+            return web.Response(status=self.status, text="forced")
+
+        if path == "/max-age":
+            return web.json_response(
+                {"n": self.hits[path]}, headers={"Cache-Control": "max-age=60"}
+            )
+        if path == "/etag":
+            if request.headers.get("If-None-Match") == '"v1"':
+                return web.Response(status=304, headers={"ETag": '"v1"'})
+            return web.json_response(
+                {"n": self.hits[path]}, headers={"ETag": '"v1"', "Cache-Control": "no-cache"}
+            )
+        if path == "/no-store":
+            return web.json_response({"n": self.hits[path]}, headers={"Cache-Control": "no-store"})
+        if path.startswith("/big"):
+            return web.Response(body=b"x" * 400, headers={"Cache-Control": "max-age=60"})
+        # No caching headers at all
+        return web.json_response({"n": self.hits[path]})
+
+
+@pytest.fixture
+async def upstream():
+    state = Upstream()
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", state.handle)
+    server = TestServer(app)
+    await server.start_server()
+    async with aiohttp.ClientSession() as session:
+        yield state, server, session
+    await server.close()
+
+
+async def fetch(cache, session, url, **kwargs):
+    async with cache.request(session, url, **kwargs) as response:
+        return response.status, await response.json(), getattr(response, "from_cache", False)
+
+
+def test_freshness_lifetime():
+    """max-age beats Expires, Age is subtracted, no-store is never stored."""
+    assert parse_cache_control('max-age=10, stale-if-error="30", public') == {
+        "max-age": "10",
+        "stale-if-error": "30",
+        "public": None,
+    }
+    assert freshness_lifetime({"cache-control": "max-age=10", "age": "4"}, 99, 0) == (6.0, 0.0)
+    assert freshness_lifetime({"cache-control": "no-store"}, 99, 0) == (None, 0.0)
+    assert freshness_lifetime({}, 5.0, 0) == (5.0, 0.0)
+    assert freshness_lifetime(
+        {
+            "expires": "Thu, 01 Jan 2026 00:01:00 GMT",
+            "date": "Thu, 01 Jan 2026 00:00:00 GMT",
+        },
+        0,
+        0,
+    ) == (60.0, 0.0)
+
+
+@pytest.mark.asyncio
+async def test_max_age_served_from_memory(upstream):
+    """Fresh entries are served without touching the network."""
+    state, server, session = upstream
+    cache = HTTPResponseCache()
+    url = str(server.make_url("/max-age"))
+
+    assert await fetch(cache, session, url) == (200, {"n": 1}, False)
+    assert await fetch(cache, session, url) == (200, {"n": 1}, True)
+    assert state.hits["/max-age"] == 1
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["bytes_saved"] == len(b'{"n": 1}')
+
+
+@pytest.mark.asyncio
+async def test_etag_revalidation(upstream):
+    """Entries with validators are revalidated and 304s reuse the stored body."""
+    state, server, session = upstream
+    cache = HTTPResponseCache()
+    url = str(server.make_url("/etag"))
+
+    await fetch(cache, session, url)
+    async with cache.request(session, url) as response:
+        assert response.revalidated
+        assert await response.json() == {"n": 1}
+
+    assert state.hits["/etag"] == 2
+    assert cache.get_stats()["not_modified"] == 1
+
+
+@pytest.mark.asyncio
+async def test_endpoint_ttl_and_call_site_ttl(upstream):
+    """Header-less responses are cached only under an endpoint or call-site TTL."""
+    state, server, session = upstream
+    cache = HTTPResponseCache()
+    plain = str(server.make_url("/plain"))
+
+    await fetch(cache, session, plain)
+    await fetch(cache, session, plain)
+    assert state.hits["/plain"] == 2
+
+    cache.set_ttl(str(server.make_url("/pla")), 60)
+    await fetch(cache, session, plain)
+    await fetch(cache, session, plain)
+    assert state.hits["/plain"] == 3
+
+    other = str(server.make_url("/other"))
+    await fetch(cache, session, other, ttl=60)
+    await fetch(cache, session, other, ttl=60)
+    assert state.hits["/other"] == 1
+
+    no_store = str(server.make_url("/no-store"))
+    await fetch(cache, session, no_store, ttl=60)
+    await fetch(cache, session, no_store, ttl=60)
+    assert state.hits["/no-store"] == 2
+
+
+@pytest.mark.asyncio
+async def test_params_and_auth_headers_are_part_of_the_key(upstream):
+    """Different query params or API keys never share an entry."""
+    state, server, session = upstream
+    cache = HTTPResponseCache()
+    url = str(server.make_url("/q"))
+
+    await fetch(cache, session, url, params={"a": 1}, ttl=60)
+    await fetch(cache, session, url, params={"a": 2}, ttl=60)
+    await fetch(cache, session, url, params={"a": 1}, headers={"X-Subscription-Token": "k"}, ttl=60)
+    await fetch(cache, session, url, params={"a": 1}, ttl=60)
+    assert state.hits["/q"] == 3
+
+
+@pytest.mark.asyncio
+async def test_byte_bound_lru_eviction(upstream):
+    """The memory tier stays under its byte budget, evicting least recently used first."""
+    state, server, session = upstream
+    cache = HTTPResponseCache(max_bytes=1000)
+    urls = [str(server.make_url(f"/big{i}")) for i in range(3)]
+
+    for url in urls[:2]:
+        async with cache.request(session, url) as response:
+            await response.read()
+    # Touch big0 so big1 is the LRU victim
+    async with cache.request(session, urls[0]) as response:
+        await response.read()
+    async with cache.request(session, urls[2]) as response:
+        await response.read()
+
+    stats = cache.get_stats()
+    assert stats["memory_bytes"] <= 1000
+    assert stats["evictions"] == 1
+    async with cache.request(session, urls[1]) as response:
+        assert not response.from_cache
+    assert state.hits["/big1"] == 2
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart(upstream):
+    """A new cache instance on the same directory serves entries from disk."""
+    state, server, session = upstream
+    url = str(server.make_url("/max-age"))
+    with tempfile.TemporaryDirectory() as disk_dir:
+        await fetch(HTTPResponseCache(disk_dir=disk_dir), session, url)
+
+        restarted = HTTPResponseCache(disk_dir=disk_dir)
+        assert await fetch(restarted, session, url) == (200, {"n": 1}, True)
+        assert restarted.get_stats()["disk_hits"] == 1
+        assert state.hits["/max-age"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_if_error(upstream):
+    """Expired entries are served when the upstream fails within the stale window."""
+    state, server, session = upstream
+    cache = HTTPResponseCache(default_stale_if_error=60)
+    url = str(server.make_url("/flaky"))
+
+    await fetch(cache, session, url, ttl=0.01)
+    await asyncio.sleep(0.02)
+
+    state.failing = True
+    async with cache.request(session, url, ttl=0.01) as response:
+        assert response.stale
+        assert await response.json() == {"n": 1}
+
+    await server.close()
+    async with cache.request(session, url, ttl=0.01) as response:
+        assert response.stale
+    assert cache.get_stats()["stale_served"] == 2
+
+    # Outside the stale window errors propagate
+    strict = HTTPResponseCache(default_stale_if_error=0)
+    with pytest.raises(aiohttp.ClientError):
+        await fetch(strict, session, url, ttl=0.01)
+
+
+@pytest.mark.asyncio
+async def test_caller_errors_propagate_unchanged(upstream):
+    """An error raised inside the caller's block is not mistaken for a fetch failure."""
+    state, server, session = upstream
+    cache = HTTPResponseCache(default_stale_if_error=60)
+    url = str(server.make_url("/etag"))
+    await fetch(cache, session, url)
+
+    state.status = 404
+    with pytest.raises(asyncio.TimeoutError):
+        async with cache.request(session, url) as response:
+            assert response.status == 404
+            raise asyncio.TimeoutError()
+    with pytest.raises(aiohttp.ClientError):
+        async with cache.request(session, url):
+            raise aiohttp.ClientError("caller")
+    assert cache.get_stats()["stale_served"] == 0
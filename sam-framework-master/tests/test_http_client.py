@@ -1,7 +1,12 @@
 import pytest
 from unittest.mock import patch, AsyncMock, MagicMock
 from contextlib import asynccontextmanager
+import asyncio
+import time
+from aiohttp import web
+from aiohttp.test_utils import TestServer
 from sam.utils.http_client import (
+    HTTPClientProfile,
     SharedHTTPClient,
     get_http_client,
     cleanup_http_client,
@@ -251,5 +256,89 @@ class TestGlobalHTTPClient:
                 assert response == mock_response
 
 
+class TestHTTPClientProfiles:
+    """Test named client profiles."""
+
+    @pytest.mark.asyncio
+    async def test_dedicated_and_shared_pools(self):
+        """Dedicated profiles own a pool; shared ones reuse the default pool."""
+        client = SharedHTTPClient()
+        default = await client.get_session()
+        rpc = await client.get_session("rpc")
+        search = await client.get_session("search")
+
+        assert rpc is await client.get_session("rpc")
+        assert rpc.connector is not default.connector
+        assert rpc.connector.limit == client.get_profile("rpc").limit
+        assert rpc.timeout.total == 15
+
+        assert search.connector is default.connector
+        assert search.timeout.total == 20
+
+        stats = client.get_pool_stats()
+        assert stats["rpc"]["dedicated"] is True
+        assert stats["search"]["dedicated"] is False
+
+        await client.close()
+        assert default.closed and rpc.closed and search.closed
+
+    @pytest.mark.asyncio
+    async def test_unknown_profile(self):
+        """Unknown profile names are rejected."""
+        client = SharedHTTPClient()
+        with pytest.raises(ValueError):
+            await client.get_session("nope")
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_register_profile_override(self):
+        """Profiles can be registered or tuned at runtime."""
+        client = SharedHTTPClient()
+        profile = client.register_profile(client.get_profile("rpc"), total_timeout=3)
+        assert profile.total_timeout == 3
+
+        client.register_profile(HTTPClientProfile("helius", limit=5, dedicated=True))
+        session = await client.get_session("helius")
+        assert session.connector.limit == 5
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_fast_upstream_does_not_queue_behind_llm(self):
+        """A saturated LLM pool does not delay requests on another profile."""
+
+        async def slow(request):
+            await asyncio.sleep(0.5)
+            return web.json_response({"ok": True})
+
+        async def fast(request):
+            return web.json_response({"ok": True})
+
+        app = web.Application()
+        app.router.add_get("/slow", slow)
+        app.router.add_get("/fast", fast)
+        server = TestServer(app)
+        await server.start_server()
+
+        client = SharedHTTPClient()
+        client.register_profile(client.get_profile("llm"), limit=1, limit_per_host=1)
+        llm = await client.get_session("llm")
+        market = await client.get_session("market_data")
+
+        async def call(session, path):
+            async with session.get(server.make_url(path)) as response:
+                return await response.json()
+
+        slow_tasks = [asyncio.create_task(call(llm, "/slow")) for _ in range(2)]
+        await asyncio.sleep(0.05)
+
+        start = time.perf_counter()
+        assert await call(market, "/fast") == {"ok": True}
+        assert time.perf_counter() - start < 0.3
+
+        await asyncio.gather(*slow_tasks)
+        await client.close()
+        await server.close()
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,129 @@
+import pytest
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from sam.utils.http_client import SharedHTTPClient
+from sam.utils.http_tracing import (
+    Histogram,
+    HTTPTraceMetrics,
+    create_trace_config,
+    enable_http_tracing,
+    get_http_trace_metrics,
+    get_trace_configs,
+)
+from sam.utils.metrics_server import MetricsServer
+from sam.utils.monitoring import MetricsCollector
+
+
+@pytest.fixture
+async def server():
+    """Local upstream returning a fixed-size body."""
+
+    async def payload(request):
+        return web.Response(body=b"x" * 2048)
+
+    app = web.Application()
+    app.router.add_get("/payload", payload)
+    server = TestServer(app)
+    await server.start_server()
+    yield server
+    await server.close()
+
+
+def test_histogram_buckets():
+    """Observations land in the first bucket whose bound is >= value."""
+    hist = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        hist.observe(value)
+
+    assert hist.counts == [2, 1, 1]
+    assert hist.cumulative() == [2, 3, 4]
+    assert hist.count == 4
+    assert hist.quantile(0.5) == 0.1
+    assert hist.quantile(1.0) == float("inf")
+
+
+def test_tracing_disabled_attaches_nothing():
+    """With tracing off no TraceConfig is attached to sessions."""
+    enable_http_tracing(False)
+    assert get_trace_configs() == []
+
+
+@pytest.mark.asyncio
+async def test_trace_config_records_phases(server):
+    """Every phase is recorded per host."""
+    metrics = HTTPTraceMetrics()
+    async with aiohttp.ClientSession(trace_configs=[create_trace_config(metrics)]) as session:
+        for _ in range(3):
+            async with session.get(server.make_url("/payload")) as response:
+                await response.read()
+
+    host = server.make_url("/").host
+    stats = metrics.snapshot()[host]
+    assert stats["requests"] == 3
+    assert stats["errors"] == 0
+    assert stats["ttfb"]["count"] == 3
+    assert stats["total"]["count"] == 3
+    assert stats["response_bytes"]["sum"] == 3 * 2048
+    # Keepalive: only the first request opens a connection
+    assert stats["connect"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_trace_config_counts_errors():
+    """Failed connections are counted as errors."""
+    metrics = HTTPTraceMetrics()
+    async with aiohttp.ClientSession(trace_configs=[create_trace_config(metrics)]) as session:
+        with pytest.raises(aiohttp.ClientError):
+            await session.get("http://127.0.0.1:1/unreachable")
+
+    assert metrics.errors == {"127.0.0.1": 1}
+
+
+@pytest.mark.asyncio
+async def test_shared_client_traces_when_enabled(server):
+    """Sessions created after enabling tracing feed the global metrics."""
+    get_http_trace_metrics().reset()
+    enable_http_tracing(True)
+    client = SharedHTTPClient()
+    try:
+        session = await client.get_session("market_data")
+        async with session.get(server.make_url("/payload")) as response:
+            await response.read()
+    finally:
+        enable_http_tracing(False)
+        await client.close()
+
+    host = server.make_url("/").host
+    assert get_http_trace_metrics().requests[host] == 1
+    assert MetricsCollector().get_http_stats()[host]["total"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(server):
+    """/metrics renders operation counters and HTTP histograms."""
+    metrics = get_http_trace_metrics()
+    metrics.reset()
+    metrics.observe("api.example.com", "ttfb", 0.02)
+    metrics.count(metrics.requests, "api.example.com")
+
+    metrics_server = MetricsServer(port=0)
+    await metrics_server.start()
+    try:
+        url = f"http://127.0.0.1:{metrics_server.bound_port}"
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{url}/metrics") as response:
+                assert response.status == 200
+                text = await response.text()
+            async with session.get(f"{url}/metrics.json") as response:
+                data = await response.json()
+    finally:
+        await metrics_server.stop()
+        metrics.reset()
+
+    assert 'sam_http_requests_total{host="api.example.com"} 1' in text
+    assert (
+        'sam_http_phase_seconds_bucket{host="api.example.com",phase="ttfb",le="0.025"} 1' in text
+    )
+    assert 'sam_http_phase_seconds_count{host="api.example.com",phase="ttfb"} 1' in text
+    assert data["http"]["api.example.com"]["ttfb"]["count"] == 1
@@ -0,0 +1,163 @@
+import pytest
+import math
+import time
+import numpy as np
+from unittest.mock import patch
+from sam.integrations.market_analysis import MarketAnalysisTools, create_market_analysis_tools
+from sam.utils.indicators import (
+    IndicatorState,
+    analyze_many,
+    atr,
+    bollinger,
+    compute_indicators,
+    ema,
+    rsi,
+    sma,
+    vwap,
+)
+from sam.utils.tick_store import CANDLE_DTYPE, TickStore
+
+
+def random_candles(n, seed=0, start=100.0):
+    rng = np.random.default_rng(seed)
+    close = start * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    candles = np.zeros(n, dtype=CANDLE_DTYPE)
+    candles["ts"] = np.arange(n) * 60.0
+    candles["open"] = np.concatenate(([start], close[:-1]))
+    candles["close"] = close
+    candles["high"] = np.maximum(candles["open"], close) * (1 + rng.uniform(0, 0.005, n))
+    candles["low"] = np.minimum(candles["open"], close) * (1 - rng.uniform(0, 0.005, n))
+    candles["volume"] = rng.uniform(1, 100, n)
+    return candles
+
+
+def test_basic_indicators_against_reference_loops():
+    x = np.array([1.0, 2.0, 3.0, 4.0, 5.0, 4.0, 3.0])
+
+    assert np.isnan(sma(x, 3)[:2]).all()
+    assert sma(x, 3)[2:].tolist() == [2.0, 3.0, 4.0, 13 / 3, 4.0]
+
+    expected, alpha = [x[0]], 2 / 4
+    for value in x[1:]:
+        expected.append(expected[-1] + alpha * (value - expected[-1]))
+    assert np.allclose(ema(x, 3), expected)
+
+    values = rsi(x, 3)
+    assert np.isnan(values[0])
+    assert values[4] == 100.0  # Only gains so far
+    assert 0 < values[-1] < 100
+
+    mid, upper, lower = bollinger(x, 3, 2.0)
+    assert mid[-1] == 4.0
+    assert math.isclose(upper[-1] - mid[-1], 2 * np.std(x[-3:]))
+
+    high, low = x + 1, x - 1
+    assert atr(high, low, x, 3)[0] == 2.0
+    assert math.isclose(vwap(high, low, x, np.ones_like(x))[-1], x.mean())
+
+
+def test_batch_is_vectorized_across_symbols():
+    """A 2-D batch gives the same result as each symbol on its own."""
+    candles = np.stack([random_candles(120, seed) for seed in range(3)])
+    batch = compute_indicators(
+        candles["high"], candles["low"], candles["close"], candles["volume"]
+    )
+    single = compute_indicators(
+        candles["high"][1], candles["low"][1], candles["close"][1], candles["volume"][1]
+    )
+    for name, values in single.items():
+        assert np.allclose(batch[name][1], values, equal_nan=True), name
+
+
+def test_incremental_state_matches_batch():
+    """Feeding candles one at a time ends at the batch values."""
+    candles = random_candles(300, seed=7)
+    state = IndicatorState.from_candles(candles[:250])
+    for candle in candles[250:]:
+        state.update(*(float(candle[f]) for f in ("ts", "high", "low", "close", "volume")))
+
+    batch = analyze_many({"x": candles})["x"]
+    incremental = state.summary()
+    assert incremental.keys() == batch.keys()
+    for name, value in batch.items():
+        assert value == pytest.approx(incremental[name], rel=1e-5, abs=1e-9), name
+    assert state.last_ts == candles["ts"][-1]
+
+
+def test_analyze_many_groups_by_length():
+    """Symbols with different history lengths are all summarized; one candle is skipped."""
+    results = analyze_many(
+        {"a": random_candles(50, 1), "b": random_candles(80, 2), "c": random_candles(1, 3)}
+    )
+    assert set(results) == {"a", "b"}
+    assert results["a"]["candles"] == 50
+    assert results["b"]["sma"] is not None
+    assert all(isinstance(v, (int, float)) or v is None for v in results["a"].values())
+
+
+@pytest.mark.asyncio
+async def test_analyze_market_tool():
+    """The tool reads candles from the tick store and resolves common symbols."""
+    from sam.utils.price_service import SOL_MINT
+
+    store = TickStore(capacity=10_000)
+    ts = np.arange(0, 6 * 3600, 30.0)
+    store.add_many(SOL_MINT, ts, 150 + np.sin(ts / 3600) * 5, np.ones(len(ts)))
+    store.add("fresh", 1.0)
+
+    tool = create_market_analysis_tools(MarketAnalysisTools(store))[0]
+    assert tool.spec.name == "analyze_market"
+    result = await tool.handler({"tokens": "SOL, fresh", "interval": "5m", "limit": 50})
+
+    sol = result["analysis"]["SOL"]
+    assert sol["candles"] == 50
+    assert 0 <= sol["rsi"] <= 100
+    assert sol["bb_lower"] < sol["bb_upper"]
+    assert result["insufficient_history"] == ["fresh"]
+
+    assert "error" in await tool.handler({"tokens": ["SOL"], "interval": "7m"})
+    assert "error" in await MarketAnalysisTools().analyze_market(["SOL"])
+
+
+@pytest.mark.asyncio
+async def test_analyze_market_advances_state_with_closed_candles():
+    """Repeat calls only feed newly closed candles into each token's state."""
+    store = TickStore(capacity=10_000)
+    now = time.time()
+    start = (now // 300 - 30) * 300
+    ts = np.arange(start, start + 20 * 300, 30.0)
+    store.add_many("m", ts, 10 + np.cos(ts / 900), np.ones(len(ts)))
+    tools = MarketAnalysisTools(store)
+
+    first = (await tools.analyze_market(["m"], "5m", limit=200))["analysis"]["m"]
+    assert first["candles"] == 20
+    assert "vwap" not in first
+    state = tools._states[("m", 300.0)]
+
+    # Ten more closed candles plus the one still forming
+    more = np.arange(start + 20 * 300, now, 30.0)
+    store.add_many("m", more, 10 + np.sin(more / 900))
+    with patch.object(store, "candles", wraps=store.candles) as candles:
+        second = (await tools.analyze_market(["m"], "5m"))["analysis"]["m"]
+    assert tools._states[("m", 300.0)] is state
+    assert candles.call_args.kwargs["since"] == start + 20 * 300
+    assert second["candles"] == 30
+
+    closed = store.candles("m", "5m")
+    closed = closed[closed["ts"] + 300 <= now]
+    expected = IndicatorState.from_candles(closed, interval=300.0)
+    assert second["rsi"] == pytest.approx(expected.summary()["rsi"], rel=1e-5)
+
+
+@pytest.mark.performance
+def test_hundreds_of_symbols_in_milliseconds():
+    """500 symbols x 200 candles are analyzed well within one chat turn."""
+    candles = {f"s{i}": random_candles(200, i) for i in range(500)}
+    analyze_many(candles)  # Warm up
+
+    start = time.perf_counter()
+    results = analyze_many(candles)
+    elapsed = time.perf_counter() - start
+
+    assert len(results) == 500
+    assert elapsed < 0.5, f"{elapsed * 1000:.1f}ms"
@@ -1,9 +1,19 @@
 import pytest
+import json
 from unittest.mock import patch, MagicMock, AsyncMock
 from sam.integrations.pump_fun import PumpFunTools
 from sam.integrations.jupiter import JupiterTools
 from sam.integrations.dexscreener import DexScreenerTools
 from sam.integrations.search import SearchTools
+from sam.utils.http_cache import configure_http_cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_http_cache():
+    """Mocked responses must not leak between tests through the response cache."""
+    configure_http_cache()
+    yield
+    configure_http_cache()
 
 
 class TestPumpFunTools:
@@ -50,6 +60,8 @@ class TestPumpFunTools:
             mock_response = MagicMock()
             mock_response.status = 200
             mock_response.json = AsyncMock(return_value=mock_response_data)
+            mock_response.read = AsyncMock(return_value=json.dumps(mock_response_data).encode())
+            mock_response.headers = {}
 
             # Create proper async context manager mock
             mock_cm = MagicMock()
@@ -130,6 +142,8 @@ class TestPumpFunTools:
             mock_response = MagicMock()
             mock_response.status = 200
             mock_response.json = AsyncMock(return_value=mock_token_data)
+            mock_response.read = AsyncMock(return_value=json.dumps(mock_token_data).encode())
+            mock_response.headers = {}
 
             # Create proper async context manager mock
             mock_cm = MagicMock()
@@ -178,6 +192,8 @@ class TestJupiterTools:
             mock_response = MagicMock()
             mock_response.status = 200
             mock_response.json = AsyncMock(return_value=mock_quote_data)
+            mock_response.read = AsyncMock(return_value=json.dumps(mock_quote_data).encode())
+            mock_response.headers = {}
 
             # Create proper async context manager mock
             mock_cm = MagicMock()
@@ -281,6 +297,8 @@ class TestSearchTools:
             mock_response = MagicMock()
             mock_response.status = 200
             mock_response.json = AsyncMock(return_value=mock_search_data)
+            mock_response.read = AsyncMock(return_value=json.dumps(mock_search_data).encode())
+            mock_response.headers = {}
 
             # Create proper async context manager mock
             mock_cm = MagicMock()
@@ -321,6 +339,8 @@ class TestSearchTools:
             mock_response = MagicMock()
             mock_response.status = 200
             mock_response.json = AsyncMock(return_value=mock_news_data)
+            mock_response.read = AsyncMock(return_value=json.dumps(mock_news_data).encode())
+            mock_response.headers = {}
 
             # Create proper async context manager mock
             mock_cm = MagicMock()
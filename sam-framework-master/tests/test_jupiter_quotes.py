@@ -0,0 +1,121 @@
+import pytest
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+from sam.integrations.jupiter import JupiterTools, amount_bucket, create_jupiter_tools
+
+SOL = "So11111111111111111111111111111111111111112"
+USDC = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+
+
+@pytest.fixture
+def jupiter():
+    """JupiterTools whose quote fetches are answered locally (100 USDC units per lamport)."""
+    tools = JupiterTools(quote_ttl=5)
+    tools.fetches = []
+
+    async def fetch(input_mint, output_mint, amount, slippage_bps, cache_ttl=None):
+        tools.fetches.append((amount, slippage_bps))
+        await asyncio.sleep(0.05)
+        if amount < 0:
+            return {"error": "bad amount"}
+        # Bigger trades get a slightly worse price
+        out = int(amount * 100 * (1 - amount / 1e12))
+        return {
+            "quote": {"inAmount": str(amount), "outAmount": str(out)},
+            "input_mint": input_mint,
+            "output_mint": output_mint,
+            "input_amount": amount,
+            "output_amount": str(out),
+            "price_impact_pct": str(amount / 1e10),
+            "route_plan": [],
+        }
+
+    with patch.object(tools, "_fetch_quote", fetch):
+        yield tools
+
+
+def test_amount_bucket():
+    assert amount_bucket(1_234_567) == 1_230_000
+    assert amount_bucket(1_235_000) == 1_240_000
+    assert amount_bucket(999) == 999
+    assert amount_bucket(0) == 0
+
+
+@pytest.mark.asyncio
+async def test_quotes_are_cached_per_amount_bucket(jupiter):
+    first = await jupiter.get_quote(SOL, USDC, 1_000_000_000, 50)
+    near = await jupiter.get_quote(SOL, USDC, 1_001_000_000, 50)
+    assert jupiter.fetches == [(1_000_000_000, 50)]
+    assert near["cached"] and near["quoted_amount"] == 1_000_000_000
+    assert near["input_amount"] == 1_001_000_000
+    assert int(near["output_amount"]) == int(first["output_amount"]) * 1001 // 1000
+
+    # Other slippage, other bucket, or a forced refresh all go to Jupiter
+    await jupiter.get_quote(SOL, USDC, 1_000_000_000, 100)
+    await jupiter.get_quote(SOL, USDC, 2_000_000_000, 50)
+    await jupiter.get_quote(SOL, USDC, 1_000_000_000, 50, cache_ttl=0)
+    assert len(jupiter.fetches) == 4
+    assert jupiter.quote_cache.get_stats()["hits"] == 1
+
+    # The raw quote is for the original amount, so a rescaled result cannot be swapped
+    assert near["estimated"] and near["quote"] is None
+    jupiter.solana_tools = MagicMock()
+    assert "fresh quote" in (await jupiter.sign_swap(near))["error"]
+    exact = await jupiter.get_quote(SOL, USDC, 1_000_000_000, 50)
+    assert exact["quote"] == first["quote"] and "estimated" not in exact
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_quotes_share_one_fetch_and_errors_are_not_cached(jupiter):
+    results = await asyncio.gather(
+        *(jupiter.get_quote(SOL, USDC, 5_000_000, 50) for _ in range(5))
+    )
+    assert len(jupiter.fetches) == 1
+    assert len({r["output_amount"] for r in results}) == 1
+
+    assert "error" in await jupiter.get_quote(SOL, USDC, -1, 50)
+    assert "error" in await jupiter.get_quote(SOL, USDC, -1, 50)
+    assert jupiter.fetches.count((-1, 50)) == 2
+
+    jupiter.quote_cache.ttl = 0.01
+    await asyncio.sleep(0.02)
+    await jupiter.get_quote(SOL, USDC, 5_000_000, 50)
+    assert jupiter.fetches.count((5_000_000, 50)) == 2
+
+
+@pytest.mark.asyncio
+async def test_compare_quotes_fetches_concurrently(jupiter):
+    handler = {t.spec.name: t.handler for t in create_jupiter_tools(jupiter)}["compare_quotes"]
+    started = time.monotonic()
+    result = await handler(
+        {
+            "input_mint": SOL,
+            "output_mint": USDC,
+            "amounts": [1_000_000_000, 10_000_000_000, 100_000_000_000],
+            "slippage_bps": [50, 100],
+        }
+    )
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.15  # Six quotes, one round
+    assert len(result["quotes"]) == 6 and len(jupiter.fetches) == 6
+    prices = [q["price"] for q in result["quotes"] if q["slippage_bps"] == 50]
+    assert prices == sorted(prices, reverse=True)  # Price impact grows with size
+    assert result["best_price_amount"] == 1_000_000_000
+    first = result["quotes"][0]
+    assert first["min_output_amount"] == first["output_amount"] * 9950 // 10000
+
+    # A follow-up comparison is served from the cache
+    again = await jupiter.compare_quotes(SOL, USDC, [1_000_000_000], [50])
+    assert again["quotes"][0]["cached"] and len(jupiter.fetches) == 6
+
+
+@pytest.mark.asyncio
+async def test_compare_quotes_limits(jupiter):
+    too_many = await jupiter.compare_quotes(SOL, USDC, list(range(1, 12)))
+    assert "At most" in too_many["error"]
+    assert "error" in await jupiter.compare_quotes(SOL, USDC, [])
+    mixed = await jupiter.compare_quotes(SOL, USDC, [1_000, -1])
+    assert "error" in mixed["quotes"][1] and mixed["best_price_amount"] == 1_000
+    assert jupiter.fetches == [(1_000, 50), (-1, 50)]
@@ -357,6 +357,188 @@ class TestPriceService:
         assert service1 is service2
         assert isinstance(service1, PriceService)
 
+    @pytest.mark.asyncio
+    async def test_get_prices_batches_uncached_mints(self):
+        """Uncached mints are fetched in capped, concurrent chunks; cached ones are not."""
+        session = _FakePriceSession({f"mint{i}": float(i) for i in range(250)})
+        service = PriceService(chunk_size=100, max_concurrency=2)
+        service._price_cache["mint0"] = PriceData(price_usd=42.0, timestamp=time.time())
+
+        with patch("sam.utils.price_service.get_session", AsyncMock(return_value=session)):
+            prices = await service.get_prices([f"mint{i}" for i in range(250)] + ["unknown"])
+            assert len(session.requests) == 3
+            assert sorted(len(ids) for ids in session.requests) == [50, 100, 100]
+            assert session.max_in_flight == 2
+
+            assert prices["mint0"] == 42.0
+            assert prices["mint249"] == 249.0
+            assert "unknown" not in prices
+
+            # Every priced mint now has its own cache entry
+            await service.get_prices(["mint7", "mint8"])
+            assert len(session.requests) == 3
+
+    @pytest.mark.asyncio
+    async def test_format_portfolio_value_includes_tokens(self):
+        """SOL and token holdings are valued with one batched price lookup."""
+        from sam.utils.price_service import SOL_MINT
+
+        session = _FakePriceSession({SOL_MINT: 100.0, "bonk": 0.5})
+        service = PriceService()
+        tokens = [
+            {"mint": "bonk", "uiAmount": 10.0},
+            {"mint": "rug", "uiAmount": 3.0},
+        ]
+
+        with patch("sam.utils.price_service.get_session", AsyncMock(return_value=session)):
+            portfolio = await service.format_portfolio_value(2.0, tokens)
+
+        assert len(session.requests) == 1
+        assert portfolio["sol_usd"] == 200.0
+        assert portfolio["tokens_usd"] == 5.0
+        assert portfolio["total_usd"] == 205.0
+        assert portfolio["unpriced_tokens"] == 1
+        assert portfolio["tokens"][0]["value_usd"] == 5.0
+        assert portfolio["tokens"][1]["price_usd"] is None
+        assert portfolio["formatted_total"] == "$205.00"
+
+
+    @pytest.mark.asyncio
+    async def test_stale_price_served_while_one_refresh_runs(self):
+        """Stale prices return immediately; concurrent callers share one refresh."""
+        from sam.utils.price_service import SOL_MINT
+
+        session = _FakePriceSession({SOL_MINT: 200.0}, delay=0.2)
+        service = PriceService(cache_ttl=30, hard_ttl=300)
+        service._price_cache["SOL"] = PriceData(price_usd=150.0, timestamp=time.time() - 60)
+
+        with patch("sam.utils.price_service.get_session", AsyncMock(return_value=session)):
+            started = time.monotonic()
+            prices = await asyncio.gather(*(service.get_sol_price_usd() for _ in range(10)))
+            assert time.monotonic() - started < 0.1
+            assert prices == [150.0] * 10
+            assert service.get_cached_price(SOL_MINT)["stale"]
+
+            await asyncio.gather(*service._refreshing.values())
+            assert len(session.requests) == 1
+            assert await service.get_sol_price_usd() == 200.0
+            assert service.get_cache_stats()["stale_served"] == 10
+
+    @pytest.mark.asyncio
+    async def test_cold_lookups_are_single_flight(self):
+        """Concurrent cold lookups for the same mint issue one request."""
+        session = _FakePriceSession({"bonk": 0.5}, delay=0.05)
+        service = PriceService()
+
+        with patch("sam.utils.price_service.get_session", AsyncMock(return_value=session)):
+            results = await asyncio.gather(*(service.get_prices(["bonk"]) for _ in range(10)))
+
+        assert results == [{"bonk": 0.5}] * 10
+        assert len(session.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_hard_expired_price_uses_fallback_on_failure(self):
+        """Past hard expiry a failed refresh goes through _get_fallback_sol_price."""
+        session = _FakePriceSession({}, status=503)
+        service = PriceService(cache_ttl=30, hard_ttl=60)
+        service._price_cache["SOL"] = PriceData(price_usd=150.0, timestamp=time.time() - 120)
+        service._get_fallback_sol_price = AsyncMock(return_value=123.0)
+
+        with patch("sam.utils.price_service.get_session", AsyncMock(return_value=session)):
+            assert await service.get_sol_price_usd() == 123.0
+        assert len(session.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_refresher_keeps_hot_prices_warm(self):
+        """The proactive refresher fills pinned and recently requested mints."""
+        from sam.utils.price_service import SOL_MINT
+
+        session = _FakePriceSession({SOL_MINT: 180.0, "wif": 2.0})
+        service = PriceService()
+        service._last_requested["wif"] = time.time()
+
+        with patch("sam.utils.price_service.get_session", AsyncMock(return_value=session)):
+            service.start_refresher(interval=0.01)
+            for _ in range(50):
+                if service.get_cached_price("wif") and service.get_cached_price(SOL_MINT):
+                    break
+                await asyncio.sleep(0.01)
+            await service.stop_refresher()
+
+        assert service.get_cached_price(SOL_MINT)["price_usd"] == 180.0
+        assert service.get_cached_price("wif")["price_usd"] == 2.0
+        assert not service.get_cache_stats()["refresher_running"]
+
+    @pytest.mark.asyncio
+    async def test_requested_mints_are_bounded_without_refresher(self):
+        """get_prices forgets mints outside hot_window and beyond the size cap."""
+        session = _FakePriceSession({})
+        service = PriceService(hot_window=60)
+        service._last_requested["old"] = time.time() - 120
+
+        with patch("sam.utils.price_service.get_session", AsyncMock(return_value=session)):
+            with patch("sam.utils.price_service.MAX_REQUESTED_MINTS", 3):
+                await service.get_prices([f"m{i}" for i in range(5)])
+
+        assert list(service._last_requested) == ["m2", "m3", "m4"]
+
+    @pytest.mark.asyncio
+    async def test_price_cache_drops_expired_and_is_capped(self):
+        """Prices past hard_ttl leave the cache, as do the oldest beyond the size cap."""
+        session = _FakePriceSession({f"m{i}": float(i) for i in range(5)})
+        service = PriceService(hard_ttl=300)
+        service._price_cache["old"] = PriceData(price_usd=1.0, timestamp=time.time() - 600)
+        service._price_cache["SOL"] = PriceData(price_usd=150.0, timestamp=time.time() - 600)
+
+        with patch("sam.utils.price_service.get_session", AsyncMock(return_value=session)):
+            with patch("sam.utils.price_service.MAX_CACHED_PRICES", 3):
+                await service.get_prices([f"m{i}" for i in range(5)])
+                await service.get_prices(["m4"])
+
+        assert list(service._price_cache) == ["m2", "m3", "m4"]
+        # The last SOL price still backs the estimate fallback
+        assert await service._get_fallback_sol_price() == 150.0
+
+
+class _FakePriceSession:
+    """Jupiter price API stand-in recording batch sizes and concurrency."""
+
+    def __init__(self, prices, delay=0.01, status=200):
+        self.prices = prices
+        self.delay = delay
+        self.status = status
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def get(self, url, params=None):
+        ids = params["ids"].split(",")
+        self.requests.append(ids)
+        session = self
+
+        class _Response:
+            status = session.status
+
+            async def __aenter__(self):
+                session.in_flight += 1
+                session.max_in_flight = max(session.max_in_flight, session.in_flight)
+                await asyncio.sleep(session.delay)
+                return self
+
+            async def __aexit__(self, *exc):
+                session.in_flight -= 1
+
+            async def json(self):
+                return {
+                    "data": {
+                        mint: {"id": mint, "price": session.prices[mint]}
+                        for mint in ids
+                        if mint in session.prices
+                    }
+                }
+
+        return _Response()
+
 
 class TestSecurity:
     """Test security utilities functionality."""
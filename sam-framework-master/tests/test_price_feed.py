@@ -0,0 +1,233 @@
+import pytest
+import asyncio
+import json
+import time
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from unittest.mock import AsyncMock, patch
+from sam.utils.price_feed import (
+    PollingPriceSource,
+    PriceFeed,
+    PriceSource,
+    PriceTick,
+    ReplayPriceSource,
+    WebSocketPriceSource,
+    cleanup_price_feed,
+    create_price_source,
+    parse_price_message,
+    start_price_feed,
+)
+from sam.utils.price_service import PriceService
+
+
+def write_ticks(path, ticks):
+    with open(path, "w") as f:
+        for mint, price, ts in ticks:
+            f.write(json.dumps({"mint": mint, "price": price, "timestamp": ts}) + "\n")
+
+
+def test_parse_price_message():
+    """Single ticks, lists and Jupiter-style payloads are all understood."""
+    assert parse_price_message({"mint": "a", "price": "1.5", "timestamp": 10}) == [
+        PriceTick("a", 1.5, 10.0, "ws")
+    ]
+    assert [t.mint for t in parse_price_message([{"mint": "a", "price": 1}, {"x": 1}])] == ["a"]
+    ticks = parse_price_message({"data": {"a": {"price": 2}, "b": {}}}, "poll")
+    assert [(t.mint, t.price_usd, t.source) for t in ticks] == [("a", 2.0, "poll")]
+    assert parse_price_message("garbage") == []
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_sees_latest_price_only():
+    """Pending ticks coalesce per mint; fast mints do not starve others."""
+    feed = PriceFeed()
+    everything = feed.subscribe()
+    only_b = feed.subscribe(["b"])
+
+    for i in range(5):
+        feed.publish(PriceTick("a", 100.0 + i, time.time()))
+    feed.publish(PriceTick("b", 1.0, time.time()))
+
+    assert everything.pending() == 2
+    assert everything.coalesced == 4
+    batch = await everything.get_batch()
+    assert [(t.mint, t.price_usd) for t in batch] == [("a", 104.0), ("b", 1.0)]
+    assert (await only_b.get()).mint == "b"
+    assert only_b.pending() == 0
+
+    stats = feed.get_stats()
+    assert stats["ticks"] == 6
+    assert stats["subscribers"] == 2
+
+
+@pytest.mark.asyncio
+async def test_latest_and_snapshot():
+    """Latest values are O(1) lookups; older ticks never overwrite newer ones."""
+    feed = PriceFeed()
+    snapshot = feed.snapshot()
+    feed.publish(PriceTick("a", 2.0, 200.0))
+    feed.publish(PriceTick("a", 1.0, 100.0))
+
+    assert feed.latest("a").price_usd == 2.0
+    assert feed.latest("missing") is None
+    assert snapshot["a"].price_usd == 2.0
+    with pytest.raises(TypeError):
+        snapshot["a"] = None
+
+
+@pytest.mark.asyncio
+async def test_replay_source(tmp_path):
+    """A replay file is published in order and the feed stops at its end."""
+    path = tmp_path / "ticks.jsonl"
+    write_ticks(path, [("a", 1.0, 1.0), ("b", 5.0, 1.5), ("a", 2.0, 2.0)])
+
+    feed = PriceFeed(ReplayPriceSource(str(path)))
+    subscription = feed.subscribe()
+    received = []
+
+    async def consume():
+        async for tick in subscription:
+            received.append((tick.mint, tick.price_usd))
+
+    consumer = asyncio.create_task(consume())
+    feed.start()
+    await feed.wait_closed()
+    await feed.stop()
+    await consumer
+
+    assert received == [("a", 1.0), ("b", 5.0), ("a", 2.0)]
+    assert feed.latest("a").timestamp == 2.0
+    assert not feed.running
+
+
+@pytest.mark.asyncio
+async def test_websocket_source_subscribes_and_streams():
+    """The websocket source subscribes to tracked mints and publishes pushed ticks."""
+    subscriptions = []
+
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for msg in ws:
+            message = json.loads(msg.data)
+            subscriptions.append(message["mints"])
+            await ws.send_str("not json")
+            await ws.send_json([{"mint": m, "price": 3.0} for m in message["mints"]])
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/ws", handler)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        async with aiohttp.ClientSession() as session:
+            with patch("sam.utils.price_feed.get_session", AsyncMock(return_value=session)):
+                feed = PriceFeed(WebSocketPriceSource(str(server.make_url("/ws")), mints=["a"]))
+                subscription = feed.subscribe()
+                feed.start()
+                assert (await asyncio.wait_for(subscription.get(), 2)).mint == "a"
+
+                feed.track(["b"])
+                tick = await asyncio.wait_for(subscription.get(), 2)
+                await feed.stop()
+    finally:
+        await server.close()
+
+    assert subscriptions == [["a"], ["b"]]
+    assert (tick.mint, tick.price_usd, tick.source) == ("b", 3.0, "ws")
+
+
+def test_price_source_is_abstract():
+    with pytest.raises(TypeError):
+        PriceSource()
+
+
+@pytest.mark.asyncio
+async def test_failed_subscribe_is_logged(caplog):
+    """Subscribe sends started by track() are kept alive and their failures logged."""
+    source = WebSocketPriceSource("ws://unused", mints=["a"])
+    source._ws = AsyncMock(closed=False)
+    source._ws.send_json.side_effect = ConnectionResetError("gone")
+
+    source.track(["b"])
+    assert len(source._sends) == 1
+    await asyncio.gather(*source._sends, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert not source._sends
+    assert "subscribe failed: gone" in caplog.text
+    assert source.mints == {"a", "b"}
+
+
+@pytest.mark.asyncio
+async def test_untrack_unsubscribes_and_forgets_latest():
+    """Untracked mints are unsubscribed and dropped, unless a subscriber named them."""
+    source = WebSocketPriceSource("ws://unused", mints=["a", "keep"])
+    source._ws = AsyncMock(closed=False)
+    feed = PriceFeed(source)
+    subscription = feed.subscribe(["keep"])
+    for mint in ("a", "keep"):
+        feed.publish(PriceTick(mint, 1.0, time.time()))
+
+    feed.untrack(["a", "keep", "never"])
+    await asyncio.gather(*source._sends)
+
+    source._ws.send_json.assert_awaited_once_with({"method": "unsubscribe", "mints": ["a"]})
+    assert source.mints == {"keep"}
+    assert feed.latest("a") is None and feed.latest("keep") is not None
+    subscription.close()
+
+
+@pytest.mark.asyncio
+async def test_price_service_untracks_cold_mints():
+    """Mints leaving the hot window are untracked on the feed; pinned mints stay."""
+    from sam.utils.price_service import SOL_MINT
+
+    feed = PriceFeed(PollingPriceSource())
+    service = PriceService(hot_window=60)
+    with patch("sam.utils.price_service.get_price_feed", return_value=feed), patch(
+        "sam.utils.price_service.get_session", AsyncMock(side_effect=OSError)
+    ):
+        await service.get_prices([SOL_MINT, "cold", "hot"])
+        assert feed.source.mints == {SOL_MINT, "cold", "hot"}
+
+        service._last_requested["cold"] = time.time() - 120
+        service._last_requested.move_to_end("cold", last=False)
+        service._last_requested[SOL_MINT] = time.time() - 120
+        service._last_requested.move_to_end(SOL_MINT, last=False)
+        await service.get_prices(["hot"])
+
+    assert feed.source.mints == {SOL_MINT, "hot"}
+
+
+@pytest.mark.asyncio
+async def test_price_service_reads_from_feed(tmp_path):
+    """With a feed running, fresh ticks are served without any HTTP fetch."""
+    from sam.utils.price_service import SOL_MINT
+
+    path = tmp_path / "ticks.jsonl"
+    write_ticks(path, [(SOL_MINT, 210.0, time.time()), ("old", 1.0, time.time() - 3600)])
+
+    feed = await start_price_feed(ReplayPriceSource(str(path)))
+    await feed.wait_closed()
+    try:
+        service = PriceService()
+        with patch("sam.utils.price_service.get_session", AsyncMock(side_effect=OSError)):
+            assert await service.get_sol_price_usd() == 210.0
+            # Ticks older than cache_ttl are ignored and the feed is asked to track the mint
+            assert await service.get_prices(["old"]) == {}
+        assert service.get_cache_stats()["feed_hits"] == 1
+        assert "old" in feed.source.mints
+    finally:
+        await cleanup_price_feed()
+
+
+def test_create_price_source():
+    """Sources are selected by URL scheme."""
+    assert create_price_source("") is None
+    assert create_price_source("poll://", interval=2).interval == 2
+    assert create_price_source("wss://prices.example/ws").url == "wss://prices.example/ws"
+    assert create_price_source("replay:///tmp/ticks.jsonl").path == "/tmp/ticks.jsonl"
+    with pytest.raises(ValueError):
+        create_price_source("ftp://nope")
@@ -0,0 +1,81 @@
+import pytest
+import asyncio
+from unittest.mock import patch
+from sam.integrations.jupiter import JupiterTools
+from sam.integrations.pump_fun import PumpFunTools
+from sam.utils.priority_fees import FeeWindow, PriorityFeeEstimator
+from fake_rpc import FakeRPCPool, samples
+
+
+def test_fee_window_rolls_and_skips_seen_slots():
+    window = FeeWindow(4)
+    assert window.add(samples([10, 20, 30])) == 3
+    assert window.add(samples([10, 20, 30])) == 0  # Same slots again
+    assert window.add(samples([40, 50, 60], start_slot=4)) == 3
+    assert sorted(window.fees) == [30, 40, 50, 60]
+    assert window.percentiles["medium"] == 45
+    assert window.percentiles["low"] < window.percentiles["high"] < 60
+
+
+@pytest.mark.asyncio
+async def test_estimates_come_from_one_batched_sample():
+    pool = FakeRPCPool()
+    pool.fees[("pumpfee",)] = samples([1000] * 10)
+    estimator = PriorityFeeEstimator(pool, scopes={"global": [], "pump_fun": ["pumpfee"]})
+    assert estimator.estimate() is None
+    assert estimator.estimate_lamports(200_000, minimum=5000) == 5000
+
+    await estimator.refresh()
+    assert len(pool.batches) == 1 and len(pool.batches[0]) == 2
+    assert estimator.estimate("medium") == pytest.approx(50.5)
+    assert estimator.estimate("very_high") > estimator.estimate("high")
+    assert estimator.estimate(scope="pump_fun") == 1000
+    assert estimator.estimate(scope="unknown") == estimator.estimate()
+
+    # 1000 micro-lamports/CU * 200k CU = 200 lamports; clamped to [minimum, max_lamports]
+    assert estimator.estimate_lamports(200_000, scope="pump_fun") == 200
+    estimator.max_lamports = 100
+    assert estimator.estimate_lamports(200_000, scope="pump_fun") == 100
+    with pytest.raises(ValueError):
+        estimator.estimate("urgent")
+
+
+@pytest.mark.asyncio
+async def test_background_sampling():
+    pool = FakeRPCPool()
+    estimator = PriorityFeeEstimator(pool, scopes={"global": []}, refresh_interval=0.02)
+    estimator.start()
+    await asyncio.sleep(0.05)
+    await estimator.stop()
+    assert len(pool.batches) >= 2
+    assert estimator.get_stats()["slots"] == 100  # Later samples repeated the same slots
+
+
+@pytest.mark.asyncio
+async def test_builders_use_estimated_fees():
+    pool = FakeRPCPool()
+    pool.fees[("pumpfee",)] = samples([500_000] * 10)
+    estimator = PriorityFeeEstimator(pool, scopes={"global": [], "pump_fun": ["pumpfee"]})
+
+    assert PumpFunTools()._priority_fee() == 0.00001
+    jupiter = JupiterTools(fee_estimator=estimator)
+    assert jupiter._priority_fee_config(None) == {"priorityLevel": "medium", "maxLamports": 1000}
+
+    await estimator.refresh()
+    pump = PumpFunTools(fee_estimator=estimator)
+    assert pump._priority_fee() == pytest.approx(0.00005)  # 500k micro-lamports * 100k CU
+    pool.fees[()] = samples([100_000] * 10, start_slot=200)
+    await estimator.refresh()
+    estimator.level = "very_high"
+    assert jupiter._priority_fee_config(None) == {"priorityLevel": "veryHigh", "maxLamports": 30000}
+    assert jupiter._priority_fee_config(2500)["maxLamports"] == 2500
+
+    captured = {}
+
+    async def fetch(payload):
+        captured.update(payload)
+        return {"error": "stop"}
+
+    with patch.object(pump, "_fetch_trade_transaction", fetch):
+        await pump.create_sell_transaction("11111111111111111111111111111112", "mint")
+    assert captured["priorityFee"] == pytest.approx(0.00005)
@@ -1,4 +1,5 @@
 import pytest
+from dataclasses import dataclass
 from sam.utils.rate_limiter import RateLimiter, RateLimit
 
 
@@ -71,7 +72,7 @@ async def test_rate_limit_enforcement():
     limiter = RateLimiter()
 
     # Create a very restrictive limit for testing
-    test_limit = RateLimit(requests=2, window=60, burst=1)
+    test_limit = RateLimit(requests=2, window=60, burst=2)
     limiter.limits["test"] = test_limit
 
     # First two requests should be allowed
@@ -91,43 +92,24 @@ async def test_rate_limit_enforcement():
 
 @pytest.mark.asyncio
 async def test_rate_limit_cleanup():
-    """Test that old records are cleaned up."""
+    """Test that idle keys (full buckets) are cleaned up."""
     limiter = RateLimiter()
 
     # Make some requests
     await limiter.check_rate_limit("user1", "default")
     await limiter.check_rate_limit("user2", "default")
 
-    # Should have records
-    assert len(limiter.request_history) == 2
+    # Should have state for both keys
+    assert limiter.key_count == 2
 
-    # Manually trigger cleanup logic
+    # Simulate two hours passing: both buckets have refilled
     import time
 
-    current_time = time.time()
-
-    async with limiter.lock:
-        # Simulate old records by backdating them
-        for key in limiter.request_history:
-            for record in limiter.request_history[key]:
-                record.timestamp = current_time - 7200  # 2 hours ago
-
-        # Now clean them up
-        keys_to_remove = []
-        for key, records in limiter.request_history.items():
-            cutoff_time = current_time - 3600  # 1 hour cutoff
-            limiter.request_history[key] = [
-                record for record in records if record.timestamp > cutoff_time
-            ]
-
-            if not limiter.request_history[key]:
-                keys_to_remove.append(key)
-
-        for key in keys_to_remove:
-            del limiter.request_history[key]
+    assert limiter._remove_idle_keys(time.time()) == 0
+    assert limiter._remove_idle_keys(time.time() + 7200) == 2
 
     # Should be cleaned up
-    assert len(limiter.request_history) == 0
+    assert limiter.key_count == 0
 
 
 @pytest.mark.asyncio
@@ -173,7 +155,7 @@ async def test_rate_limit_info():
     default_limit = limiter.limits["default"]
 
     assert info["limit"] == default_limit.requests
-    assert info["remaining"] == default_limit.requests
+    assert info["remaining"] == default_limit.burst
     assert info["used"] == 0
 
     # Make a request and check again
@@ -181,7 +163,7 @@ async def test_rate_limit_info():
     info_after = await limiter.get_rate_limit_info("used_user", "default")
 
     assert info_after["used"] == 1
-    assert info_after["remaining"] == default_limit.requests - 1
+    assert info_after["remaining"] == default_limit.burst - 1
 
 
 @pytest.mark.asyncio
@@ -203,3 +185,322 @@ async def test_rate_limit_reset():
     # Check that it's reset
     info_after = await limiter.get_rate_limit_info("reset_user", "default")
     assert info_after["used"] == 0
+
+
+@pytest.mark.asyncio
+async def test_burst_then_sustained_rate():
+    """A full bucket allows burst requests, then one per emission interval."""
+    limiter = RateLimiter()
+    limiter.limits["test"] = RateLimit(requests=60, window=60, burst=3)
+    limit = limiter.limits["test"]
+
+    results = [limiter._check("k", limit, 1000.0) for _ in range(4)]
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    assert [info["remaining"] for _, info in results[:3]] == [2, 1, 0]
+
+    # Exactly one emission interval (1s) until the next request is allowed
+    assert results[3][1]["retry_after"] == pytest.approx(1.0)
+    assert limiter._check("k", limit, 1000.999)[0] is False
+    assert limiter._check("k", limit, 1001.0)[0] is True
+
+    # Idle for longer than burst * interval: bucket is full again
+    assert [limiter._check("k", limit, 1010.0)[0] for _ in range(4)] == [True, True, True, False]
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_at_max_keys():
+    """New keys beyond max_keys evict the least recently used one."""
+    limiter = RateLimiter(max_keys=3, shards=1)
+    for key in ("a", "b", "c"):
+        await limiter.check_rate_limit(key)
+    await limiter.check_rate_limit("a")
+    await limiter.check_rate_limit("d")
+
+    assert list(limiter._shards[0].states) == ["c", "a", "d"]
+
+
+@pytest.mark.asyncio
+async def test_shards_lock_independently():
+    """A held shard lock only blocks keys that hash to that shard."""
+    import asyncio
+
+    limiter = RateLimiter(shards=8)
+    keys = [f"user{i}" for i in range(64)]
+    busy = limiter._shard(keys[0])
+    other = next(k for k in keys if limiter._shard(k) is not busy)
+    same = next(k for k in keys[1:] if limiter._shard(k) is busy)
+
+    async with busy.lock:
+        allowed, _ = await asyncio.wait_for(limiter.check_rate_limit(other), timeout=1)
+        assert allowed
+        blocked = asyncio.create_task(limiter.check_rate_limit(same))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+    assert (await blocked)[0]
+
+    stats = await limiter.get_stats()
+    assert stats["shards"] == 8
+    assert stats["total_keys"] == 2
+
+
+@pytest.mark.asyncio
+async def test_incremental_cleanup_yields_between_chunks():
+    """Cleanup removes idle keys in bounded chunks while checks keep flowing."""
+    import asyncio
+
+    limiter = RateLimiter(max_keys=100_000, shards=4, cleanup_chunk=100)
+    limit = limiter.limits["default"]
+    for i in range(10_000):
+        limiter._check(f"idle{i}", limit, 0.0)  # Refilled long ago
+    await limiter.check_rate_limit("active")
+
+    sweep = asyncio.create_task(limiter.sweep())
+    await asyncio.sleep(0)
+    allowed, _ = await limiter.check_rate_limit("during-sweep")
+    assert allowed
+    assert not sweep.done()
+
+    assert await sweep == 10_000
+    assert limiter.key_count == 2
+
+    stats = (await limiter.get_stats())["cleanup"]
+    assert stats["sweeps"] == 1
+    assert stats["steps"] >= 10_000 // 100
+    assert stats["keys_removed"] == 10_000
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_in_fifo_order():
+    """Over-quota callers wait their turn instead of being rejected."""
+    import asyncio
+
+    limiter = RateLimiter()
+    limiter.limits["shaped"] = RateLimit(requests=50, window=1, burst=1)
+    order = []
+
+    async def call(i):
+        allowed, info = await limiter.acquire("upstream:test", "shaped", timeout=5)
+        order.append(i)
+        return allowed, info["waited"]
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    results = await asyncio.gather(*(call(i) for i in range(5)))
+
+    assert order == [0, 1, 2, 3, 4]
+    assert all(allowed for allowed, _ in results)
+    # One immediate, then one every 20ms
+    assert loop.time() - started >= 0.08 - 0.005
+    assert results[-1][1] > results[1][1] > 0
+
+    stats = limiter.get_throttle_stats()["upstream:test"]
+    assert stats["max_waiting"] == 5
+    assert stats["waiting"] == 0
+    assert stats["acquired"] == 5
+    assert stats["delayed"] == 4
+
+
+@pytest.mark.asyncio
+async def test_sweep_drops_idle_throttle_queues():
+    """Queues with nobody waiting are dropped by cleanup; busy ones stay."""
+    import asyncio
+
+    limiter = RateLimiter()
+    limiter.limits["slow"] = RateLimit(requests=1, window=60, burst=1)
+    for i in range(50):
+        assert (await limiter.acquire(f"upstream:{i}", "slow", timeout=1))[0]
+    waiter = asyncio.create_task(limiter.acquire("upstream:0", "slow", timeout=120))
+    await asyncio.sleep(0.01)
+
+    await limiter.sweep()
+    assert list(limiter.get_throttle_stats()) == ["upstream:0"]
+    assert (await limiter.get_stats())["cleanup"]["throttles_removed"] == 49
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_acquire_gives_up_at_deadline():
+    """A caller that cannot be admitted before its deadline fails fast."""
+    import asyncio
+
+    limiter = RateLimiter()
+    limiter.limits["slow"] = RateLimit(requests=1, window=60, burst=1)
+    assert (await limiter.acquire("upstream:slow", "slow", timeout=1))[0]
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    allowed, info = await limiter.acquire("upstream:slow", "slow", timeout=1)
+    assert not allowed
+    assert loop.time() - started < 0.5
+    assert info["retry_after"] == pytest.approx(60, abs=1)
+    assert limiter.get_throttle_stats()["upstream:slow"]["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_throttle_decorator_uses_declared_quota():
+    """Integrations declare upstream quotas; the decorator shapes calls to them."""
+    from sam.config.settings import Settings
+    from sam.utils.decorators import throttle
+    from sam.utils.monitoring import MetricsCollector
+    from sam.utils.rate_limiter import declare_upstream_quota, cleanup_rate_limiter
+
+    await cleanup_rate_limiter()
+    upstream = declare_upstream_quota("test_api", requests=1, window=60, burst=2)
+    original = Settings.UPSTREAM_THROTTLING_ENABLED
+    Settings.UPSTREAM_THROTTLING_ENABLED = True
+
+    @throttle(upstream, timeout=0.1)
+    async def call():
+        return {"ok": True}
+
+    try:
+        assert await call() == {"ok": True}
+        assert await call() == {"ok": True}
+        result = await call()
+        assert "busy" in result["error"]
+
+        text = MetricsCollector().render_prometheus()
+        assert 'sam_throttle_acquired_total{upstream="test_api"} 2' in text
+        assert 'sam_throttle_timeouts_total{upstream="test_api"} 1' in text
+    finally:
+        Settings.UPSTREAM_THROTTLING_ENABLED = original
+        await cleanup_rate_limiter()
+
+
+def _shared_store_worker(db_path, attempts):
+    """Worker process: hammer one key through the shared store; returns allowed count."""
+    import asyncio
+    from sam.utils.rate_limit_store import SQLiteRateLimitStore
+    from sam.utils.db_executor import cleanup_sqlite_executors
+
+    async def run():
+        limiter = RateLimiter(store=SQLiteRateLimitStore(db_path))
+        limiter.limits["shared"] = RateLimit(requests=10, window=3600, burst=10)
+        allowed = 0
+        for _ in range(attempts):
+            ok, _ = await limiter.check_rate_limit("wallet", "shared")
+            allowed += ok
+        await limiter.shutdown()
+        await cleanup_sqlite_executors()
+        return allowed
+
+    return asyncio.run(run())
+
+
+@pytest.mark.asyncio
+async def test_shared_store_across_worker_processes():
+    """Several worker processes sharing one store enforce one combined limit."""
+    import asyncio
+    import multiprocessing
+    import os
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "ratelimits.db")
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(4, mp_context=multiprocessing.get_context("spawn")) as pool:
+            counts = await asyncio.gather(
+                *(loop.run_in_executor(pool, _shared_store_worker, db_path, 8) for _ in range(4))
+            )
+
+    # 32 attempts across 4 processes, 10 allowed in total (not 10 per worker)
+    assert sum(counts) == 10
+
+
+@pytest.mark.asyncio
+async def test_shared_store_info_reset_and_sweep():
+    """Info, reset and cleanup operate on the shared table."""
+    import os
+    import tempfile
+    from sam.utils.db_executor import cleanup_sqlite_executors
+    from sam.utils.rate_limit_store import SQLiteRateLimitStore, create_rate_limit_store
+
+    assert create_rate_limit_store("memory://") is None
+    with pytest.raises(ValueError):
+        create_rate_limit_store("redis://localhost")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = SQLiteRateLimitStore(os.path.join(temp_dir, "ratelimits.db"))
+        limiter = RateLimiter(store=store)
+        try:
+            await limiter.check_rate_limit("a")
+            await limiter.check_rate_limit("a")
+            await limiter.check_rate_limit("b")
+            assert (await limiter.get_rate_limit_info("a"))["used"] == 2
+            assert limiter.key_count == 0  # Nothing kept in process memory
+
+            stats = await limiter.get_stats()
+            assert stats["backend"] == "sqlite"
+            assert stats["total_keys"] == 2
+
+            await limiter.reset_rate_limit("a")
+            assert (await limiter.get_rate_limit_info("a"))["used"] == 0
+
+            # Make "b" idle by rewinding its TAT
+            await store._executor.execute("UPDATE rate_limits SET tat = 0")
+            assert await limiter.sweep() == 1
+            assert await store.count() == 0
+        finally:
+            await limiter.shutdown()
+            await cleanup_sqlite_executors()
+
+
+@dataclass
+class _Record:
+    timestamp: float
+    key: str
+
+
+class _SlidingWindowLimiter:
+    """Previous implementation: a list of records per key, rebuilt on every check."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.history = {}
+
+    def check(self, key, now):
+        limit = self.limit
+        window_start = now - limit.window
+        records = [r for r in self.history.get(key, []) if r.timestamp > window_start]
+        self.history[key] = records
+        if len(records) < limit.requests:
+            records.append(_Record(now, key))
+            return True, {"allowed": True, "remaining": limit.requests - len(records)}
+        oldest = min(records, key=lambda r: r.timestamp)
+        return False, {"allowed": False, "retry_after": oldest.timestamp + limit.window - now}
+
+
+@pytest.mark.performance
+@pytest.mark.asyncio
+async def test_memory_against_sliding_window():
+    """100k keys: GCRA keeps less state than the sliding window."""
+    import sys
+
+    keys = [f"user{i}" for i in range(100_000)]
+    limit = RateLimit(requests=60, window=60, burst=60)
+    rounds = 10
+
+    def drive(check):
+        now = 1000.0
+        for _ in range(rounds):
+            for key in keys:
+                check(key, now)
+            now += 1.0
+
+    old = _SlidingWindowLimiter(limit)
+    drive(old.check)
+    old_bytes = sys.getsizeof(old.history) + sum(
+        sys.getsizeof(records) + sum(sys.getsizeof(r) + sys.getsizeof(r.__dict__) for r in records)
+        for records in old.history.values()
+    )
+
+    limiter = RateLimiter(max_keys=2 * len(keys))
+    drive(lambda key, now: limiter._check(key, limit, now))
+    new_bytes = sum(
+        sys.getsizeof(shard.states) + sum(sys.getsizeof(st) for st in shard.states.values())
+        for shard in limiter._shards
+    )
+
+    assert new_bytes < old_bytes
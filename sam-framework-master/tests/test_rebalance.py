@@ -0,0 +1,138 @@
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from sam.integrations.rebalance import RebalanceTools, create_rebalance_tools, plan_rebalance
+from sam.utils.price_service import SOL_MINT
+from sam.utils.tx_pipeline import PendingTransaction
+
+USDC = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+BONK = "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263"
+PRICES = {SOL_MINT: 100.0, USDC: 1.0, BONK: 0.00002}
+
+
+def test_plan_sells_overweight_tokens_straight_into_underweight_ones():
+    holdings = {
+        SOL_MINT: (10 * 10**9, 9),  # $1000
+        BONK: (25_000_000 * 10**5, 5),  # $500
+    }
+    legs, summary = plan_rebalance(holdings, PRICES, {SOL_MINT: 1, USDC: 1, BONK: 0})
+
+    assert summary["total_value_usd"] == 1500
+    assert summary["current_weights"][USDC] == 0
+    assert [(leg.input_mint, leg.output_mint, round(leg.value_usd)) for leg in legs] == [
+        (BONK, USDC, 500),
+        (SOL_MINT, USDC, 250),
+    ]
+    assert legs[0].amount == holdings[BONK][0]  # Sold out completely
+    assert legs[1].amount == int(2.5 * 10**9)
+
+
+def test_plan_tolerance_and_errors():
+    holdings = {SOL_MINT: (10 * 10**9, 9), USDC: (995 * 10**6, 6)}
+    legs, _ = plan_rebalance(holdings, PRICES, {SOL_MINT: 1, USDC: 1}, min_trade_usd=5)
+    assert legs == []  # $2.50 off target is within tolerance
+    legs, _ = plan_rebalance(holdings, PRICES, {SOL_MINT: 1, USDC: 1}, min_trade_usd=1)
+    assert len(legs) == 1 and legs[0].input_mint == SOL_MINT
+
+    with pytest.raises(ValueError, match="No price"):
+        plan_rebalance(holdings, {SOL_MINT: 100.0}, {SOL_MINT: 1, USDC: 1})
+    with pytest.raises(ValueError):
+        plan_rebalance(holdings, PRICES, {SOL_MINT: 0, USDC: 0})
+
+
+class FakeSolana:
+    def __init__(self):
+        self.keypair = object()
+        self.events = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get_balance(self):
+        return {
+            "sol_balance_lamports": 10 * 10**9 + 20_000_000,  # $1000 above the reserve
+            "tokens": [{"mint": BONK, "amount": 25_000_000 * 10**5, "decimals": 5}],
+        }
+
+    async def submit_transaction(self, transaction, last_valid_block_height, **kwargs):
+        self.events.append(("send", transaction))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        pending = PendingTransaction(f"sig-{transaction}", last_valid_block_height)
+
+        def settle():
+            self.in_flight -= 1
+            pending.resolve("confirmed", 10)
+
+        asyncio.get_running_loop().call_later(0.02, settle)
+        return pending
+
+
+class FakeJupiter:
+    def __init__(self, solana):
+        self.solana_tools = solana
+        self.quote_error = None
+
+    async def quote(self, input_mint, output_mint, amount, slippage_bps, cache_ttl=None):
+        self.solana_tools.events.append(("quote", input_mint))
+        await asyncio.sleep(0.01)
+        if self.quote_error:
+            return {"error": self.quote_error}
+        return {"quote": {"inputMint": input_mint}, "output_amount": str(amount * 2)}
+
+    async def sign_swap(self, quote_result):
+        self.solana_tools.events.append(("sign", quote_result["quote"]["inputMint"]))
+        await asyncio.sleep(0.01)
+        return {"transaction": quote_result["quote"]["inputMint"], "last_valid_block_height": 99}
+
+
+@pytest.fixture
+def rebalancer():
+    price_service = MagicMock()
+    price_service.get_prices = AsyncMock(side_effect=lambda mints: dict(PRICES))
+    with patch(
+        "sam.integrations.rebalance.get_price_service", AsyncMock(return_value=price_service)
+    ):
+        solana = FakeSolana()
+        yield RebalanceTools(FakeJupiter(solana), max_in_flight=1), solana
+
+
+@pytest.mark.asyncio
+async def test_every_leg_is_signed_before_any_is_sent(rebalancer):
+    tools, solana = rebalancer
+    result = await tools.rebalance({"SOL": 1, USDC: 1, BONK: 0})
+
+    assert result["success"] and result["confirmed"] == 2
+    kinds = [kind for kind, _ in solana.events]
+    assert kinds == ["quote", "quote", "sign", "sign", "send", "send"]
+    assert solana.max_in_flight == 1  # Second leg waited for the first to confirm
+    assert [leg["status"] for leg in result["legs"]] == ["confirmed", "confirmed"]
+    assert result["legs"][0]["signature"] == f"sig-{BONK}"
+    assert result["legs"][1]["expected_output_amount"] == str(int(2.5 * 10**9) * 2)
+
+
+@pytest.mark.asyncio
+async def test_dry_run_and_quote_failures_send_nothing(rebalancer):
+    tools, solana = rebalancer
+    planned = await tools.rebalance({"SOL": 1, USDC: 1, BONK: 0}, dry_run=True)
+    assert planned["dry_run"] and len(planned["legs"]) == 2
+
+    tools.jupiter_tools.quote_error = "no route"
+    failed = await tools.rebalance({"SOL": 1, USDC: 1, BONK: 0})
+    assert "nothing was sent" in failed["error"] and len(failed["details"]) == 2
+    assert not any(kind in ("sign", "send") for kind, _ in solana.events)
+
+    assert "error" in await tools.rebalance({"SOL": 1})
+
+
+@pytest.mark.asyncio
+async def test_rebalance_tool_validates_and_invalidates_balance_cache(rebalancer):
+    tools, _ = rebalancer
+    agent = MagicMock()
+    handler = create_rebalance_tools(tools, agent=agent)[0].handler
+
+    result = await handler({"targets": {"SOL": 0.5, USDC: 0.5, BONK: 0}, "slippage_bps": 100})
+    assert result["success"]
+    agent.invalidate_balance_cache.assert_called_once()
+
+    with pytest.raises(ValueError):
+        await handler({"targets": {"not-a-mint": 1}})
@@ -0,0 +1,193 @@
+import pytest
+import asyncio
+import os
+import tempfile
+from sam.core.memory import MemoryManager
+from sam.core.retention import RetentionEngine, RetentionPolicy
+from sam.core.storage import cleanup_storage_backends
+from sam.utils.db_executor import cleanup_sqlite_executors, get_sqlite_executor
+from sam.utils.error_handling import ErrorTracker
+
+
+@pytest.fixture
+async def memory():
+    """Memory manager on a fresh database with old and new trades."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        memory = MemoryManager(os.path.join(temp_dir, "retention.db"))
+        await memory.initialize()
+
+        old = [
+            {
+                "user_id": "u1",
+                "token_address": f"old{i}",
+                "action": "buy",
+                "amount": 1.0,
+                "timestamp": "2000-01-01T00:00:00",
+            }
+            for i in range(1050)
+        ]
+        await memory.save_trade_history_batch(old)
+        await memory.save_trade_history("u1", "fresh", "sell", 2.0)
+
+        yield memory
+
+        await cleanup_storage_backends()
+        await cleanup_sqlite_executors()
+
+
+@pytest.mark.asyncio
+async def test_chunked_cleanup_counts_all_rows(memory):
+    """Chunked deletes remove every expired row and keep recent ones."""
+    chunks = []
+    deleted = await memory.purge_expired(
+        "trades", "2001-01-01T00:00:00", chunk_size=100, on_chunk=chunks.append
+    )
+
+    assert deleted == 1050
+    assert chunks == [100] * 10 + [50]
+    history = await memory.get_trade_history("u1")
+    assert [t["token_address"] for t in history] == ["fresh"]
+
+
+@pytest.mark.asyncio
+async def test_chunks_let_other_writers_in(memory):
+    """Writes issued during a purge complete before the purge does."""
+    engine = RetentionEngine(
+        memory, policies=[RetentionPolicy("trades", 1)], chunk_size=50, chunk_pause=0.01
+    )
+    purge = asyncio.create_task(engine.purge(engine.policies[0]))
+    await asyncio.sleep(0.02)
+
+    await memory.save_session("live", [{"role": "user", "content": "hi"}])
+    assert not purge.done()
+
+    assert await purge == 1050
+    assert engine.get_stats()["tables"]["trades"]["chunks"] == 22
+
+
+@pytest.mark.asyncio
+async def test_run_once_reclaims_pages_and_checkpoints(memory):
+    """A run purges, releases free pages incrementally and truncates the WAL."""
+    assert await memory.db.get_auto_vacuum_mode() == 2
+
+    engine = RetentionEngine(memory, chunk_size=200, chunk_pause=0, vacuum_pages=0)
+    result = await engine.run_once()
+
+    assert result["deleted"] == {"sessions": 0, "trades": 1050}
+    assert result["vacuum"]["pages_freed"] > 0
+    assert result["vacuum"]["free_pages"] == 0
+    assert result["checkpoint"]["busy"] == 0
+    assert os.path.getsize(memory.db_path + "-wal") == 0
+
+    stats = engine.get_stats()
+    assert stats["runs"] == 1
+    assert stats["rows_deleted"] == 1050
+    assert stats["checkpoints"] == 1
+    assert stats["pages_freed"] == result["vacuum"]["pages_freed"]
+
+
+@pytest.mark.asyncio
+async def test_scheduler_runs_in_background(memory):
+    """The scheduler runs retention and checkpoints on its own and stops cleanly."""
+    engine = RetentionEngine(
+        memory, chunk_size=500, chunk_pause=0, interval=0.05, checkpoint_interval=0.02
+    )
+    engine.start()
+    assert engine.running
+
+    for _ in range(100):
+        if engine.stats.runs:
+            break
+        await asyncio.sleep(0.02)
+
+    await engine.stop()
+    assert not engine.running
+    assert engine.stats.runs >= 1
+    assert engine.stats.checkpoints >= 2
+    assert engine.stats.rows_deleted == 1050
+
+
+@pytest.mark.asyncio
+async def test_run_once_purges_errors(memory):
+    """With an error tracker, scheduled runs purge its errors table too."""
+    tracker = ErrorTracker(os.path.join(os.path.dirname(memory.db_path), "errors.db"))
+    await tracker.initialize()
+    await tracker.log_error(ValueError("fresh"), "test")
+    db = get_sqlite_executor(tracker.db_path)
+    await db.executemany(
+        "INSERT INTO errors (timestamp, error_type, error_message, severity, component) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [("2000-01-01T00:00:00", "ValueError", "old", "low", "test")] * 120,
+    )
+
+    engine = RetentionEngine(memory, chunk_size=50, chunk_pause=0, error_tracker=tracker)
+    result = await engine.run_once()
+
+    assert result["deleted"] == {"sessions": 0, "trades": 1050, "errors": 120}
+    assert engine.get_stats()["tables"]["errors"]["chunks"] == 3
+    assert await db.fetchall("SELECT error_message FROM errors") == [("fresh",)]
+
+
+@pytest.mark.asyncio
+async def test_enable_incremental_vacuum_on_legacy_file():
+    """Files created without auto_vacuum are converted on request."""
+    import sqlite3
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "legacy.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE legacy (x INTEGER)")
+        conn.commit()
+        conn.close()
+
+        memory = MemoryManager(db_path)
+        await memory.initialize()
+        assert await memory.db.get_auto_vacuum_mode() == 0
+
+        assert await memory.backend.enable_incremental_vacuum() is True
+        assert await memory.db.get_auto_vacuum_mode() == 2
+        assert await memory.backend.enable_incremental_vacuum() is False
+
+        await cleanup_storage_backends()
+        await cleanup_sqlite_executors()
+
+
+@pytest.mark.asyncio
+async def test_full_vacuum_maintenance_vacuums_once_when_switching(tmp_path):
+    """Switching a legacy file already rewrote it; the full vacuum is not repeated."""
+    import sqlite3
+    from unittest.mock import AsyncMock, patch
+    from sam.cli import run_maintenance
+    from sam.config.settings import Settings
+    from sam.utils.db_executor import SQLiteExecutor
+
+    db_path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE legacy (x INTEGER)")
+    conn.commit()
+    conn.close()
+    tracker = ErrorTracker(str(tmp_path / "errors.db"))
+    await tracker.initialize()
+
+    vacuum = SQLiteExecutor.vacuum
+    calls = []
+
+    async def counting_vacuum(self):
+        calls.append(self.db_path)
+        await vacuum(self)
+
+    try:
+        with patch.object(Settings, "SAM_DB_PATH", db_path), patch.object(
+            Settings, "SAM_DB_URL", None
+        ), patch("sam.cli.get_error_tracker", AsyncMock(return_value=tracker)), patch.object(
+            SQLiteExecutor, "vacuum", counting_vacuum
+        ):
+            assert await run_maintenance(full_vacuum=True) == 0
+            assert calls == [db_path]
+
+            # Already incremental: the full vacuum runs on its own
+            assert await run_maintenance(full_vacuum=True) == 0
+            assert calls == [db_path, db_path]
+    finally:
+        await cleanup_storage_backends()
+        await cleanup_sqlite_executors()
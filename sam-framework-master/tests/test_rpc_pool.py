@@ -0,0 +1,199 @@
+import pytest
+import asyncio
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from unittest.mock import AsyncMock, patch
+from sam.utils.rpc_pool import RPCError, RPCPool
+
+
+class Node:
+    """Local JSON-RPC endpoint with configurable latency and failure modes."""
+
+    def __init__(self, name, delay=0.0, status=200, rpc_error=None, batching=True, html=False):
+        self.name = name
+        self.html = html
+        self.delay = delay
+        self.status = status
+        self.rpc_error = rpc_error
+        self.batching = batching
+        self.methods = []
+        self.in_flight = 0
+        self.peak = 0
+
+    def answer(self, call):
+        self.methods.append(call["method"])
+        if self.rpc_error:
+            return {"jsonrpc": "2.0", "id": call["id"], "error": self.rpc_error}
+        if call["method"] == "sendTransaction":
+            result = "sig-from-" + self.name
+        else:
+            result = self.name
+        return {"jsonrpc": "2.0", "id": call["id"], "result": result}
+
+    async def handle(self, request):
+        body = await request.json()
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if self.status != 200:
+            return web.Response(status=self.status, headers={"Retry-After": "30"})
+        if self.html:
+            return web.Response(text="<html>502 Bad Gateway</html>", content_type="text/html")
+        if isinstance(body, list):
+            if not self.batching:
+                return web.Response(status=400, text="batch requests are not supported")
+            return web.json_response([self.answer(call) for call in body])
+        return web.json_response(self.answer(body))
+
+
+@pytest.fixture
+async def nodes():
+    async def start(name, **kwargs):
+        node = Node(name, **kwargs)
+        app = web.Application()
+        app.router.add_post("/", node.handle)
+        server = TestServer(app)
+        await server.start_server()
+        servers.append(server)
+        return node, str(server.make_url("/"))
+
+    servers = []
+    async with aiohttp.ClientSession() as session:
+        with patch("sam.utils.rpc_pool.get_session", AsyncMock(return_value=session)):
+            yield start
+    for server in servers:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_routes_to_lowest_latency_endpoint(nodes):
+    """After probing each endpoint once, reads go to the fastest one."""
+    slow, slow_url = await nodes("slow", delay=0.05)
+    fast, fast_url = await nodes("fast")
+    pool = RPCPool([slow_url, fast_url])
+
+    assert await pool.request("getSlot") == "slow"  # Untried endpoints are probed in order
+    assert await pool.request("getSlot") == "fast"
+    results = [await pool.request("getSlot") for _ in range(5)]
+
+    assert results == ["fast"] * 5
+    assert len(slow.methods) == 1
+    assert pool.ranked()[0].url == fast_url
+
+
+@pytest.mark.asyncio
+async def test_fails_over_and_benches_unhealthy_endpoints(nodes):
+    """HTTP 503 fails over; repeated failures bench the endpoint."""
+    broken, broken_url = await nodes("broken", status=503)
+    backup, backup_url = await nodes("backup", delay=0.01)
+    pool = RPCPool([broken_url, backup_url], failure_threshold=2, cooldown=30)
+    pool.endpoints[1].latency = 1.0  # Make the broken endpoint look better at first
+
+    assert await pool.request("getSlot") == "backup"
+    pool.endpoints[0].latency = 0.0
+    assert await pool.request("getSlot") == "backup"
+
+    stats = pool.get_stats()
+    assert stats["failovers"] == 2
+    assert not stats["endpoints"][broken_url]["healthy"]
+    assert stats["endpoints"][broken_url]["failures"] == 2
+
+    # Benched endpoints are skipped entirely
+    await pool.request("getSlot")
+    assert pool.get_stats()["endpoints"][broken_url]["requests"] == 2
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_endpoint_honours_retry_after(nodes):
+    limited, limited_url = await nodes("limited", status=429)
+    _, other_url = await nodes("other")
+    pool = RPCPool([limited_url, other_url])
+
+    assert await pool.request("getSlot") == "other"
+    assert pool.get_stats()["endpoints"][limited_url]["cooldown_remaining"] > 25
+
+
+@pytest.mark.asyncio
+async def test_non_json_body_fails_over(nodes):
+    """An HTML page served with 200 scores the endpoint down like a transport error."""
+    gateway, gateway_url = await nodes("gateway", html=True)
+    _, ok_url = await nodes("ok")
+    pool = RPCPool([gateway_url, ok_url])
+
+    assert await pool.request("getSlot") == "ok"
+    stats = pool.get_stats()
+    assert stats["failovers"] == 1
+    assert stats["endpoints"][gateway_url]["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_retryable_rpc_errors_fail_over_but_others_raise(nodes):
+    behind, behind_url = await nodes("behind", rpc_error={"code": -32005, "message": "behind"})
+    _, ok_url = await nodes("ok")
+    pool = RPCPool([behind_url, ok_url])
+    assert await pool.request("getSlot") == "ok"
+
+    bad, bad_url = await nodes("bad", rpc_error={"code": -32602, "message": "invalid params"})
+    pool = RPCPool([bad_url, ok_url])
+    with pytest.raises(RPCError, match="invalid params"):
+        await pool.request("getSlot")
+
+
+@pytest.mark.asyncio
+async def test_per_endpoint_concurrency_cap(nodes):
+    node, url = await nodes("only", delay=0.05)
+    pool = RPCPool([url], max_concurrency=3)
+
+    results = await asyncio.gather(*(pool.request("getSlot") for _ in range(10)))
+
+    assert results == ["only"] * 10
+    assert node.peak == 3
+
+
+@pytest.mark.asyncio
+async def test_send_transaction_is_sticky_for_confirmation(nodes):
+    """Status polls for a signature go to the endpoint that accepted the transaction."""
+    first, first_url = await nodes("first", delay=0.02)
+    second, second_url = await nodes("second")
+    pool = RPCPool([first_url, second_url])
+
+    signature = await pool.send_transaction("AAAA", "sig")
+    assert signature == "sig-from-first"
+    await pool.request("getSlot")  # Probes the second, faster endpoint
+    assert pool.ranked()[0].url == second_url
+
+    for _ in range(3):
+        assert await pool.request("getSignatureStatuses", [["sig"]], sticky_key="sig") == "first"
+    assert second.methods.count("getSignatureStatuses") == 0
+    assert pool.get_stats()["sticky_hits"] == 3
+
+
+@pytest.mark.asyncio
+async def test_send_transaction_does_not_rebroadcast_after_delivery(nodes):
+    """A transaction that reached a node is never sent to a second one."""
+    broken, broken_url = await nodes("broken", status=502)
+    other, other_url = await nodes("other")
+    pool = RPCPool([broken_url, other_url])
+
+    with pytest.raises(RPCError):
+        await pool.send_transaction("AAAA", "sig")
+    assert "sendTransaction" not in other.methods
+
+
+@pytest.mark.asyncio
+async def test_batch_falls_back_when_endpoint_rejects_batches(nodes):
+    node, url = await nodes("single", batching=False)
+    pool = RPCPool([url])
+
+    calls = [("getSlot", None), ("getBalance", ["x"]), ("getEpochInfo", None)]
+    assert await pool.batch(calls) == ["single"] * 3
+    assert pool.endpoints[0].supports_batch is False
+
+    # Later batches skip the rejected attempt
+    node.methods.clear()
+    assert await pool.batch(calls) == ["single"] * 3
+    assert sorted(node.methods) == ["getBalance", "getEpochInfo", "getSlot"]
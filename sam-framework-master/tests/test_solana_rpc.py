@@ -0,0 +1,272 @@
+import pytest
+import asyncio
+import time
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from unittest.mock import AsyncMock, MagicMock, patch
+from sam.integrations.solana.solana_tools import (
+    SolanaTools,
+    TOKEN_2022_PROGRAM_ID,
+    TOKEN_PROGRAM_ID,
+)
+from sam.utils.price_service import PriceService, SOL_MINT
+
+WALLET = "11111111111111111111111111111112"
+
+
+def token_account(mint, amount, decimals=6):
+    return {
+        "pubkey": f"{mint}-account",
+        "account": {
+            "data": {
+                "parsed": {
+                    "info": {
+                        "mint": mint,
+                        "tokenAmount": {
+                            "amount": str(amount),
+                            "decimals": decimals,
+                            "uiAmount": amount / 10**decimals,
+                        },
+                    }
+                }
+            }
+        }
+    }
+
+
+class RPCNode:
+    """Local JSON-RPC endpoint; counts HTTP requests and optionally rejects batches."""
+
+    def __init__(self, delay=0.0, batching=True):
+        self.delay = delay
+        self.batching = batching
+        self.posts = 0
+        self.accounts = {
+            TOKEN_PROGRAM_ID: [token_account("spl", 5_000_000), token_account("empty", 0)],
+            TOKEN_2022_PROGRAM_ID: [token_account("t22", 2_500_000)],
+        }
+
+    def answer(self, call):
+        if call["method"] == "getBalance":
+            result = {"context": {"slot": 1}, "value": 2_000_000_000}
+        elif call["method"] == "getAssetBatch":
+            result = [
+                {"id": mint, "content": {"metadata": {"name": mint.upper(), "symbol": mint}}}
+                for mint in call["params"]["ids"]
+            ]
+        else:
+            program = call["params"][1]["programId"]
+            result = {"context": {"slot": 1}, "value": self.accounts[program]}
+        return {"jsonrpc": "2.0", "id": call["id"], "result": result}
+
+    async def handle(self, request):
+        self.posts += 1
+        body = await request.json()
+        await asyncio.sleep(self.delay)
+        if isinstance(body, list):
+            if not self.batching:
+                return web.json_response(
+                    {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "no batch"}}
+                )
+            return web.json_response([self.answer(call) for call in body])
+        return web.json_response(self.answer(body))
+
+
+@pytest.fixture
+async def rpc():
+    async def start(**kwargs):
+        node = RPCNode(**kwargs)
+        app = web.Application()
+        app.router.add_post("/", node.handle)
+        server = TestServer(app)
+        await server.start_server()
+        servers.append(server)
+        return node, str(server.make_url("/"))
+
+    servers = []
+    async with aiohttp.ClientSession() as session:
+        with patch(
+            "sam.utils.rpc_pool.get_session", AsyncMock(return_value=session)
+        ):
+            yield start
+    for server in servers:
+        await server.close()
+
+
+def price_session(delay=0.0):
+    """Fake market_data session pricing every requested mint at 2 USD (SOL at 100)."""
+    requested = []
+
+    class _Response:
+        status = 200
+
+        def __init__(self, ids):
+            self.ids = ids
+
+        async def __aenter__(self):
+            await asyncio.sleep(delay)
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def json(self):
+            return {
+                "data": {m: {"price": 100.0 if m == SOL_MINT else 2.0} for m in self.ids}
+            }
+
+    def get(url, params=None, **kwargs):
+        ids = params["ids"].split(",")
+        requested.extend(ids)
+        return _Response(ids)
+
+    session = MagicMock()
+    session.get = get
+    return session, requested
+
+
+@pytest.mark.asyncio
+async def test_get_balance_is_one_batched_round_trip(rpc):
+    """SOL, SPL Token and Token-2022 balances come from a single batch POST."""
+    node, url = await rpc()
+    tools = SolanaTools(url)
+    session, requested = price_session()
+
+    with (
+        patch("sam.utils.price_service.get_session", AsyncMock(return_value=session)),
+        patch(
+            "sam.integrations.solana.solana_tools.get_price_service",
+            AsyncMock(return_value=PriceService()),
+        ),
+    ):
+        result = await tools.get_balance(WALLET)
+        assert node.posts == 2  # Balance batch + getAssetBatch for the unseen mints
+        await tools.get_balance(WALLET)
+    await tools.close()
+
+    assert node.posts == 3  # Names now come from the metadata cache
+    assert result["sol_balance"] == 2.0
+    assert [t["symbol"] for t in result["tokens"]] == ["spl", "t22"]
+    assert [(t["mint"], t["program"]) for t in result["tokens"]] == [
+        ("spl", "spl-token"),
+        ("t22", "token-2022"),
+    ]
+    assert result["tokens_usd"] == pytest.approx(5.0 * 2 + 2.5 * 2)
+    assert result["total_portfolio_usd"] == pytest.approx(200.0 + 15.0)
+    assert SOL_MINT in requested
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_concurrent_calls_without_batch_support(rpc):
+    """Endpoints that reject batches still get all three calls, concurrently."""
+    node, url = await rpc(batching=False, delay=0.1)
+    tools = SolanaTools(url)
+    session, _ = price_session()
+
+    with (
+        patch("sam.utils.price_service.get_session", AsyncMock(return_value=session)),
+        patch(
+            "sam.integrations.solana.solana_tools.get_price_service",
+            AsyncMock(return_value=PriceService()),
+        ),
+    ):
+        started = time.monotonic()
+        result = await tools.get_balance(WALLET)
+        elapsed = time.monotonic() - started
+    await tools.close()
+
+    assert node.posts == 5  # Rejected batch + three single calls + token names
+    assert result["token_count"] == 2
+    # Batch attempt, one concurrent round, names alongside prices; not five sequential calls
+    assert elapsed < 0.45
+
+
+@pytest.mark.asyncio
+async def test_prices_are_fetched_alongside_the_rpc(rpc):
+    """Known mints are priced while the RPC batch is in flight."""
+    node, url = await rpc(delay=0.2)
+    tools = SolanaTools(url)
+    session, requested = price_session(delay=0.2)
+
+    with patch("sam.utils.price_service.get_session", AsyncMock(return_value=session)):
+        with patch(
+            "sam.integrations.solana.solana_tools.get_price_service",
+            AsyncMock(return_value=PriceService()),
+        ):
+            await tools.get_balance(WALLET)
+
+        requested.clear()
+        with patch(
+            "sam.integrations.solana.solana_tools.get_price_service",
+            AsyncMock(return_value=PriceService()),
+        ):
+            started = time.monotonic()
+            result = await tools.get_balance(WALLET)
+            elapsed = time.monotonic() - started
+    await tools.close()
+
+    assert set(requested) == {SOL_MINT, "spl", "t22"}
+    assert result["tokens_usd"] == pytest.approx(15.0)
+    assert elapsed < 0.35  # RPC and pricing overlap
+
+
+@pytest.mark.asyncio
+async def test_rpc_errors_are_reported(rpc):
+    """A JSON-RPC error for any call in the batch fails the balance check."""
+    node, url = await rpc()
+    node.answer = lambda call: {"jsonrpc": "2.0", "id": call["id"], "error": {"message": "boom"}}
+    tools = SolanaTools(url)
+    session, _ = price_session()
+
+    with (
+        patch("sam.utils.price_service.get_session", AsyncMock(return_value=session)),
+        patch(
+            "sam.integrations.solana.solana_tools.get_price_service",
+            AsyncMock(return_value=PriceService()),
+        ),
+    ):
+        result = await tools.get_balance(WALLET)
+    await tools.close()
+
+    assert "error" in result
+
+
+@pytest.mark.asyncio
+async def test_token_accounts_share_the_pooled_session(rpc):
+    """Token accounts for both programs come from one batch on the shared session."""
+    node, url = await rpc()
+    tools = SolanaTools(url)
+    assert not hasattr(tools, "client")  # No private HTTP client alongside the pool
+
+    result = await tools.get_token_accounts(WALLET)
+    await tools.close()
+
+    assert node.posts == 1
+    assert [(a["account"], a["program"]) for a in result["token_accounts"]] == [
+        ("spl-account", "spl-token"),
+        ("empty-account", "spl-token"),
+        ("t22-account", "token-2022"),
+    ]
+    assert result["token_accounts"][0]["uiAmount"] == 5.0
+
+
+@pytest.mark.asyncio
+async def test_known_mints_are_bounded(rpc):
+    """Mints are remembered for the most recently queried addresses only."""
+    node, url = await rpc()
+    tools = SolanaTools(url)
+    session, _ = price_session()
+    other = "11111111111111111111111111111113"
+
+    with patch("sam.utils.price_service.get_session", AsyncMock(return_value=session)):
+        with patch(
+            "sam.integrations.solana.solana_tools.get_price_service",
+            AsyncMock(return_value=PriceService()),
+        ), patch("sam.integrations.solana.solana_tools.MAX_KNOWN_ADDRESSES", 1):
+            await tools.get_balance(WALLET)
+            await tools.get_balance(other)
+    await tools.close()
+
+    assert list(tools._known_mints) == [other]
+    assert set(tools._known_mints[other]) == {"spl", "t22"}
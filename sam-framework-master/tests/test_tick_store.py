@@ -0,0 +1,160 @@
+import pytest
+import asyncio
+import time
+import numpy as np
+from unittest.mock import AsyncMock, MagicMock, patch
+from sam.utils.price_feed import PriceFeed, PriceTick
+from sam.utils.tick_store import (
+    TICK_DTYPE,
+    TickBuffer,
+    TickStore,
+    cleanup_tick_store,
+    configure_tick_store,
+    get_tick_store,
+    resample_ohlcv,
+)
+
+
+def make_ticks(rows):
+    return np.array(rows, dtype=TICK_DTYPE)
+
+
+def test_resample_ohlcv():
+    """Ticks are bucketed on interval boundaries with correct OHLCV values."""
+    ticks = make_ticks(
+        [(0, 10, 1), (10, 12, 2), (59, 9, 1), (60, 11, 5), (130, 15, 1), (179, 14, 1)]
+    )
+    candles = resample_ohlcv(ticks, "1m")
+
+    assert candles["ts"].tolist() == [0, 60, 120]
+    assert candles["open"].tolist() == [10, 11, 15]
+    assert candles["high"].tolist() == [12, 11, 15]
+    assert candles["low"].tolist() == [9, 11, 14]
+    assert candles["close"].tolist() == [9, 11, 14]
+    assert candles["volume"].tolist() == [4, 5, 2]
+    assert candles["ticks"].tolist() == [3, 1, 2]
+
+    five = resample_ohlcv(ticks, "5m")
+    assert len(five) == 1 and five[0]["high"] == 15 and five[0]["close"] == 14
+    assert len(resample_ohlcv(ticks[:0], "1h")) == 0
+    with pytest.raises(ValueError):
+        resample_ohlcv(ticks, "7m")
+
+
+def test_ring_buffer_is_bounded_and_ordered():
+    """The buffer keeps only the newest capacity ticks, returned oldest first."""
+    buffer = TickBuffer(4)
+    for i in range(6):
+        buffer.append(i, 100 + i)
+    assert buffer.count == 4
+    assert buffer.ordered()["ts"].tolist() == [2, 3, 4, 5]
+    assert buffer.last()["price"] == 105
+
+    buffer.extend(make_ticks([(6, 1, 0), (7, 1, 0), (8, 1, 0)]))
+    assert buffer.ordered()["ts"].tolist() == [5, 6, 7, 8]
+    buffer.extend(make_ticks([(i, 1, 0) for i in range(9, 20)]))
+    assert buffer.ordered()["ts"].tolist() == [16, 17, 18, 19]
+    assert buffer.data.nbytes == 4 * 24
+
+
+def test_store_memory_and_symbol_bounds():
+    """Memory is fixed per symbol and the least recently updated symbol is dropped."""
+    store = TickStore(capacity=100, max_symbols=2)
+    store.add("a", 1.0, ts=1)
+    store.add("b", 2.0, ts=1)
+    store.add("a", 1.5, ts=2)
+    store.add("c", 3.0, ts=1)
+
+    assert store.symbols() == ["a", "c"]
+    stats = store.get_stats()
+    assert stats["memory_bytes"] == 2 * 100 * 24
+    assert stats["evicted_symbols"] == 1
+    assert store.latest("a") == {"ts": 2.0, "price": 1.5, "volume": 0.0}
+    assert store.latest("b") is None
+
+
+def test_candles_since_and_limit():
+    """since filters ticks before resampling; limit keeps the newest candles."""
+    store = TickStore(capacity=1000)
+    ts = np.arange(0, 3600, 10.0)
+    store.add_many("sol", ts, 100 + ts / 100, np.ones(len(ts)))
+
+    assert len(store.candles("sol", "1m")) == 60
+    assert len(store.candles("sol", "5m", since=1800)) == 6
+    last = store.candles_as_dicts("sol", "1h", limit=1)
+    assert last == [
+        {
+            "ts": 0.0,
+            "open": 100.0,
+            "high": 135.9,
+            "low": 100.0,
+            "close": 135.9,
+            "volume": 360.0,
+            "ticks": 360,
+        }
+    ]
+
+
+def test_snapshot_and_restore(tmp_path):
+    """History survives a restart through the memory-mapped snapshot."""
+    path = str(tmp_path / "ticks.npy")
+    store = TickStore(capacity=5)
+    for i in range(7):
+        store.add("a", float(i), ts=float(i))
+    store.add("b", 42.0, volume=3.0, ts=1.0)
+
+    assert store.snapshot(path) == 6
+
+    restored = TickStore(capacity=5)
+    assert restored.restore(path) == 6
+    assert restored.ticks("a")["price"].tolist() == [2.0, 3.0, 4.0, 5.0, 6.0]
+    assert restored.latest("b") == {"ts": 1.0, "price": 42.0, "volume": 3.0}
+
+    smaller = TickStore(capacity=2)
+    smaller.restore(path)
+    assert smaller.ticks("a")["ts"].tolist() == [5.0, 6.0]
+    assert TickStore().restore(str(tmp_path / "missing.npy")) == 0
+
+
+@pytest.mark.asyncio
+async def test_records_feed_and_price_service(tmp_path):
+    """The global store records feed ticks and fetched prices, and snapshots on cleanup."""
+    from sam.utils.price_service import PriceService
+
+    path = str(tmp_path / "ticks.npy")
+    store = configure_tick_store(capacity=10, snapshot_path=path)
+    feed = PriceFeed()
+    store.record_from(feed)
+    feed.publish(PriceTick("a", 1.0, time.time()))
+    feed.publish(PriceTick("a", 2.0, time.time()))
+    for _ in range(10):
+        if store.latest("a") and store.latest("a")["price"] == 2.0:
+            break
+        await asyncio.sleep(0)
+
+    class _Response:
+        status = 200
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def json(self):
+            return {"data": {"b": {"price": 7.0}}}
+
+    session = MagicMock()
+    session.get = MagicMock(return_value=_Response())
+    with patch("sam.utils.price_service.get_session", AsyncMock(return_value=session)):
+        await PriceService().get_prices(["b"])
+
+    assert store.latest("a")["price"] == 2.0
+    assert store.latest("b")["price"] == 7.0
+    assert get_tick_store() is store
+
+    await feed.stop()
+    await cleanup_tick_store()
+    assert get_tick_store() is None
+    assert configure_tick_store(capacity=10, snapshot_path=path).latest("b")["price"] == 7.0
+    await cleanup_tick_store()
@@ -0,0 +1,145 @@
+import pytest
+import asyncio
+from sam.integrations.solana.solana_tools import SolanaTools
+from sam.utils.db_executor import cleanup_sqlite_executors
+from sam.utils.rpc_pool import RPCError
+from sam.utils.token_metadata import TokenMetadataStore, parse_asset
+from fake_rpc import FakeRPCPool, asset
+
+
+@pytest.fixture
+async def executors():
+    yield
+    await cleanup_sqlite_executors()
+
+
+def test_parse_asset_flattens_das_fields():
+    data = parse_asset(asset("bonk"))
+    assert (data["name"], data["symbol"], data["decimals"]) == ("bonk token", "BONK", 6)
+    assert data["image"] == "https://img/bonk.png"
+    assert parse_asset({})["symbol"] == "Unknown"
+
+
+@pytest.mark.asyncio
+async def test_misses_are_batched_and_unknown_mints_negatively_cached():
+    pool = FakeRPCPool()
+    store = TokenMetadataStore(rpc_pool=pool)
+
+    result = await store.get_many(["bonk", "wif", "nope", "bonk"])
+    assert pool.asset_requests == [["bonk", "wif", "nope"]]
+    assert result["wif"]["symbol"] == "WIF"
+    assert result["nope"] is None
+
+    assert (await store.get_many(["bonk", "nope"]))["nope"] is None
+    assert len(pool.asset_requests) == 1
+    stats = store.get_stats()
+    assert (stats["memory_hits"], stats["negative_hits"]) == (1, 1)
+
+    # Negative entries expire so newly created mints show up
+    store.negative_ttl = 0
+    pool.known.add("nope")
+    assert (await store.get("nope"))["symbol"] == "NOPE"
+    assert pool.asset_requests[-1] == ["nope"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_fetch():
+    pool = FakeRPCPool(delay=0.05)
+    store = TokenMetadataStore(rpc_pool=pool)
+
+    results = await asyncio.gather(
+        store.get("bonk"), store.get("bonk"), store.get_many(["bonk", "wif"])
+    )
+
+    assert results[0] == results[1] == results[2]["bonk"]
+    assert sorted(m for call in pool.asset_requests for m in call) == ["bonk", "wif"]
+
+
+@pytest.mark.asyncio
+async def test_persisted_across_stores(tmp_path, executors):
+    """A second store (another session or process) reads SQLite instead of the RPC."""
+    db_path = str(tmp_path / "meta.db")
+    first = FakeRPCPool()
+    await TokenMetadataStore(db_path, rpc_pool=first).get_many(["bonk", "nope"])
+
+    second = FakeRPCPool()
+    store = TokenMetadataStore(db_path, rpc_pool=second)
+    result = await store.get_many(["bonk", "nope"])
+
+    assert second.asset_requests == []
+    assert result["bonk"]["decimals"] == 6
+    assert result["nope"] is None
+    assert store.get_stats()["db_hits"] == 1
+
+    await store.invalidate("bonk")
+    await TokenMetadataStore(db_path, rpc_pool=second).get("bonk")
+    assert second.asset_requests == [["bonk"]]
+
+
+@pytest.mark.asyncio
+async def test_mutable_fields_refresh_and_stale_values_survive_errors():
+    pool = FakeRPCPool()
+    store = TokenMetadataStore(rpc_pool=pool, refresh_interval=3600)
+    assert (await store.get("bonk"))["token_info"]["supply"] == 1000
+
+    pool.supply = 900
+    assert (await store.get("bonk"))["token_info"]["supply"] == 1000  # Still fresh
+
+    store.refresh_interval = 1e-9
+    assert (await store.get("bonk"))["token_info"]["supply"] == 900
+
+    pool.error = RPCError("down", retryable=True)
+    assert (await store.get("bonk"))["token_info"]["supply"] == 900
+    assert store.get_stats()["fetch_errors"] == 1
+
+    with pytest.raises(RPCError):
+        await store.get("wif")  # Nothing cached to fall back on
+
+
+@pytest.mark.asyncio
+async def test_refresh_omitting_a_known_mint_keeps_its_metadata():
+    pool = FakeRPCPool()
+    store = TokenMetadataStore(rpc_pool=pool, refresh_interval=3600, negative_ttl=600)
+    known = await store.get("bonk")
+
+    # Stale, and the next batch leaves it out
+    store._entries["bonk"] = (known, store._entries["bonk"][1] - 3600)
+    pool.known.discard("bonk")
+    assert await store.get("bonk") == known
+    assert len(pool.asset_requests) == 2
+
+    # The omission is retried after negative_ttl, not on every lookup
+    assert await store.get("bonk") == known
+    assert len(pool.asset_requests) == 2
+    store._entries["bonk"] = (known, store._entries["bonk"][1] - 600)
+    await store.get("bonk")
+    assert len(pool.asset_requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_lru_bound_and_non_das_rpc():
+    pool = FakeRPCPool(known=("a", "b", "c"))
+    store = TokenMetadataStore(rpc_pool=pool, max_entries=2)
+    await store.get_many(["a", "b", "c"])
+    assert store.peek("a") is None and store.peek("c") is not None
+
+    pool.error = RPCError("Method not found", code=-32601)
+    with pytest.raises(RPCError):
+        await store.get("x")
+    with pytest.raises(RuntimeError, match="getAssetBatch"):
+        await store.get("y")
+    assert len(pool.asset_requests) == 2  # Not asked again after "method not found"
+
+
+@pytest.mark.asyncio
+async def test_get_token_metadata_uses_store():
+    pool = FakeRPCPool()
+    store = TokenMetadataStore(rpc_pool=pool)
+    tools = SolanaTools("http://127.0.0.1:1", rpc_pool=pool, metadata_store=store)
+
+    result = await tools.get_token_metadata("bonk")
+    assert result["success"] and result["symbol"] == "BONK" and result["mint"] == "bonk"
+    assert "error" in await tools.get_token_metadata("nope")
+    await tools.get_token_metadata("bonk")
+    assert len(pool.asset_requests) == 2
+    await tools.close()
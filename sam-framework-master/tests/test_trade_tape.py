@@ -0,0 +1,229 @@
+import pytest
+import asyncio
+import json
+import time
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from unittest.mock import AsyncMock, patch
+from sam.integrations.pump_fun import PumpFunTools
+from sam.utils.trade_tape import (
+    Trade,
+    TradeTape,
+    TradeTapeStore,
+    WebSocketTradeSource,
+    cleanup_trade_tape,
+    create_trade_source,
+    get_trade_tape,
+    parse_trade_message,
+    start_trade_tape,
+)
+
+
+def trade_event(mint, trader, side, sol, ts=None, signature="sig"):
+    event = {
+        "signature": signature,
+        "mint": mint,
+        "traderPublicKey": trader,
+        "txType": side,
+        "tokenAmount": sol * 1_000_000,
+        "solAmount": sol,
+    }
+    if ts is not None:
+        event["timestamp"] = ts
+    return event
+
+
+def make_trade(trader, is_buy, sol, ts, mint="m"):
+    return Trade(mint, f"sig-{ts}", trader, is_buy, sol, sol * 1000, ts)
+
+
+def test_parse_trade_message():
+    """PumpPortal trade events become trades; acknowledgements are ignored."""
+    trades = parse_trade_message(
+        [trade_event("m", "t1", "buy", 0.5, ts=10), {"message": "Successfully subscribed"}]
+    )
+    assert trades == [Trade("m", "sig", "t1", True, 0.5, 500_000.0, 10.0)]
+    assert parse_trade_message({"txType": "create", "mint": "m"}) == []
+    assert parse_trade_message({"txType": "sell", "solAmount": "x", "mint": "m"}) == []
+    assert parse_trade_message("garbage") == []
+
+
+def test_tape_wraps_and_keeps_running_totals():
+    """Evicted rows leave the totals and the trader table; totals match a full recount."""
+    tape = TradeTape(4)
+    trades = [
+        make_trade("a", True, 1.0, 1),
+        make_trade("b", False, 2.0, 2),
+        make_trade("a", True, 3.0, 3),
+        make_trade("c", True, 4.0, 4),
+        make_trade("d", False, 5.0, 5),
+        make_trade("e", True, 6.0, 6),
+    ]
+    for trade in trades:
+        tape.append(trade)
+
+    assert [t["timestamp"] for t in tape.recent(10)] == [6.0, 5.0, 4.0, 3.0]
+    assert tape.recent(1)[0] == {
+        "signature": "sig-6",
+        "trader": "e",
+        "side": "buy",
+        "sol_amount": 6.0,
+        "token_amount": 6000.0,
+        "timestamp": 6.0,
+    }
+    flow = tape.flow()
+    assert tape.flow(window=100, now=6) == flow | {"window_seconds": 100, "truncated": True}
+    assert (flow["trades"], flow["buys"], flow["sells"]) == (4, 3, 1)
+    assert flow["buy_volume_sol"] == 13.0 and flow["sell_volume_sol"] == 5.0
+    assert flow["buy_sell_ratio"] == 2.6
+    # "b" left the tape; its id was recycled for "e"
+    assert tape.unique_traders == flow["unique_traders"] == 4
+    assert tape._traders == ["a", "e", "c", "d"]
+
+
+def test_tape_flow_window():
+    """A window only counts trades inside it and is not truncated when the tape covers it."""
+    tape = TradeTape(100)
+    for i, (trader, is_buy, sol) in enumerate(
+        [("a", True, 1.0), ("b", True, 2.0), ("a", False, 0.5), ("c", True, 1.0)]
+    ):
+        tape.append(make_trade(trader, is_buy, sol, 100.0 + i * 10))
+
+    flow = tape.flow(window=15, now=130)
+    assert (flow["trades"], flow["buys"], flow["unique_traders"]) == (2, 1, 2)
+    assert flow["net_flow_sol"] == 0.5
+    assert flow["truncated"] is False
+    assert tape.flow(window=1, now=1000)["buy_sell_ratio"] is None
+
+
+@pytest.mark.asyncio
+async def test_store_evicts_least_recently_traded_mint():
+    """Only max_mints tapes are kept."""
+    store = TradeTapeStore(capacity=8, max_mints=2)
+    for mint in ["a", "b", "a", "c"]:
+        store.publish(make_trade("t", True, 1.0, time.time(), mint=mint))
+
+    assert store.tape("b") is None and store.latest("b") is None
+    assert store.tape("a").count == 2
+    stats = store.get_stats()
+    assert (stats["mints"], stats["trades"], stats["evicted_mints"]) == (2, 4, 1)
+
+
+@pytest.mark.asyncio
+async def test_subscriptions_capped_at_max_mints():
+    """Tracking past max_mints unsubscribes the least recently tracked mint."""
+    source = WebSocketTradeSource("ws://unused")
+    source._ws = AsyncMock(closed=False)
+    store = TradeTapeStore(source, max_mints=2)
+    for mint in ["a", "b", "a", "c"]:
+        store.track([mint])
+    await asyncio.gather(*source._sends)
+
+    assert source.mints == {"a", "c"}
+    assert store.tracking("a") and not store.tracking("b")
+    assert source._ws.send_json.await_args_list[-2].args == (
+        {"method": "unsubscribeTokenTrade", "keys": ["b"]},
+    )
+
+
+@pytest.mark.asyncio
+async def test_evicted_tape_unsubscribes_its_mint():
+    """An evicted tape's mint is unsubscribed and its late trades are ignored."""
+    source = WebSocketTradeSource("ws://unused", mints=["a", "b", "c"])
+    source._ws = AsyncMock(closed=False)
+    store = TradeTapeStore(source, max_mints=2)
+    for mint in ["a", "b", "c", "a"]:
+        store.publish(make_trade("t", True, 1.0, time.time(), mint=mint))
+    await asyncio.gather(*source._sends)
+
+    assert source.mints == {"b", "c"}
+    source._ws.send_json.assert_awaited_once_with(
+        {"method": "unsubscribeTokenTrade", "keys": ["a"]}
+    )
+    assert store.tape("a") is None
+    assert store.get_stats()["evicted_mints"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_token_trades_served_from_tape(tmp_path):
+    """Once the tape holds enough trades, trades and flow need no HTTP request."""
+    now = time.time()
+    path = tmp_path / "trades.jsonl"
+    with open(path, "w") as f:
+        for i in range(12):
+            side = "buy" if i % 3 else "sell"
+            f.write(json.dumps(trade_event("m", f"t{i % 4}", side, 0.1, ts=now - 12 + i)) + "\n")
+
+    store = await start_trade_tape(create_trade_source(f"replay://{path}"))
+    await store.wait_closed()
+    try:
+        tools = PumpFunTools()
+        assert tools.trade_tape is get_trade_tape()
+        with patch("sam.integrations.pump_fun.get_session", AsyncMock(side_effect=OSError)):
+            result = await tools.get_token_trades("m", 10)
+            flow = await tools.get_token_flow("m", 60)
+        assert result["source"] == "tape" and result["total_trades"] == 10
+        assert result["trades"][0]["timestamp"] == pytest.approx(now - 1)
+        assert (flow["trades"], flow["buys"], flow["unique_traders"]) == (12, 8, 4)
+
+        # Not enough trades on the tape yet: REST answers and the mint gets subscribed
+        with patch("sam.integrations.pump_fun.get_session", AsyncMock(side_effect=OSError)):
+            fallback = await tools.get_token_trades("other", 5)
+        assert "error" in fallback
+        assert store.tracking("other")
+        assert (await tools.get_token_flow("new"))["trades"] == 0
+        assert store.tracking("new")
+    finally:
+        await cleanup_trade_tape()
+    assert "error" in await PumpFunTools().get_token_flow("m")
+
+
+@pytest.mark.asyncio
+async def test_websocket_source_subscribes_to_token_trades():
+    """Tracked mints are subscribed with subscribeTokenTrade and pushed trades recorded."""
+    subscriptions = []
+
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for msg in ws:
+            message = json.loads(msg.data)
+            subscriptions.append(message)
+            await ws.send_json({"message": "Successfully subscribed to keys."})
+            for mint in message["keys"]:
+                await ws.send_json(trade_event(mint, "trader", "buy", 0.25))
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/api/data", handler)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        async with aiohttp.ClientSession() as session:
+            with patch("sam.utils.price_feed.get_session", AsyncMock(return_value=session)):
+                store = TradeTapeStore(WebSocketTradeSource(str(server.make_url("/api/data"))))
+                subscription = store.subscribe(["a"])
+                store.start()
+                assert (await asyncio.wait_for(subscription.get(), 2)).mint == "a"
+
+                # Subscribing tracks the mint, which sends a new subscription
+                await asyncio.wait_for(store.subscribe(["b"]).get(), 2)
+                await store.stop()
+    finally:
+        await server.close()
+
+    assert subscriptions == [
+        {"method": "subscribeTokenTrade", "keys": ["a"]},
+        {"method": "subscribeTokenTrade", "keys": ["b"]},
+    ]
+    assert store.tape("b").flow()["buy_volume_sol"] == 0.25
+
+
+def test_create_trade_source():
+    """Sources are selected by URL scheme."""
+    assert create_trade_source("") is None
+    assert create_trade_source("wss://pumpportal.fun/api/data").name == "pumpportal"
+    assert create_trade_source("replay:///tmp/trades.jsonl").path == "/tmp/trades.jsonl"
+    with pytest.raises(ValueError):
+        create_trade_source("ftp://nope")
@@ -0,0 +1,237 @@
+import pytest
+import asyncio
+import base58
+import time
+from unittest.mock import patch
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.system_program import transfer, TransferParams
+from solders.transaction import VersionedTransaction
+from sam.integrations.pump_fun import PumpFunTools
+from sam.integrations.solana.solana_tools import SolanaTools
+from sam.utils.rpc_pool import RPCError
+from sam.utils.tx_pipeline import BlockhashCache, MessageTemplate, TransactionPipeline, prepare
+from fake_rpc import FakeRPCPool
+
+RECIPIENT = "11111111111111111111111111111112"
+
+
+def transfer_ix(payer, lamports=1000):
+    return transfer(
+        TransferParams(from_pubkey=payer.pubkey(), to_pubkey=Keypair().pubkey(), lamports=lamports)
+    )
+
+
+@pytest.mark.asyncio
+async def test_blockhash_cache_single_flight_and_expiry():
+    pool = FakeRPCPool(delay=0.02)
+    cache = BlockhashCache(pool, max_age=0.1)
+
+    first, second = await asyncio.gather(cache.get(), cache.get())
+    assert first is second
+    assert pool.calls == ["getLatestBlockhash"]
+    assert (await cache.get()) is first
+    assert cache.get_stats()["hits"] == 1
+
+    await asyncio.sleep(0.12)
+    assert (await cache.get()) is not first
+    cache.invalidate()
+    await cache.get()
+    assert pool.calls.count("getLatestBlockhash") == 3
+
+
+@pytest.mark.asyncio
+async def test_background_refresh_keeps_blockhash_warm():
+    pool = FakeRPCPool()
+    cache = BlockhashCache(pool, refresh_interval=0.02)
+    cache.start()
+    await asyncio.sleep(0.07)
+    fetched = len(pool.calls)
+    await cache.get()
+    await cache.stop()
+
+    assert fetched >= 3
+    assert len(pool.calls) == fetched  # get() was served from the warm cache
+
+
+def test_message_template_matches_a_fresh_compile():
+    payer = Keypair()
+    ix = transfer_ix(payer)
+    blockhash = Hash.new_unique()
+    built = MessageTemplate(payer.pubkey(), [ix]).build(blockhash)
+    assert built == MessageV0.try_compile(payer.pubkey(), [ix], [], blockhash)
+
+
+@pytest.mark.asyncio
+async def test_build_reuses_templates():
+    pipeline = TransactionPipeline(FakeRPCPool())
+    payer = Keypair()
+    ix = transfer_ix(payer)
+
+    tx1, recent = await pipeline.build(payer, [ix])
+    tx2, _ = await pipeline.build(payer, [ix])
+    await pipeline.build(payer, [transfer_ix(payer, 5)])
+
+    assert tx1.message.recent_blockhash == recent.blockhash
+    assert tx1.verify_with_results() == [True]
+    # Identical builds on the same warm blockhash still sign differently
+    assert tx2.message.recent_blockhash == recent.blockhash
+    assert tx2.verify_with_results() == [True]
+    assert tx1.signatures[0] != tx2.signatures[0]
+    assert pipeline.get_stats()["template_hits"] == 1
+    assert pipeline.get_stats()["templates"] == 2
+
+
+def test_identical_builds_on_one_blockhash_get_distinct_signatures():
+    """Sending the same transfer twice must not collapse into one transaction."""
+    payer = Keypair()
+    template = MessageTemplate(payer.pubkey(), [transfer_ix(payer)])
+    blockhash = Hash.new_unique()
+
+    signatures = {
+        VersionedTransaction(template.build(blockhash), [payer]).signatures[0]
+        for _ in range(3)
+    }
+    assert len(signatures) == 3
+    # A new blockhash is distinct on its own and reuses the plain message
+    assert template.build(Hash.new_unique()).instructions == template.message.instructions
+
+
+@pytest.mark.asyncio
+async def test_submit_returns_before_confirmation():
+    pool = FakeRPCPool()
+    pool.status_script = [None, {"slot": 7, "confirmationStatus": "processed", "err": None}]
+    pool.status_script.append({"slot": 8, "confirmationStatus": "confirmed", "err": None})
+    pipeline = TransactionPipeline(pool, poll_interval=0.01)
+    payer = Keypair()
+    tx, recent = await pipeline.build(payer, [transfer_ix(payer)])
+
+    pending = await pipeline.submit(tx, recent.last_valid_block_height)
+    assert pending.status == "submitted"
+    assert pending.signature == str(tx.signatures[0])
+
+    result = await pending.wait(timeout=1)
+    assert result["status"] == "confirmed" and result["slot"] == 8
+    assert pipeline.status(pending.signature)["status"] == "confirmed"
+    await pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_and_expired_transactions():
+    pool = FakeRPCPool()
+    pipeline = TransactionPipeline(pool, poll_interval=0.01)
+    payer = Keypair()
+
+    pool.status_script = [
+        {"slot": 3, "confirmationStatus": "processed", "err": {"InstructionError": 0}}
+    ]
+    tx, recent = await pipeline.build(payer, [transfer_ix(payer)])
+    failed = await (await pipeline.submit(tx, recent.last_valid_block_height)).wait(1)
+    assert failed["status"] == "failed" and "InstructionError" in failed["error"]
+
+    pool.status_script = [None]
+    pool.block_height = 151  # Past lastValidBlockHeight
+    tx, recent = await pipeline.build(payer, [transfer_ix(payer, 2)])
+    expired = await (await pipeline.submit(tx, recent.last_valid_block_height)).wait(1)
+    assert expired["status"] == "expired"
+    assert pipeline.get_stats()["failed"] == pipeline.get_stats()["expired"] == 1
+    await pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_tracked_transactions_are_bounded_while_unconfirmed():
+    """Past max_tracked the oldest pending transaction is dropped and marked expired."""
+    pool = FakeRPCPool()
+    pipeline = TransactionPipeline(pool, poll_interval=10, max_tracked=3)
+    payer = Keypair()
+
+    submitted = []
+    for lamports in range(1, 6):
+        tx, recent = await pipeline.build(payer, [transfer_ix(payer, lamports)])
+        submitted.append(await pipeline.submit(tx, recent.last_valid_block_height))
+
+    assert [p.status for p in submitted] == ["expired"] * 2 + ["submitted"] * 3
+    assert (await submitted[0].wait(0))["error"].startswith("No longer tracked")
+    assert pipeline.status(submitted[0].signature) is None
+    stats = pipeline.get_stats()
+    assert (stats["tracking"], stats["expired"]) == (3, 2)
+
+    # A late result for an evicted transaction is not counted twice
+    pool.statuses[submitted[0].signature] = {"slot": 4, "confirmationStatus": "confirmed"}
+    await pipeline.tracker.poll()
+    assert pipeline.get_stats()["confirmed"] == 0
+    await pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_prepare_runs_steps_concurrently_and_cancels_on_failure():
+    async def step(value, delay=0.05):
+        await asyncio.sleep(delay)
+        return value
+
+    started = time.monotonic()
+    assert await prepare(step(1), step(2), step(3)) == (1, 2, 3)
+    assert time.monotonic() - started < 0.1
+
+    async def boom():
+        raise ValueError("bad")
+
+    slow = asyncio.ensure_future(step(4, delay=1))
+    with pytest.raises(ValueError):
+        await prepare(slow, boom())
+    await asyncio.sleep(0)
+    assert slow.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_transfer_uses_warm_blockhash_and_rebuilds_once_on_rejection():
+    pool = FakeRPCPool()
+    pool.status_script = [None]
+    payer = Keypair()
+    pipeline = TransactionPipeline(pool, poll_interval=10)
+    tools = SolanaTools(
+        "http://127.0.0.1:1",
+        base58.b58encode(bytes(payer)).decode(),
+        rpc_pool=pool,
+        pipeline=pipeline,
+    )
+
+    await pipeline.blockhash.get()  # Warmed by the background refresher in production
+    result = await tools.transfer_sol(RECIPIENT, 0.001)
+    assert result["success"] and result["status"] == "submitted"
+    assert pool.calls == ["getLatestBlockhash", "sendTransaction"]
+
+    pool.send_errors = [RPCError("Transaction simulation failed: Blockhash not found")]
+    result = await tools.transfer_sol(RECIPIENT, 0.002)
+    assert result["success"]
+    assert pool.calls[2:] == ["sendTransaction", "getLatestBlockhash", "sendTransaction"]
+    await tools.close()
+
+
+@pytest.mark.asyncio
+async def test_pump_buy_checks_balance_while_building():
+    """Pre-trade validation overlaps the pump.fun build request."""
+    tools = PumpFunTools()
+
+    async def build(payload):
+        await asyncio.sleep(0.1)
+        return b"unsigned"
+
+    async def failing_check():
+        await asyncio.sleep(0.1)
+        return {"error": True, "message": "insufficient balance"}
+
+    with (
+        patch.object(tools, "_fetch_trade_transaction", build),
+        patch.object(tools, "_sign_and_send_transaction") as sign,
+    ):
+        started = time.monotonic()
+        result = await tools.create_buy_transaction(
+            RECIPIENT, "mint", 0.1, 5, check=failing_check
+        )
+        elapsed = time.monotonic() - started
+
+    assert result["message"] == "insufficient balance"
+    assert not sign.called
+    assert elapsed < 0.18